@@ -0,0 +1,213 @@
+#
+# File:    AttributeStore.py
+# Author:  Alex Stivala
+# Created: October 2026
+#
+# Defines the AttributeStore node attribute storage: typed numpy
+# column arrays for binary, continuous or categorical node attributes,
+# loaded (parsed) lazily only when first used.
+#
+
+import os
+from collections.abc import Mapping
+import numpy as np
+
+from utils import NA_VALUE
+from pajekLoader import open_datafile
+
+# numpy data type for each type of attribute
+ATTR_DTYPES = {'binattr': np.int8, 'contattr': np.float64, 'catattr': np.int32}
+
+
+class AttributeStore(Mapping):
+    """Node attributes of one type (binary, continuous or categorical)
+    stored as a read-only mapping from attribute name to a numpy
+    array of the attribute values indexed by node id, so that e.g. the
+    categorical attribute 'class' for node id 2 is catattr['class'][2]
+    exactly as with the dict of lists previously used for attributes
+    (and so change statistics specified as e.g.
+    partial(changeoOb, "name") work unchanged).
+
+    Binary attributes are int8, continuous float64 and categorical
+    int32 (int64 if values are too large). Missing values (NA) are
+    stored as NA_VALUE (binary and categorical) or NaN (continuous)
+    as before, and also in a separate boolean NA mask for each
+    attribute (see naMask()).
+
+    When constructed from an attributes file, only the header line is
+    read initially, and each attribute (column) is parsed from the
+    file only when it is first used, so only the attributes actually
+    referenced by the model are parsed and stored.
+
+    The format of the attributes files is header line with
+    whitespace-delimited attribute names, followed by (whitespace
+    delimited) attributes one line per node (corresponding to node
+    number order, i.e the node numbers in the Pajek file, 1..N), with
+    "NA" for missing values.
+
+    If the nodes of the network have been reordered (see CSRGraph),
+    the values are stored in the new node order, given by a
+    permutation of the node ids in the attributes file.
+    """
+
+    def __init__(self, attrtype, filename=None, n=None, arrays=None,
+                 permutation=None):
+        """
+        Construct attribute store from an attributes file or from
+        existing arrays.
+
+        Parameters:
+            attrtype - type of attributes: 'binattr', 'contattr' or 'catattr'
+            filename - attributes file as described above, or None to
+                       use arrays instead. Default None.
+            n        - number of nodes (if filename is not None). Each
+                       attribute must have exactly n values.
+            arrays   - dict mapping attribute name to numpy array (or
+                       list) of values with NA as NA_VALUE or NaN (only
+                       if filename = None). The arrays are used without
+                       copying if already of the correct type.
+                       Default None.
+            permutation - numpy array of node ids (in the file or arrays)
+                       in the order the values are to be stored in,
+                       i.e. node k has the values of node permutation[k]
+                       in the file or arrays, or None for no reordering.
+                       Default None.
+        """
+        assert attrtype in ATTR_DTYPES
+        assert (filename is None) != (arrays is None)
+        self.attrtype = attrtype
+        # absolute path, as columns may be loaded after a change of
+        # working directory
+        self.filename = os.path.abspath(filename) if filename is not None else None
+        self.n = n
+        self.permutation = permutation
+        self.columns = None # dict attribute name to column number in file
+        self.values = dict() # dict attribute name to numpy array of values
+        self.na = dict()     # dict attribute name to boolean NA mask array
+
+        if filename is not None:
+            with open_datafile(filename) as f:
+                names = f.readline().split()
+            self.columns = dict([(name, k) for (k, name) in enumerate(names)])
+        else:
+            self.columns = dict([(name, None) for name in arrays.keys()])
+            for (name, values) in arrays.items():
+                values = np.asarray(values)
+                if permutation is not None:
+                    values = values[permutation]
+                if not (values.dtype == ATTR_DTYPES[attrtype] or
+                        (attrtype == 'catattr' and values.dtype == np.int64)):
+                    values = values.astype(ATTR_DTYPES[attrtype])
+                self.values[name] = values
+
+
+    def __getitem__(self, name):
+        """
+        Return numpy array of values of attribute name, parsing it from
+        the file if it has not already been loaded.
+        """
+        if name not in self.values:
+            if name not in self.columns:
+                raise KeyError(name)
+            self.loadColumn(name)
+        return self.values[name]
+
+    def __iter__(self):
+        """
+        Return iterator over attribute names (in file column order)
+        """
+        return iter(self.columns)
+
+    def __len__(self):
+        """
+        Return number of attributes
+        """
+        return len(self.columns)
+
+    def loadColumn(self, name):
+        """
+        Parse the values of attribute name from the attributes file
+
+        Parameters:
+            name - name of attribute (column header in file)
+        """
+        k = self.columns[name]
+        with open_datafile(self.filename) as f:
+            f.readline() # skip header
+            col = np.array([row.split()[k] for row in f if row.strip()])
+        if len(col) != self.n:
+            raise ValueError("attribute " + name + " has " + str(len(col)) +
+                             " values but there are " + str(self.n) +
+                             " nodes in " + self.filename)
+        na = col == "NA"
+        if self.attrtype == 'contattr':
+            col[na] = "NaN"
+            values = col.astype(np.float64)
+        else:
+            col[na] = str(NA_VALUE)
+            values = col.astype(np.int64)
+            if self.attrtype == 'binattr':
+                if np.any((values[~na] != 0) & (values[~na] != 1)):
+                    raise ValueError("binary attribute " + name +
+                                     " has values other than 0, 1 or NA in "
+                                     + self.filename)
+                values = values.astype(np.int8)
+            elif np.max(np.abs(values), initial = 0) < 2**31:
+                values = values.astype(np.int32)
+        if self.permutation is not None:
+            values = values[self.permutation]
+            na = na[self.permutation]
+        self.values[name] = values
+        self.na[name] = na
+
+    def isLoaded(self, name):
+        """
+        Return True iff the values of attribute name are already loaded
+        """
+        return name in self.values
+
+    def naMask(self, name):
+        """
+        Return boolean numpy array which is True for nodes where
+        attribute name is missing (NA)
+        """
+        if name not in self.na:
+            values = self[name]
+            if name not in self.na:
+                self.na[name] = (np.isnan(values) if
+                                 self.attrtype == 'contattr' else
+                                 values == NA_VALUE)
+        return self.na[name]
+
+    def numNA(self, name):
+        """
+        Return number of nodes where attribute name is missing (NA)
+        """
+        return int(np.count_nonzero(self.naMask(name)))
+
+    def permuted(self, permutation):
+        """
+        Return new AttributeStore with the values reordered by a
+        permutation of the node ids. Attributes not yet loaded from
+        the file are still only loaded when first used.
+
+        Parameters:
+            permutation - numpy array of node ids, so that node k
+                          in the returned store has the values of node
+                          permutation[k] in this store
+
+        Return value:
+            AttributeStore with the permuted values
+        """
+        if self.filename is None:
+            return AttributeStore(self.attrtype, arrays = self.values,
+                                  permutation = permutation)
+        file_permutation = (permutation if self.permutation is None else
+                            self.permutation[permutation])
+        store = AttributeStore(self.attrtype, self.filename, self.n,
+                               permutation = file_permutation)
+        for (name, values) in self.values.items():
+            store.values[name] = values[permutation]
+            if name in self.na:
+                store.na[name] = self.na[name][permutation]
+        return store
@@ -10,8 +10,10 @@
 import sys
 import random
 import math
+import numpy as np
 from Graph import Graph
-from SparseMatrix import SparseMatrix
+from SparseMatrix import adjacency_two_paths
+from pajekLoader import open_datafile,edges_to_csr
 from utils import NA_VALUE
 
 
@@ -38,12 +40,22 @@ class BipartiteGraph(Graph):
     They must be numbered 1 ... N where N = num_A + num_B
     so nodes 1 .. num_A are type A and num_A+1 .. N are type B
     see e.g. http://www.pfeffer.at/txt2pajek/txt2pajek.pdf
+
+    The number of two-paths between each pair of nodes (used for
+    fast computation of four-cycle change statistics) is stored in
+    twoPathsMatrix, a CSRSparseMatrix built in bulk (see
+    adjacency_two_paths()) when it is first used after the graph is
+    modified. If twopaths_max_bytes is not None and the matrix would
+    take more memory than that, twoPathsMatrix is None and the
+    two-paths are counted by neighbour intersection when needed instead
+    (see twoPathsIterator()).
     
     """
 
     def __init__(self, pajek_edgelist_filename=None, binattr_filename=None,
                  contattr_filename=None, catattr_filename=None,
-                 zone_filename=None, num_nodes=None):
+                 zone_filename=None, num_nodes=None,
+                 twopaths_max_bytes=None):
         """
         Construct graph from Pajek format network and binary attributes.
 
@@ -65,16 +77,20 @@ class BipartiteGraph(Graph):
                                 in empty graph to create
                                (only if pajek_edgelist_filename = None)
                                Default None
+            twopaths_max_bytes - maximum memory (bytes) to use for the
+                                 two-paths matrix, or None for no limit.
+                                 Default None.
 
         """
         assert not (num_nodes is not None and
                     pajek_edgelist_filename is not None)
         assert num_nodes is not None or pajek_edgelist_filename is not None
-
-
+        self.twopaths_max_bytes = twopaths_max_bytes
+        self.twoPathsCSR = None # two-paths matrix (see twoPathsMatrix)
+        self.twoPathsStale = True # True if two-paths matrix must be rebuilt
 
         if pajek_edgelist_filename is not None:
-            f =  open(pajek_edgelist_filename)
+            f =  open_datafile(pajek_edgelist_filename)
             l = f.readline() # first line must be e.g. "*vertices 500 200"
             n = int(l.split()[1])
             f.close()
@@ -82,8 +98,6 @@ class BipartiteGraph(Graph):
                 self.num_A_nodes = int(l.split()[2])
             except IndexError:
                 raise ValueError('expecting "*vertices num_nodes num_A_nodes" for two-mode network')
-            # sparse matrix of two-path counts
-            self.twoPathsMatrix = SparseMatrix(n)
             super().__init__(pajek_edgelist_filename, binattr_filename,
                              contattr_filename, catattr_filename, zone_filename)
             self.num_B_nodes = self.numNodes() - self.num_A_nodes
@@ -91,8 +105,6 @@ class BipartiteGraph(Graph):
             assert(n == self.numNodes())
         else:
             n = num_nodes[0] + num_nodes[1]
-            # sparse matrix of two-path counts
-            self.twoPathsMatrix = SparseMatrix(n)
             super().__init__(num_nodes = n)
             self.num_A_nodes = num_nodes[0]
             self.num_B_nodes = num_nodes[1]
@@ -118,17 +130,17 @@ class BipartiteGraph(Graph):
 
         if self.binattr is not None:
             for attrname in self.binattr.keys():
-                print('Binary attribute', attrname, 'has', self.binattr[attrname].count(NA_VALUE), 'NA values (', self.binattr[attrname][:self.num_A_nodes].count(NA_VALUE), 'in mode A and', self.binattr[attrname][self.num_A_nodes:].count(NA_VALUE), 'in mode B)' )
+                print('Binary attribute', attrname, 'has', np.count_nonzero(np.asarray(self.binattr[attrname]) == NA_VALUE), 'NA values (', np.count_nonzero(np.asarray(self.binattr[attrname][:self.num_A_nodes]) == NA_VALUE), 'in mode A and', np.count_nonzero(np.asarray(self.binattr[attrname][self.num_A_nodes:]) == NA_VALUE), 'in mode B)' )
         else:
             print('No binary attributes')
         if self.contattr is not None:
             for attrname in self.contattr.keys():
-                print('Continuous attribute', attrname, 'has', sum([math.isnan(x) for x in self.contattr[attrname]]), 'NA values (', sum([math.isnan(x) for x in self.contattr[attrname][:self.num_A_nodes]]), 'in mode A and ', sum([math.isnan(x) for x in self.contattr[attrname][self.num_A_nodes:]]), 'in mode B)')
+                print('Continuous attribute', attrname, 'has', np.count_nonzero(np.isnan(self.contattr[attrname])), 'NA values (', np.count_nonzero(np.isnan(self.contattr[attrname][:self.num_A_nodes])), 'in mode A and ', np.count_nonzero(np.isnan(self.contattr[attrname][self.num_A_nodes:])), 'in mode B)')
         else:
             print('No continuous attributes')
         if self.catattr is not None:
             for attrname in self.catattr.keys():
-                print('Categorical attribute', attrname, 'has', self.catattr[attrname].count(NA_VALUE), 'NA values (', self.catattr[attrname][:self.num_A_nodes].count(NA_VALUE), 'in mode A and ', self.catattr[attrname][self.num_A_nodes:].count(NA_VALUE), 'in mode B)')
+                print('Categorical attribute', attrname, 'has', np.count_nonzero(np.asarray(self.catattr[attrname]) == NA_VALUE), 'NA values (', np.count_nonzero(np.asarray(self.catattr[attrname][:self.num_A_nodes]) == NA_VALUE), 'in mode A and ', np.count_nonzero(np.asarray(self.catattr[attrname][self.num_A_nodes:]) == NA_VALUE), 'in mode B)')
         else:
             print('No categorical attributes')
 
@@ -154,7 +166,26 @@ class BipartiteGraph(Graph):
         if self.bipartite_node_mode(i) == self.bipartite_node_mode(j):
             raise ValueError("edge in bipartite graph inserted between nodes in same mode")
         super().insertEdge(i, j)
-        self.updateTwoPathsMatrix(i, j)
+        self.twoPathsStale = True
+
+    def insertEdges(self, i, j, w=None):
+        """
+        Insert edges i[k] -- j[k] (with weight w[k]) for all k in place,
+        where i and j are numpy arrays of node ids. This is a bulk
+        version of insertEdge() used when loading the graph.
+        """
+        if np.any((i < self.num_A_nodes) == (j < self.num_A_nodes)):
+            raise ValueError("edge in bipartite graph inserted between nodes in same mode")
+        super().insertEdges(i, j, w)
+        self.twoPathsStale = True
+
+    def removeEdge(self, i, j):
+        """
+        Delete edge i -- j in place
+        """
+        super().removeEdge(i, j)
+        self.twoPathsStale = True
+
 
     def nodeModeIterator(self, mode):
         """
@@ -164,22 +195,75 @@ class BipartiteGraph(Graph):
         return filter(
             lambda v: self.bipartite_node_mode(v) == mode, self.G.keys())
 
-    def updateTwoPathsMatrix(self, i, j):
-        """
-        Update the two-paths sparse matrix used for fast computation
-        of some change statistics (specifically 4-cycles), for addition
-        of the edge i -- j.
-        """
-        for u in self.neighbourIterator(i):
-            if u == i or u == j:
-                continue
-            self.twoPathsMatrix.incrementValue(u, j)
-            self.twoPathsMatrix.incrementValue(j, u)
-        for u in self.neighbourIterator(j):
-            if u == i or u == j:
-                continue
-            self.twoPathsMatrix.incrementValue(u, i)
-            self.twoPathsMatrix.incrementValue(i, u)
+    @property
+    def twoPathsMatrix(self):
+        """
+        The two-paths sparse matrix (CSRSparseMatrix) of the number of
+        two-paths i -- v -- j for all pairs of nodes i, j, used for fast
+        computation of some change statistics (specifically 4-cycles).
+        It is (re)built when first used after the graph is modified,
+        and is None if it would exceed twopaths_max_bytes.
+        """
+        if self.twoPathsStale:
+            self.buildTwoPathsMatrix()
+        return self.twoPathsCSR
+
+    def buildTwoPathsMatrix(self):
+        """
+        Build the two-paths sparse matrix in bulk as the product of the
+        biadjacency matrix and its transpose (see adjacency_two_paths())
+        """
+        n = self.numNodes()
+        i = np.fromiter((u for u in self.G for v in self.G[u]),
+                        dtype = np.int64)
+        j = np.fromiter((v for u in self.G for v in self.G[u]),
+                        dtype = np.int64)
+        (indptr, indices) = edges_to_csr(n, i, j)
+        # two-paths matrix uses 4 bytes each for the column and value
+        max_nonzero = (self.twopaths_max_bytes // 8
+                       if self.twopaths_max_bytes is not None else None)
+        self.twoPathsCSR = adjacency_two_paths(indptr, indices, max_nonzero)
+        self.twoPathsStale = False
+
+    def twoPathsIterator(self, i):
+        """
+        Return iterator over tuples (j, p) where p > 0 is the number of
+        two-paths i -- v -- j, for all nodes j (distinct from i) with
+        such two-paths. Uses the two-paths matrix if it is built, or
+        else counts the two-paths from the neighbours of neighbours.
+        """
+        if self.twoPathsMatrix is not None:
+            return zip(self.twoPathsMatrix.rowNonZeroColumnsIterator(i),
+                       self.twoPathsMatrix.rowNonZeroValuesIterator(i))
+        return zip(*[x.tolist() for x in self.twoPathsRow(i)])
+
+    def twoPathsRow(self, i):
+        """
+        Return tuple (columns, counts) of numpy arrays, where counts[k] > 0
+        is the number of two-paths i -- v -- columns[k], for all nodes
+        (distinct from i) with such two-paths, so computations over
+        them can be vectorized. These are views of the two-paths matrix
+        row if it is built, or else are counted from the neighbours of
+        neighbours.
+        """
+        if self.twoPathsMatrix is not None:
+            return (self.twoPathsMatrix.rowNonZeroColumns(i),
+                    self.twoPathsMatrix.rowNonZeroValues(i))
+        js = np.fromiter((j for v in self.G[i] for j in self.G[v] if j != i),
+                         dtype = np.int64)
+        return np.unique(js, return_counts = True)
+
+    def twoPaths(self, i, j):
+        """
+        Count undirected two-paths for (i, j): paths i -- v -- j for some v
+        (where v is distinct from both i and j, which are also distinct),
+        from the two-paths sparse matrix if it is built
+        """
+        if i == j:
+            return 0
+        if self.twoPathsMatrix is not None:
+            return self.twoPathsMatrix.getValue(i, j)
+        return super().twoPaths(i, j)
 
     def random_node(self, mode):
         """
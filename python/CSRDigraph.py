@@ -0,0 +1,364 @@
+#
+# File:    CSRDigraph.py
+# Author:  Alex Stivala
+# Created: October 2026
+#
+# Defines the immutable directed graph structure CSRDigraph with
+# compressed sparse row (CSR) array out- and in-adjacency representation,
+# and index of reciprocated arcs, for large networks.
+#
+
+import bisect
+import numpy as np
+
+from Digraph import Digraph
+from pajekLoader import read_pajek_edgelist,edges_to_csr
+
+# maximum number of two-paths checked at once in computeTriangleCensus(),
+# to bound memory use
+MAX_TWOPATHS_CHUNK = 2**22
+
+
+class CSRDigraph(Digraph):
+    """The digraph is represented in compressed sparse row (CSR) format
+    with numpy arrays rather than the two dictionaries of dictionaries
+    (G and Grev) used by Digraph, for large networks where the dict of
+    dicts take far too much memory. Nodes are indexed by integers 0..n-1.
+
+    indptr is an array of n+1 offsets and indices an array of
+    (number of arcs) node ids, so that the out-neighbours of node i are
+    indices[indptr[i]:indptr[i+1]], in sorted (ascending) order.
+    Similarly in_indptr and in_indices give the in-neighbours of each
+    node. The out-degree and in-degree of every node are precomputed
+    in the outdegrees and indegrees arrays.
+
+    For each arc i -> j (aligned with indices) the array reciprocated
+    is True iff the arc j -> i also exists, and the number of mutual
+    (reciprocated) arcs i <-> j of each node i is precomputed in the
+    mutualdegrees array, so that reciprocity is found by array lookups
+    rather than searching for the reverse arc.
+
+    So simple operations are:
+      outdegree of node i:                   outdegrees[i]
+      does arc i->j exist?:                  binary search for j in
+                                             indices[indptr[i]:indptr[i+1]]
+      out-neighbours of i:                   indices[indptr[i]:indptr[i+1]]
+      in-neighbours of i:                    in_indices[in_indptr[i]:in_indptr[i+1]]
+      is arc i->j reciprocated?:             reciprocated[k] where
+                                             indices[k] == j
+      number of mutual arcs of i:            mutualdegrees[i]
+
+    The number of each type of directed triangle (transitive T1, D1,
+    U1 and cyclic C1) that each node is in is computed in one pass
+    when first needed, and stored in triangleCensus (see
+    computeTriangleCensus()), as these depend only on the digraph.
+
+    The digraph is immutable: once constructed, arcs cannot be inserted
+    or removed. It provides the same interface as Digraph (outdegree,
+    indegree, isArc, outIterator, inIterator, edgeIterator etc.) so
+    the change statistics functions and samplers can be used with it
+    unchanged. Node attributes and snowball sampling zones are stored
+    exactly as in Digraph.
+    """
+
+    def __init__(self, pajek_edgelist_filename=None, binattr_filename=None,
+                 contattr_filename=None, catattr_filename=None,
+                 zone_filename=None,
+                 digraph=None, csr=None):
+        """
+        Construct digraph from Pajek format network and binary attributes,
+        or by converting an existing Digraph object, or from existing
+        CSR arrays.
+
+        Parameters:
+            pajek_edgelist_filename - edge list in Pajek format
+                                      If None then digraph or csr must be
+                                      used instead
+                                      Default None
+            binattr_filename  - binary attributes
+                                Default None: no binary attributes loaded
+            contattr_filename - continuous attributes
+                                Default None: no continuous attributes loaded
+            catattr_filename - categorical attributes
+                                Default None: no categorical attributes loaded
+            zone_filename    - snowball sample zone for each node
+                                Deafult None: no zone information loaded
+            digraph          - Digraph object to convert to CSR representation
+                               (only if pajek_edgelist_filename = None).
+                               The attributes and zones of digraph are
+                               shared (not copied).
+                               Default None
+            csr              - tuple (indptr, indices) or (indptr, indices,
+                               in_indptr, in_indices) of CSR arrays
+                               as described above to use (not copied)
+                               for digraph with no attributes or zones
+                               (only if pajek_edgelist_filename = None
+                               and digraph = None). If the in-neighbour
+                               arrays are not given they are computed.
+                               Default None
+        """
+        assert [pajek_edgelist_filename, digraph, csr].count(None) == 2
+        self.G = None   # no dict of dicts in this representation
+        self.Grev = None
+        self.indptr = None  # CSR offsets (n+1) of out-neighbours
+        self.indices = None # CSR out-neighbour node ids (sorted for each node)
+        self.in_indptr = None  # CSR offsets (n+1) of in-neighbours
+        self.in_indices = None # CSR in-neighbour node ids (sorted)
+        self.outdegrees = None # out-degree of each node
+        self.indegrees = None  # in-degree of each node
+        self.reciprocated = None  # True for reciprocated arcs, aligned with indices
+        self.mutualdegrees = None # number of mutual arcs of each node
+        self.triangleCensus = None # dict triangle type -> count by node
+        self.binattr = None # binary attributes: AttributeStore name, array by node
+        self.contattr = None # continuous attributes: AttributeStore name, array by node
+        self.catattr = None  # categorical attributes: AttributeStore name, array by node
+
+        # for conditional estimation on snowball sampling structure
+        self.zone    = None  # node snowball zone, list by node
+        self.max_zone= None  # maximum snowball zone number
+        self.inner_nodes = None # list of nodes with zone < max_zone
+        self.permutation = None # original node id of each node if reordered
+
+        if pajek_edgelist_filename is not None:
+            (vertices, arcs_i, arcs_j) = read_pajek_edgelist(
+                pajek_edgelist_filename, directed = True)
+            n = vertices[0]
+            self.buildCSR(n, arcs_i, arcs_j)
+            self.loadAttributes(n, binattr_filename, contattr_filename,
+                                catattr_filename, zone_filename)
+        elif digraph is not None:
+            n = digraph.numNodes()
+            arcs = np.array(list(digraph.edgeIterator()),
+                            dtype=np.int64).reshape(-1, 2)
+            self.buildCSR(n, arcs[:, 0], arcs[:, 1])
+            self.binattr = digraph.binattr
+            self.contattr = digraph.contattr
+            self.catattr = digraph.catattr
+            self.zone = digraph.zone
+            self.max_zone = digraph.max_zone
+            self.inner_nodes = digraph.inner_nodes
+        elif len(csr) == 2:
+            (indptr, indices) = csr
+            n = len(indptr) - 1
+            self.buildCSR(n, np.repeat(np.arange(n), np.diff(indptr)),
+                          np.asarray(indices, dtype=np.int64),
+                          out_csr = (indptr, indices))
+        else:
+            (self.indptr, self.indices, self.in_indptr, self.in_indices) = csr
+            self.buildIndex()
+
+
+    def buildCSR(self, n, i, j, out_csr = None):
+        """
+        Build the CSR arrays from arrays of (0-based) arc endpoints.
+
+        Parameters:
+            n       - number of nodes
+            i       - numpy array of source node of each arc
+            j       - numpy array of target node of each arc
+            out_csr - tuple (indptr, indices) of already built out-neighbour
+                      CSR arrays for these arcs, or None. Default None.
+
+        Duplicate arcs and self-loops must already have been removed.
+        """
+        if out_csr is None:
+            out_csr = edges_to_csr(n, i, j)
+        (self.indptr, self.indices) = out_csr
+        (self.in_indptr, self.in_indices) = edges_to_csr(n, j, i)
+        self.buildIndex()
+
+
+    def buildIndex(self):
+        """
+        Compute the degree arrays, and the reciprocated arc index and
+        mutual degree of each node, from the CSR arrays.
+        """
+        n = self.numNodes()
+        self.outdegrees = np.diff(self.indptr)
+        self.indegrees = np.diff(self.in_indptr)
+        # arc keys i*n+j are sorted since rows and neighbours are sorted,
+        # so arc j -> i is found by binary search for key j*n+i
+        rows = np.repeat(np.arange(n, dtype=np.int64), self.outdegrees)
+        cols = np.asarray(self.indices, dtype=np.int64)
+        keys = rows * n + cols
+        reverse_keys = cols * n + rows
+        pos = np.minimum(np.searchsorted(keys, reverse_keys),
+                         max(len(keys) - 1, 0))
+        self.reciprocated = (keys[pos] == reverse_keys if len(keys) > 0 else
+                             np.zeros(0, dtype=bool))
+        self.mutualdegrees = np.bincount(rows[self.reciprocated],
+                                         minlength=n)
+
+
+    def computeTriangleCensus(self):
+        """
+        Compute the number of directed triangles of each type that
+        each node i is in, stored in the dict triangleCensus mapping
+        triangle type to numpy int64 array of the count for each node:
+
+          'T1' - arcs v -> i, i -> u, v -> u
+          'D1' - arcs i -> u, u -> v, i -> v
+          'U1' - arcs u -> i, u -> v, v -> i
+          'C1' - arcs i -> u, u -> v, v -> i
+
+        (the change statistics changeTransitiveTriangleT1 etc. in
+        changeStatisticsALAAMdirected.py).
+
+        Every two-path x -> y -> z (x != z) is enumerated once, from
+        the in- and out-neighbours of its middle node y, and the arcs
+        x -> z and z -> x closing it are found by binary search in the
+        sorted arc keys. A transitive triangle (closed by x -> z) is
+        counted as D1 for x, T1 for y and U1 for z, and a cyclic
+        triangle (closed by z -> x) as C1 for x. The two-paths are
+        processed in chunks of at most MAX_TWOPATHS_CHUNK (except for
+        a single node with more), to bound memory use.
+        """
+        n = self.numNodes()
+        rows = np.repeat(np.arange(n, dtype=np.int64), self.outdegrees)
+        keys = rows * n + np.asarray(self.indices, dtype=np.int64)
+        counts = dict([(t, np.zeros(n, dtype=np.int64))
+                       for t in ['T1', 'D1', 'U1', 'C1']])
+        def is_arc(i, j):
+            pos = np.minimum(np.searchsorted(keys, i * n + j),
+                             max(len(keys) - 1, 0))
+            return keys[pos] == i * n + j
+        cum_twopaths = np.cumsum(self.indegrees.astype(np.int64) *
+                                 self.outdegrees)
+        start = 0
+        while start < n and len(keys) > 0:
+            done = cum_twopaths[start - 1] if start > 0 else 0
+            end = max(int(np.searchsorted(cum_twopaths,
+                                          done + MAX_TWOPATHS_CHUNK,
+                                          side='right')), start + 1)
+            # each in-arc x -> y of the nodes y in the chunk, paired with
+            # each out-arc y -> z
+            y = np.repeat(np.arange(start, end, dtype=np.int64),
+                          self.indegrees[start:end])
+            x = np.asarray(self.in_indices[self.in_indptr[start]:
+                                           self.in_indptr[end]],
+                           dtype=np.int64)
+            c = self.outdegrees[y]
+            offsets = (np.arange(np.sum(c), dtype=np.int64) -
+                       np.repeat(np.cumsum(c) - c, c))
+            (x, y) = (np.repeat(x, c), np.repeat(y, c))
+            z = np.asarray(self.indices[self.indptr[y] + offsets],
+                           dtype=np.int64)
+            keep = x != z
+            (x, y, z) = (x[keep], y[keep], z[keep])
+            transitive = is_arc(x, z)
+            counts['D1'] += np.bincount(x[transitive], minlength=n)
+            counts['T1'] += np.bincount(y[transitive], minlength=n)
+            counts['U1'] += np.bincount(z[transitive], minlength=n)
+            counts['C1'] += np.bincount(x[is_arc(z, x)], minlength=n)
+            start = end
+        self.triangleCensus = counts
+
+
+    def numNodes(self):
+        """
+        Return number of nodes in digraph
+        """
+        return len(self.indptr) - 1
+
+    def numArcs(self):
+        """
+        Return number of arcs in digraph
+        """
+        return len(self.indices)
+
+    def outdegree(self, i):
+        """
+        Return Out-degree of node i
+        """
+        # Python int not numpy int so no overflow in e.g. EgoOutThreeStar
+        return int(self.outdegrees[i])
+
+    def indegree(self, i):
+        """
+        Return In-degree of node i
+        """
+        return int(self.indegrees[i])
+
+    def mutualdegree(self, i):
+        """
+        Return number of mutual (reciprocated) arcs i <-> j of node i
+        """
+        return int(self.mutualdegrees[i])
+
+    def isArc(self, i, j):
+        """
+        Return True iff arc i -> j in digraph
+        """
+        # binary search in sorted out-neighbours of i
+        start = self.indptr[i]
+        end = self.indptr[i+1]
+        k = bisect.bisect_left(self.indices, j, start, end)
+        return k < end and self.indices[k] == j
+
+    def mutualIterator(self, i):
+        """
+        Return iterator over nodes j with mutual (reciprocated) arcs i <-> j
+        """
+        start = self.indptr[i]
+        end = self.indptr[i+1]
+        return iter(self.indices[start:end][
+            self.reciprocated[start:end]].tolist())
+
+    def outIterator(self, i):
+        """
+        Return iterator over out-neighbours of i
+        """
+        return iter(self.indices[self.indptr[i]:self.indptr[i+1]].tolist())
+
+    def inIterator(self, i):
+        """
+        Return iterator over in-neighbours of i
+        """
+        return iter(self.in_indices[self.in_indptr[i]:
+                                    self.in_indptr[i+1]].tolist())
+
+    def outArray(self, i):
+        """
+        Return numpy array (view) of sorted out-neighbours of i
+        """
+        return self.indices[self.indptr[i]:self.indptr[i+1]]
+
+    def inArray(self, i):
+        """
+        Return numpy array (view) of sorted in-neighbours of i
+        """
+        return self.in_indices[self.in_indptr[i]:self.in_indptr[i+1]]
+
+    def insertArc(self, i, j, w = 1):
+        """
+        Not supported: CSRDigraph is immutable
+        """
+        raise Exception("cannot insert arc in immutable CSRDigraph")
+
+    def insertArcs(self, i, j):
+        """
+        Not supported: CSRDigraph is immutable
+        """
+        raise Exception("cannot insert arc in immutable CSRDigraph")
+
+    def removeArc(self, i, j):
+        """
+        Not supported: CSRDigraph is immutable
+        """
+        raise Exception("cannot remove arc in immutable CSRDigraph")
+
+    def nodeIterator(self):
+        """
+        Return iterator over nodes of graph
+        """
+        return iter(range(self.numNodes()))
+
+    def edgeIterator(self):
+        """Iterate over arcs in graph
+
+        This is a generator function that yields a tuple (i, j) for
+        each arc (i, j) in the graph
+        """
+        for i in range(self.numNodes()):
+            for j in self.outIterator(i):
+                yield (i, j)
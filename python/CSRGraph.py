@@ -0,0 +1,427 @@
+#
+# File:    CSRGraph.py
+# Author:  Alex Stivala
+# Created: October 2026
+#
+# Defines the immutable undirected graph structure CSRGraph with
+# compressed sparse row (CSR) array graph representation, for large
+# networks.
+#
+
+import bisect
+import numpy as np
+
+from Graph import Graph
+from pajekLoader import read_pajek_edgelist,edges_to_csr
+from nodeOrdering import node_ordering
+from AttributeStore import AttributeStore
+
+# maximum number of two-paths (wedges) checked at once when counting
+# the triangles on each edge in computeEdgeTwoPaths(), to bound memory use
+MAX_WEDGES_CHUNK = 2**22
+
+
+class CSRGraph(Graph):
+    """The network is represented in compressed sparse row (CSR) format
+    with numpy arrays rather than the dictionary of dictionaries used
+    by Graph, for large networks where the dict of dicts takes far too
+    much memory. Nodes are indexed by integers 0..n-1.
+
+    indptr is an array of n+1 offsets and indices an array of
+    (2 times the number of edges) neighbour node ids, so that the
+    neighbours of node i are indices[indptr[i]:indptr[i+1]], in sorted
+    (ascending) order. As in Graph, for simplicity in undirected graph
+    we always store both the edge i -- j and the edge j -- i. The
+    degree of every node is also precomputed in the degrees array.
+
+    So simple operations are:
+      degree of node i:                      degrees[i]
+      does edge i--j exist?:                 binary search for j in
+                                             indices[indptr[i]:indptr[i+1]]
+      neighbours of i:                       indices[indptr[i]:indptr[i+1]]
+
+    The number of two-paths i -- u -- j for each edge i -- j (i.e. the
+    number of triangles containing the edge) is computed once when
+    first needed, and stored in the array edgeTwoPaths aligned with
+    indices (see computeEdgeTwoPaths() and neighbourTwoPathsList()).
+
+    Edge weights (e.g. the distance between the endpoints of each edge,
+    for the ContagionDist change statistic) can optionally be stored in
+    the array weights aligned with indices, so they take O(E) memory
+    rather than the O(N^2) of a distance matrix. If there are no edge
+    weights, weights is None and every edge has weight 1.
+
+    The graph is immutable: once constructed, edges cannot be inserted
+    or removed. It provides the same interface as Graph (degree,
+    isEdge, neighbourIterator, neighbourList, edgeIterator, twoPaths
+    etc.) so the change statistics functions and samplers can be used
+    with it unchanged. Node attributes and snowball sampling zones
+    are stored exactly as in Graph.
+
+    Optionally the nodes can be reordered (renumbered) when the graph
+    is constructed, e.g. by reverse Cuthill-McKee ordering, so that
+    neighbouring nodes tend to have nearby node ids, for better memory
+    locality (see reorderNodes()). The original node id of each node is
+    then stored in the permutation array, the attributes and zones are
+    permuted accordingly, and outcome vectors are converted between the
+    original and internal node order with toInternalOrder() and
+    toOriginalOrder().
+    """
+
+    def __init__(self, pajek_edgelist_filename=None, binattr_filename=None,
+                 contattr_filename=None, catattr_filename=None,
+                 zone_filename=None,
+                 graph=None, csr=None, reorder=None, edge_weights=False):
+        """
+        Construct graph from Pajek format network and binary attributes,
+        or by converting an existing Graph object, or from existing
+        CSR arrays.
+
+        Parameters:
+            pajek_edgelist_filename - edge list in Pajek format
+                                      If None then graph must be
+                                      used instead to convert existing graph
+                                      Default None
+            binattr_filename  - binary attributes
+                                Default None: no binary attributes loaded
+            contattr_filename - continuous attributes
+                                Default None: no continuous attributes loaded
+            catattr_filename - categorical attributes
+                                Default None: no categorical attributes loaded
+            zone_filename    - snowball sample zone for each node
+                                Deafult None: no zone information loaded
+            graph            - Graph object to convert to CSR representation
+                               (only if pajek_edgelist_filename = None).
+                               The attributes and zones of graph are
+                               shared (not copied).
+                               Default None
+            csr              - tuple (indptr, indices) or
+                               (indptr, indices, weights) of CSR arrays
+                               as described above to use (not copied)
+                               for graph with no attributes or zones
+                               (only if pajek_edgelist_filename = None
+                               and graph = None). Default None
+            reorder          - node ordering method to reorder the nodes
+                               with (see reorderNodes()): 'rcm', 'degree'
+                               or 'bfs', or None for no reordering.
+                               Default None
+            edge_weights     - if True, load edge weights from the third
+                               column of the Pajek edge list.
+                               Default False
+        """
+        assert [pajek_edgelist_filename, graph, csr].count(None) == 2
+        self.G = None   # no dict of dicts in this representation
+        self.indptr = None  # CSR offsets (n+1) as described above
+        self.indices = None # CSR neighbour node ids (sorted for each node)
+        self.degrees = None # degree of each node
+        self.edgeTwoPaths = None # two-paths count for each entry in indices
+        self.weights = None # edge weight for each entry in indices, or None
+        self.binattr = None # binary attributes: AttributeStore name, array by node
+        self.contattr = None # continuous attributes: AttributeStore name, array by node
+        self.catattr = None  # categorical attributes: AttributeStore name, array by node
+
+        # for conditional estimation on snowball sampling structure
+        self.zone    = None  # node snowball zone, list by node
+        self.max_zone= None  # maximum snowball zone number
+        self.inner_nodes = None # list of nodes with zone < max_zone
+        self.permutation = None # original node id of each node if reordered
+
+        if pajek_edgelist_filename is not None:
+            edgelist = read_pajek_edgelist(pajek_edgelist_filename,
+                                           weights = edge_weights)
+            n = edgelist[0][0]
+            self.buildCSR(n, *edgelist[1:])
+            self.loadAttributes(n, binattr_filename, contattr_filename,
+                                catattr_filename, zone_filename)
+        elif graph is not None:
+            n = graph.numNodes()
+            edges = np.array(list(graph.edgeIterator()),
+                             dtype=np.int64).reshape(-1, 2)
+            weights = np.array([graph.edgeWeight(i, j) for (i, j) in edges.tolist()],
+                               dtype=np.float64)
+            self.buildCSR(n, edges[:, 0], edges[:, 1],
+                          None if np.all(weights == 1) else weights)
+            self.binattr = graph.binattr
+            self.contattr = graph.contattr
+            self.catattr = graph.catattr
+            self.zone = graph.zone
+            self.max_zone = graph.max_zone
+            self.inner_nodes = graph.inner_nodes
+        else:
+            (self.indptr, self.indices) = csr[:2]
+            if len(csr) > 2:
+                self.weights = csr[2]
+            self.degrees = np.diff(self.indptr)
+
+        if reorder is not None:
+            self.reorderNodes(reorder)
+
+
+    def buildCSR(self, n, i, j, w=None):
+        """
+        Build the CSR arrays from arrays of (0-based) edge endpoints.
+
+        Parameters:
+            n - number of nodes
+            i - numpy array of first endpoint of each edge
+            j - numpy array of second endpoint of each edge
+            w - numpy array of weight of each edge, or None for
+                no edge weights. Default None.
+
+        Each undirected edge must be given only once (in either
+        direction), with no self-loops.
+        """
+        # store both directions of every edge, with sorted neighbours
+        csr = edges_to_csr(n, np.concatenate((i, j)), np.concatenate((j, i)),
+                           None if w is None else np.concatenate((w, w)))
+        (self.indptr, self.indices) = csr[:2]
+        if w is not None:
+            self.weights = csr[2]
+        self.degrees = np.diff(self.indptr)
+
+
+    def reorderNodes(self, method):
+        """
+        Reorder (renumber) the nodes for better memory locality,
+        permuting the CSR arrays, node attributes and snowball sampling
+        zones. The original node id of node k is then permutation[k]
+        (if the nodes were already reordered, this is composed with the
+        previous permutation so is still the id in the input files).
+
+        Parameters:
+            method - node ordering method: 'rcm' (reverse Cuthill-McKee),
+                     'degree' (decreasing degree) or 'bfs' (breadth-first
+                     search); see node_ordering() in nodeOrdering.py
+        """
+        n = self.numNodes()
+        perm = node_ordering(self.indptr, self.indices, method)
+        newid = np.empty(n, dtype=np.int64)
+        newid[perm] = np.arange(n, dtype=np.int64)
+        rows = np.repeat(np.arange(n, dtype=np.int64), self.degrees)
+        csr = edges_to_csr(
+            n, newid[rows], newid[np.asarray(self.indices, dtype=np.int64)],
+            self.weights)
+        (self.indptr, self.indices) = csr[:2]
+        if self.weights is not None:
+            self.weights = csr[2]
+        self.degrees = np.diff(self.indptr)
+        self.edgeTwoPaths = None
+
+        for attrtype in ['binattr', 'contattr', 'catattr']:
+            attrs = getattr(self, attrtype)
+            if attrs is not None:
+                if not isinstance(attrs, AttributeStore):
+                    attrs = AttributeStore(attrtype, arrays = attrs)
+                setattr(self, attrtype, attrs.permuted(perm))
+        if self.zone is not None:
+            self.zone = np.asarray(self.zone)[perm].tolist()
+            self.inner_nodes = [i for (i, z) in enumerate(self.zone)
+                                if z < self.max_zone]
+        self.permutation = (perm if self.permutation is None else
+                            self.permutation[perm])
+
+
+    def numNodes(self):
+        """
+        Return number of nodes in graph
+        """
+        return len(self.indptr) - 1
+
+    def numEdges(self):
+        """
+        Return number of edges in graph
+        """
+        # both directions of each edge are stored so divide by 2
+        return len(self.indices) // 2
+
+    def degree(self, i):
+        """
+        Return degree of node i
+        """
+        # Python int not numpy int so no overflow in e.g. ThreeStar
+        return int(self.degrees[i])
+
+    def isEdge(self, i, j):
+        """
+        Return True iff edge i -- j in graph
+        """
+        # binary search in sorted neighbours of i
+        start = self.indptr[i]
+        end = self.indptr[i+1]
+        k = bisect.bisect_left(self.indices, j, start, end)
+        return k < end and self.indices[k] == j
+
+    def neighbourIterator(self, i):
+        """
+        Return iterator over neighbours of i
+        """
+        return iter(self.neighbourList(i))
+
+    def neighbourList(self, i):
+        """
+        Return list of neighbours of i
+        """
+        return self.indices[self.indptr[i]:self.indptr[i+1]].tolist()
+
+    def neighbourArray(self, i):
+        """
+        Return numpy array (view) of sorted neighbours of i
+        """
+        return self.indices[self.indptr[i]:self.indptr[i+1]]
+
+    def edgeWeight(self, i, j):
+        """
+        Return weight of edge i -- j (1 if no edge weights)
+        """
+        if self.weights is None:
+            return 1
+        start = self.indptr[i]
+        end = self.indptr[i+1]
+        k = bisect.bisect_left(self.indices, j, start, end)
+        if k == end or self.indices[k] != j:
+            raise KeyError((i, j))
+        return float(self.weights[k])
+
+    def neighbourWeightIterator(self, i):
+        """
+        Return iterator over tuples (u, w) for each neighbour u of i
+        where w is the weight of edge i -- u, in the same order as
+        neighbourIterator(i)
+        """
+        if self.weights is None:
+            return iter([(u, 1) for u in self.neighbourList(i)])
+        return zip(self.neighbourList(i),
+                   self.weights[self.indptr[i]:self.indptr[i+1]].tolist())
+
+    def edgeWeightArray(self):
+        """
+        Return numpy array of the edge weight for each entry in
+        indices (all 1 if no edge weights)
+        """
+        if self.weights is None:
+            return np.ones(len(self.indices))
+        return self.weights
+
+    def insertEdge(self, i, j):
+        """
+        Not supported: CSRGraph is immutable
+        """
+        raise Exception("cannot insert edge in immutable CSRGraph")
+
+    def insertEdges(self, i, j, w=None):
+        """
+        Not supported: CSRGraph is immutable
+        """
+        raise Exception("cannot insert edge in immutable CSRGraph")
+
+    def removeEdge(self, i, j):
+        """
+        Not supported: CSRGraph is immutable
+        """
+        raise Exception("cannot remove edge in immutable CSRGraph")
+
+    def nodeIterator(self):
+        """
+        Return iterator over nodes of graph
+        """
+        return iter(range(self.numNodes()))
+
+    def edgeIterator(self):
+        """
+        Iterate over edges in graph
+
+        This is a generator function that yields a tuple (i, j) for
+        each edge (i, j) in the graph
+        """
+        # both directions stored, so return only those edges where i < j;
+        # since neighbours are sorted these are at the end of the row
+        for i in range(self.numNodes()):
+            start = self.indptr[i]
+            end = self.indptr[i+1]
+            k = bisect.bisect_right(self.indices, i, start, end)
+            for j in self.indices[k:end].tolist():
+                yield (i, j)
+
+    def twoPaths(self, i, j):
+        """
+        Count undirected two-paths for (i, j): paths i -- v -- j for some v
+        (where v is distinct from both i and j, which are also distinct)
+        """
+        # intersection of sorted neighbour arrays (no self-loops so
+        # neither i nor j can be in the intersection)
+        if i == j:
+            return 0
+        return len(np.intersect1d(self.neighbourArray(i),
+                                  self.neighbourArray(j),
+                                  assume_unique = True))
+
+    def computeEdgeTwoPaths(self):
+        """
+        Compute the number of two-paths i -- u -- j (i.e. the number of
+        triangles containing the edge) for every edge i -- j, stored in
+        the array edgeTwoPaths aligned with indices.
+
+        Each triangle is found exactly once by orienting each edge
+        from the lower to the higher ranked node (ranked by degree,
+        then node id), and checking for each pair of out-neighbours u,
+        v of each node whether u -- v is an edge, by binary search in
+        the sorted adjacency arrays. The pairs are processed in chunks
+        of at most MAX_WEDGES_CHUNK, to bound memory use.
+        """
+        n = self.numNodes()
+        rows = np.repeat(np.arange(n, dtype=np.int64), self.degrees)
+        cols = self.indices.astype(np.int64)
+        # sorted key of each entry since rows and neighbours are sorted
+        keys = rows * n + cols
+        rank = np.empty(n, dtype=np.int64)
+        rank[np.lexsort((np.arange(n), self.degrees))] = np.arange(n)
+        fwd = np.flatnonzero(rank[cols] > rank[rows]) # oriented edges
+        outdegrees = np.bincount(rows[fwd], minlength=n)
+        fwd_indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(outdegrees, out=fwd_indptr[1:])
+        # number of later out-neighbours to pair with each oriented edge
+        partners = (fwd_indptr[rows[fwd] + 1] - 1 -
+                    np.arange(len(fwd), dtype=np.int64))
+        cum_partners = np.cumsum(partners)
+
+        counts = np.zeros(len(keys), dtype=np.int64)
+        start = 0
+        while start < len(fwd):
+            done = cum_partners[start - 1] if start > 0 else 0
+            end = max(int(np.searchsorted(cum_partners,
+                                          done + MAX_WEDGES_CHUNK,
+                                          side='right')), start + 1)
+            c = partners[start:end]
+            first = np.repeat(np.arange(start, end, dtype=np.int64), c)
+            offsets = np.cumsum(c) - c
+            second = (first + 1 + np.arange(len(first), dtype=np.int64) -
+                      np.repeat(offsets, c))
+            (w, u, v) = (rows[fwd[first]], cols[fwd[first]], cols[fwd[second]])
+            pos_uv = np.minimum(np.searchsorted(keys, u * n + v),
+                                len(keys) - 1)
+            found = keys[pos_uv] == u * n + v
+            (w, u, v) = (w[found], u[found], v[found])
+            counts += np.bincount(np.concatenate((
+                fwd[first[found]], fwd[second[found]], pos_uv[found],
+                np.searchsorted(keys, u * n + w),
+                np.searchsorted(keys, v * n + w),
+                np.searchsorted(keys, v * n + u))), minlength=len(keys))
+            start = end
+        self.edgeTwoPaths = counts.astype(np.int32)
+
+    def neighbourTwoPathsList(self, i):
+        """
+        Return list of the number of two-paths i -- u -- v (i.e. the
+        number of triangles containing the edge i -- v) for each
+        neighbour v of i, in the same order as neighbourList(i).
+        """
+        return self.neighbourTwoPathsArray(i).tolist()
+
+    def neighbourTwoPathsArray(self, i):
+        """
+        Return numpy array (view) of the number of two-paths i -- u -- v
+        for each neighbour v of i, aligned with neighbourArray(i)
+        """
+        if self.edgeTwoPaths is None:
+            self.computeEdgeTwoPaths()
+        return self.edgeTwoPaths[self.indptr[i]:self.indptr[i+1]]
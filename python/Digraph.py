@@ -12,7 +12,10 @@
 #
 
 import math
+import numpy as np
 from utils import int_or_na,float_or_na,NA_VALUE
+from pajekLoader import open_datafile,read_pajek_edgelist,edges_to_csr
+from AttributeStore import AttributeStore
 
 
 
@@ -57,12 +60,13 @@ class Digraph:
     categorical, and NaN for continuous.
 
     Node attributes (binary, continuous, categorical; separately)
-    are each stored in a dictionary of lists. The key of the dictionary
-    is the attribute name, and the value is a list which is simply
-    indexed by node id i.e. a simple list of the attribute values in
-    node id order. So e.g. the categorical attribute 'class' for node id 2
-    (the third node, so row 4 in data which has header)
-    would be catattr['class'][2]
+    are each stored in an AttributeStore, a mapping (like a dictionary)
+    where the key is the attribute name, and the value is a (typed)
+    numpy array which is simply indexed by node id i.e. the attribute
+    values in node id order. So e.g. the categorical attribute 'class'
+    for node id 2 (the third node, so row 4 in data which has header)
+    would be catattr['class'][2]. Each attribute is only parsed from
+    the file when it is first used (see AttributeStore).
 
     Also there can be optionally be a 'zone' for each node, which is
     the snowball sampling zone: 0 for the seed nodes, 1 for nodes
@@ -100,20 +104,22 @@ class Digraph:
         assert num_nodes is not None or pajek_edgelist_filename is not None
         self.G = None  # dict of dicts as described above
         self.Grev = None # version with all arcs reversed to get in-neighbours
+        self.csrDigraph = None # CSRDigraph of this digraph, see csr_digraph()
         
-        self.binattr = None # binary attributes: dict name, list by node (int not boolean)
-        self.contattr = None # continuous attributes: dict name, list by node
-        self.catattr = None  # categorical attributes: dict name, list by node
+        self.binattr = None # binary attributes: AttributeStore name, array by node
+        self.contattr = None # continuous attributes: AttributeStore name, array by node
+        self.catattr = None  # categorical attributes: AttributeStore name, array by node
 
         # for conditional estimation on snowball sampling structure
         self.zone    = None  # node snowball zone, list by node
         self.max_zone= None  # maximum snowball zone number
         self.inner_nodes = None # list of nodes with zone < max_zone
+        self.permutation = None # original node id of each node if reordered
 
         if pajek_edgelist_filename is not None:
-            f =  open(pajek_edgelist_filename)
-            l = f.readline() # first line must be e.g. "*vertices 500"
-            n = int(l.split()[1])
+            (vertices, arcs_i, arcs_j) = read_pajek_edgelist(
+                pajek_edgelist_filename, directed = True)
+            n = vertices[0]
         else:
             n = num_nodes
 
@@ -122,41 +128,42 @@ class Digraph:
         self.Grev = dict(list(zip(list(range(n)), [dict() for i in range(n)])))
 
         if pajek_edgelist_filename is not None:
-            while l and l.rstrip().lower() != "*arcs":
-                l = f.readline()
-            if not l:
-                raise ValueError("no *arcs in Pajek file " + pajek_edgelist_filename)
-            lsplit = f.readline().split()
-            while len(lsplit) >= 2:
-                lsplit = lsplit[:2]  # only used first two (i,j) ignore weight
-                (i, j) = list(map(int, lsplit))
-                assert(i >= 1 and i <= n and j >= 1 and j <= n)
-                self.insertArc(i-1, j-1)    # input is 1-based but we are 0-based
-                lsplit = f.readline().split()
-
-        # Note in the following,
-        #  map(list, zip(*[row.split() for row in open(filename).readlines()]))
-        # reads the data and transposes it so we have a list of columns
-        # not a list of rows, which then makes it easy to convert to
-        # the dict where key is column header and value is list of values
-        # (converted to the appropraite data type from sting with int_or_na()
-        # etc.)
-        # https://stackoverflow.com/questions/6473679/transpose-list-of-lists#
-        
+            self.insertArcs(arcs_i, arcs_j)
+
+        self.loadAttributes(n, binattr_filename, contattr_filename,
+                            catattr_filename, zone_filename)
+
+    def loadAttributes(self, n, binattr_filename=None,
+                       contattr_filename=None, catattr_filename=None,
+                       zone_filename=None):
+        """
+        Load node attributes and snowball sampling zones from files
+        for a digraph with n nodes. Used by the constructor (and by
+        subclasses which build the network structure differently).
+
+        Parameters:
+            n                 - number of nodes in the digraph
+            binattr_filename  - binary attributes
+                                Default None: no binary attributes loaded
+            contattr_filename - continuous attributes
+                                Default None: no continuous attributes loaded
+            catattr_filename - categorical attributes
+                                Default None: no categorical attributes loaded
+            zone_filename    - snowball sample zone for each node
+                                Deafult None: no zone information loaded
+        """
+        # attributes are only parsed from the files when first used
         if binattr_filename is not None:
-            self.binattr = dict([(col[0], list(map(int_or_na, col[1:]))) for col in map(list, list(zip(*[row.split() for row in open(binattr_filename).readlines()])))])
-            assert(all([len(v) == n for v in self.binattr.values()]))
+            self.binattr = AttributeStore('binattr', binattr_filename, n)
 
         if contattr_filename is not None:
-            self.contattr = dict([(col[0], list(map(float_or_na, col[1:]))) for col in map(list, list(zip(*[row.split() for row in open(contattr_filename).readlines()])))])
-            assert(all([len(v) == n for v in self.contattr.values()]))
+            self.contattr = AttributeStore('contattr', contattr_filename, n)
 
         if catattr_filename is not None:
-            self.catattr = dict([(col[0], list(map(int_or_na, col[1:]))) for col in map(list, list(zip(*[row.split() for row in open(catattr_filename).readlines()])))])
-            assert(all([len(v) == n for v in self.catattr.values()]))
+            self.catattr = AttributeStore('catattr', catattr_filename, n)
 
         if zone_filename is not None:
-            self.zone = [int(s) for s in open(zone_filename).readlines()[1:]]
+            self.zone = [int(s) for s in open_datafile(zone_filename).readlines()[1:]]
             assert(len(self.zone) == n)
             self.max_zone = max(self.zone)
             assert(min(self.zone) == 0)
@@ -204,6 +211,18 @@ class Digraph:
         """
         return j in self.G[i]
 
+    def mutualdegree(self, i):
+        """
+        Return number of mutual (reciprocated) arcs i <-> j of node i
+        """
+        return sum([1 for j in self.G[i] if i in self.G[j]])
+
+    def mutualIterator(self, i):
+        """
+        Return iterator over nodes j with mutual (reciprocated) arcs i <-> j
+        """
+        return (j for j in self.G[i] if i in self.G[j])
+
     def outIterator(self, i):
         """
         Return iterator over out-neighbours of i
@@ -223,6 +242,24 @@ class Digraph:
         assert i != j # do not allow loops (self-arcs)
         self.G[i][j] = w
         self.Grev[j][i] = w
+        self.csrDigraph = None
+
+    def insertArcs(self, i, j):
+        """
+        Insert arcs i[k] -> j[k] for all k in place, where i and j
+        are numpy arrays of node ids. This is a bulk version of
+        insertArc() (with arc weight 1) used when loading the digraph.
+        """
+        assert not np.any(i == j) # do not allow loops (self-arcs)
+        self.csrDigraph = None
+        n = self.numNodes()
+        for (Gdict, source, target) in [(self.G, i, j), (self.Grev, j, i)]:
+            (indptr, indices) = edges_to_csr(n, source, target)
+            indptr = indptr.tolist()
+            indices = indices.tolist()
+            for v in range(n):
+                if indptr[v+1] > indptr[v]:
+                    Gdict[v].update(dict.fromkeys(indices[indptr[v]:indptr[v+1]], 1))
 
     def insertEdge(self, i, j, w = 1):
         """
@@ -238,6 +275,43 @@ class Digraph:
         """
         self.G[i].pop(j)
         self.Grev[j].pop(i)
+        self.csrDigraph = None
+
+    def toInternalOrder(self, x):
+        """
+        Return vector of values for each node (e.g. outcome vector) given
+        in the original node order (as in the input files) in the node
+        order used internally. This is the vector itself unless the
+        nodes have been reordered (see CSRGraph).
+
+        Parameters:
+            x - list or numpy array of values for each node in original order
+
+        Return value:
+            x, or numpy array of the values permuted to internal node order
+        """
+        if self.permutation is None:
+            return x
+        return np.asarray(x)[self.permutation]
+
+    def toOriginalOrder(self, x):
+        """
+        Return vector of values for each node (e.g. simulated outcome
+        vector) in the internal node order permuted back to the original
+        node order (as in the input files). Inverse of toInternalOrder().
+
+        Parameters:
+            x - list or numpy array of values for each node in internal order
+
+        Return value:
+            x, or numpy array of the values permuted to original node order
+        """
+        if self.permutation is None:
+            return x
+        x = np.asarray(x)
+        y = np.empty_like(x)
+        y[self.permutation] = x
+        return y
 
     def printSummary(self):
         """
@@ -250,17 +324,17 @@ class Digraph:
 
         if self.binattr is not None:
             for attrname in self.binattr.keys():
-                print('Binary attribute', attrname, 'has', self.binattr[attrname].count(NA_VALUE), 'NA values')
+                print('Binary attribute', attrname, 'has', np.count_nonzero(np.asarray(self.binattr[attrname]) == NA_VALUE), 'NA values')
         else:
             print('No binary attributes')
         if self.contattr is not None:
             for attrname in self.contattr.keys():
-                print('Continuous attribute', attrname, 'has', sum([math.isnan(x) for x in self.contattr[attrname]]), 'NA values')
+                print('Continuous attribute', attrname, 'has', np.count_nonzero(np.isnan(self.contattr[attrname])), 'NA values')
         else:
             print('No continuous attributes')
         if self.catattr is not None:
             for attrname in self.catattr.keys():
-                print('Categorical attribute', attrname, 'has', self.catattr[attrname].count(NA_VALUE), 'NA values')
+                print('Categorical attribute', attrname, 'has', np.count_nonzero(np.asarray(self.catattr[attrname]) == NA_VALUE), 'NA values')
         else:
             print('No categorical attributes')
 
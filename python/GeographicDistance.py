@@ -0,0 +1,186 @@
+#
+# File:    GeographicDistance.py
+# Author:  Alex Stivala
+# Created: October 2026
+#
+# Distances between nodes computed as needed from node coordinates
+# (or a distance function), for the GeographicHomophily change
+# statistic, rather than stored in an N x N distance matrix.
+#
+
+import numpy as np
+
+# maximum number of distances to compute at once in sumDistances()
+MAX_DISTANCES_CHUNK = 2**22
+
+
+class GeographicDistance:
+    """
+    Distances between nodes, used instead of the N x N distance matrix
+    for the GeographicHomophily (and ContagionDist) change statistics,
+    e.g. partial(changeGeographicHomophily, GeographicDistance(coords)).
+
+    The distance is either the Euclidean distance between node
+    coordinates, or given by a (vectorized) distance function. With a
+    cutoff, distances greater than the cutoff are treated as zero (i.e.
+    only nodes within the cutoff distance of each other are related),
+    and for coordinates the nodes within the cutoff distance of a node
+    are found with a grid of cells of the cutoff size, so need not be
+    compared with every node.
+
+    Distances must be symmetric (d(i, j) = d(j, i)).
+    """
+
+    def __init__(self, coords = None, distance_func = None, num_nodes = None,
+                 cutoff = None):
+        """
+        Construct GeographicDistance from node coordinates or distance
+        function (exactly one of which must be given).
+
+        Parameters:
+            coords        - N x d numpy array of the coordinates of each
+                            node (or N vector for d = 1)
+            distance_func - function (i, nodes) returning numpy vector of
+                            the distance from node i to each node in the
+                            numpy array of node ids nodes
+            num_nodes     - number of nodes (only with distance_func)
+            cutoff        - distances greater than cutoff are zero, or
+                            None for no cutoff. Default None.
+        """
+        assert (coords is None) != (distance_func is None)
+        assert (distance_func is None) == (num_nodes is None)
+        self.distance_func = distance_func
+        self.cutoff = cutoff
+        self.coords = None
+        self.cells = None
+        if coords is not None:
+            coords = np.asarray(coords, dtype = np.float64)
+            self.coords = coords.reshape(len(coords), -1)
+            self.n = len(self.coords)
+            if cutoff is not None:
+                self.buildCells()
+        else:
+            self.n = num_nodes
+
+
+    def buildCells(self):
+        """
+        Build the grid of cells (of the cutoff size in each dimension)
+        of the coordinates: dict mapping cell (tuple of ints) to numpy
+        array of the nodes in it.
+        """
+        cell = np.floor(self.coords / self.cutoff).astype(np.int64)
+        self.cell = cell
+        order = np.lexsort(cell.T[::-1])
+        (keys, starts) = np.unique(cell[order], axis = 0, return_index = True)
+        ends = np.append(starts[1:], len(order))
+        self.cells = dict([(tuple(key), order[start:end]) for
+                           (key, start, end) in zip(keys.tolist(), starts, ends)])
+        dim = self.coords.shape[1]
+        self.cell_offsets = np.stack(np.meshgrid(*([[-1, 0, 1]] * dim),
+                                                 indexing = 'ij'),
+                                     axis = -1).reshape(-1, dim)
+
+
+    def candidates(self, i):
+        """
+        Return numpy array of the nodes that may be within the cutoff
+        distance of node i (all nodes if no grid of cells)
+        """
+        if self.cells is None:
+            return np.arange(self.numNodes())
+        nodes = [self.cells.get(tuple(c)) for c in
+                 (self.cell[i] + self.cell_offsets).tolist()]
+        return np.concatenate([v for v in nodes if v is not None])
+
+
+    def numNodes(self):
+        """
+        Return the number of nodes
+        """
+        return self.n
+
+
+    def distancesTo(self, i, nodes):
+        """
+        Return numpy vector of the distance from node i to each of
+        the nodes (numpy array of node ids), without cutoff
+        """
+        if self.coords is not None:
+            diff = self.coords[nodes] - self.coords[i]
+            return np.sqrt(np.sum(diff * diff, axis = 1))
+        return np.asarray(self.distance_func(i, nodes), dtype = np.float64)
+
+
+    def distances(self, i):
+        """
+        Return tuple (nodes, dists) of numpy array of the nodes (other
+        than i) at nonzero distance (not greater than the cutoff) from
+        node i, and numpy vector of the distances to them.
+        """
+        nodes = self.candidates(i)
+        dists = self.distancesTo(i, nodes)
+        keep = (nodes != i) & (dists != 0)
+        if self.cutoff is not None:
+            keep &= dists <= self.cutoff
+        return (nodes[keep], dists[keep])
+
+
+    def sumDistances(self, x):
+        """
+        Return numpy vector of the sum of the distances from each node
+        i to every other node j weighted by x[j], i.e. the distance
+        matrix times x (with zero diagonal)
+
+        Parameters:
+           x - numpy vector of weights for each node
+        """
+        x = np.asarray(x, dtype = np.float64)
+        assert len(x) == self.n
+        sums = np.zeros(self.n)
+        if self.coords is not None and self.cutoff is None:
+            chunk = max(1, MAX_DISTANCES_CHUNK // self.n)
+            for start in range(0, self.n, chunk):
+                block = self.coords[start:start+chunk]
+                diff = block[:, np.newaxis, :] - self.coords[np.newaxis, :, :]
+                sums[start:start+chunk] = (
+                    np.sqrt(np.sum(diff * diff, axis = 2)) @ x)
+        else:
+            # distances are symmetric so add from each node with nonzero x
+            for j in np.flatnonzero(x):
+                (nodes, dists) = self.distances(j)
+                sums[nodes] += x[j] * dists
+        return sums
+
+
+    def pairDistances(self, i, j):
+        """
+        Return numpy vector of the distances between nodes i[k] and j[k]
+        for each k (e.g. for each edge of a network)
+
+        Parameters:
+           i, j - numpy arrays of node ids of the same length
+        """
+        (i, j) = (np.asarray(i, dtype = np.int64), np.asarray(j, dtype = np.int64))
+        if self.coords is not None:
+            diff = self.coords[i] - self.coords[j]
+            dists = np.sqrt(np.sum(diff * diff, axis = 1))
+        else:
+            dists = np.empty(len(i))
+            for u in np.unique(i):
+                k = np.flatnonzero(i == u)
+                dists[k] = self.distancesTo(u, j[k])
+        dists[i == j] = 0
+        if self.cutoff is not None:
+            dists[dists > self.cutoff] = 0
+        return dists
+
+
+    def __getitem__(self, ij):
+        """
+        Return the distance between nodes i and j, so that
+        GeographicDistance can be used like the distance matrix
+        as distmatrix[i, j]
+        """
+        (i, j) = ij
+        return float(self.pairDistances([i], [j])[0])
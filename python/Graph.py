@@ -8,8 +8,10 @@
 #
 
 import math
-import functools
+import numpy as np
 from utils import int_or_na,float_or_na,NA_VALUE
+from pajekLoader import open_datafile,read_pajek_edgelist,edges_to_csr
+from AttributeStore import AttributeStore
 
 
 
@@ -18,10 +20,13 @@ class Graph:
     """The network is represented as a dictionary of dictionaries.
     Nodes are indexed by integers 0..n-1. The outermost dictionary has the node
     v as a key, and dictionary as value. Then this dictionary has the neighbours
-    of v as the keys, and here simply 1 as value (there are no edge weights).
+    of v as the keys, and the edge weight as value, which is simply 1
+    unless edge weights (e.g. distances) are loaded from the third
+    column of the Pajek edge list.
 
     So G[i] is a dictionary with k entries, where k is the degree of node i.
-    and G[i][j] exists (and has value 1) exactly when j is a neighbour of i.
+    and G[i][j] exists (and has value 1, or the weight) exactly when j
+    is a neighbour of i.
     And simple operations are:
       degree of node i:                      len(G[i])
       does edge i--j exist?:                 j in G[i]                 
@@ -59,12 +64,13 @@ class Graph:
     categorical, and NaN for continuous.
 
     Node attributes (binary, continuous, categorical; separately)
-    are each stored in a dictionary of lists. The key of the dictionary
-    is the attribute name, and the value is a list which is simply
-    indexed by node id i.e. a simple list of the attribute values in
-    node id order. So e.g. the categorical attribute 'class' for node id 2
-    (the third node, so row 4 in data which has header)
-    would be catattr['class'][2]
+    are each stored in an AttributeStore, a mapping (like a dictionary)
+    where the key is the attribute name, and the value is a (typed)
+    numpy array which is simply indexed by node id i.e. the attribute
+    values in node id order. So e.g. the categorical attribute 'class'
+    for node id 2 (the third node, so row 4 in data which has header)
+    would be catattr['class'][2]. Each attribute is only parsed from
+    the file when it is first used (see AttributeStore).
 
     Also there can be optionally be a 'zone' for each node, which is
     the snowball sampling zone: 0 for the seed nodes, 1 for nodes
@@ -78,7 +84,7 @@ class Graph:
     def __init__(self, pajek_edgelist_filename=None, binattr_filename=None,
                  contattr_filename=None, catattr_filename=None,
                  zone_filename=None,
-                 num_nodes=None):
+                 num_nodes=None, edge_weights=False):
         """
         Construct graph from Pajek format network and binary attributes.
 
@@ -98,24 +104,34 @@ class Graph:
             num_nodes        - number of nodes in empty graph to create
                                (only if pajek_edgelist_filename = None)
                                Default None
+            edge_weights     - if True, load edge weights from the third
+                               column of the Pajek edge list.
+                               Default False
         """
         assert not (num_nodes is not None and
                     pajek_edgelist_filename is not None)
         assert num_nodes is not None or pajek_edgelist_filename is not None
         self.G = None  # dict of dicts as described above
-        self.binattr = None # binary attributes: dict name, list by node (int not boolean)
-        self.contattr = None # continuous attributes: dict name, list by node
-        self.catattr = None  # categorical attributes: dict name, list by node
+        self.neighbourTwoPathCounts = None # see neighbourTwoPathsList()
+        self.csrGraph = None # CSRGraph of this graph, see csr_graph()
+        self.binattr = None # binary attributes: AttributeStore name, array by node
+        self.contattr = None # continuous attributes: AttributeStore name, array by node
+        self.catattr = None  # categorical attributes: AttributeStore name, array by node
 
         # for conditional estimation on snowball sampling structure
         self.zone    = None  # node snowball zone, list by node
         self.max_zone= None  # maximum snowball zone number
         self.inner_nodes = None # list of nodes with zone < max_zone
+        self.permutation = None # original node id of each node if reordered
 
+        weights = None
         if pajek_edgelist_filename is not None:
-            f =  open(pajek_edgelist_filename)
-            l = f.readline() # first line must be e.g. "*vertices 500"
-            n = int(l.split()[1])
+            edgelist = read_pajek_edgelist(pajek_edgelist_filename,
+                                           weights = edge_weights)
+            (vertices, edges_i, edges_j) = edgelist[:3]
+            if edge_weights:
+                weights = edgelist[3]
+            n = vertices[0]
         else:
             n = num_nodes
 
@@ -123,42 +139,42 @@ class Graph:
         self.G = dict(list(zip(list(range(n)), [dict() for i in range(n)])))
 
         if pajek_edgelist_filename is not None:
-            while l and l.rstrip().lower() != "*edges":
-                l = f.readline()
-            if not l:
-                raise ValueError("no *edges in Pajek file " +
-                                 pajek_edgelist_filename)
-            lsplit = f.readline().split()
-            while len(lsplit) >= 2:
-                lsplit = lsplit[:2]  # only used first two (i,j) ignore weight
-                (i, j) = list(map(int, lsplit))
-                assert(i >= 1 and i <= n and j >= 1 and j <= n)
-                self.insertEdge(i-1, j-1)    # input is 1-based but we are 0-based
-                lsplit = f.readline().split()
-
-        # Note in the following,
-        #  map(list, zip(*[row.split() for row in open(filename).readlines()]))
-        # reads the data and transposes it so we have a list of columns
-        # not a list of rows, which then makes it easy to convert to
-        # the dict where key is column header and value is list of values
-        # (converted to the appropraite data type from sting with int_or_na()
-        # etc.)
-        # https://stackoverflow.com/questions/6473679/transpose-list-of-lists#
-        
+            self.insertEdges(edges_i, edges_j, weights)
+
+        self.loadAttributes(n, binattr_filename, contattr_filename,
+                            catattr_filename, zone_filename)
+
+    def loadAttributes(self, n, binattr_filename=None,
+                       contattr_filename=None, catattr_filename=None,
+                       zone_filename=None):
+        """
+        Load node attributes and snowball sampling zones from files
+        for a graph with n nodes. Used by the constructor (and by
+        subclasses which build the network structure differently).
+
+        Parameters:
+            n                 - number of nodes in the graph
+            binattr_filename  - binary attributes
+                                Default None: no binary attributes loaded
+            contattr_filename - continuous attributes
+                                Default None: no continuous attributes loaded
+            catattr_filename - categorical attributes
+                                Default None: no categorical attributes loaded
+            zone_filename    - snowball sample zone for each node
+                                Deafult None: no zone information loaded
+        """
+        # attributes are only parsed from the files when first used
         if binattr_filename is not None:
-            self.binattr = dict([(col[0], list(map(int_or_na, col[1:]))) for col in map(list, list(zip(*[row.split() for row in open(binattr_filename).readlines()])))])
-            assert(all([len(v) == n for v in self.binattr.values()]))
+            self.binattr = AttributeStore('binattr', binattr_filename, n)
 
         if contattr_filename is not None:
-            self.contattr = dict([(col[0], list(map(float_or_na, col[1:]))) for col in map(list, list(zip(*[row.split() for row in open(contattr_filename).readlines()])))])
-            assert(all([len(v) == n for v in self.contattr.values()]))
+            self.contattr = AttributeStore('contattr', contattr_filename, n)
 
         if catattr_filename is not None:
-            self.catattr = dict([(col[0], list(map(int_or_na, col[1:]))) for col in map(list, list(zip(*[row.split() for row in open(catattr_filename).readlines()])))])
-            assert(all([len(v) == n for v in self.catattr.values()]))
+            self.catattr = AttributeStore('catattr', catattr_filename, n)
 
         if zone_filename is not None:
-            self.zone = [int(s) for s in open(zone_filename).readlines()[1:]]
+            self.zone = [int(s) for s in open_datafile(zone_filename).readlines()[1:]]
             assert(len(self.zone) == n)
             self.max_zone = max(self.zone)
             assert(min(self.zone) == 0)
@@ -166,6 +182,7 @@ class Graph:
             # get list of nodes in inner waves, i.e. with zone < max_zone
             self.inner_nodes = [i for (i, z) in enumerate(self.zone) if z < self.max_zone]
 
+
     def numNodes(self):
         """
         Return number of nodes in graph
@@ -213,13 +230,54 @@ class Graph:
         """
         return list(self.G[i])
 
-    def insertEdge(self, i, j):
+    def edgeWeight(self, i, j):
+        """
+        Return weight of edge i -- j (1 unless edge weights loaded)
+        """
+        return self.G[i][j]
+
+    def neighbourWeightIterator(self, i):
+        """
+        Return iterator over tuples (u, w) for each neighbour u of i
+        where w is the weight of edge i -- u, in the same order as
+        neighbourIterator(i)
+        """
+        return iter(self.G[i].items())
+
+    def insertEdge(self, i, j, w=1):
         """
-        Insert edge i -- j in place
+        Insert edge i -- j (with weight w, default 1) in place
         """
         assert i != j # do not allow loops (self-edges)
-        self.G[i][j] = 1
-        self.G[j][i] = 1
+        self.G[i][j] = w
+        self.G[j][i] = w
+        self.neighbourTwoPathCounts = None
+        self.csrGraph = None
+
+
+    def insertEdges(self, i, j, w=None):
+        """
+        Insert edges i[k] -- j[k] (with weight w[k]) for all k in place,
+        where i and j are numpy arrays of node ids, and w is numpy array
+        of edge weights or None for all weights 1. This is a bulk version
+        of insertEdge() used when loading the graph.
+        """
+        assert not np.any(i == j) # do not allow loops (self-edges)
+        self.neighbourTwoPathCounts = None
+        self.csrGraph = None
+        csr = edges_to_csr(self.numNodes(),
+                           np.concatenate((i, j)), np.concatenate((j, i)),
+                           None if w is None else np.concatenate((w, w)))
+        indptr = csr[0].tolist()
+        indices = csr[1].tolist()
+        weights = csr[2].tolist() if w is not None else None
+        for v in range(self.numNodes()):
+            if indptr[v+1] > indptr[v]:
+                if weights is None:
+                    self.G[v].update(dict.fromkeys(indices[indptr[v]:indptr[v+1]], 1))
+                else:
+                    self.G[v].update(zip(indices[indptr[v]:indptr[v+1]],
+                                         weights[indptr[v]:indptr[v+1]]))
 
 
     def removeEdge(self, i, j):
@@ -228,7 +286,45 @@ class Graph:
         """
         self.G[i].pop(j)
         self.G[j].pop(i)
+        self.neighbourTwoPathCounts = None
+        self.csrGraph = None
+
 
+    def toInternalOrder(self, x):
+        """
+        Return vector of values for each node (e.g. outcome vector) given
+        in the original node order (as in the input files) in the node
+        order used internally. This is the vector itself unless the
+        nodes have been reordered (see CSRGraph).
+
+        Parameters:
+            x - list or numpy array of values for each node in original order
+
+        Return value:
+            x, or numpy array of the values permuted to internal node order
+        """
+        if self.permutation is None:
+            return x
+        return np.asarray(x)[self.permutation]
+
+    def toOriginalOrder(self, x):
+        """
+        Return vector of values for each node (e.g. simulated outcome
+        vector) in the internal node order permuted back to the original
+        node order (as in the input files). Inverse of toInternalOrder().
+
+        Parameters:
+            x - list or numpy array of values for each node in internal order
+
+        Return value:
+            x, or numpy array of the values permuted to original node order
+        """
+        if self.permutation is None:
+            return x
+        x = np.asarray(x)
+        y = np.empty_like(x)
+        y[self.permutation] = x
+        return y
 
     def printSummary(self):
         """
@@ -241,17 +337,17 @@ class Graph:
 
         if self.binattr is not None:
             for attrname in self.binattr.keys():
-                print('Binary attribute', attrname, 'has', self.binattr[attrname].count(NA_VALUE), 'NA values')
+                print('Binary attribute', attrname, 'has', np.count_nonzero(np.asarray(self.binattr[attrname]) == NA_VALUE), 'NA values')
         else:
             print('No binary attributes')
         if self.contattr is not None:
             for attrname in self.contattr.keys():
-                print('Continuous attribute', attrname, 'has', sum([math.isnan(x) for x in self.contattr[attrname]]), 'NA values')
+                print('Continuous attribute', attrname, 'has', np.count_nonzero(np.isnan(self.contattr[attrname])), 'NA values')
         else:
             print('No continuous attributes')
         if self.catattr is not None:
             for attrname in self.catattr.keys():
-                print('Categorical attribute', attrname, 'has', self.catattr[attrname].count(NA_VALUE), 'NA values')
+                print('Categorical attribute', attrname, 'has', np.count_nonzero(np.asarray(self.catattr[attrname]) == NA_VALUE), 'NA values')
         else:
             print('No categorical attributes')
 
@@ -284,11 +380,29 @@ class Graph:
                     yield (i, j)
 
 
-    @functools.cache # Memoize the twoPaths function (Python 3.9)
     def twoPaths(self, i, j):
         """
         Count undirected two-paths for (i, j): paths i -- v -- j for some v
         (where v is distinct from both i and j, which are also distinct)
         """
-        return sum([(v in self.neighbourIterator(j)) for v in self.neighbourIterator(i)]) if i != j else 0
+        return len(self.G[i].keys() & self.G[j].keys()) if i != j else 0
+
+
+    def neighbourTwoPathsList(self, i):
+        """
+        Return list of the number of two-paths i -- u -- v (i.e. the
+        number of triangles containing the edge i -- v) for each
+        neighbour v of i, in the same order as neighbourList(i).
+
+        The counts are computed (by intersection of the neighbour sets)
+        only once for each node, and kept until the graph is modified.
+        """
+        if self.neighbourTwoPathCounts is None:
+            self.neighbourTwoPathCounts = [None] * self.numNodes()
+        counts = self.neighbourTwoPathCounts[i]
+        if counts is None:
+            neighbours = self.G[i].keys()
+            counts = [len(neighbours & self.G[v].keys()) for v in self.G[i]]
+            self.neighbourTwoPathCounts[i] = counts
+        return counts
 
@@ -0,0 +1,455 @@
+#
+# File:    OutcomeState.py
+# Author:  Alex Stivala
+# Created: October 2026
+#
+# Outcome vector which also keeps, for each node, counts of its
+# neighbours with outcome 1 (or for a digraph, out-, in- and mutual
+# neighbours), updated incrementally as the outcome vector is
+# changed, so that outcome dependent change statistics such as
+# Contagion need not loop over neighbours (and neighbours of
+# neighbours) testing the outcome of each one.
+#
+# Also the nodes eligible for the samplers to propose toggling the
+# outcome of (not NA, and in the inner snowball sampling waves or the
+# given bipartite mode), see proposal_nodes(), and the sets of nodes
+# with outcome 0 and 1 for the ZOO sampler, see zero_one_node_sets().
+#
+
+import numpy as np
+
+from utils import NA_VALUE
+from Digraph import Digraph
+from BipartiteGraph import BipartiteGraph,MODE_A,MODE_B
+from binaryNetwork import adjacency_arrays
+from changeStatisticsALAAMvectorized import outcome_indicator,csr_rows,category_match_arcs,csr_digraph,neighbour_sum
+
+
+class OutcomeState(np.ndarray):
+    """
+    Outcome vector (numpy array of 0, 1 or NA_VALUE for each node) of
+    an undirected graph, which also maintains for each node i:
+
+      plusCount[i]     - the number of neighbours of i with outcome 1
+      plusDegreeSum[i] - the sum of the degrees of those neighbours
+
+    and (only for categorical attributes asked for with
+    samePlusCount()) the number of neighbours of i with outcome 1 and
+    the same value of the categorical attribute as i, and (only for
+    GeographicDistance objects asked for with distanceSum()) the sum of
+    the distances from i to the nodes with outcome 1.
+
+    Setting an element (A[i] = x) updates the counts of the neighbours
+    of i if its outcome changes to or from 1, in O(degree) time, so the
+    samplers use it just like a numpy outcome vector. Setting any other
+    way (slices, index arrays) recomputes all the counts. The counts
+    are kept in lists rather than numpy arrays, as they are used one
+    element at a time, which is faster with lists.
+    The change statistic functions in changeStatisticsALAAM.py use
+    the counts when A is an OutcomeState, making e.g. Contagion O(1).
+
+    The graph must not be changed while the OutcomeState is in use.
+    Arrays derived from an OutcomeState (e.g. A == 1) are plain numpy
+    arrays; copies and views made with A.copy() or slicing are
+    OutcomeState objects without counts (plusCount is None) and behave
+    as plain numpy arrays.
+    """
+
+    def __new__(cls, G, A):
+        """
+        Construct OutcomeState with a copy of the outcome vector A
+
+        Parameters:
+           G - Graph (undirected, one-mode) object
+           A - vector of 0/1/NA_VALUE outcome variables
+        """
+        obj = np.array(A).view(cls)
+        obj.G = G
+        obj.proposalNodes = {}   # dict (mode, inner) -> proposal nodes list
+        obj.zeroOneNodeSets = None # see zero_one_node_sets() in zooALAAMsampler
+        obj.initialize()
+        obj.recompute()
+        return obj
+
+
+    def initialize(self):
+        """
+        Set up the (outcome independent) data for maintaining the
+        counts, before they are first computed by recompute()
+        """
+        (self.indptr, self.indices) = adjacency_arrays(self.G)
+        self.degrees = np.diff(self.indptr).tolist()
+        self.catCodes = {}         # dict attrname -> categorical values list
+        self.samePlusCounts = {}   # dict attrname -> same category plus counts
+        self.distanceSums = {}     # dict id -> (GeographicDistance, sums)
+        self.pendingMoves = {}     # dict node -> change not yet in distanceSums
+
+
+    def __array_finalize__(self, obj):
+        # views and copies do not have (or maintain) the counts
+        self.G = None
+        self.plusCount = None
+        self.proposalNodes = None
+        self.zeroOneNodeSets = None
+
+
+    def __array_wrap__(self, arr, context = None, return_scalar = False):
+        # results of numpy functions (e.g. A == 1) are plain arrays
+        arr = arr.view(np.ndarray)
+        return arr[()] if return_scalar else arr
+
+
+    def __reduce__(self):
+        # pickle (e.g. for multiprocessing) as plain outcome vector
+        return (np.array, (self.view(np.ndarray),))
+
+
+    def __setitem__(self, key, value):
+        if self.G is None:
+            np.ndarray.__setitem__(self, key, value)
+        elif isinstance(key, (int, np.integer)):
+            old = np.ndarray.__getitem__(self, key)
+            np.ndarray.__setitem__(self, key, value)
+            new = np.ndarray.__getitem__(self, key)
+            if (old == 1) != (new == 1):
+                self.update(key, 1 if new == 1 else -1)
+            if (old == NA_VALUE) != (new == NA_VALUE):
+                self.proposalNodes.clear()
+                self.zeroOneNodeSets = None
+            elif old != new and self.zeroOneNodeSets is not None:
+                self.zeroOneNodeSets.move(int(key), 1 if new == 1 else 0)
+        else:
+            np.ndarray.__setitem__(self, key, value)
+            self.proposalNodes.clear()
+            self.zeroOneNodeSets = None
+            self.recompute()
+
+
+    def update(self, i, delta):
+        """
+        Update the counts for the neighbours of node i when its
+        outcome has changed to 1 (delta = +1) or from 1 (delta = -1)
+        """
+        plusCount = self.plusCount
+        plusDegreeSum = self.plusDegreeSum
+        delta_degree = delta * self.degrees[i]
+        for u in self.G.neighbourIterator(i):
+            plusCount[u] += delta
+            plusDegreeSum[u] += delta_degree
+        for (attrname, counts) in self.samePlusCounts.items():
+            cat = self.catCodes[attrname]
+            if cat[i] != NA_VALUE:
+                for u in self.G.neighbourIterator(i):
+                    if cat[u] == cat[i]:
+                        counts[u] += delta
+        if self.distanceSums:
+            # distance sums are updated only when next used, as the
+            # samplers often change the outcome of a node and then
+            # change it back again (if the move is not accepted)
+            pending = self.pendingMoves.get(i, 0) + delta
+            if pending != 0:
+                self.pendingMoves[i] = pending
+            else:
+                del self.pendingMoves[i]
+
+
+    def recompute(self):
+        """
+        Recompute all the counts from the outcome vector
+        """
+        n = len(self.indptr) - 1
+        rows = csr_rows(self.indptr)
+        a = outcome_indicator(self)
+        self.plusCount = np.bincount(rows, weights = a[self.indices],
+                                     minlength = n).astype(np.int64).tolist()
+        self.plusDegreeSum = np.bincount(
+            rows, weights = (a * np.diff(self.indptr))[self.indices],
+            minlength = n).astype(np.int64).tolist()
+        for attrname in self.samePlusCounts:
+            self.samePlusCounts[attrname] = self.computeSamePlusCount(attrname)
+        self.pendingMoves = {}
+        for (key, (distances, _)) in self.distanceSums.items():
+            self.distanceSums[key] = (distances, distances.sumDistances(a))
+
+
+    def computeSamePlusCount(self, attrname):
+        """
+        Return list of the number of neighbours of each node
+        with outcome 1 and the same (not NA) value of the categorical
+        attribute attrname
+        """
+        (match, _) = category_match_arcs(self.G, attrname,
+                                         self.indptr, self.indices)
+        a = outcome_indicator(self)
+        return np.bincount(csr_rows(self.indptr),
+                           weights = match * a[self.indices],
+                           minlength = len(self.indptr) - 1
+                           ).astype(np.int64).tolist()
+
+
+    def samePlusCount(self, attrname):
+        """
+        Return list of the number of neighbours of each node
+        with outcome 1 and the same (not NA) value of the categorical
+        attribute attrname. It is computed on first use and then
+        maintained as the outcome vector changes.
+        """
+        if attrname not in self.samePlusCounts:
+            self.catCodes[attrname] = np.asarray(
+                self.G.catattr[attrname]).tolist()
+            self.samePlusCounts[attrname] = self.computeSamePlusCount(attrname)
+        return self.samePlusCounts[attrname]
+
+
+
+    def applyPendingMoves(self, i):
+        """
+        Update the distance sums for the changes of outcome of all
+        nodes other than i since they were last updated (the distance
+        sum for i does not depend on the outcome of i itself)
+        """
+        pending = self.pendingMoves
+        if not pending or (len(pending) == 1 and i in pending):
+            return
+        for j in [j for j in pending if j != i]:
+            for (distances, sums) in self.distanceSums.values():
+                (nodes, dists) = distances.distances(j)
+                sums[nodes] += pending[j] * dists
+            del pending[j]
+
+
+    def distanceSum(self, distances, i):
+        """
+        Return the sum of the distances from node i to all other nodes
+        with outcome 1. The sums for all nodes are computed on first use
+        and then updated (with one pass over the distances from a node)
+        only when the outcome of a node has changed.
+
+        Parameters:
+           distances - GeographicDistance object
+           i         - node to get the sum of distances for
+        """
+        key = id(distances)
+        if key not in self.distanceSums:
+            self.applyPendingMoves(None)
+            self.distanceSums[key] = (distances, distances.sumDistances(
+                outcome_indicator(self)))
+        else:
+            self.applyPendingMoves(i)
+        return float(self.distanceSums[key][1][i])
+
+
+
+class DirectedOutcomeState(OutcomeState):
+    """
+    Outcome vector (numpy array of 0, 1 or NA_VALUE for each node) of
+    a digraph, which also maintains for each node i:
+
+      outPlusCount[i]    - the number of out-neighbours of i with outcome 1
+      inPlusCount[i]     - the number of in-neighbours of i with outcome 1
+      mutualPlusCount[i] - the number of mutual neighbours of i (i.e.
+                           with reciprocated arcs) with outcome 1
+
+    updated in O(degree) time when the outcome of a node changes to
+    or from 1, exactly as for OutcomeState. The change statistic
+    functions in changeStatisticsALAAMdirected.py use the counts when
+    A is a DirectedOutcomeState, making e.g. Contagion O(1).
+    """
+
+    def initialize(self):
+        """
+        Set up the CSR arrays of the digraph for recompute()
+        """
+        self.csr = csr_digraph(self.G)
+
+
+    def __array_finalize__(self, obj):
+        OutcomeState.__array_finalize__(self, obj)
+        self.outPlusCount = None
+
+
+    def update(self, i, delta):
+        """
+        Update the counts for the in-, out- and mutual neighbours of
+        node i when its outcome has changed to 1 (delta = +1) or from
+        1 (delta = -1)
+        """
+        inPlusCount = self.inPlusCount
+        for u in self.G.outIterator(i):
+            inPlusCount[u] += delta
+        outPlusCount = self.outPlusCount
+        for u in self.G.inIterator(i):
+            outPlusCount[u] += delta
+        mutualPlusCount = self.mutualPlusCount
+        for u in self.G.mutualIterator(i):
+            mutualPlusCount[u] += delta
+
+
+    def recompute(self):
+        """
+        Recompute all the counts from the outcome vector
+        """
+        g = self.csr
+        a = outcome_indicator(self)
+        self.outPlusCount = neighbour_sum(g.indptr, g.indices, a
+                                          ).astype(np.int64).tolist()
+        self.inPlusCount = neighbour_sum(g.in_indptr, g.in_indices, a
+                                         ).astype(np.int64).tolist()
+        self.mutualPlusCount = np.bincount(
+            csr_rows(g.indptr), weights = g.reciprocated * a[g.indices],
+            minlength = g.numNodes()).astype(np.int64).tolist()
+
+
+
+class BipartiteOutcomeState(OutcomeState):
+    """
+    Outcome vector (numpy array of 0, 1 or NA_VALUE for each node) of
+    a two-mode network, which maintains for each node i, over the
+    other nodes j (necessarily of the same mode as i) with outcome 1:
+
+      twoPathPlusSum[i]   - the sum of the number of two-paths
+                            i -- v -- j, p(i, j)
+      fourCyclePlusSum[i] - the sum of p(i, j) choose 2, i.e. the number
+                            of four-cycles containing i and j
+
+    and (only for categorical attributes asked for with
+    twoPathCategorySums()) the sums of p(i, j) over those j which have
+    the same, and which have any (not NA), value of the categorical
+    attribute. These are the change statistics AlterTwoStar2,
+    FourCycle2 and BpAlterSameTwoStar2 (and BpAlterDiffTwoStar2) in
+    changeStatisticsALAAMbipartite.py.
+
+    When the outcome of node k changes to or from 1, the sums are
+    updated along the row of k in the two-paths matrix (see
+    BipartiteGraph.twoPathsRow()), rather than each change statistic
+    scanning the row of (or the neighbours of neighbours of) the node
+    it is computed for on every proposal. The sums are numpy arrays,
+    as they are updated for a row at a time.
+    """
+
+    def __array_finalize__(self, obj):
+        OutcomeState.__array_finalize__(self, obj)
+        self.twoPathPlusSum = None
+
+
+    def initialize(self):
+        """
+        Set up the dicts for the categorical attribute sums
+        """
+        self.catArrays = {}  # dict attrname -> categorical values array
+        self.twoPathCategorySumsDict = {} # dict attrname -> (same, valid)
+
+
+    def update(self, i, delta):
+        """
+        Update the sums along the row of node i in the two-paths matrix
+        when its outcome has changed to 1 (delta = +1) or from 1
+        (delta = -1)
+        """
+        (cols, p) = self.G.twoPathsRow(i)
+        p = np.asarray(p, dtype = np.int64)
+        self.twoPathPlusSum[cols] += delta * p
+        self.fourCyclePlusSum[cols] += delta * (p * (p - 1) // 2)
+        for (attrname, (same, valid)) in self.twoPathCategorySumsDict.items():
+            cat = self.catArrays[attrname]
+            if cat[i] != NA_VALUE:
+                valid[cols] += delta * p
+                match = cat[cols] == cat[i]
+                same[cols[match]] += delta * p[match]
+
+
+    def recompute(self):
+        """
+        Recompute all the sums from the outcome vector
+        """
+        n = len(self)
+        self.twoPathPlusSum = np.zeros(n, dtype = np.int64)
+        self.fourCyclePlusSum = np.zeros(n, dtype = np.int64)
+        for attrname in self.twoPathCategorySumsDict:
+            self.twoPathCategorySumsDict[attrname] = (
+                np.zeros(n, dtype = np.int64), np.zeros(n, dtype = np.int64))
+        for k in np.flatnonzero(outcome_indicator(self)).tolist():
+            self.update(k, 1)
+
+
+    def twoPathCategorySums(self, attrname):
+        """
+        Return tuple (same, valid) of numpy arrays of, for each node i,
+        the sum of the number of two-paths from i to nodes with outcome
+        1 and the same (not NA) value of the categorical attribute
+        attrname as i (same), and to nodes with outcome 1 and any not NA
+        value of it (valid). These are computed on first use and then
+        maintained as the outcome vector changes.
+        """
+        if attrname not in self.twoPathCategorySumsDict:
+            self.catArrays[attrname] = np.asarray(self.G.catattr[attrname])
+            self.twoPathCategorySumsDict[attrname] = None
+            self.recompute()
+        return self.twoPathCategorySumsDict[attrname]
+
+
+
+def make_outcome_state(G, A):
+    """
+    Return an outcome vector for the samplers to use for the network G:
+    an OutcomeState for an undirected one-mode network, a
+    DirectedOutcomeState for a digraph, or a BipartiteOutcomeState
+    for a two-mode network. In any case it is a copy of A.
+
+    Parameters:
+       G - Graph, Digraph or BipartiteGraph object
+       A - vector of 0/1/NA_VALUE outcome variables
+
+    Return value:
+       OutcomeState, DirectedOutcomeState or BipartiteOutcomeState
+       copy of A
+    """
+    if isinstance(G, Digraph):
+        return DirectedOutcomeState(G, A)
+    if isinstance(G, BipartiteGraph):
+        return BipartiteOutcomeState(G, A)
+    return OutcomeState(G, A)
+
+
+def proposal_nodes(G, A, mode = None, inner = False):
+    """
+    Return list of the nodes the samplers can propose toggling the
+    outcome of: those with outcome not NA, and (if inner) in the inner
+    waves of the snowball sample (G.inner_nodes) and (if mode is not
+    None) of the given mode of the two-mode network, so that a sampler
+    can choose a node uniformly at random from the list rather than
+    choosing any node and trying again if it is NA (or not in the inner
+    waves or the mode).
+
+    If A is an OutcomeState the list is computed once and kept (until
+    an outcome is changed to or from NA), so the samplers, called many
+    times with the same outcome vector, do not recompute it every time.
+
+    Parameters:
+       G     - Graph, Digraph or BipartiteGraph object
+       A     - vector of 0/1/NA_VALUE outcome variables
+       mode  - MODE_A or MODE_B (BipartiteGraph only) or None for all
+               nodes. Default None.
+       inner - if True, only nodes in the inner snowball sampling
+               waves. Default False.
+
+    Return value:
+       list of node ids with outcome not NA and satisfying the conditions
+    """
+    cache = getattr(A, 'proposalNodes', None)
+    if cache is not None and (mode, inner) in cache:
+        return cache[(mode, inner)]
+    if inner:
+        nodes = np.asarray(G.inner_nodes, dtype = np.int64)
+    elif mode == MODE_A:
+        nodes = np.arange(G.num_A_nodes)
+    elif mode == MODE_B:
+        nodes = np.arange(G.num_A_nodes, G.numNodes())
+    else:
+        nodes = np.arange(G.numNodes())
+    if inner and mode is not None:
+        nodes = nodes[(nodes < G.num_A_nodes) == (mode == MODE_A)]
+    nodes = nodes[np.asarray(A)[nodes] != NA_VALUE].tolist()
+    if cache is not None:
+        cache[(mode, inner)] = nodes
+    return nodes
@@ -3,9 +3,17 @@
 # Author:  Alex Stivala
 # Created: August 2022
 #
-# Defines a sparse matrix data structure
+# Defines sparse matrix data structures
 #
 
+import bisect
+import numpy as np
+
+# maximum number of two-paths generated at once (unless from a single
+# node) when computing the two-paths matrix in adjacency_two_paths(),
+# to bound memory use
+MAX_PAIRS_CHUNK = 2**22
+
 
 class SparseMatrix:
     """The sparse matrix is represented as a dictionary of
@@ -25,9 +33,10 @@ class SparseMatrix:
     which are effectively sparse adjacency matrix (adjacency list)
     storage, with operations specific to graphs.
 
-    An alternative would be something like compressed sparse row (CSR)
-    storage, using 3 arrays, but dictionaries are very convenient in
-    Python (and arrays are not).
+    An alternative is compressed sparse row (CSR) storage, using 3
+    arrays, as in CSRSparseMatrix, which has the same interface (for
+    reading values) but is immutable. Dictionaries are very convenient
+    in Python for building a matrix incrementally.
 
     """
 
@@ -80,6 +89,21 @@ class SparseMatrix:
         """
         return iter(self.A[i].values())
 
+    def rowNonZeroColumns(self, i):
+        """
+        Return numpy array of columns of nonzero entries in row i
+        """
+        return np.fromiter(self.A[i].keys(), dtype = np.int64,
+                           count = len(self.A[i]))
+
+    def rowNonZeroValues(self, i):
+        """
+        Return numpy array of nonzero entries in row i, in the same
+        order as rowNonZeroColumns(i)
+        """
+        return np.fromiter(self.A[i].values(), dtype = np.int64,
+                           count = len(self.A[i]))
+
     def insertValue(self, i, j, v):
         """
         Insert value v for A(i,j) in place
@@ -101,3 +125,202 @@ class SparseMatrix:
         """
         self.A[i].pop(j)
 
+
+
+class CSRSparseMatrix:
+    """The sparse matrix is represented in compressed sparse row (CSR)
+    format with numpy arrays, rather than the dictionary of
+    dictionaries used by SparseMatrix. Indexed by integers 0..n-1.
+
+    indptr is an array of n+1 offsets, and indices and values arrays
+    of the column and value of each nonzero entry, so that the nonzero
+    columns of row i are indices[indptr[i]:indptr[i+1]] in sorted
+    (ascending) order, with the corresponding values in
+    values[indptr[i]:indptr[i+1]].
+
+    The matrix is immutable: it is built in bulk (see
+    adjacency_two_paths() and csr_sparse_matrix()) and provides the
+    same interface as SparseMatrix for reading values. In addition
+    rowNonZeroColumns() and rowNonZeroValues() return numpy views of
+    a row, so computations over a row can be vectorized.
+    """
+
+    def __init__(self, indptr, indices, values):
+        """
+        Construct sparse matrix from CSR arrays (not copied).
+
+        Parameters:
+            indptr  - numpy array of n+1 row offsets
+            indices - numpy array of column of each nonzero entry,
+                      sorted within each row
+            values  - numpy array of value of each nonzero entry
+        """
+        self.indptr = indptr
+        self.indices = indices
+        self.values = values
+
+    def getValue(self, i, j):
+        """
+        Return value A(i, j)
+        """
+        # binary search in sorted columns of row i
+        start = self.indptr[i]
+        end = self.indptr[i+1]
+        k = bisect.bisect_left(self.indices, j, start, end)
+        return int(self.values[k]) if k < end and self.indices[k] == j else 0
+
+    def numRows(self):
+        """
+        Return number of rows in matrix
+        """
+        return len(self.indptr) - 1
+
+    def numNonZero(self):
+        """
+        Return number of nonzero entries in matrix
+        """
+        return len(self.indices)
+
+    def numNonZeroInRow(self, i):
+        """
+        Return number of nonzero entries in row i
+        """
+        return int(self.indptr[i+1] - self.indptr[i])
+
+    def rowNonZeroColumnsIterator(self, i):
+        """
+        Return iterator over columns of nonzero entries in row i
+        """
+        return iter(self.indices[self.indptr[i]:self.indptr[i+1]].tolist())
+
+    def rowNonZeroValuesIterator(self, i):
+        """
+        Return iterator over nonzero entries in row i
+        """
+        return iter(self.values[self.indptr[i]:self.indptr[i+1]].tolist())
+
+    def rowNonZeroColumns(self, i):
+        """
+        Return numpy array (view) of sorted columns of nonzero entries
+        in row i
+        """
+        return self.indices[self.indptr[i]:self.indptr[i+1]]
+
+    def rowNonZeroValues(self, i):
+        """
+        Return numpy array (view) of nonzero entries in row i, in the
+        same order as rowNonZeroColumns(i)
+        """
+        return self.values[self.indptr[i]:self.indptr[i+1]]
+
+    def insertValue(self, i, j, v):
+        """
+        Not supported: CSRSparseMatrix is immutable
+        """
+        raise Exception("cannot insert value in immutable CSRSparseMatrix")
+
+    def incrementValue(self, i, j):
+        """
+        Not supported: CSRSparseMatrix is immutable
+        """
+        raise Exception("cannot increment value in immutable CSRSparseMatrix")
+
+    def removeValue(self, i, j):
+        """
+        Not supported: CSRSparseMatrix is immutable
+        """
+        raise Exception("cannot remove value in immutable CSRSparseMatrix")
+
+
+def csr_sparse_matrix(M):
+    """
+    Convert SparseMatrix to CSRSparseMatrix
+
+    Parameters:
+       M - SparseMatrix object
+
+    Return value:
+       CSRSparseMatrix with the same values as M
+    """
+    n = M.numRows()
+    indptr = np.zeros(n + 1, dtype = np.int64)
+    np.cumsum([M.numNonZeroInRow(i) for i in range(n)], out = indptr[1:])
+    indices = np.zeros(indptr[-1], dtype = np.int32 if n < 2**31 else
+                       np.int64)
+    values = np.zeros(indptr[-1], dtype = np.int64)
+    for i in range(n):
+        cols = M.rowNonZeroColumns(i)
+        order = np.argsort(cols)
+        indices[indptr[i]:indptr[i+1]] = cols[order]
+        values[indptr[i]:indptr[i+1]] = M.rowNonZeroValues(i)[order]
+    return CSRSparseMatrix(indptr, indices, values)
+
+
+def adjacency_two_paths(indptr, indices, max_nonzero = None):
+    """
+    Compute the matrix of the number of two-paths i -- v -- j (for
+    distinct i and j) between all pairs of nodes of a graph, i.e. the
+    sparse product of the (symmetric) adjacency matrix with itself,
+    without its diagonal. For a bipartite graph this is the product
+    of the biadjacency matrix with its transpose (and the transpose
+    with the biadjacency matrix).
+
+    The rows are processed in chunks of consecutive rows with at most
+    MAX_PAIRS_CHUNK two-paths in total (or a single row): every
+    two-path i -- v -- j from each row i in the chunk is generated
+    and the two-paths to each distinct j counted. Since the chunks
+    are disjoint sets of rows in order, their results are simply
+    concatenated, and memory use is bounded by the size of the result
+    and the chunk size, not the total number of two-paths.
+
+    Parameters:
+       indptr      - CSR offsets array of the adjacency matrix (with both
+                     directions of each edge, no self-loops)
+       indices     - CSR neighbours array of the adjacency matrix
+       max_nonzero - maximum number of nonzero entries allowed in the
+                     result, or None for no limit. Default None.
+
+    Return value:
+       CSRSparseMatrix of two-paths counts, or None if it would have
+       more than max_nonzero nonzero entries
+    """
+    n = len(indptr) - 1
+    degrees = np.diff(indptr)
+    # number of two-paths i -- v -- j (including j = i) from each row i
+    row_paths = np.zeros(n + 1, dtype = np.int64)
+    np.cumsum(np.add.reduceat(np.append(degrees[indices], 0), indptr[:-1])
+              * (degrees > 0), out = row_paths[1:])
+    keys_list = []
+    counts_list = []
+    num_nonzero = 0
+    start = 0
+    while start < n:
+        end = max(int(np.searchsorted(row_paths,
+                                      row_paths[start] + MAX_PAIRS_CHUNK,
+                                      side = 'right')) - 1, start + 1)
+        # each edge i -- v in the rows of the chunk, to each neighbour of v
+        first = np.arange(indptr[start], indptr[end], dtype = np.int64)
+        mid = indices[first].astype(np.int64)
+        c = degrees[mid]
+        local = (np.arange(np.sum(c), dtype = np.int64) -
+                 np.repeat(np.cumsum(c) - c, c))
+        i = np.repeat(np.repeat(np.arange(start, end, dtype = np.int64),
+                                degrees[start:end]), c)
+        j = indices[np.repeat(indptr[mid], c) + local].astype(np.int64)
+        (keys, counts) = np.unique((i * n + j)[i != j], return_counts = True)
+        num_nonzero += len(keys)
+        if max_nonzero is not None and num_nonzero > max_nonzero:
+            return None
+        keys_list.append(keys)
+        counts_list.append(counts)
+        start = end
+    keys = (np.concatenate(keys_list) if len(keys_list) > 0 else
+            np.zeros(0, dtype = np.int64))
+    counts = (np.concatenate(counts_list) if len(counts_list) > 0 else
+              np.zeros(0, dtype = np.int64))
+    tp_indptr = np.zeros(n + 1, dtype = np.int64)
+    np.cumsum(np.bincount(keys // n, minlength = n), out = tp_indptr[1:])
+    return CSRSparseMatrix(tp_indptr,
+                           (keys % n).astype(np.int32 if n < 2**31 else
+                                             np.int64),
+                           counts.astype(np.int32))
@@ -31,11 +31,13 @@ import numpy as np         # used for matrix & vector data types and functions
 
 from Graph import Graph,NA_VALUE
 from changeStatisticsALAAM import *
+from coreALAAMsampler import coreALAAMsampler
+from OutcomeState import proposal_nodes
 
 
 
 def basicALAAMsampler(G, A, changestats_func_list, theta, performMove,
-                      sampler_m):
+                      sampler_m, rng = None):
     """
     basicALAAMsampler - sample from ALAAM distribution with basic sampler,
                    returning estimate of E(Delta_z(x_obs))
@@ -54,6 +56,12 @@ def basicALAAMsampler(G, A, changestats_func_list, theta, performMove,
                              updating the outcome vector A
                              (otherwise are not modified)
        sampler_m           - number of proposals (iterations of sampler)
+       rng                 - numpy random Generator (e.g. a per-run stream,
+                             see run_ee() in estimateALAAMEE.py) to draw
+                             the random numbers from, in blocks (of
+                             up to SAMPLER_BLOCK_SIZE proposals).
+                             Default None, for a Generator seeded from
+                             the random module.
 
     Returns:
         acceptance_rate     - sampler acceptance rate
@@ -63,48 +71,10 @@ def basicALAAMsampler(G, A, changestats_func_list, theta, performMove,
     Note A is updated in place if performMove is True
     otherwise unchanged
     """
-    n = len(changestats_func_list)
-#    assert(len(theta) == n)
-    accepted = 0
-    changeTo1ChangeStats = np.zeros(n)
-    changeTo0ChangeStats = np.zeros(n)
-    for k in range(sampler_m):
-        # basic sampler: select a node  i uniformly at random
-        # and toggle outcome variable for it
-        i = random.randint(0, G.numNodes()-1)
-        while A[i] == NA_VALUE:  # keep going until we get one that is not NA
-            i = random.randint(0, G.numNodes()-1)
-        isChangeToZero = (A[i] == 1)
-        if isChangeToZero:
-            A[i] = 0
-
-        # compute change statistics for each of the n statistics using the
-        # list of change statistic functions
-        changestats = np.zeros(n)
-        for l in range(n):
-            changestats[l] = changestats_func_list[l](G, A, i)
-        changeSignMul = -1 if isChangeToZero else +1
-        total = np.sum(theta * changeSignMul * changestats)
-        if random.uniform(0, 1) < np.exp(total): #np.exp gives inf not overflow
-            accepted += 1
-            if performMove:
-                # actually accept the move.
-                # if changing to 0, we have already done it.
-                # For changeTo1 move, set outcome to 1 now
-                if not isChangeToZero:
-                    A[i] = 1
-            else:
-                # if we are not to actually perform the moves, then reverse
-                # changes for changeTo0 move made so A same as before
-                if isChangeToZero:
-                    A[i] = 1
-            if isChangeToZero:
-                changeTo0ChangeStats += changestats
-            else:
-                changeTo1ChangeStats += changestats
-        elif isChangeToZero: # move not accepted, so reverse change 
-            A[i] = 1
-
-    acceptance_rate = float(accepted) / sampler_m
-    return (acceptance_rate, changeTo1ChangeStats, changeTo0ChangeStats)
+    # basic sampler: select a node i uniformly at random (from those
+    # that are not NA) and toggle outcome variable for it
+    nodes = proposal_nodes(G, A)
+    assert len(nodes) > 0, "no nodes with outcome not NA"
+    return coreALAAMsampler(G, A, changestats_func_list, theta, performMove,
+                            sampler_m, rng, nodes = nodes)
 
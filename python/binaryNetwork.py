@@ -0,0 +1,367 @@
+#
+# File:    binaryNetwork.py
+# Author:  Alex Stivala
+# Created: October 2026
+#
+# Functions to save and load Graph, Digraph and BipartiteGraph
+# objects (including node attributes and snowball sampling zones)
+# in a binary on-disk format of numpy arrays, which can be opened
+# with memory mapping so loading costs almost nothing, and to use
+# this as a cache of the network parsed from the text files.
+#
+
+import os
+import json
+import hashlib
+import tempfile
+import numpy as np
+
+from Graph import Graph
+from CSRGraph import CSRGraph
+from Digraph import Digraph
+from CSRDigraph import CSRDigraph
+from BipartiteGraph import BipartiteGraph
+from pajekLoader import edges_to_csr
+from AttributeStore import AttributeStore
+
+# version number of the binary network format
+BINARY_FORMAT_VERSION = 1
+
+# name of the file containing the metadata in the binary network directory
+METADATA_FILENAME = 'network.json'
+
+
+def file_signature(filename, with_hash = True):
+    """
+    Return signature of a file used to decide if a cache built from it
+    is still valid: its size, modification time and (optionally)
+    SHA-256 hash of its contents.
+
+    Parameters:
+       filename  - name of file
+       with_hash - if True compute the hash of the file. Default True.
+
+    Return value:
+      dict with keys 'size', 'mtime' and 'sha256' (None if not with_hash)
+    """
+    st = os.stat(filename)
+    sha256 = None
+    if with_hash:
+        h = hashlib.sha256()
+        with open(filename, 'rb') as f:
+            for block in iter(lambda: f.read(1024*1024), b''):
+                h.update(block)
+        sha256 = h.hexdigest()
+    return {'size': st.st_size, 'mtime': st.st_mtime_ns, 'sha256': sha256}
+
+
+def adjacency_arrays(G):
+    """
+    Return the CSR adjacency arrays (indptr, indices) of the network:
+    for Graph (or BipartiteGraph) both directions of each edge are
+    included, for Digraph the arcs (out-neighbours).
+
+    Parameters:
+       G - Graph, Digraph or BipartiteGraph object
+
+    Return value:
+       tuple (indptr, indices) as described in CSRGraph
+    """
+    if isinstance(G, (CSRGraph, CSRDigraph)):
+        return (G.indptr, G.indices)
+    edges = np.array(list(G.edgeIterator()), dtype = np.int64).reshape(-1, 2)
+    (i, j) = (edges[:, 0], edges[:, 1])
+    if not isinstance(G, Digraph):
+        (i, j) = (np.concatenate((i, j)), np.concatenate((j, i)))
+    return edges_to_csr(G.numNodes(), i, j)
+
+
+def edge_weight_array(G):
+    """
+    Return the edge weights of an undirected one-mode network as numpy
+    array aligned with the indices array from adjacency_arrays(G), or
+    None if the network has no edge weights (every edge has weight 1).
+
+    Parameters:
+       G - Graph, Digraph or BipartiteGraph object
+
+    Return value:
+       numpy float64 array of edge weights, or None
+    """
+    if isinstance(G, CSRGraph):
+        return G.weights
+    if isinstance(G, (Digraph, BipartiteGraph)):
+        return None
+    (indptr, indices) = adjacency_arrays(G)
+    rows = np.repeat(np.arange(G.numNodes()), np.diff(indptr))
+    weights = np.array([G.edgeWeight(i, j) for (i, j) in
+                        zip(rows.tolist(), indices.tolist())],
+                       dtype = np.float64)
+    return None if np.all(weights == 1) else weights
+
+
+def in_adjacency_arrays(G):
+    """
+    Return the CSR in-adjacency arrays (in_indptr, in_indices) of the
+    digraph, i.e. the in-neighbours of each node.
+
+    Parameters:
+       G - Digraph object
+
+    Return value:
+       tuple (in_indptr, in_indices) as described in CSRDigraph
+    """
+    if isinstance(G, CSRDigraph):
+        return (G.in_indptr, G.in_indices)
+    arcs = np.array(list(G.edgeIterator()), dtype = np.int64).reshape(-1, 2)
+    return edges_to_csr(G.numNodes(), arcs[:, 1], arcs[:, 0])
+
+
+def save_binary(G, dirname, sources = None):
+    """
+    Save network (including node attributes and snowball sampling
+    zones) in binary format as numpy .npy files in a directory.
+
+    Parameters:
+       G       - Graph, Digraph or BipartiteGraph object to save
+       dirname - directory to save network in. It is created if it
+                 does not exist. WARNING: files in it are overwritten.
+       sources - dict of source filename signatures (from
+                 file_signature()) to store in the metadata, or None.
+                 Default None.
+    """
+    os.makedirs(dirname, exist_ok = True)
+    directed = isinstance(G, Digraph)
+    bipartite = isinstance(G, BipartiteGraph)
+    n = G.numNodes()
+    (indptr, indices) = adjacency_arrays(G)
+    np.save(os.path.join(dirname, 'indptr.npy'), indptr)
+    np.save(os.path.join(dirname, 'indices.npy'), indices)
+    weights = edge_weight_array(G)
+    if weights is not None:
+        np.save(os.path.join(dirname, 'weights.npy'), weights)
+    if directed:
+        # also store in-neighbours so they need not be computed on loading
+        (in_indptr, in_indices) = in_adjacency_arrays(G)
+        np.save(os.path.join(dirname, 'in_indptr.npy'), in_indptr)
+        np.save(os.path.join(dirname, 'in_indices.npy'), in_indices)
+
+    metadata = {'version': BINARY_FORMAT_VERSION,
+                'type': ('Digraph' if directed else
+                         'BipartiteGraph' if bipartite else 'Graph'),
+                'num_nodes': n,
+                'num_A_nodes': G.num_A_nodes if bipartite else None,
+                'zone': G.zone is not None,
+                'permutation': G.permutation is not None,
+                'weights': weights is not None,
+                'sources': sources}
+    # attribute names may not be valid filenames so files are numbered
+    for (attrtype, attrs, dtype) in [('binattr', G.binattr, np.int8),
+                                     ('contattr', G.contattr, np.float64),
+                                     ('catattr', G.catattr, np.int32)]:
+        names = list(attrs.keys()) if attrs is not None else None
+        metadata[attrtype] = names
+        for (k, name) in enumerate(names if names is not None else []):
+            values = np.asarray(attrs[name])
+            if dtype == np.int32 and (np.max(values, initial = 0) >= 2**31):
+                dtype = np.int64
+            np.save(os.path.join(dirname, attrtype + '_' + str(k) + '.npy'),
+                    values.astype(dtype))
+    if G.zone is not None:
+        np.save(os.path.join(dirname, 'zone.npy'),
+                np.asarray(G.zone, dtype = np.int32))
+    if G.permutation is not None:
+        np.save(os.path.join(dirname, 'permutation.npy'),
+                np.asarray(G.permutation, dtype = np.int64))
+    # write metadata last so incomplete directory is never valid
+    with open(os.path.join(dirname, METADATA_FILENAME), 'w') as f:
+        json.dump(metadata, f)
+
+
+def load_binary(dirname, mmap = True):
+    """
+    Load network saved with save_binary()
+
+    An undirected (one-mode) network is loaded as an (immutable)
+    CSRGraph, and a directed network as an (immutable) CSRDigraph,
+    directly using the (memory mapped) saved arrays, so loading costs
+    almost nothing. BipartiteGraph objects are built from the saved
+    arrays.
+
+    Parameters:
+       dirname - directory network was saved in with save_binary()
+       mmap    - if True open the arrays with memory mapping (read-only)
+                 rather than reading them into memory. Default True.
+
+    Return value:
+       CSRGraph, CSRDigraph or BipartiteGraph object
+    """
+    mmap_mode = 'r' if mmap else None
+    with open(os.path.join(dirname, METADATA_FILENAME)) as f:
+        metadata = json.load(f)
+    if metadata['version'] != BINARY_FORMAT_VERSION:
+        raise ValueError('unsupported binary network format version ' +
+                         str(metadata['version']) + ' in ' + dirname)
+    n = metadata['num_nodes']
+    load = lambda name: np.load(os.path.join(dirname, name + '.npy'),
+                                mmap_mode = mmap_mode)
+    (indptr, indices) = (load('indptr'), load('indices'))
+    if metadata['type'] == 'Graph':
+        G = CSRGraph(csr = (indptr, indices) + ((load('weights'),) if
+                                                metadata.get('weights') else ()))
+    elif metadata['type'] == 'Digraph':
+        G = CSRDigraph(csr = (indptr, indices,
+                              load('in_indptr'), load('in_indices')))
+    else:
+        # build source and target arrays of each edge from CSR
+        i = np.repeat(np.arange(n), np.diff(indptr))
+        j = np.asarray(indices, dtype = np.int64)
+        num_A = metadata['num_A_nodes']
+        G = BipartiteGraph(num_nodes = (num_A, n - num_A))
+        G.insertEdges(i[i < j], j[i < j])
+
+    for attrtype in ['binattr', 'contattr', 'catattr']:
+        names = metadata[attrtype]
+        if names is not None:
+            setattr(G, attrtype, AttributeStore(attrtype, arrays = dict(
+                [(name, load(attrtype + '_' + str(k)))
+                 for (k, name) in enumerate(names)])))
+    if metadata['zone']:
+        G.zone = load('zone').tolist()
+        G.max_zone = max(G.zone)
+        G.inner_nodes = [i for (i, z) in enumerate(G.zone) if z < G.max_zone]
+    if metadata.get('permutation'):
+        G.permutation = load('permutation')
+    return G
+
+
+def load_network(edgelist_filename, binattr_filename = None,
+                 contattr_filename = None, catattr_filename = None,
+                 zone_filename = None, directed = False, bipartite = False,
+                 cache_dir = None, reorder = None, edge_weights = False):
+    """
+    Load network from Pajek format edge list and attribute files,
+    optionally using a binary cache (see save_binary()) of the network
+    in cache_dir. The cache is used if it exists and the source files
+    are unchanged (same size and modification time, or same contents
+    hash); otherwise the network is parsed from the text files and the
+    cache (re)written. This allows e.g. many parallel runs to share
+    the cost of parsing the text files once.
+
+    Each version of the cache is written to a new subdirectory of
+    cache_dir, which is never changed or removed as other processes
+    may be loading it, and a small file naming it is then atomically
+    replaced. So old versions are left behind when the source files
+    change, and can be removed when no process is using them.
+
+    Parameters:
+       edgelist_filename - filename of Pajek format edgelist
+       binattr_filename  - filename of binary attributes or None
+       contattr_filename - filename of continuous attributes or None
+       catattr_filename  - filename of categorical attributes or None
+       zone_filename     - filename of snowball sampling zones or None
+       directed          - True for directed network. Default False.
+       bipartite         - True for two-mode network. Default False.
+       cache_dir         - directory for binary network cache, or None
+                           for no caching. Default None.
+       reorder           - node ordering method ('rcm', 'degree' or 'bfs')
+                           to reorder the nodes with for better memory
+                           locality (see CSRGraph), or None for no
+                           reordering. Only for undirected one-mode
+                           networks. Default None.
+       edge_weights      - if True, load edge weights (e.g. distances)
+                           from the third column of the edge list (see
+                           CSRGraph). Only for undirected one-mode
+                           networks. Default False.
+
+    Return value:
+       Graph, Digraph or BipartiteGraph object, or CSRGraph for
+       undirected one-mode network and CSRDigraph for directed
+       network if cache_dir is not None (or CSRGraph if reorder
+       is not None)
+    """
+    if directed and bipartite:
+        raise Exception("directed bipartite network not suppored")
+    if reorder is not None and (directed or bipartite):
+        raise Exception("node reordering only supported for undirected "
+                        "one-mode network")
+    if edge_weights and (directed or bipartite):
+        raise Exception("edge weights only supported for undirected "
+                        "one-mode network")
+    filenames = {'edgelist': edgelist_filename,
+                 'binattr': binattr_filename,
+                 'contattr': contattr_filename,
+                 'catattr': catattr_filename,
+                 'zone': zone_filename}
+    if cache_dir is not None:
+        # cache subdirectory is determined by the source files
+        key = hashlib.sha256(repr(
+            (sorted((k, os.path.abspath(v)) for (k, v) in filenames.items()
+                    if v is not None), directed, bipartite, reorder) +
+            (('edge_weights',) if edge_weights else ())).encode()
+                             ).hexdigest()[:16]
+        cachename = os.path.join(cache_dir, os.path.splitext(
+            os.path.basename(edgelist_filename))[0] + '_' + key)
+        sources = None
+        try:
+            # cachename is the file naming the current version
+            with open(cachename) as f:
+                versionname = os.path.join(cache_dir, f.read().strip())
+            with open(os.path.join(versionname, METADATA_FILENAME)) as f:
+                sources = json.load(f)['sources']
+        except (OSError, ValueError):
+            pass
+        if sources is not None and all(
+                (sources.get(k) is None) == (v is None) for
+                (k, v) in filenames.items()):
+            valid = True
+            for (k, v) in filenames.items():
+                if v is None:
+                    continue
+                sig = file_signature(v, with_hash = False)
+                if (sig['size'] != sources[k]['size'] or
+                    (sig['mtime'] != sources[k]['mtime'] and
+                     file_signature(v)['sha256'] != sources[k]['sha256'])):
+                    valid = False
+                    break
+            if valid:
+                return load_binary(versionname)
+
+    if directed:
+        G = Digraph(edgelist_filename, binattr_filename, contattr_filename,
+                    catattr_filename, zone_filename)
+    elif bipartite:
+        G = BipartiteGraph(edgelist_filename, binattr_filename,
+                           contattr_filename, catattr_filename,
+                           zone_filename)
+    elif reorder is not None:
+        G = CSRGraph(edgelist_filename, binattr_filename,
+                     contattr_filename, catattr_filename, zone_filename,
+                     reorder = reorder, edge_weights = edge_weights)
+    else:
+        G = Graph(edgelist_filename, binattr_filename,
+                  contattr_filename, catattr_filename, zone_filename,
+                  edge_weights = edge_weights)
+
+    if cache_dir is not None:
+        sources = dict([(k, file_signature(v) if v is not None else None)
+                        for (k, v) in filenames.items()])
+        # write a new version then replace the file naming the current
+        # version, so that concurrent processes never see a partially
+        # written cache, nor lose one they are loading
+        os.makedirs(cache_dir, exist_ok = True)
+        versionname = tempfile.mkdtemp(
+            prefix = os.path.basename(cachename) + '.', dir = cache_dir)
+        save_binary(G, versionname, sources)
+        (fd, tmpname) = tempfile.mkstemp(dir = cache_dir)
+        with os.fdopen(fd, 'w') as f:
+            f.write(os.path.basename(versionname))
+        try:
+            os.replace(tmpname, cachename)
+        except OSError:
+            # cachename is not a file (e.g. an unversioned cache
+            # directory): this version is still used in this process
+            os.remove(tmpname)
+        # load from cache so same type is returned whether or not cached
+        G = load_binary(versionname)
+    return G
@@ -26,11 +26,13 @@ import numpy as np         # used for matrix & vector data types and functions
 
 from utils import NA_VALUE
 from BipartiteGraph import BipartiteGraph,MODE_A,MODE_B
+from coreALAAMsampler import coreALAAMsampler
+from OutcomeState import proposal_nodes
 
 
 def bipartiteALAAMsampler(mode,
                           G, A, changestats_func_list, theta, performMove,
-                          sampler_m):
+                          sampler_m, rng = None):
     """
     bipartiteALAAMsampler - sample from ALAAM distribution on bipartite
                             network with basic sampler,
@@ -77,6 +79,12 @@ def bipartiteALAAMsampler(mode,
                              updating the outcome vector A
                              (otherwise are not modified)
        sampler_m           - number of proposals (iterations of sampler)
+       rng                 - numpy random Generator (e.g. a per-run stream,
+                             see run_ee() in estimateALAAMEE.py) to draw
+                             the random numbers from, in blocks (of
+                             up to SAMPLER_BLOCK_SIZE proposals).
+                             Default None, for a Generator seeded from
+                             the random module.
 
     Returns:
         acceptance_rate     - sampler acceptance rate
@@ -87,49 +95,11 @@ def bipartiteALAAMsampler(mode,
     otherwise unchanged
     """
     assert mode in [MODE_A, MODE_B]
-    n = len(changestats_func_list)
-    accepted = 0
-    changeTo1ChangeStats = np.zeros(n)
-    changeTo0ChangeStats = np.zeros(n)
-    for k in range(sampler_m):
-        # basic sampler for two-mode network: select a node i of the
-        # specified mode unfiormly at random and toggle outcome
-        # variable for it
-        i = G.random_node(mode)
-        while A[i] == NA_VALUE:  # keep going until we get one that is not NA
-            i = G.random_node(mode)
-        assert G.bipartite_node_mode(i) == mode
-        isChangeToZero = (A[i] == 1)
-        if isChangeToZero:
-            A[i] = 0
-
-        # compute change statistics for each of the n statistics using the
-        # list of change statistic functions
-        changestats = np.zeros(n)
-        for l in range(n):
-            changestats[l] = changestats_func_list[l](G, A, i)
-        changeSignMul = -1 if isChangeToZero else +1
-        total = np.sum(theta * changeSignMul * changestats)
-        if random.uniform(0, 1) < np.exp(total): #np.exp gives inf not overflow
-            accepted += 1
-            if performMove:
-                # actually accept the move.
-                # if changing to 0, we have already done it.
-                # For changeTo1 move, set outcome to 1 now
-                if not isChangeToZero:
-                    A[i] = 1
-            else:
-                # if we are not to actually perform the moves, then reverse
-                # changes for changeTo0 move made so A same as before
-                if isChangeToZero:
-                    A[i] = 1
-            if isChangeToZero:
-                changeTo0ChangeStats += changestats
-            else:
-                changeTo1ChangeStats += changestats
-        elif isChangeToZero: # move not accepted, so reverse change 
-            A[i] = 1
-
-    acceptance_rate = float(accepted) / sampler_m
-    return (acceptance_rate, changeTo1ChangeStats, changeTo0ChangeStats)
+    # basic sampler for two-mode network: select a node i of the
+    # specified mode (and not NA) unfiormly at random and toggle outcome
+    # variable for it
+    nodes = proposal_nodes(G, A, mode = mode)
+    assert len(nodes) > 0, "no nodes of the mode with outcome not NA"
+    return coreALAAMsampler(G, A, changestats_func_list, theta, performMove,
+                            sampler_m, rng, nodes = nodes)
 
@@ -57,6 +57,21 @@ import functools
 
 from utils import NA_VALUE
 from Graph import Graph
+from GeographicDistance import GeographicDistance
+
+# Use as the distance matrix for ContagionDist e.g.
+# partial(changeContagionDist, EDGE_WEIGHTS) to use the edge weights of
+# the network (loaded with edge_weights = True) as the distances.
+# It is a string rather than an object so it is unchanged by pickling.
+EDGE_WEIGHTS = 'edgeweights'
+
+
+def is_edge_weights(distmatrix):
+    """
+    Return True if distmatrix is EDGE_WEIGHTS (use the edge weights
+    of the network as the distances) rather than a distance matrix
+    """
+    return isinstance(distmatrix, str) and distmatrix == EDGE_WEIGHTS
 
 
 
@@ -197,10 +212,10 @@ def changeTriangleT1(G, A, i):
      / \
     *---o
 
-    Fast version using cached two-paths function
+    Fast version using precomputed two-paths counts for each edge
     """
     return (0 if G.degree(i) < 2 else
-            sum([G.twoPaths(i, v) for v in G.neighbourIterator(i)]) // 2)
+            sum(G.neighbourTwoPathsList(i)) // 2)
 
 
 def changeContagion(G, A, i):
@@ -208,7 +223,12 @@ def changeContagion(G, A, i):
     change statistic for Contagion (partner attribute)
 
     *--*
+
+    If A is an OutcomeState, the number of neighbours of i with
+    outcome 1 is already known.
     """
+    if getattr(A, 'plusCount', None) is not None:
+        return A.plusCount[i]
     delta = 0
     for u in G.neighbourIterator(i):
         if A[u] == 1:
@@ -237,7 +257,11 @@ def changePartnerAttributeActivity(G, A, i):
 
     *--*--o
 
+    If A is an OutcomeState, this is computed from the number of
+    neighbours of i with outcome 1 and the sum of their degrees.
     """
+    if getattr(A, 'plusCount', None) is not None:
+        return (G.degree(i) - 2) * A.plusCount[i] + A.plusDegreeSum[i]
     delta = 0
     for u in G.neighbourIterator(i):
         if A[u] == 1:
@@ -250,7 +274,18 @@ def changePartnerPartnerAttribute(G, A, i):
     Change statistic for partner-partner-attribute (partner-resource)
 
     *--*--*
+
+    If A is an OutcomeState, this is computed from the number of
+    neighbours with outcome 1 of i and of each of its neighbours, in
+    O(degree) rather than O(degree^2) time.
     """
+    if getattr(A, 'plusCount', None) is not None:
+        plusCount = A.plusCount
+        delta = 0
+        for u in G.neighbourIterator(i):
+            if A[u] == 1:
+                delta += plusCount[u]
+        return 2 * delta + plusCount[i] * (plusCount[i] - 1)
     delta = 0
     for u in G.neighbourIterator(i):
         if A[u] == 1:
@@ -271,11 +306,12 @@ def changeTriangleT2(G, A, i):
      / \
     *---o
 
-    Fast version using cached two-paths function
+    Fast version using precomputed two-paths counts for each edge
     """
     return (0 if G.degree(i) < 2 else
-            sum([G.twoPaths(i, v) for
-                 v in G.neighbourIterator(i) if A[v] == 1]))
+            sum([twoPaths for (v, twoPaths) in
+                 zip(G.neighbourIterator(i), G.neighbourTwoPathsList(i))
+                 if A[v] == 1]))
         
 
 def changeTriangleT3(G, A, i):
@@ -310,7 +346,7 @@ def changeoOb(attrname, G, A, i):
 
     [*]
     """
-    return 0 if G.binattr[attrname][i] == NA_VALUE else G.binattr[attrname][i]
+    return 1 if G.binattr[attrname][i] == 1 else 0
 
 
 def changeo_Ob(attrname, G, A, i):
@@ -321,7 +357,8 @@ def changeo_Ob(attrname, G, A, i):
     """
     delta = 0
     for u in G.neighbourIterator(i):
-        delta += 0 if G.binattr[attrname][u] == NA_VALUE else G.binattr[attrname][u]
+        if G.binattr[attrname][u] == 1:
+            delta += 1
     return delta
 
 
@@ -370,7 +407,12 @@ def changeoO_OsameContagion(attrname, G, A, i):
     exogenous attributes)
 
     {*}--{*}
+
+    If A is an OutcomeState, the number of neighbours of i with outcome
+    1 and the same category is already known.
     """
+    if getattr(A, 'plusCount', None) is not None:
+        return A.samePlusCount(attrname)[i]
     delta = 0
     for u in G.neighbourIterator(i):
         if (G.catattr[attrname][u] != NA_VALUE and G.catattr[attrname][i] != NA_VALUE and
@@ -511,14 +553,20 @@ def changeGeographicHomophily(distmatrix, G, A, i):
     "regardless of whether these people are friends." (Daraganova & 
     Robins 2013, p. 245).
 
-    TODO: Note this implementation is not scalable to large networks, as the
-    distance matrix is NxN. For large networks, need to implement a version
-    that instead of a matrix calls a function to find the distance between
-    two nodes. However, even then, this change statistic involves
-    iterating over all nodes, rather than just neighbour nodes, and so
-    is not scalable.
+    For large networks, distmatrix can instead be a GeographicDistance
+    object, which computes distances from node coordinates (or a
+    distance function, optionally with a cutoff distance) so no NxN
+    matrix is needed. Then if A is an OutcomeState, the sum of the
+    distances from each node to the nodes with outcome 1 is kept
+    up to date as the outcome vector changes, so this is O(1) rather
+    than iterating over all nodes.
 
     """
+    if isinstance(distmatrix, GeographicDistance):
+        if getattr(A, 'plusCount', None) is not None:
+            return A.distanceSum(distmatrix, i)
+        (nodes, dists) = distmatrix.distances(i)
+        return float(numpy.sum(dists[numpy.asarray(A)[nodes] == 1]))
     delta = 0
     for u in G.nodeIterator():
         if u != i and A[u] == 1:
@@ -541,13 +589,20 @@ def changeContagionDist(distmatrix, G, A, i):
     In the PNet manual (Wang et al., 2009) this is called
     "Contagion-among-partners" (p. 42).
 
-    TODO: Note this implementation is not scalable to large networks, as the
-    distance matrix is NxN. For large networks, need to implement a version
-    that instead of a matrix calls a function to find the distance between
-    two nodes.
+    Only the distances between directly connected actors are used, so
+    for large networks distmatrix can instead be EDGE_WEIGHTS, to use
+    the edge weights stored with the network (e.g. loaded from the
+    third column of the Pajek edge list, see CSRGraph) as the
+    distances, taking O(E) rather than O(N^2) memory. The distance
+    can also be a GeographicDistance object.
 
     """
     delta = 0
+    if is_edge_weights(distmatrix):
+        for (u, w) in G.neighbourWeightIterator(i):
+            if A[u] == 1:
+                delta += w
+        return delta
     for u in G.neighbourIterator(i):
         if A[u] == 1:
             delta += distmatrix[i, u]
@@ -700,6 +755,18 @@ def changeAlterBinaryTwoStar2(attrname, G, A, i):
 
 # ======================= experimental statistics ============================
 
+def contagion_neighbour_plus_counts(G, A, i):
+    """
+    Return list of the number of neighbours with outcome 1 of
+    each neighbour of node i with outcome 1, if A is an OutcomeState,
+    otherwise None. Used for the GW, Log and Power contagion statistics.
+    """
+    if getattr(A, 'plusCount', None) is None:
+        return None
+    plusCount = A.plusCount
+    return [plusCount[j] for j in G.neighbourIterator(i) if A[j] == 1]
+
+
 def changeGWContagion(alpha, G, A, i):
     r"""Change statistic for Geometrically Weighted Contagion.
 
@@ -731,8 +798,16 @@ def changeGWContagion(alpha, G, A, i):
 
     Implemented with only (ugly and more code) loops, as it is faster
     than more elegant implementation using list comprehensions.
+    If A is an OutcomeState, the number of neighbours with outcome 1
+    of each neighbour j of i (djplus) is already known, so this is
+    O(degree) rather than O(degree^2) time.
 
     """
+    plus_counts = contagion_neighbour_plus_counts(G, A, i)
+    if plus_counts is not None:
+        return (sum([math.exp(-alpha * (djplus + 1)) - math.exp(-alpha * djplus)
+                     for djplus in plus_counts]) +
+                math.exp(-alpha * len(plus_counts)))
     delta = 0
     diplus = 0
     for j in G.neighbourIterator(i):
@@ -761,9 +836,15 @@ def changeLogContagion(G, A, i):
 
     Implemented with only (ugly and more code) loops, as it is faster
     than more elegant implementation using list comprehensions.
+    If A is an OutcomeState this is O(degree) (see changeGWContagion).
 
     """
     ## Note adding one to degree so never have log(0)
+    plus_counts = contagion_neighbour_plus_counts(G, A, i)
+    if plus_counts is not None:
+        return (sum([math.log((djplus + 2) / (djplus + 1))
+                     for djplus in plus_counts]) +
+                math.log(len(plus_counts) + 1))
     delta = 0
     diplus = 0
     for j in G.neighbourIterator(i):
@@ -800,6 +881,7 @@ def changePowerContagion(beta, G, A, i):
 
     Implemented with only (ugly and more code) loops, as it is faster
     than more elegant implementation using list comprehensions.
+    If A is an OutcomeState this is O(degree) (see changeGWContagion).
 
     References:
 
@@ -812,6 +894,11 @@ def changePowerContagion(beta, G, A, i):
     model specification and simulation. Social Networks, 49, 37-47.
 
     """
+    plus_counts = contagion_neighbour_plus_counts(G, A, i)
+    if plus_counts is not None:
+        return (sum([math.pow(djplus + 1, 1/beta) - math.pow(djplus, 1/beta)
+                     for djplus in plus_counts]) +
+                math.pow(len(plus_counts), 1/beta))
     delta = 0
     diplus = 0
     for j in G.neighbourIterator(i):
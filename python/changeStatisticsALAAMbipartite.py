@@ -103,6 +103,7 @@ See
 
 import math
 import functools
+import numpy as np
 
 from utils import NA_VALUE
 from BipartiteGraph import BipartiteGraph
@@ -171,9 +172,14 @@ def changeBipartiteAlterTwoStar2(mode, G, A, i):
     AlterX-2Star2[mode]
 
     *--o--*
+
+    If A is a BipartiteOutcomeState this is O(1).
     """
-    return (changeStatisticsALAAM.changeIndirectPartnerAttribute(G, A, i)
-            if G.bipartite_node_mode(i) == mode else 0)
+    if G.bipartite_node_mode(i) != mode:
+        return 0
+    if getattr(A, 'twoPathPlusSum', None) is not None:
+        return int(A.twoPathPlusSum[i])
+    return changeStatisticsALAAM.changeIndirectPartnerAttribute(G, A, i)
 
 
 
@@ -188,9 +194,10 @@ def changeBipartiteFourCycle1(mode, G, A, i):
        \ /
         o
     """
-    return (sum([(p := G.twoPathsMatrix.getValue(i, j)) * (p - 1) / 2
-                 for j in G.twoPathsMatrix.rowNonZeroColumnsIterator(i)])
-            if G.bipartite_node_mode(i) == mode else 0)
+    if G.bipartite_node_mode(i) != mode:
+        return 0
+    (cols, p) = G.twoPathsRow(i)
+    return float(np.sum(p * (p - 1.0))) / 2
 
 
 def changeBipartiteFourCycle2(mode, G, A, i):
@@ -203,12 +210,16 @@ def changeBipartiteFourCycle2(mode, G, A, i):
       *   *
        \ /
         o
-    """
-    # uses assignment operator := introduced in Pyton 3.8
 
-    return sum([(p := G.twoPathsMatrix.getValue(i, j)) * (p - 1) / 2
-                for j in G.twoPathsMatrix.rowNonZeroColumnsIterator(i)
-                if A[j] == 1]) if G.bipartite_node_mode(i) == mode else 0
+    If A is a BipartiteOutcomeState this is O(1).
+    """
+    if G.bipartite_node_mode(i) != mode:
+        return 0
+    if getattr(A, 'twoPathPlusSum', None) is not None:
+        return float(A.fourCyclePlusSum[i])
+    (cols, p) = G.twoPathsRow(i)
+    p = p[np.asarray(A)[cols] == 1]
+    return float(np.sum(p * (p - 1.0))) / 2
 
 
 
@@ -325,9 +336,14 @@ def changeBpAlterSameTwoStar2(mode, attrname, G, A, i):
     requirement that the two nodes on the ends of the two-path have the
     same value of the named categorical attribute.
 
+    If A is a BipartiteOutcomeState this is O(1).
+
     """
-    return (changeStatisticsALAAM.changeSameIndirectPartnerAttribute(attrname, G, A, i)
-            if G.bipartite_node_mode(i) == mode else 0)
+    if G.bipartite_node_mode(i) != mode:
+        return 0
+    if getattr(A, 'twoPathPlusSum', None) is not None:
+        return int(A.twoPathCategorySums(attrname)[0][i])
+    return changeStatisticsALAAM.changeSameIndirectPartnerAttribute(attrname, G, A, i)
 
 
 def changeBpAlterDiffTwoStar2(mode, attrname, G, A, i):
@@ -340,9 +356,17 @@ def changeBpAlterDiffTwoStar2(mode, attrname, G, A, i):
     requirement that the two nodes on the ends of the two-path have
     different values of the named categorical attribute.
 
+    If A is a BipartiteOutcomeState this is O(1).
+
     """
-    return (changeStatisticsALAAM.changeDiffIndirectPartnerAttribute(attrname, G, A, i)
-            if G.bipartite_node_mode(i) == mode else 0)
+    if G.bipartite_node_mode(i) != mode:
+        return 0
+    if getattr(A, 'twoPathPlusSum', None) is not None:
+        if G.catattr[attrname][i] == NA_VALUE:
+            return 0
+        (same, valid) = A.twoPathCategorySums(attrname)
+        return int(valid[i] - same[i])
+    return changeStatisticsALAAM.changeDiffIndirectPartnerAttribute(attrname, G, A, i)
 
 
 
@@ -87,11 +87,7 @@ def changeReciprocity(G, A, i):
 
     *<->o
     """
-    delta = 0
-    for u in G.outIterator(i):
-        if G.isArc(u, i):
-            delta += 1
-    return delta
+    return G.mutualdegree(i)
 
 
 def changeEgoInTwoStar(G, A, i):
@@ -196,7 +192,12 @@ def changeContagion(G, A, i):
     change statistic for Contagion (partner attribute)
 
     *->*
+
+    If A is a DirectedOutcomeState, the numbers of out- and
+    in-neighbours with outcome 1 are already known, so this is O(1).
     """
+    if getattr(A, 'outPlusCount', None) is not None:
+        return A.outPlusCount[i] + A.inPlusCount[i]
     delta = 0
     for u in G.outIterator(i):
         if A[u] == 1:
@@ -212,10 +213,14 @@ def changeContagionReciprocity(G, A, i):
     change statistic for Contagion Reciprocity (mutual contagion)
 
     *<->*
+
+    If A is a DirectedOutcomeState this is O(1).
     """
+    if getattr(A, 'outPlusCount', None) is not None:
+        return A.mutualPlusCount[i]
     delta = 0
-    for u in G.outIterator(i):
-        if A[u] == 1 and G.isArc(u, i):
+    for u in G.mutualIterator(i):
+        if A[u] == 1:
             delta += 1
     return delta
 
@@ -414,11 +419,10 @@ def changeReciprocityMatch(attrname, G, A, i):
     {*}<->{o}
     """
     delta = 0
-    for u in G.outIterator(i):
+    for u in G.mutualIterator(i):
         if (G.catattr[attrname][u] != NA_VALUE and
             G.catattr[attrname][i] != NA_VALUE and
-            G.catattr[attrname][u] == G.catattr[attrname][i] and
-            G.isArc(u, i)):
+            G.catattr[attrname][u] == G.catattr[attrname][i]):
             delta += 1
     return delta
 
@@ -464,11 +468,10 @@ def changeReciprocityMismatch(attrname, G, A, i):
 
     """
     delta = 0
-    for u in G.outIterator(i):
+    for u in G.mutualIterator(i):
         if (G.catattr[attrname][u] != NA_VALUE and
             G.catattr[attrname][i] != NA_VALUE and
-            G.catattr[attrname][u] != G.catattr[attrname][i] and
-            G.isArc(u, i)):
+            G.catattr[attrname][u] != G.catattr[attrname][i]):
             delta += 1
     return delta
 
@@ -615,6 +618,22 @@ def changeGWReceiver(alpha, G, A, i):
 
 # ======================= experimental statistics ============================
 
+def contagion_arc_plus_counts(G, A, i):
+    """
+    Return tuple (out_counts, in_counts) of lists of the number of
+    in-neighbours with outcome 1 of each out-neighbour of node i with
+    outcome 1, and of the number of out-neighbours with outcome 1 of
+    each in-neighbour of i with outcome 1, if A is a
+    DirectedOutcomeState, otherwise None. Used for the GW, Log and
+    Power contagion statistics.
+    """
+    if getattr(A, 'outPlusCount', None) is None:
+        return None
+    (inPlusCount, outPlusCount) = (A.inPlusCount, A.outPlusCount)
+    return ([inPlusCount[j] for j in G.outIterator(i) if A[j] == 1],
+            [outPlusCount[j] for j in G.inIterator(i) if A[j] == 1])
+
+
 def changeGWContagion(alpha, G, A, i):
     r"""Change statistic for Geometrically Weighted Contagion.
 
@@ -654,8 +673,16 @@ def changeGWContagion(alpha, G, A, i):
 
     Implemented with only (ugly and more code) loops, as it is faster
     than more elegant implementation using list comprehensions.
+    If A is a DirectedOutcomeState, the number of neighbours with
+    outcome 1 of each neighbour j of i (djplus) is already known, so
+    this is O(degree) rather than O(degree^2) time.
 
     """
+    plus_counts = contagion_arc_plus_counts(G, A, i)
+    if plus_counts is not None:
+        return sum([sum([math.exp(-alpha * (djplus + 1)) -
+                         math.exp(-alpha * djplus) for djplus in counts]) +
+                    math.exp(-alpha * len(counts)) for counts in plus_counts])
     delta = 0
     diplus = 0
     for j in G.outIterator(i):
@@ -704,9 +731,16 @@ def changeLogContagion(G, A, i):
 
     Implemented with only (ugly and more code) loops, as it is faster
     than more elegant implementation using list comprehensions.
+    If A is a DirectedOutcomeState this is O(degree) time, as
+    for changeGWContagion().
 
     """
     ## Note adding one to degree so never have log(0)
+    plus_counts = contagion_arc_plus_counts(G, A, i)
+    if plus_counts is not None:
+        return sum([sum([math.log((djplus + 2) / (djplus + 1))
+                         for djplus in counts]) +
+                    math.log(len(counts) + 1) for counts in plus_counts])
     delta = 0
     diplus = 0
     for j in G.outIterator(i):
@@ -778,8 +812,15 @@ def changePowerContagion(beta, G, A, i):
 
     Implemented with only (ugly and more code) loops, as it is faster
     than more elegant implementation using list comprehensions.
+    If A is a DirectedOutcomeState this is O(degree) time, as
+    for changeGWContagion().
 
     """
+    plus_counts = contagion_arc_plus_counts(G, A, i)
+    if plus_counts is not None:
+        return sum([sum([math.pow(djplus + 1, 1/beta) -
+                         math.pow(djplus, 1/beta) for djplus in counts]) +
+                    math.pow(len(counts), 1/beta) for counts in plus_counts])
     delta = 0
     diplus = 0
     for j in G.outIterator(i):
@@ -0,0 +1,325 @@
+#
+# File:    changeStatisticsALAAMfused.py
+# Author:  Alex Stivala
+# Created: October 2026
+#
+r"""Compile a list of ALAAM change statistic functions into a single
+(fused) function computing all of the change statistics for a node.
+
+The samplers call each change statistic function in the model for
+the node i in turn, so that e.g. a model with Activity, Contagion,
+TriangleT1, TriangleT2, o_Ob and oO_Osame iterates over the
+neighbours of i five times for each proposal. compile_changestats()
+instead generates (as Python source code, compiled with exec()) one
+function which iterates over the neighbours of i once, accumulating
+all of these change statistics together, and returns the vector of
+change statistics:
+
+    changestats_func = compile_changestats(changestats_func_list)
+    changestats = changestats_func(G, A, i)
+
+Each (built-in) change statistic that can be computed this way is
+registered in FUSED_CHANGESTATS (including for statistics made with
+functools.partial e.g. partial(changeoOb, "senior")) with the
+fragments of code for it, see register_fused_changestat(). Change
+statistics not registered (e.g. user defined ones, or those needing
+neighbours of neighbours such as TriangleT3) are computed in the
+fused function by calling the change statistic function as usual,
+so any list of change statistic functions can be compiled.
+
+Change statistics that are looked up in the neighbour outcome counts
+of an OutcomeState (e.g. Contagion) by the change statistic functions
+are looked up in the same way by the fused function when it is given
+an OutcomeState with counts, rather than computed in its loop.
+
+The fused function gives exactly the same values as the change
+statistic functions, as the code fragments are the same computations,
+in the same order.
+"""
+
+import math
+import functools
+import numpy as np
+
+from utils import NA_VALUE
+from changeStatisticsALAAM import *
+from changeStatisticsALAAMvectorized import changeStaticTable
+
+# dict mapping change statistic function to tuple (setup, loop, value,
+# counted) of code fragments, see register_fused_changestat()
+FUSED_CHANGESTATS = dict()
+
+
+def register_fused_changestat(changestat_func, setup, loop, value,
+                              counted = None):
+    """
+    Register the code fragments to compute a change statistic in a
+    fused change statistics function (see compile_changestats()).
+
+    The fragments are Python source code, in which {k} is replaced by
+    the index of the change statistic in the list, so variables
+    should have {k} appended to their names to be unique, e.g. x{k}.
+    They can use these variables:
+
+       G, A, i  - the parameters of the change statistic function
+       d_i      - degree of i
+       p{k}     - the parameter bound with functools.partial
+                  e.g. the attribute name for partial(changeoOb, "senior")
+       x{k}     - accumulator for loop, initialized to 0
+
+    and in the loop fragment, which is executed for each neighbour u
+    of i (in the order of G.neighbourIterator(i)):
+
+       u        - the neighbour of i
+       a_u      - A[u]
+       d_u      - degree of u
+       tp_u     - number of two-paths between i and u
+                  (from G.neighbourTwoPathsList(i))
+
+    Parameters:
+       changestat_func - change statistic function with signature
+                         (G, A, i) or with one leading parameter to be
+                         bound with functools.partial e.g.
+                         (attrname, G, A, i)
+       setup           - statement executed once before the loop, or None
+       loop            - statement executed for each neighbour u, or None
+       value           - expression for the value of the change statistic
+       counted         - expression for the value of the change statistic
+                         when A is an OutcomeState with neighbour outcome
+                         counts (A.plusCount is not None), used instead
+                         of setup, loop and value, or None. Default None.
+    """
+    FUSED_CHANGESTATS[changestat_func] = (setup, loop, value, counted)
+
+
+def fused_changestat(changestat_func):
+    """
+    Return tuple (setup, loop, value, counted, param) of the code fragments
+    registered for the change statistic function and its parameter
+    bound with functools.partial (or None if not a partial function),
+    or None if it has no registered code fragments.
+
+    Parameters:
+       changestat_func - change statistic function with signature (G, A, i),
+                         possibly made with functools.partial
+    """
+    if isinstance(changestat_func, functools.partial):
+        entry = FUSED_CHANGESTATS.get(changestat_func.func)
+        if (entry is None or changestat_func.keywords or
+            len(changestat_func.args) != 1):
+            return None
+        if (changestat_func.func == changeContagionDist and
+            is_edge_weights(changestat_func.args[0])):
+            # edge weights not indexed by node pair: call the function
+            return None
+        return entry + (changestat_func.args[0],)
+    entry = FUSED_CHANGESTATS.get(changestat_func)
+    return entry + (None,) if entry is not None else None
+
+
+def compile_changestats_source(changestats_func_list, as_tuple = False):
+    """
+    Return tuple (source, namespace) of the Python source code of the
+    fused change statistics function fused_changestats(G, A, i)
+    for the list of change statistic functions, and the dict of the
+    global variables it uses.
+
+    If any of the change statistics has a counted value expression
+    (see register_fused_changestat()), the function has two versions
+    of its body: one used when A is an OutcomeState with neighbour
+    outcome counts, in which those statistics are looked up in the
+    counts rather than computed in the loop over the neighbours of i,
+    and one used otherwise.
+
+    Parameters:
+       changestats_func_list - list of change statistic functions with
+                               signature (G, A, i)
+       as_tuple              - if True the function returns a tuple
+                               rather than a numpy vector. Default False.
+    """
+    namespace = {'math': math, 'np': np, 'NA_VALUE': NA_VALUE}
+    entries = []
+    for (k, f) in enumerate(changestats_func_list):
+        entry = fused_changestat(f)
+        if entry is None:
+            namespace['f' + str(k)] = f
+        else:
+            namespace['p' + str(k)] = entry[-1]
+            entry = entry[:-1]
+        entries.append(entry)
+    return (fused_source(tuple(entries), as_tuple), namespace)
+
+
+@functools.lru_cache(maxsize = 128)
+def fused_source(entries, as_tuple):
+    """
+    Return the Python source code of the fused change statistics
+    function, see compile_changestats_source(). It depends only on the
+    registered code fragments (not on the change statistic functions
+    or their parameters, which are in the namespace of the function),
+    so it is cached without keeping any of them alive.
+
+    Parameters:
+       entries  - tuple of tuples (setup, loop, value, counted) from
+                  fused_changestat() (without the parameter) for each
+                  change statistic, or None if it is not registered
+       as_tuple - if True the function returns a tuple rather than a
+                  numpy vector
+    """
+    lines = ['def fused_changestats(G, A, i):']
+    if any(entry is not None and entry[3] is not None for entry in entries):
+        lines.append("    if getattr(A, 'plusCount', None) is not None:")
+        lines += ['    ' + s for s in fused_body(entries, True, as_tuple)]
+    lines += fused_body(entries, False, as_tuple)
+    return '\n'.join(lines) + '\n'
+
+
+def fused_body(entries, counted, as_tuple):
+    """
+    Return list of the (indented) lines of source code of the body of
+    the fused change statistics function, see compile_changestats_source().
+
+    Parameters:
+       entries  - tuple of tuples (setup, loop, value, counted) from
+                  fused_changestat() for each change statistic, or
+                  None if it is not registered
+       counted  - if True A has neighbour outcome counts, so the counted
+                  value is used for change statistics which have one
+       as_tuple - if True return a tuple rather than a numpy vector
+    """
+    setup = []
+    loop = []
+    values = []
+    for (k, entry) in enumerate(entries):
+        if entry is None:
+            values.append('f' + str(k) + '(G, A, i)')
+            continue
+        (setup_code, loop_code, value_code, counted_code) = entry
+        if counted and counted_code is not None:
+            values.append(counted_code.format(k = k))
+            continue
+        if setup_code is not None:
+            setup.append(setup_code.format(k = k))
+        if loop_code is not None:
+            setup.append('x' + str(k) + ' = 0')
+            loop.append(loop_code.format(k = k))
+        values.append(value_code.format(k = k))
+
+    lines = []
+    if 'd_i' in '\n'.join(setup + loop + values):
+        # only if needed, as not all graph types have degree()
+        lines.append('    d_i = G.degree(i)')
+    lines += ['    ' + s for s in setup]
+    if len(loop) > 0:
+        loop_text = '\n'.join(loop)
+        if 'tp_u' in loop_text:
+            lines.append('    for (u, tp_u) in zip(G.neighbourIterator(i),'
+                         ' G.neighbourTwoPathsList(i)):')
+        else:
+            lines.append('    for u in G.neighbourIterator(i):')
+        if 'a_u' in loop_text:
+            lines.append('        a_u = A[u]')
+        if 'd_u' in loop_text:
+            lines.append('        d_u = G.degree(u)')
+        lines += ['        ' + s for s in loop]
+    if as_tuple:
+        lines.append('    return (' + ''.join(v + ', ' for v in values) + ')')
+    else:
+        lines.append('    return np.array([' + ', '.join(values) + '],'
+                     ' dtype = np.float64)')
+    return lines
+
+
+@functools.lru_cache(maxsize = 128)
+def fused_code(source):
+    """
+    Return the code object compiled from the source code of a fused
+    change statistics function (cached, as compiling it takes much
+    longer than making the function from it)
+    """
+    return compile(source, '<fused_changestats>', 'exec')
+
+
+def compile_changestats(changestats_func_list, as_tuple = False):
+    """
+    Compile list of change statistic functions into a single function
+    computing all of the change statistics for a node, iterating over
+    its neighbours only once.
+
+    The source code and compiled code of the function are cached (by
+    the registered code fragments of the change statistics), so
+    compiling a list of the same change statistics again (even with
+    different parameters, e.g. the tables made by
+    precompute_static_changestats() for each model) costs only a few
+    microseconds. Nothing is cached that would keep the change
+    statistic functions or their parameters alive.
+
+    Parameters:
+       changestats_func_list - list of change statistic functions with
+                               signature (G, A, i)
+       as_tuple              - if True the function returns a tuple
+                               of the change statistics, which is
+                               cheaper to make (and to use one element
+                               at a time) than a numpy vector.
+                               Default False.
+
+    Return value:
+       function with signature (G, A, i) returning numpy float64 vector
+       (or tuple) of the change statistics for node i, in the same
+       order as changestats_func_list
+    """
+    (source, namespace) = compile_changestats_source(changestats_func_list,
+                                                     as_tuple)
+    exec(fused_code(source), namespace)
+    # not left in its own globals, which would make a reference cycle
+    # keeping the parameters (e.g. tables) alive until garbage collection
+    return namespace.pop('fused_changestats')
+
+
+register_fused_changestat(changeDensity, None, None, '1')
+register_fused_changestat(changeActivity, None, None, 'd_i')
+register_fused_changestat(changeTwoStar, None, None,
+                          '(d_i * (d_i - 1))/2.0 if d_i > 1 else 0')
+register_fused_changestat(changeThreeStar, None, None,
+                          'd_i * (d_i - 1) * (d_i - 2) / 6.0 if d_i > 2 else 0')
+register_fused_changestat(changePartnerActivityTwoPath, None,
+                          'x{k} += d_u - 1', 'x{k}')
+register_fused_changestat(changeTriangleT1, None,
+                          'x{k} += tp_u', '0 if d_i < 2 else x{k} // 2')
+register_fused_changestat(changeContagion, None,
+                          'if a_u == 1: x{k} += 1', 'x{k}',
+                          'A.plusCount[i]')
+register_fused_changestat(changePartnerAttributeActivity, None,
+                          'if a_u == 1: x{k} += d_i + d_u - 2', 'x{k}',
+                          '(d_i - 2) * A.plusCount[i] + A.plusDegreeSum[i]')
+register_fused_changestat(changeTriangleT2, None,
+                          'if a_u == 1: x{k} += tp_u', '0 if d_i < 2 else x{k}')
+register_fused_changestat(changeoOb, 'b{k} = G.binattr[p{k}]', None,
+                          '1 if b{k}[i] == 1 else 0')
+register_fused_changestat(changeo_Ob, 'b{k} = G.binattr[p{k}]',
+                          'if b{k}[u] == 1: x{k} += 1', 'x{k}')
+register_fused_changestat(changeoOc, 'c{k} = G.contattr[p{k}]', None,
+                          '0 if math.isnan(c{k}[i]) else c{k}[i]')
+register_fused_changestat(changeo_Oc, 'c{k} = G.contattr[p{k}]',
+                          'x{k} += 0 if math.isnan(c{k}[u]) else c{k}[u]',
+                          'x{k}')
+register_fused_changestat(
+    changeoO_Osame, 'c{k} = G.catattr[p{k}]; ci{k} = c{k}[i]',
+    'if c{k}[u] != NA_VALUE and ci{k} != NA_VALUE and c{k}[u] == ci{k}:'
+    ' x{k} += 1', 'x{k}')
+register_fused_changestat(
+    changeoO_OsameContagion, 'c{k} = G.catattr[p{k}]; ci{k} = c{k}[i]',
+    'if c{k}[u] != NA_VALUE and ci{k} != NA_VALUE and c{k}[u] == ci{k}'
+    ' and a_u == 1: x{k} += 1', 'x{k}', 'A.samePlusCount(p{k})[i]')
+register_fused_changestat(
+    changeoO_Odiff, 'c{k} = G.catattr[p{k}]; ci{k} = c{k}[i]',
+    'if c{k}[u] != NA_VALUE and ci{k} != NA_VALUE and c{k}[u] != ci{k}:'
+    ' x{k} += 1', 'x{k}')
+register_fused_changestat(changeGWActivity, None, None,
+                          'math.exp(-p{k} * d_i)')
+register_fused_changestat(changeContagionDist, None,
+                          'if a_u == 1: x{k} += p{k}[i, u]', 'x{k}')
+register_fused_changestat(
+    changeAlterBinaryTwoStar1, 'b{k} = G.binattr[p{k}]',
+    'if b{k}[u] != NA_VALUE and b{k}[u]: x{k} += d_u - 1', 'x{k}')
+register_fused_changestat(changeStaticTable, None, None, 'p{k}[i]')
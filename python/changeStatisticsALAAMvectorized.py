@@ -0,0 +1,1010 @@
+#
+# File:    changeStatisticsALAAMvectorized.py
+# Author:  Alex Stivala
+# Created: October 2026
+#
+r"""Functions to compute ALAAM change statistics for all nodes at once.
+
+Each change statistic function in changeStatisticsALAAM.py,
+changeStatisticsALAAMdirected.py and changeStatisticsALAAMbipartite.py
+computes the change statistic for a single node i with Python loops
+over its neighbours. The functions here instead return the numpy
+vector of the change statistic for every node, for the same graph G
+and outcome vector A, computed with numpy array operations on the CSR
+arrays of the network (see CSRGraph and CSRDigraph), e.g. Contagion
+for all nodes is the adjacency matrix times the outcome vector.
+
+The vectorized form of each (built-in) change statistic function is
+found automatically in the registry VECTORIZED_CHANGESTATS, including
+for statistics made with functools.partial e.g.
+partial(changeoOb, "senior"), so callers just use
+
+    change_statistic_vector(G, A, changestat_func)
+
+or change_statistics_matrix() for a list of change statistic
+functions. Change statistics without a vectorized form (e.g. user
+defined ones, or the directed triangle statistics) are computed by
+calling the change statistic function for each node, so these
+functions can be used for any change statistic. Vectorized forms of
+other change statistics can be added with
+register_vectorized_changestat().
+
+Each vectorized function has the same parameters as the change
+statistic function it corresponds to, but without the node i, and
+returns numpy float64 vector with an element for every node.
+
+The registry also records which change statistics do not depend on
+the outcome vector A at all (e.g. Activity, or exogenous attribute
+statistics such as oOb), see is_static_changestat().
+"""
+
+import functools
+import numpy as np
+
+from utils import NA_VALUE
+from CSRGraph import CSRGraph,MAX_WEDGES_CHUNK
+from CSRDigraph import CSRDigraph
+from Digraph import Digraph
+from BipartiteGraph import BipartiteGraph,MODE_A
+from GeographicDistance import GeographicDistance
+import changeStatisticsALAAM
+import changeStatisticsALAAMdirected
+import changeStatisticsALAAMbipartite
+
+# dict mapping change statistic function to tuple (vectorized_func, static)
+# see register_vectorized_changestat()
+VECTORIZED_CHANGESTATS = dict()
+
+
+def register_vectorized_changestat(changestat_func, vectorized_func,
+                                   static = False):
+    """
+    Register the vectorized form of a change statistic function
+
+    Parameters:
+       changestat_func - change statistic function with signature
+                         (G, A, i) or with leading parameters to be
+                         bound with functools.partial e.g.
+                         (attrname, G, A, i)
+       vectorized_func - function with the same parameters except i,
+                         returning numpy vector of the change statistic
+                         for every node
+       static          - True if the change statistic does not depend
+                         on the outcome vector A. Default False.
+    """
+    VECTORIZED_CHANGESTATS[changestat_func] = (vectorized_func, static)
+
+
+def vectorized_changestat(changestat_func):
+    """
+    Return the vectorized form of a change statistic function, or None
+    if it has none.
+
+    Parameters:
+       changestat_func - change statistic function with signature (G, A, i),
+                         possibly made with functools.partial
+
+    Return value:
+       function with signature (G, A) returning numpy vector of the
+       change statistic for every node, or None
+    """
+    if isinstance(changestat_func, functools.partial):
+        entry = VECTORIZED_CHANGESTATS.get(changestat_func.func)
+        if entry is None:
+            return None
+        return functools.partial(entry[0], *changestat_func.args,
+                                 **changestat_func.keywords)
+    entry = VECTORIZED_CHANGESTATS.get(changestat_func)
+    return entry[0] if entry is not None else None
+
+
+def is_static_changestat(changestat_func):
+    """
+    Return True if the change statistic function is registered as not
+    depending on the outcome vector A (so that its value for each node
+    is fixed for a given network and attributes).
+
+    Parameters:
+       changestat_func - change statistic function with signature (G, A, i),
+                         possibly made with functools.partial
+    """
+    if isinstance(changestat_func, functools.partial):
+        changestat_func = changestat_func.func
+    entry = VECTORIZED_CHANGESTATS.get(changestat_func)
+    return entry is not None and entry[1]
+
+
+def change_statistic_vector(G, A, changestat_func, nodes = None):
+    """
+    Return the change statistic for every node (or the given nodes),
+    using the vectorized form of the change statistic if it has one,
+    otherwise calling the change statistic function for each node.
+
+    Parameters:
+       G               - Graph, Digraph or BipartiteGraph (or CSRGraph,
+                         CSRDigraph) object
+       A               - outcome vector (list or numpy array)
+       changestat_func - change statistic function with signature (G, A, i)
+       nodes           - numpy array (or list) of node ids to compute the
+                         change statistic for, or None for all nodes.
+                         Default None.
+
+    Return value:
+       numpy float64 vector of the change statistic for each node
+       (in nodes)
+    """
+    vfunc = vectorized_changestat(changestat_func)
+    if vfunc is None:
+        if nodes is None:
+            nodes = range(G.numNodes())
+        return np.array([changestat_func(G, A, i) for i in nodes],
+                        dtype = np.float64)
+    values = vfunc(G, A)
+    return values if nodes is None else values[nodes]
+
+
+def change_statistics_matrix(G, A, changestats_func_list, nodes = None):
+    """
+    Return the change statistics for every node (or the given nodes)
+    as a matrix, see change_statistic_vector().
+
+    Parameters:
+       G                     - Graph, Digraph or BipartiteGraph object
+       A                     - outcome vector (list or numpy array)
+       changestats_func_list - list of change statistic functions
+       nodes                 - numpy array (or list) of node ids to compute
+                               the change statistics for, or None for
+                               all nodes. Default None.
+
+    Return value:
+       numpy float64 matrix with a row for each node (in nodes) and a
+       column for each change statistic in changestats_func_list
+    """
+    n = G.numNodes() if nodes is None else len(nodes)
+    Z = np.empty((n, len(changestats_func_list)))
+    for (l, f) in enumerate(changestats_func_list):
+        Z[:, l] = change_statistic_vector(G, A, f, nodes)
+    return Z
+
+
+def changeStaticTable(table, G, A, i):
+    """
+    Change statistic with precomputed value for each node, looked up
+    in table (list indexed by node id), see
+    precompute_static_changestats()
+    """
+    return table[i]
+
+
+def changeStaticTableAll(table, G, A):
+    """Vectorized changeStaticTable"""
+    return np.asarray(table, dtype = np.float64)
+
+
+def precompute_static_changestats(G, changestats_func_list):
+    """
+    Return list of change statistic functions where each change
+    statistic which does not depend on the outcome vector (see
+    is_static_changestat()) is replaced by a lookup in a table of its
+    value for each node, computed once here (in vectorized form).
+
+    This is done before starting the MCMC samplers (e.g. in EE
+    estimation), which would otherwise compute the same values
+    over and over again. The returned list must only be used with the
+    network G it was made for.
+
+    A Graph or Digraph (dict of dicts) is converted to CSRGraph or
+    CSRDigraph only once here, so that values computed once for the
+    network and shared by several change statistics (e.g. the directed
+    triangle census for TransitiveTriangleT1, D1, U1 and CyclicTriangleC1)
+    are computed only once.
+
+    Parameters:
+       G                     - Graph, Digraph or BipartiteGraph object
+       changestats_func_list - list of change statistic functions
+
+    Return value:
+       list of change statistic functions with the same values as
+       those in changestats_func_list, in the same order
+    """
+    A = np.zeros(G.numNodes())  # ignored by static change statistics
+    if any(is_static_changestat(f) for f in changestats_func_list):
+        G = csr_network(G)
+    return [functools.partial(changeStaticTable,
+                              change_statistic_vector(G, A, f).tolist())
+            if is_static_changestat(f) else f
+            for f in changestats_func_list]
+
+
+# ======================= helper functions ==================================
+
+def outcome_indicator(A):
+    """
+    Return numpy float64 vector which is 1 for nodes with outcome 1,
+    and 0 otherwise (outcome 0 or NA)
+    """
+    return (np.asarray(A) == 1).astype(np.float64)
+
+
+def csr_graph(G):
+    """
+    Return the CSRGraph for the undirected graph G (G itself if it is
+    already a CSRGraph). It is made once and kept in G.csrGraph (until
+    G is modified), so the vectorized change statistics do not each
+    convert G again.
+    """
+    if isinstance(G, CSRGraph):
+        return G
+    if getattr(G, 'csrGraph', None) is None:
+        G.csrGraph = CSRGraph(graph = G)
+    return G.csrGraph
+
+
+def csr_network(G):
+    """
+    Return the CSRGraph or CSRDigraph for G (G itself if it is already
+    one, or is a BipartiteGraph), so that a network can be converted
+    once for several vectorized change statistics rather than in each.
+    """
+    if isinstance(G, Digraph):
+        return csr_digraph(G)
+    elif not isinstance(G, BipartiteGraph):
+        return csr_graph(G)
+    return G
+
+
+def csr_digraph(G):
+    """
+    Return the CSRDigraph for the digraph G (G itself if it is
+    already a CSRDigraph). It is made once and kept in G.csrDigraph
+    (until G is modified), as for csr_graph().
+    """
+    if isinstance(G, CSRDigraph):
+        return G
+    if getattr(G, 'csrDigraph', None) is None:
+        G.csrDigraph = CSRDigraph(digraph = G)
+    return G.csrDigraph
+
+
+def csr_rows(indptr):
+    """
+    Return numpy array of the row (node) of each entry of a CSR
+    indices array
+    """
+    n = len(indptr) - 1
+    return np.repeat(np.arange(n, dtype = np.int64), np.diff(indptr))
+
+
+def neighbour_sum(indptr, indices, x):
+    """
+    Return numpy vector of the sum over the neighbours of each node of
+    the values x for each node, i.e. the adjacency matrix times x
+
+    Parameters:
+       indptr, indices - CSR arrays of the (out-)neighbours of each node
+       x               - numpy vector of values for each node
+    """
+    return np.bincount(csr_rows(indptr), weights = x[indices],
+                       minlength = len(indptr) - 1).astype(np.float64)
+
+
+def edge_distances(distmatrix, g, rows, cols):
+    """
+    Return numpy vector of the distance for each entry (rows[k], cols[k])
+    of the CSR arrays of the CSRGraph g, from the distance matrix,
+    GeographicDistance object, or the edge weights of g if distmatrix
+    is EDGE_WEIGHTS
+    """
+    if changeStatisticsALAAM.is_edge_weights(distmatrix):
+        return g.edgeWeightArray()
+    if isinstance(distmatrix, GeographicDistance):
+        return distmatrix.pairDistances(rows, cols)
+    return np.asarray(distmatrix)[rows, cols]
+
+
+def category_codes(G, attrname):
+    """
+    Return tuple (codes, valid) of numpy arrays of the values of the
+    categorical attribute attrname converted to integers 0..K-1, and
+    True where the attribute is not NA.
+    """
+    cat = np.asarray(G.catattr[attrname])
+    (_, codes) = np.unique(cat, return_inverse = True)
+    return (codes.astype(np.int64), cat != NA_VALUE)
+
+
+def category_match_arcs(G, attrname, indptr, indices):
+    """
+    Return tuple (match, mismatch) of boolean numpy arrays aligned with
+    indices, True for arcs i -> u where the categorical attribute
+    attrname of i and u is not NA and matches (or mismatches)
+    """
+    cat = np.asarray(G.catattr[attrname])
+    (ci, cu) = (cat[csr_rows(indptr)], cat[indices])
+    valid = (ci != NA_VALUE) & (cu != NA_VALUE)
+    return (valid & (ci == cu), valid & (ci != cu))
+
+
+def category_two_paths(G, attrname, weights):
+    """
+    Return tuple (same, diff) of numpy vectors of the sum over two-paths
+    i -- u -- v (v != i) from each node i of the weight of v, where i
+    and v have the same (or different) non-NA value of the
+    categorical attribute attrname.
+
+    Parameters:
+       G        - Graph object
+       attrname - name of categorical attribute
+       weights  - numpy vector of weight of each node
+    """
+    g = csr_graph(G)
+    n = g.numNodes()
+    (rows, cols) = (csr_rows(g.indptr), np.asarray(g.indices, dtype=np.int64))
+    (codes, valid) = category_codes(G, attrname)
+    K = int(np.max(codes, initial = 0)) + 1
+    # weighted number of neighbours u -- v of each node u with each category
+    ok = valid[cols]
+    (keys, inv) = np.unique(rows[ok] * K + codes[cols[ok]],
+                            return_inverse = True)
+    counts = np.bincount(inv, weights = weights[cols[ok]],
+                         minlength = len(keys))
+    total = np.bincount(rows[ok], weights = weights[cols[ok]], minlength = n)
+    # for each edge i -- u look up the count for u and the category of i
+    q = valid[rows]
+    (i, u) = (rows[q], cols[q])
+    lookup = u * K + codes[i]
+    pos = np.minimum(np.searchsorted(keys, lookup), max(len(keys) - 1, 0))
+    same_u = (np.where(keys[pos] == lookup, counts[pos], 0) if len(keys) > 0
+              else np.zeros(len(lookup)))
+    # v = i is in the same category so is excluded from same but not diff
+    same = np.bincount(i, weights = same_u - weights[i], minlength = n)
+    diff = np.bincount(i, weights = total[u] - same_u, minlength = n)
+    return (same, diff)
+
+
+def common_neighbour_counts(g, x, y):
+    """
+    Return numpy vector of the number of times each node w is a common
+    neighbour of the pairs of nodes x[k], y[k] (for all k), i.e. the
+    number of triangles w -- x[k] -- y[k] containing each node w.
+    The neighbours of x[k] are checked, so x[k] should be the lower
+    degree node of the pair. Processed in chunks of at most
+    MAX_WEDGES_CHUNK neighbours to bound memory use.
+
+    Parameters:
+       g    - CSRGraph object
+       x, y - numpy int64 arrays of node ids
+    """
+    n = g.numNodes()
+    rows = csr_rows(g.indptr)
+    keys = rows * n + np.asarray(g.indices, dtype = np.int64)
+    counts = np.zeros(n)
+    cum_degrees = np.cumsum(g.degrees[x])
+    start = 0
+    while start < len(x):
+        done = cum_degrees[start - 1] if start > 0 else 0
+        end = max(int(np.searchsorted(cum_degrees, done + MAX_WEDGES_CHUNK,
+                                      side = 'right')), start + 1)
+        c = g.degrees[x[start:end]]
+        offsets = np.cumsum(c) - c
+        pos = (np.repeat(g.indptr[x[start:end]] - offsets, c) +
+               np.arange(np.sum(c), dtype = np.int64))
+        w = np.asarray(g.indices[pos], dtype = np.int64)
+        yw = np.repeat(y[start:end], c) * n + w
+        found = keys[np.minimum(np.searchsorted(keys, yw),
+                                len(keys) - 1)] == yw
+        counts += np.bincount(w[found], minlength = n)
+        start = end
+    return counts
+
+
+def geometric_contagion(indptr, indices, rev_indptr, rev_indices, a, g, h):
+    """
+    Return numpy vector of the sum over (out-)neighbours j of each node
+    i with outcome 1 of g(d_j) where d_j is the number of
+    (in-)neighbours of j with outcome 1, plus h(d_i) where d_i is the
+    number of (out-)neighbours of i with outcome 1. Used for the
+    GWContagion, LogContagion and PowerContagion statistics.
+
+    Parameters:
+       indptr, indices         - CSR arrays of (out-)neighbours
+       rev_indptr, rev_indices - CSR arrays of (in-)neighbours (the same
+                                 as indptr, indices if undirected)
+       a                       - outcome indicator vector
+       g, h                    - numpy vectorized functions of counts
+    """
+    d = neighbour_sum(rev_indptr, rev_indices, a)
+    return neighbour_sum(indptr, indices, a * g(d)) + h(neighbour_sum(indptr, indices, a))
+
+
+# ======================= undirected statistics =============================
+
+def changeDensityAll(G, A):
+    """Vectorized changeDensity"""
+    return np.ones(G.numNodes())
+
+def changeActivityAll(G, A):
+    """Vectorized changeActivity"""
+    return csr_graph(G).degrees.astype(np.float64)
+
+def changeTwoStarAll(G, A):
+    """Vectorized changeTwoStar"""
+    d = changeActivityAll(G, A)
+    return d * (d - 1) / 2.0
+
+def changeThreeStarAll(G, A):
+    """Vectorized changeThreeStar"""
+    d = changeActivityAll(G, A)
+    return np.maximum(d * (d - 1) * (d - 2) / 6.0, 0)
+
+def changePartnerActivityTwoPathAll(G, A):
+    """Vectorized changePartnerActivityTwoPath"""
+    g = csr_graph(G)
+    return neighbour_sum(g.indptr, g.indices, g.degrees - 1.0)
+
+def changeTriangleT1All(G, A):
+    """Vectorized changeTriangleT1"""
+    g = csr_graph(G)
+    if g.edgeTwoPaths is None:
+        g.computeEdgeTwoPaths()
+    return np.bincount(csr_rows(g.indptr), weights = g.edgeTwoPaths,
+                       minlength = g.numNodes()) // 2
+
+def changeContagionAll(G, A):
+    """Vectorized changeContagion"""
+    g = csr_graph(G)
+    return neighbour_sum(g.indptr, g.indices, outcome_indicator(A))
+
+def changeIndirectPartnerAttributeAll(G, A):
+    """Vectorized changeIndirectPartnerAttribute"""
+    g = csr_graph(G)
+    a = outcome_indicator(A)
+    return (neighbour_sum(g.indptr, g.indices,
+                          neighbour_sum(g.indptr, g.indices, a)) -
+            g.degrees * a)
+
+def changePartnerAttributeActivityAll(G, A):
+    """Vectorized changePartnerAttributeActivity"""
+    g = csr_graph(G)
+    a = outcome_indicator(A)
+    c = neighbour_sum(g.indptr, g.indices, a)
+    return (g.degrees - 2.0) * c + neighbour_sum(g.indptr, g.indices,
+                                                 a * g.degrees)
+
+def changePartnerPartnerAttributeAll(G, A):
+    """Vectorized changePartnerPartnerAttribute"""
+    g = csr_graph(G)
+    a = outcome_indicator(A)
+    c = neighbour_sum(g.indptr, g.indices, a)
+    return 2 * neighbour_sum(g.indptr, g.indices, a * c) + c * (c - 1)
+
+def changeTriangleT2All(G, A):
+    """Vectorized changeTriangleT2"""
+    g = csr_graph(G)
+    if g.edgeTwoPaths is None:
+        g.computeEdgeTwoPaths()
+    a = outcome_indicator(A)
+    return np.bincount(csr_rows(g.indptr),
+                       weights = g.edgeTwoPaths * a[g.indices],
+                       minlength = g.numNodes())
+
+def changeTriangleT3All(G, A):
+    """Vectorized changeTriangleT3"""
+    g = csr_graph(G)
+    a = outcome_indicator(A) > 0
+    rows = csr_rows(g.indptr)
+    cols = np.asarray(g.indices, dtype = np.int64)
+    # edges u -- v (each once) with outcome 1 on both, then count
+    # each common neighbour, from the lower degree end of the edge
+    both = (rows < cols) & a[rows] & a[cols]
+    (u, v) = (rows[both], cols[both])
+    swap = g.degrees[u] > g.degrees[v]
+    return common_neighbour_counts(g, np.where(swap, v, u),
+                                   np.where(swap, u, v))
+
+def changeoObAll(attrname, G, A):
+    """Vectorized changeoOb"""
+    return (np.asarray(G.binattr[attrname]) == 1).astype(np.float64)
+
+def changeo_ObAll(attrname, G, A):
+    """Vectorized changeo_Ob"""
+    g = csr_graph(G)
+    return neighbour_sum(g.indptr, g.indices, changeoObAll(attrname, G, A))
+
+def changeoOcAll(attrname, G, A):
+    """Vectorized changeoOc"""
+    return np.nan_to_num(np.asarray(G.contattr[attrname], dtype = np.float64),
+                         nan = 0.0)
+
+def changeo_OcAll(attrname, G, A):
+    """Vectorized changeo_Oc"""
+    g = csr_graph(G)
+    return neighbour_sum(g.indptr, g.indices, changeoOcAll(attrname, G, A))
+
+def changeoO_OsameAll(attrname, G, A):
+    """Vectorized changeoO_Osame"""
+    g = csr_graph(G)
+    (match, mismatch) = category_match_arcs(G, attrname, g.indptr, g.indices)
+    return np.bincount(csr_rows(g.indptr), weights = match,
+                       minlength = g.numNodes())
+
+def changeoO_OsameContagionAll(attrname, G, A):
+    """Vectorized changeoO_OsameContagion"""
+    g = csr_graph(G)
+    (match, mismatch) = category_match_arcs(G, attrname, g.indptr, g.indices)
+    return np.bincount(csr_rows(g.indptr),
+                       weights = match * outcome_indicator(A)[g.indices],
+                       minlength = g.numNodes())
+
+def changeoO_OdiffAll(attrname, G, A):
+    """Vectorized changeoO_Odiff"""
+    g = csr_graph(G)
+    (match, mismatch) = category_match_arcs(G, attrname, g.indptr, g.indices)
+    return np.bincount(csr_rows(g.indptr), weights = mismatch,
+                       minlength = g.numNodes())
+
+def changeSettingHomophilyAll(settingGraph, G, A):
+    """Vectorized changeSettingHomophily"""
+    return changeContagionAll(settingGraph, A)
+
+def changeGWActivityAll(alpha, G, A):
+    """Vectorized changeGWActivity"""
+    return np.exp(-alpha * changeActivityAll(G, A))
+
+def changeGeographicHomophilyAll(distmatrix, G, A):
+    """Vectorized changeGeographicHomophily"""
+    a = outcome_indicator(A)
+    if isinstance(distmatrix, GeographicDistance):
+        return distmatrix.sumDistances(a)
+    distmatrix = np.asarray(distmatrix)
+    return distmatrix @ a - np.diagonal(distmatrix) * a
+
+def changeContagionDistAll(distmatrix, G, A):
+    """Vectorized changeContagionDist"""
+    g = csr_graph(G)
+    rows = csr_rows(g.indptr)
+    return np.bincount(rows, weights = (edge_distances(distmatrix, g, rows, g.indices)
+                                        * outcome_indicator(A)[g.indices]),
+                       minlength = g.numNodes())
+
+def changeSamePartnerActivityTwoPathAll(attrname, G, A):
+    """Vectorized changeSamePartnerActivityTwoPath"""
+    return category_two_paths(G, attrname, np.ones(G.numNodes()))[0]
+
+def changeDiffPartnerActivityTwoPathAll(attrname, G, A):
+    """Vectorized changeDiffPartnerActivityTwoPath"""
+    return category_two_paths(G, attrname, np.ones(G.numNodes()))[1]
+
+def changeSameIndirectPartnerAttributeAll(attrname, G, A):
+    """Vectorized changeSameIndirectPartnerAttribute"""
+    return category_two_paths(G, attrname, outcome_indicator(A))[0]
+
+def changeDiffIndirectPartnerAttributeAll(attrname, G, A):
+    """Vectorized changeDiffIndirectPartnerAttribute"""
+    return category_two_paths(G, attrname, outcome_indicator(A))[1]
+
+def changeAlterBinaryTwoStar1All(attrname, G, A):
+    """Vectorized changeAlterBinaryTwoStar1"""
+    g = csr_graph(G)
+    b = changeoObAll(attrname, G, A)
+    return neighbour_sum(g.indptr, g.indices, b * (g.degrees - 1.0))
+
+def changeAlterBinaryTwoStar2All(attrname, G, A):
+    """Vectorized changeAlterBinaryTwoStar2"""
+    g = csr_graph(G)
+    a = outcome_indicator(A)
+    b = changeoObAll(attrname, G, A)
+    return (neighbour_sum(g.indptr, g.indices,
+                          b * neighbour_sum(g.indptr, g.indices, a)) -
+            a * neighbour_sum(g.indptr, g.indices, b))
+
+def changeGWContagionAll(alpha, G, A):
+    """Vectorized changeGWContagion"""
+    g = csr_graph(G)
+    return geometric_contagion(
+        g.indptr, g.indices, g.indptr, g.indices, outcome_indicator(A),
+        lambda d: np.exp(-alpha * (d + 1)) - np.exp(-alpha * d),
+        lambda d: np.exp(-alpha * d))
+
+def changeLogContagionAll(G, A):
+    """Vectorized changeLogContagion"""
+    g = csr_graph(G)
+    return geometric_contagion(
+        g.indptr, g.indices, g.indptr, g.indices, outcome_indicator(A),
+        lambda d: np.log((d + 2) / (d + 1)), lambda d: np.log(d + 1))
+
+def changePowerContagionAll(beta, G, A):
+    """Vectorized changePowerContagion"""
+    g = csr_graph(G)
+    return geometric_contagion(
+        g.indptr, g.indices, g.indptr, g.indices, outcome_indicator(A),
+        lambda d: np.power(d + 1, 1/beta) - np.power(d, 1/beta),
+        lambda d: np.power(d, 1/beta))
+
+
+# ======================= directed statistics ===============================
+
+def changeSenderAll(G, A):
+    """Vectorized changeSender"""
+    return csr_digraph(G).outdegrees.astype(np.float64)
+
+def changeReceiverAll(G, A):
+    """Vectorized changeReceiver"""
+    return csr_digraph(G).indegrees.astype(np.float64)
+
+def changeReciprocityAll(G, A):
+    """Vectorized changeReciprocity"""
+    return csr_digraph(G).mutualdegrees.astype(np.float64)
+
+def changeEgoInTwoStarAll(G, A):
+    """Vectorized changeEgoInTwoStar"""
+    d = changeReceiverAll(G, A)
+    return d * (d - 1) / 2.0
+
+def changeEgoInThreeStarAll(G, A):
+    """Vectorized changeEgoInThreeStar"""
+    d = changeReceiverAll(G, A)
+    return np.maximum(d * (d - 1) * (d - 2) / 6.0, 0)
+
+def changeEgoOutTwoStarAll(G, A):
+    """Vectorized changeEgoOutTwoStar"""
+    d = changeSenderAll(G, A)
+    return d * (d - 1) / 2.0
+
+def changeEgoOutThreeStarAll(G, A):
+    """Vectorized changeEgoOutThreeStar"""
+    d = changeSenderAll(G, A)
+    return np.maximum(d * (d - 1) * (d - 2) / 6.0, 0)
+
+def changeMixedTwoStarAll(G, A):
+    """Vectorized changeMixedTwoStar"""
+    g = csr_digraph(G)
+    return (g.indegrees * g.outdegrees - g.mutualdegrees).astype(np.float64)
+
+def changeMixedTwoStarSourceAll(G, A):
+    """Vectorized changeMixedTwoStarSource"""
+    g = csr_digraph(G)
+    return (neighbour_sum(g.indptr, g.indices, g.outdegrees.astype(np.float64))
+            - g.mutualdegrees)
+
+def changeMixedTwoStarSinkAll(G, A):
+    """Vectorized changeMixedTwoStarSink"""
+    g = csr_digraph(G)
+    return (neighbour_sum(g.in_indptr, g.in_indices,
+                          g.indegrees.astype(np.float64)) - g.mutualdegrees)
+
+def changeDirectedContagionAll(G, A):
+    """Vectorized changeContagion (directed)"""
+    g = csr_digraph(G)
+    a = outcome_indicator(A)
+    return (neighbour_sum(g.indptr, g.indices, a) +
+            neighbour_sum(g.in_indptr, g.in_indices, a))
+
+def changeContagionReciprocityAll(G, A):
+    """Vectorized changeContagionReciprocity"""
+    g = csr_digraph(G)
+    return np.bincount(csr_rows(g.indptr),
+                       weights = g.reciprocated * outcome_indicator(A)[g.indices],
+                       minlength = g.numNodes())
+
+def changeAlterInTwoStar2All(G, A):
+    """Vectorized changeAlterInTwoStar2"""
+    g = csr_digraph(G)
+    a = outcome_indicator(A)
+    return (neighbour_sum(g.in_indptr, g.in_indices,
+                          neighbour_sum(g.indptr, g.indices, a)) -
+            g.indegrees * a)
+
+def changeAlterOutTwoStar2All(G, A):
+    """Vectorized changeAlterOutTwoStar2"""
+    g = csr_digraph(G)
+    a = outcome_indicator(A)
+    return (neighbour_sum(g.indptr, g.indices,
+                          neighbour_sum(g.in_indptr, g.in_indices, a)) -
+            g.outdegrees * a)
+
+def changeSenderMatchAll(attrname, G, A):
+    """Vectorized changeSenderMatch"""
+    g = csr_digraph(G)
+    (match, mismatch) = category_match_arcs(G, attrname, g.indptr, g.indices)
+    return np.bincount(csr_rows(g.indptr), weights = match,
+                       minlength = g.numNodes())
+
+def changeReceiverMatchAll(attrname, G, A):
+    """Vectorized changeReceiverMatch"""
+    g = csr_digraph(G)
+    (match, mismatch) = category_match_arcs(G, attrname, g.in_indptr,
+                                            g.in_indices)
+    return np.bincount(csr_rows(g.in_indptr), weights = match,
+                       minlength = g.numNodes())
+
+def changeReciprocityMatchAll(attrname, G, A):
+    """Vectorized changeReciprocityMatch"""
+    g = csr_digraph(G)
+    (match, mismatch) = category_match_arcs(G, attrname, g.indptr, g.indices)
+    return np.bincount(csr_rows(g.indptr), weights = match & g.reciprocated,
+                       minlength = g.numNodes())
+
+def changeSenderMismatchAll(attrname, G, A):
+    """Vectorized changeSenderMismatch"""
+    g = csr_digraph(G)
+    (match, mismatch) = category_match_arcs(G, attrname, g.indptr, g.indices)
+    return np.bincount(csr_rows(g.indptr), weights = mismatch,
+                       minlength = g.numNodes())
+
+def changeReceiverMismatchAll(attrname, G, A):
+    """Vectorized changeReceiverMismatch"""
+    g = csr_digraph(G)
+    (match, mismatch) = category_match_arcs(G, attrname, g.in_indptr,
+                                            g.in_indices)
+    return np.bincount(csr_rows(g.in_indptr), weights = mismatch,
+                       minlength = g.numNodes())
+
+def changeReciprocityMismatchAll(attrname, G, A):
+    """Vectorized changeReciprocityMismatch"""
+    g = csr_digraph(G)
+    (match, mismatch) = category_match_arcs(G, attrname, g.indptr, g.indices)
+    return np.bincount(csr_rows(g.indptr), weights = mismatch & g.reciprocated,
+                       minlength = g.numNodes())
+
+def directed_triangle_census(G, triangle_type):
+    """
+    Return numpy float64 vector of the number of directed triangles of
+    type triangle_type ('T1', 'D1', 'U1' or 'C1') each node is in,
+    from the triangle census of the digraph, which is computed (for
+    all the types at once) when first needed, see
+    CSRDigraph.computeTriangleCensus()
+    """
+    g = csr_digraph(G)
+    if g.triangleCensus is None:
+        g.computeTriangleCensus()
+    return g.triangleCensus[triangle_type].astype(np.float64)
+
+def changeTransitiveTriangleT1All(G, A):
+    """Vectorized changeTransitiveTriangleT1"""
+    return directed_triangle_census(G, 'T1')
+
+def changeTransitiveTriangleD1All(G, A):
+    """Vectorized changeTransitiveTriangleD1"""
+    return directed_triangle_census(G, 'D1')
+
+def changeTransitiveTriangleU1All(G, A):
+    """Vectorized changeTransitiveTriangleU1"""
+    return directed_triangle_census(G, 'U1')
+
+def changeCyclicTriangleC1All(G, A):
+    """Vectorized changeCyclicTriangleC1"""
+    return directed_triangle_census(G, 'C1')
+
+def changeGWSenderAll(alpha, G, A):
+    """Vectorized changeGWSender"""
+    return np.exp(-alpha * changeSenderAll(G, A))
+
+def changeGWReceiverAll(alpha, G, A):
+    """Vectorized changeGWReceiver"""
+    return np.exp(-alpha * changeReceiverAll(G, A))
+
+def directed_geometric_contagion(G, A, g, h):
+    """
+    Return geometric_contagion() summed over the out-neighbours (with
+    in-neighbour counts) and the in-neighbours (with out-neighbour
+    counts) of each node, for the directed GWContagion etc.
+    """
+    c = csr_digraph(G)
+    a = outcome_indicator(A)
+    return (geometric_contagion(c.indptr, c.indices, c.in_indptr,
+                                c.in_indices, a, g, h) +
+            geometric_contagion(c.in_indptr, c.in_indices, c.indptr,
+                                c.indices, a, g, h))
+
+def changeDirectedGWContagionAll(alpha, G, A):
+    """Vectorized changeGWContagion (directed)"""
+    return directed_geometric_contagion(
+        G, A, lambda d: np.exp(-alpha * (d + 1)) - np.exp(-alpha * d),
+        lambda d: np.exp(-alpha * d))
+
+def changeDirectedLogContagionAll(G, A):
+    """Vectorized changeLogContagion (directed)"""
+    return directed_geometric_contagion(
+        G, A, lambda d: np.log((d + 2) / (d + 1)), lambda d: np.log(d + 1))
+
+def changeDirectedPowerContagionAll(beta, G, A):
+    """Vectorized changePowerContagion (directed)"""
+    return directed_geometric_contagion(
+        G, A, lambda d: np.power(d + 1, 1/beta) - np.power(d, 1/beta),
+        lambda d: np.power(d, 1/beta))
+
+
+# ======================= bipartite statistics ==============================
+
+def bipartite_mode_mask(mode, G):
+    """
+    Return numpy float64 vector which is 1 for nodes in the given mode
+    (MODE_A or MODE_B) of the bipartite graph G and 0 otherwise
+    """
+    isA = np.arange(G.numNodes()) < G.num_A_nodes
+    return (isA if mode == MODE_A else ~isA).astype(np.float64)
+
+def bipartite_vectorized(vectorized_func):
+    """
+    Return vectorized bipartite change statistic function, with
+    parameters (mode, *args, G, A), which is the given vectorized
+    (one-mode) change statistic function for nodes in mode and 0 for
+    the other nodes
+    """
+    def vfunc(mode, *args):
+        (G, A) = args[-2:]
+        return bipartite_mode_mask(mode, G) * vectorized_func(*args)
+    return vfunc
+
+def changeBipartiteFourCycleAll(mode, G, A, outcome_only):
+    """
+    Vectorized changeBipartiteFourCycle1 (or changeBipartiteFourCycle2
+    if outcome_only is True, counting only other nodes with outcome 1)
+    using the two-paths matrix, or the change statistic function for
+    each node if the two-paths matrix is too large to build.
+    """
+    M = G.twoPathsMatrix
+    if M is None:
+        f = (changeStatisticsALAAMbipartite.changeBipartiteFourCycle2
+             if outcome_only else
+             changeStatisticsALAAMbipartite.changeBipartiteFourCycle1)
+        return np.array([f(mode, G, A, i) for i in G.nodeIterator()],
+                        dtype = np.float64)
+    p = M.values.astype(np.float64)
+    if outcome_only:
+        p = p * outcome_indicator(A)[M.indices]
+    return bipartite_mode_mask(mode, G) * np.bincount(
+        csr_rows(M.indptr), weights = p * (p - 1.0) / 2,
+        minlength = G.numNodes())
+
+def changeBipartiteFourCycle1All(mode, G, A):
+    """Vectorized changeBipartiteFourCycle1"""
+    return changeBipartiteFourCycleAll(mode, G, A, False)
+
+def changeBipartiteFourCycle2All(mode, G, A):
+    """Vectorized changeBipartiteFourCycle2"""
+    return changeBipartiteFourCycleAll(mode, G, A, True)
+
+
+# ======================= registry of built-in statistics ===================
+
+for (changestat_func, vectorized_func, static) in [
+        (changeStatisticsALAAM.changeDensity, changeDensityAll, True),
+        (changeStatisticsALAAM.changeActivity, changeActivityAll, True),
+        (changeStatisticsALAAM.changeTwoStar, changeTwoStarAll, True),
+        (changeStatisticsALAAM.changeThreeStar, changeThreeStarAll, True),
+        (changeStatisticsALAAM.changePartnerActivityTwoPath,
+         changePartnerActivityTwoPathAll, True),
+        (changeStatisticsALAAM.changeTriangleT1, changeTriangleT1All, True),
+        (changeStatisticsALAAM.changeContagion, changeContagionAll, False),
+        (changeStatisticsALAAM.changeIndirectPartnerAttribute,
+         changeIndirectPartnerAttributeAll, False),
+        (changeStatisticsALAAM.changePartnerAttributeActivity,
+         changePartnerAttributeActivityAll, False),
+        (changeStatisticsALAAM.changePartnerPartnerAttribute,
+         changePartnerPartnerAttributeAll, False),
+        (changeStatisticsALAAM.changeTriangleT2, changeTriangleT2All, False),
+        (changeStatisticsALAAM.changeTriangleT3, changeTriangleT3All, False),
+        (changeStatisticsALAAM.changeoOb, changeoObAll, True),
+        (changeStatisticsALAAM.changeo_Ob, changeo_ObAll, True),
+        (changeStatisticsALAAM.changeoOc, changeoOcAll, True),
+        (changeStatisticsALAAM.changeo_Oc, changeo_OcAll, True),
+        (changeStatisticsALAAM.changeoO_Osame, changeoO_OsameAll, True),
+        (changeStatisticsALAAM.changeoO_OsameContagion,
+         changeoO_OsameContagionAll, False),
+        (changeStatisticsALAAM.changeoO_Odiff, changeoO_OdiffAll, True),
+        (changeStatisticsALAAM.changeSettingHomophily,
+         changeSettingHomophilyAll, False),
+        (changeStatisticsALAAM.changeGWActivity, changeGWActivityAll, True),
+        (changeStatisticsALAAM.changeGeographicHomophily,
+         changeGeographicHomophilyAll, False),
+        (changeStatisticsALAAM.changeContagionDist,
+         changeContagionDistAll, False),
+        (changeStatisticsALAAM.changeSamePartnerActivityTwoPath,
+         changeSamePartnerActivityTwoPathAll, True),
+        (changeStatisticsALAAM.changeDiffPartnerActivityTwoPath,
+         changeDiffPartnerActivityTwoPathAll, True),
+        (changeStatisticsALAAM.changeSameIndirectPartnerAttribute,
+         changeSameIndirectPartnerAttributeAll, False),
+        (changeStatisticsALAAM.changeDiffIndirectPartnerAttribute,
+         changeDiffIndirectPartnerAttributeAll, False),
+        (changeStatisticsALAAM.changeAlterBinaryTwoStar1,
+         changeAlterBinaryTwoStar1All, True),
+        (changeStatisticsALAAM.changeAlterBinaryTwoStar2,
+         changeAlterBinaryTwoStar2All, False),
+        (changeStatisticsALAAM.changeGWContagion, changeGWContagionAll, False),
+        (changeStatisticsALAAM.changeLogContagion, changeLogContagionAll, False),
+        (changeStatisticsALAAM.changePowerContagion,
+         changePowerContagionAll, False),
+
+        (changeStatisticsALAAMdirected.changeSender, changeSenderAll, True),
+        (changeStatisticsALAAMdirected.changeReceiver, changeReceiverAll, True),
+        (changeStatisticsALAAMdirected.changeReciprocity,
+         changeReciprocityAll, True),
+        (changeStatisticsALAAMdirected.changeEgoInTwoStar,
+         changeEgoInTwoStarAll, True),
+        (changeStatisticsALAAMdirected.changeEgoInThreeStar,
+         changeEgoInThreeStarAll, True),
+        (changeStatisticsALAAMdirected.changeEgoOutTwoStar,
+         changeEgoOutTwoStarAll, True),
+        (changeStatisticsALAAMdirected.changeEgoOutThreeStar,
+         changeEgoOutThreeStarAll, True),
+        (changeStatisticsALAAMdirected.changeMixedTwoStar,
+         changeMixedTwoStarAll, True),
+        (changeStatisticsALAAMdirected.changeMixedTwoStarSource,
+         changeMixedTwoStarSourceAll, True),
+        (changeStatisticsALAAMdirected.changeMixedTwoStarSink,
+         changeMixedTwoStarSinkAll, True),
+        (changeStatisticsALAAMdirected.changeContagion,
+         changeDirectedContagionAll, False),
+        (changeStatisticsALAAMdirected.changeContagionReciprocity,
+         changeContagionReciprocityAll, False),
+        (changeStatisticsALAAMdirected.changeTransitiveTriangleT1,
+         changeTransitiveTriangleT1All, True),
+        (changeStatisticsALAAMdirected.changeTransitiveTriangleD1,
+         changeTransitiveTriangleD1All, True),
+        (changeStatisticsALAAMdirected.changeTransitiveTriangleU1,
+         changeTransitiveTriangleU1All, True),
+        (changeStatisticsALAAMdirected.changeCyclicTriangleC1,
+         changeCyclicTriangleC1All, True),
+        (changeStatisticsALAAMdirected.changeAlterInTwoStar2,
+         changeAlterInTwoStar2All, False),
+        (changeStatisticsALAAMdirected.changeAlterOutTwoStar2,
+         changeAlterOutTwoStar2All, False),
+        (changeStatisticsALAAMdirected.changeSenderMatch,
+         changeSenderMatchAll, True),
+        (changeStatisticsALAAMdirected.changeReceiverMatch,
+         changeReceiverMatchAll, True),
+        (changeStatisticsALAAMdirected.changeReciprocityMatch,
+         changeReciprocityMatchAll, True),
+        (changeStatisticsALAAMdirected.changeSenderMismatch,
+         changeSenderMismatchAll, True),
+        (changeStatisticsALAAMdirected.changeReceiverMismatch,
+         changeReceiverMismatchAll, True),
+        (changeStatisticsALAAMdirected.changeReciprocityMismatch,
+         changeReciprocityMismatchAll, True),
+        (changeStatisticsALAAMdirected.changeGWSender, changeGWSenderAll, True),
+        (changeStatisticsALAAMdirected.changeGWReceiver,
+         changeGWReceiverAll, True),
+        (changeStatisticsALAAMdirected.changeGWContagion,
+         changeDirectedGWContagionAll, False),
+        (changeStatisticsALAAMdirected.changeLogContagion,
+         changeDirectedLogContagionAll, False),
+        (changeStatisticsALAAMdirected.changePowerContagion,
+         changeDirectedPowerContagionAll, False),
+
+        (changeStatisticsALAAMbipartite.changeBipartiteDensity,
+         bipartite_vectorized(changeDensityAll), True),
+        (changeStatisticsALAAMbipartite.changeBipartiteActivity,
+         bipartite_vectorized(changeActivityAll), True),
+        (changeStatisticsALAAMbipartite.changeBipartiteEgoTwoStar,
+         bipartite_vectorized(changeTwoStarAll), True),
+        (changeStatisticsALAAMbipartite.changeBipartiteEgoThreeStar,
+         bipartite_vectorized(changeThreeStarAll), True),
+        (changeStatisticsALAAMbipartite.changeBipartiteAlterTwoStar1,
+         bipartite_vectorized(changePartnerActivityTwoPathAll), True),
+        (changeStatisticsALAAMbipartite.changeBipartiteAlterTwoStar2,
+         bipartite_vectorized(changeIndirectPartnerAttributeAll), False),
+        (changeStatisticsALAAMbipartite.changeBipartiteFourCycle1,
+         changeBipartiteFourCycle1All, True),
+        (changeStatisticsALAAMbipartite.changeBipartiteFourCycle2,
+         changeBipartiteFourCycle2All, False),
+        (changeStatisticsALAAMbipartite.changeBipartiteGWActivity,
+         bipartite_vectorized(changeGWActivityAll), True),
+        (changeStatisticsALAAMbipartite.changeBpAlterSameTwoStar1,
+         bipartite_vectorized(changeSamePartnerActivityTwoPathAll), True),
+        (changeStatisticsALAAMbipartite.changeBpAlterDiffTwoStar1,
+         bipartite_vectorized(changeDiffPartnerActivityTwoPathAll), True),
+        (changeStatisticsALAAMbipartite.changeBpAlterSameTwoStar2,
+         bipartite_vectorized(changeSameIndirectPartnerAttributeAll), False),
+        (changeStatisticsALAAMbipartite.changeBpAlterDiffTwoStar2,
+         bipartite_vectorized(changeDiffIndirectPartnerAttributeAll), False),
+        (changeStatisticsALAAMbipartite.changeBpAlterBinaryTwoStar1,
+         bipartite_vectorized(changeAlterBinaryTwoStar1All), True),
+        (changeStatisticsALAAMbipartite.changeBpAlterBinaryTwoStar2,
+         bipartite_vectorized(changeAlterBinaryTwoStar2All), False)]:
+    register_vectorized_changestat(changestat_func, vectorized_func, static)
+
+register_vectorized_changestat(changeStaticTable, changeStaticTableAll,
+                               static = True)
@@ -5,7 +5,8 @@
 #
 """
 Compute the observed values of ALAAM statistics by summing the change
-statistics for each 1 variable in the outcome variable vector.
+statistics for each 1 variable in the outcome variable vector
+(or equivalently but faster with vectorized change statistics).
 """
 import sys
 import numpy as np         # used for matrix & vector data types and functions
@@ -14,10 +15,68 @@ from Graph import Graph,NA_VALUE
 from Digraph import Digraph
 from BipartiteGraph import BipartiteGraph
 from utils import int_or_na
+from GeographicDistance import GeographicDistance
+import functools
 from changeStatisticsALAAM import *
+import changeStatisticsALAAMdirected
+import changeStatisticsALAAMbipartite
+from changeStatisticsALAAMvectorized import is_static_changestat,csr_network,change_statistic_vector,outcome_indicator,csr_graph,csr_digraph,csr_rows,neighbour_sum,category_codes,category_match_arcs,bipartite_mode_mask,edge_distances,changeTriangleT3All
 
 
 def computeObservedStatistics(G, Aobs, changestats_func_list):
+    """
+    Compute the observed values of ALAAM statistics, equal to summing
+    the change statistics for each 1 variable in the outcome variable
+    vector (see computeObservedStatisticsSum()).
+
+    Each statistic is computed directly from the network, attributes
+    and outcome vector with numpy array operations where possible:
+    for change statistics that do not depend on the outcome vector
+    (see is_static_changestat() in changeStatisticsALAAMvectorized.py)
+    this is just the sum of the vectorized change statistic over the
+    nodes with outcome 1, and for others by the closed form of the
+    statistic in CLOSED_FORM_STATISTICS (e.g. for Contagion the
+    number of edges with outcome 1 on both nodes). Only statistics
+    with neither are computed by summing the change statistics.
+
+    Parameters:
+       G                   - Graph object for graph to compute stats in
+       Aobs                - vector of 0/1 outcome variables for ALAAM
+       changestats_func_list-list of change statistics funcions
+
+     Returns:
+        numpy vector of observed statistics corresponding to the 
+        cangestats_func_list
+
+    """
+    n = len(changestats_func_list)
+    Zobs = np.zeros(n)
+    ones = np.flatnonzero(np.asarray(Aobs) == 1)
+    summed = []
+    # a Graph or Digraph (dict of dicts) is converted to CSR form once
+    # here rather than in each vectorized or closed form statistic
+    # (and so values shared by several statistics are computed once)
+    if any(is_static_changestat(f) or closed_form_statistic(f) is not None
+           for f in changestats_func_list):
+        Gcsr = csr_network(G)
+    for l in range(n):
+        f = changestats_func_list[l]
+        if is_static_changestat(f):
+            Zobs[l] = np.sum(change_statistic_vector(Gcsr, Aobs, f)[ones])
+        else:
+            statfunc = closed_form_statistic(f)
+            value = statfunc(Gcsr, Aobs) if statfunc is not None else None
+            if value is not None:
+                Zobs[l] = value
+            else:
+                summed.append(l)
+    if len(summed) > 0:
+        Zobs[summed] = computeObservedStatisticsSum(
+            G, Aobs, [changestats_func_list[l] for l in summed])
+    return Zobs
+
+
+def computeObservedStatisticsSum(G, Aobs, changestats_func_list):
     """
     Compute the observed values of ALAAM statistics by summing the change
     statistics for each 1 variable in the outcome variable vector.
@@ -48,6 +107,291 @@ def computeObservedStatistics(G, Aobs, changestats_func_list):
 
 
 
+# ==================== closed form statistics ================================
+#
+# These compute the statistic corresponding to a change statistic
+# function directly for the whole outcome vector A, equal to the sum of
+# the change statistic over the nodes with outcome 1 (switching them to
+# 1 one at a time) as computed by computeObservedStatisticsSum().
+# Each has the same parameters as the change statistic function
+# except G, A (rather than G, A, i) at the end, and returns the value
+# of the statistic. Many are sums over each (centre) node u of a
+# function of the number c[u] of neighbours of u with outcome 1.
+#
+
+def pairs(x):
+    """
+    Return numpy vector of number of unordered pairs x*(x-1)/2
+    """
+    return x * (x - 1) / 2.0
+
+def active_neighbours(G, A):
+    """
+    Return tuple (g, a, c) of the CSRGraph for G, the outcome indicator
+    vector and the number of neighbours with outcome 1 of each node
+    """
+    g = csr_graph(G)
+    a = outcome_indicator(A)
+    return (g, a, neighbour_sum(g.indptr, g.indices, a))
+
+def category_pairs(G, attrname, a):
+    """
+    Return tuple (same, diff) of numpy vectors of the number of
+    unordered pairs of neighbours with outcome 1 of each node where
+    the pair have the same (or different) non-NA value of the
+    categorical attribute attrname.
+    """
+    g = csr_graph(G)
+    n = g.numNodes()
+    (rows, cols) = (csr_rows(g.indptr), np.asarray(g.indices, dtype=np.int64))
+    (codes, valid) = category_codes(G, attrname)
+    K = int(np.max(codes, initial = 0)) + 1
+    ok = valid[cols] & (a[cols] > 0)
+    (keys, counts) = np.unique(rows[ok] * K + codes[cols[ok]],
+                               return_counts = True)
+    counts = counts.astype(np.float64)
+    total = np.bincount(rows[ok], minlength = n).astype(np.float64)
+    same = np.bincount(keys // K, weights = pairs(counts), minlength = n)
+    diff = (total**2 - np.bincount(keys // K, weights = counts**2,
+                                   minlength = n)) / 2
+    return (same, diff)
+
+def observedContagion(G, A):
+    """Contagion: number of edges with outcome 1 on both nodes"""
+    (g, a, c) = active_neighbours(G, A)
+    return np.dot(a, c) / 2
+
+def observedIndirectPartnerAttribute(G, A):
+    """IndirectPartnerAttribute: number of two-paths *--o--*"""
+    (g, a, c) = active_neighbours(G, A)
+    return np.sum(pairs(c))
+
+def observedPartnerAttributeActivity(G, A):
+    """PartnerAttributeActivity: number of two-paths *--*--o"""
+    (g, a, c) = active_neighbours(G, A)
+    return np.sum(a * c * (g.degrees - 1.0))
+
+def observedPartnerPartnerAttribute(G, A):
+    """PartnerPartnerAttribute: twice the number of two-paths *--*--*"""
+    (g, a, c) = active_neighbours(G, A)
+    return np.sum(a * c * (c - 1))
+
+def observedTriangleT2(G, A):
+    """TriangleT2: number of triangles on each edge with outcome 1 on both nodes"""
+    g = csr_graph(G)
+    if g.edgeTwoPaths is None:
+        g.computeEdgeTwoPaths()
+    a = outcome_indicator(A)
+    return np.sum(g.edgeTwoPaths * a[csr_rows(g.indptr)] * a[g.indices]) / 2
+
+def observedTriangleT3(G, A):
+    """TriangleT3: number of triangles with outcome 1 on all three nodes"""
+    return np.sum(outcome_indicator(A) * changeTriangleT3All(G, A)) / 3
+
+def observedoO_OsameContagion(attrname, G, A):
+    """oO_OsameContagion: number of edges with outcome 1 and matching
+    categorical attribute on both nodes"""
+    g = csr_graph(G)
+    a = outcome_indicator(A)
+    (match, mismatch) = category_match_arcs(G, attrname, g.indptr, g.indices)
+    return np.sum(match * a[csr_rows(g.indptr)] * a[g.indices]) / 2
+
+def observedSettingHomophily(settingGraph, G, A):
+    """SettingHomophily: Contagion in the setting network"""
+    return observedContagion(settingGraph, A)
+
+def observedGeographicHomophily(distmatrix, G, A):
+    """GeographicHomophily: sum of distances between nodes with outcome 1
+    (the distance from each node to the nodes with lower node id)"""
+    a = outcome_indicator(A)
+    if isinstance(distmatrix, GeographicDistance):
+        return a @ distmatrix.sumDistances(a) / 2 # distances are symmetric
+    return a @ np.tril(np.asarray(distmatrix), -1) @ a
+
+def observedContagionDist(distmatrix, G, A):
+    """ContagionDist: sum of distances on edges with outcome 1 on both
+    nodes (the distance from the higher to the lower node id)"""
+    g = csr_graph(G)
+    a = outcome_indicator(A)
+    (rows, cols) = (csr_rows(g.indptr), g.indices)
+    lower = cols < rows
+    return np.sum((edge_distances(distmatrix, g, rows, cols) * a[rows] * a[cols])[lower])
+
+def observedSameIndirectPartnerAttribute(attrname, G, A):
+    """SameIndirectPartnerAttribute: number of two-paths {*}--o--{*}"""
+    return np.sum(category_pairs(G, attrname, outcome_indicator(A))[0])
+
+def observedDiffIndirectPartnerAttribute(attrname, G, A):
+    """DiffIndirectPartnerAttribute: number of two-paths {*}--o--<*>"""
+    return np.sum(category_pairs(G, attrname, outcome_indicator(A))[1])
+
+def observedAlterBinaryTwoStar2(attrname, G, A):
+    """AlterBinaryTwoStar2: number of two-paths *--[o]--*"""
+    (g, a, c) = active_neighbours(G, A)
+    return np.sum((np.asarray(G.binattr[attrname]) == 1) * pairs(c))
+
+def observedGWContagion(alpha, G, A):
+    """GWContagion: sum over nodes with outcome 1 of exp(-alpha * c)"""
+    (g, a, c) = active_neighbours(G, A)
+    return np.sum(a * np.exp(-alpha * c))
+
+def observedLogContagion(G, A):
+    """LogContagion: sum over nodes with outcome 1 of log(c + 1)"""
+    (g, a, c) = active_neighbours(G, A)
+    return np.sum(a * np.log(c + 1))
+
+def observedPowerContagion(beta, G, A):
+    """PowerContagion: sum over nodes with outcome 1 of c^(1/beta)"""
+    (g, a, c) = active_neighbours(G, A)
+    return np.sum(a * np.power(c, 1/beta))
+
+def directed_active_neighbours(G, A):
+    """
+    Return tuple (g, a, cout, cin) of the CSRDigraph for G, the outcome
+    indicator vector and the number of out-neighbours and in-neighbours
+    with outcome 1 of each node
+    """
+    g = csr_digraph(G)
+    a = outcome_indicator(A)
+    return (g, a, neighbour_sum(g.indptr, g.indices, a),
+            neighbour_sum(g.in_indptr, g.in_indices, a))
+
+def observedDirectedContagion(G, A):
+    """Contagion (directed): number of arcs with outcome 1 on both nodes"""
+    (g, a, cout, cin) = directed_active_neighbours(G, A)
+    return np.dot(a, cout)
+
+def observedContagionReciprocity(G, A):
+    """ContagionReciprocity: number of mutual arcs with outcome 1 on both nodes"""
+    g = csr_digraph(G)
+    a = outcome_indicator(A)
+    return np.sum(g.reciprocated * a[csr_rows(g.indptr)] * a[g.indices]) / 2
+
+def observedAlterInTwoStar2(G, A):
+    """AlterInTwoStar2: number of two-paths *<--o-->*"""
+    (g, a, cout, cin) = directed_active_neighbours(G, A)
+    return np.sum(pairs(cout))
+
+def observedAlterOutTwoStar2(G, A):
+    """AlterOutTwoStar2: number of two-paths *-->o<--*"""
+    (g, a, cout, cin) = directed_active_neighbours(G, A)
+    return np.sum(pairs(cin))
+
+def observedDirectedGWContagion(alpha, G, A):
+    """GWContagion (directed)"""
+    (g, a, cout, cin) = directed_active_neighbours(G, A)
+    return np.sum(a * (np.exp(-alpha * cout) + np.exp(-alpha * cin)))
+
+def observedDirectedLogContagion(G, A):
+    """LogContagion (directed)"""
+    (g, a, cout, cin) = directed_active_neighbours(G, A)
+    return np.sum(a * (np.log(cout + 1) + np.log(cin + 1)))
+
+def observedDirectedPowerContagion(beta, G, A):
+    """PowerContagion (directed)"""
+    (g, a, cout, cin) = directed_active_neighbours(G, A)
+    return np.sum(a * (np.power(cout, 1/beta) + np.power(cin, 1/beta)))
+
+def observedBipartiteAlterTwoStar2(mode, G, A):
+    """Bipartite AlterTwoStar2: number of two-paths *--o--* with
+    the outcome nodes in mode"""
+    g = csr_graph(G)
+    a = outcome_indicator(A) * bipartite_mode_mask(mode, G)
+    return np.sum(pairs(neighbour_sum(g.indptr, g.indices, a)))
+
+def observedBipartiteFourCycle2(mode, G, A):
+    """Bipartite FourCycle2: number of four-cycles with outcome 1 on
+    both nodes in mode, or None if the two-paths matrix is not built"""
+    M = G.twoPathsMatrix
+    if M is None:
+        return None
+    a = outcome_indicator(A) * bipartite_mode_mask(mode, G)
+    p = M.values.astype(np.float64)
+    return np.sum(pairs(p) * a[csr_rows(M.indptr)] * a[M.indices]) / 2
+
+def observedBpAlterSameTwoStar2(mode, attrname, G, A):
+    """Bipartite AlterSameTwoStar2: number of two-paths {*}--o--{*}"""
+    a = outcome_indicator(A) * bipartite_mode_mask(mode, G)
+    return np.sum(category_pairs(G, attrname, a)[0])
+
+def observedBpAlterDiffTwoStar2(mode, attrname, G, A):
+    """Bipartite AlterDiffTwoStar2: number of two-paths {*}--o--<*>"""
+    a = outcome_indicator(A) * bipartite_mode_mask(mode, G)
+    return np.sum(category_pairs(G, attrname, a)[1])
+
+def observedBpAlterBinaryTwoStar2(mode, attrname, G, A):
+    """Bipartite AlterBinaryTwoStar2: number of two-paths *--[o]--*"""
+    return observedAlterBinaryTwoStar2(
+        attrname, G, outcome_indicator(A) * bipartite_mode_mask(mode, G))
+
+
+# dict mapping change statistic function to function computing the
+# corresponding statistic directly, see closed_form_statistic()
+CLOSED_FORM_STATISTICS = {
+    changeContagion: observedContagion,
+    changeIndirectPartnerAttribute: observedIndirectPartnerAttribute,
+    changePartnerAttributeActivity: observedPartnerAttributeActivity,
+    changePartnerPartnerAttribute: observedPartnerPartnerAttribute,
+    changeTriangleT2: observedTriangleT2,
+    changeTriangleT3: observedTriangleT3,
+    changeoO_OsameContagion: observedoO_OsameContagion,
+    changeSettingHomophily: observedSettingHomophily,
+    changeGeographicHomophily: observedGeographicHomophily,
+    changeContagionDist: observedContagionDist,
+    changeSameIndirectPartnerAttribute: observedSameIndirectPartnerAttribute,
+    changeDiffIndirectPartnerAttribute: observedDiffIndirectPartnerAttribute,
+    changeAlterBinaryTwoStar2: observedAlterBinaryTwoStar2,
+    changeGWContagion: observedGWContagion,
+    changeLogContagion: observedLogContagion,
+    changePowerContagion: observedPowerContagion,
+    changeStatisticsALAAMdirected.changeContagion: observedDirectedContagion,
+    changeStatisticsALAAMdirected.changeContagionReciprocity:
+        observedContagionReciprocity,
+    changeStatisticsALAAMdirected.changeAlterInTwoStar2: observedAlterInTwoStar2,
+    changeStatisticsALAAMdirected.changeAlterOutTwoStar2:
+        observedAlterOutTwoStar2,
+    changeStatisticsALAAMdirected.changeGWContagion:
+        observedDirectedGWContagion,
+    changeStatisticsALAAMdirected.changeLogContagion:
+        observedDirectedLogContagion,
+    changeStatisticsALAAMdirected.changePowerContagion:
+        observedDirectedPowerContagion,
+    changeStatisticsALAAMbipartite.changeBipartiteAlterTwoStar2:
+        observedBipartiteAlterTwoStar2,
+    changeStatisticsALAAMbipartite.changeBipartiteFourCycle2:
+        observedBipartiteFourCycle2,
+    changeStatisticsALAAMbipartite.changeBpAlterSameTwoStar2:
+        observedBpAlterSameTwoStar2,
+    changeStatisticsALAAMbipartite.changeBpAlterDiffTwoStar2:
+        observedBpAlterDiffTwoStar2,
+    changeStatisticsALAAMbipartite.changeBpAlterBinaryTwoStar2:
+        observedBpAlterBinaryTwoStar2,
+    }
+
+
+def closed_form_statistic(changestat_func):
+    """
+    Return function with signature (G, A) computing the statistic
+    corresponding to the change statistic function directly (see
+    CLOSED_FORM_STATISTICS), or None if there is none. The function
+    may also return None if it cannot compute the statistic for a
+    particular network (in which case the change statistics are summed).
+
+    Parameters:
+       changestat_func - change statistic function with signature (G, A, i),
+                         possibly made with functools.partial
+    """
+    if isinstance(changestat_func, functools.partial):
+        statfunc = CLOSED_FORM_STATISTICS.get(changestat_func.func)
+        if statfunc is None:
+            return None
+        return functools.partial(statfunc, *changestat_func.args,
+                                 **changestat_func.keywords)
+    return CLOSED_FORM_STATISTICS.get(changestat_func)
+
+
+
+
 def get_observed_stats_from_network_attr(edgelist_filename, param_func_list,
                                          labels,
                                          outcome_bin_filename,
@@ -0,0 +1,133 @@
+#
+# File:    coreALAAMsampler.py
+# Author:  Alex Stivala
+# Created: October 2026
+#
+"""Core of the ALAAM MCMC samplers: the Metropolis-Hastings loop
+   shared by the basic, conditional, bipartite and ZOO samplers,
+   which differ only in how the node to toggle is chosen.
+
+   As each proposal costs only a few microseconds of actual work for a
+   small model, the loop avoids numpy calls on scalars and small
+   vectors: the change statistics are computed as a tuple by the fused
+   change statistics function, the weighted sum with theta is done with
+   Python floats, the move is accepted by comparing with log(u) for
+   uniform u (drawn, with the proposals, in blocks as numpy arrays)
+   rather than computing exp() of the sum, and the change statistics
+   of accepted moves are summed for the whole block at once.
+"""
+
+import numpy as np         # used for matrix & vector data types and functions
+
+from utils import sampler_rng,SAMPLER_BLOCK_SIZE
+from changeStatisticsALAAMfused import compile_changestats
+
+
+def coreALAAMsampler(G, A, changestats_func_list, theta, performMove,
+                     sampler_m, rng = None, nodes = None, nodesets = None):
+    """
+    coreALAAMsampler - sample from ALAAM distribution, toggling the
+                       outcome of a node chosen uniformly at random
+                       from the list nodes, or (for the ZOO sampler)
+                       chosen by the nodesets object.
+
+    Parameters:
+       G                   - Graph object for network (fixed)
+       A                   - vector of 0/1 outcome variables for ALAAM
+       changestats_func_list  - list of change statistics funcions
+       theta               - numpy vector of theta (parameter) values
+       performMove         - if True, actually do the MC move,
+                             updating the outcome vector A
+                             (otherwise are not modified)
+       sampler_m           - number of proposals (iterations of sampler)
+       rng                 - numpy random Generator or None, see
+                             basicALAAMsampler()
+       nodes               - list of nodes to choose from uniformly at
+                             random (see proposal_nodes() in
+                             OutcomeState.py), or None if nodesets
+                             is given
+       nodesets            - ZeroOneNodeSets object (see
+                             zooALAAMsampler.py) choosing the move type
+                             and node, and giving the proposal ratio,
+                             or None if nodes is given. If it is kept
+                             by A (an OutcomeState), A updates it
+                             when an outcome changes, otherwise it is
+                             updated here when a move is performed.
+
+    Returns:
+        acceptance_rate      - sampler acceptance rate
+        changeTo1ChangeStats - numpy vector of change stats for changeTo1 moves
+        changeTo0ChangeStats - numpy vector of change stats for changeTo0 moves
+
+    Note A is updated in place if performMove is True
+    otherwise unchanged
+    """
+    assert (nodes is None) != (nodesets is None)
+    n = len(changestats_func_list)
+    theta = np.ravel(theta).tolist() # may be a row vector (see stochasticApproximation)
+    rng = sampler_rng(rng)
+    # node sets to update here (not those maintained by an OutcomeState)
+    movedNodesets = (None if nodesets is None or
+                     getattr(A, 'zeroOneNodeSets', None) is nodesets
+                     else nodesets)
+
+    accepted = 0
+    changeTo1ChangeStats = np.zeros(n)
+    changeTo0ChangeStats = np.zeros(n)
+    # all change statistics computed together, see changeStatisticsALAAMfused
+    changestats_func = compile_changestats(changestats_func_list,
+                                           as_tuple = True)
+    for start in range(0, sampler_m, SAMPLER_BLOCK_SIZE):
+        m = min(SAMPLER_BLOCK_SIZE, sampler_m - start)
+        # draw the random numbers for this block of proposals: accept
+        # the move if log(u) < log(proposal ratio) + theta * changestats
+        with np.errstate(divide = 'ignore'):
+            thresholds = np.log(rng.random(m)).tolist()
+        if nodesets is None:
+            proposals = rng.integers(len(nodes), size = m).tolist()
+        else:
+            (moveUniforms, nodeUniforms) = rng.random((2, m)).tolist()
+        changeTo1 = []  # change statistics of accepted moves in this block
+        changeTo0 = []
+        for k in range(m):
+            if nodesets is None:
+                i = nodes[proposals[k]]
+                isChangeToZero = (A[i] == 1)
+                total = 0.0
+            else:
+                isChangeToZero = nodesets.randomMoveType(moveUniforms[k])
+                i = nodesets.randomNode(1 if isChangeToZero else 0,
+                                        nodeUniforms[k])
+                total = nodesets.logProposalRatio(isChangeToZero)
+            if isChangeToZero:
+                A[i] = 0
+
+            # compute change statistics for each of the n statistics
+            changestats = changestats_func(G, A, i)
+            weighted = 0.0
+            for j in range(n):
+                weighted += theta[j] * changestats[j]
+            total += -weighted if isChangeToZero else weighted
+
+            if thresholds[k] < total:
+                accepted += 1
+                if isChangeToZero:
+                    changeTo0.append(changestats)
+                    if not performMove:
+                        # reverse change made so A same as before
+                        A[i] = 1
+                else:
+                    changeTo1.append(changestats)
+                    if performMove:
+                        A[i] = 1
+                if performMove and movedNodesets is not None:
+                    movedNodesets.move(i, 0 if isChangeToZero else 1)
+            elif isChangeToZero: # move not accepted, so reverse change
+                A[i] = 1
+        if len(changeTo1) > 0:
+            changeTo1ChangeStats += np.sum(changeTo1, axis = 0)
+        if len(changeTo0) > 0:
+            changeTo0ChangeStats += np.sum(changeTo0, axis = 0)
+
+    acceptance_rate = float(accepted) / sampler_m
+    return (acceptance_rate, changeTo1ChangeStats, changeTo0ChangeStats)
@@ -39,15 +39,19 @@
 
 import time
 import os
+import multiprocessing
 import random
 import math
 import numpy as np         # used for matrix & vector data types and functions
 from functools import partial
 
 from utils import NA_VALUE,int_or_na
-from Graph import Graph
 from Digraph import Digraph
 from BipartiteGraph import BipartiteGraph
+from binaryNetwork import load_network
+from OutcomeState import make_outcome_state
+from changeStatisticsALAAMvectorized import precompute_static_changestats
+from sharedNetwork import share_network,attach_network,release_network
 from changeStatisticsALAAM import *
 from initialEstimator import algorithm_S
 #OLD:from equilibriumExpectation import algorithm_EE,THETA_PREFIX,DZA_PREFIX
@@ -66,7 +70,11 @@ def run_on_network_attr(edgelist_filename, param_func_list, labels,
                         sampler_func = basicALAAMsampler,
                         zone_filename= None,
                         directed = False,
-                        bipartite = False):
+                        bipartite = False,
+                        cache_dir = None,
+                        reorder = None,
+                        edge_weights = False,
+                        seed = None):
     """Run estimation using EE algorithm on specified network with binary 
     and/or continuous and categorical attributes.
     
@@ -106,6 +114,17 @@ def run_on_network_attr(edgelist_filename, param_func_list, labels,
                            True for directed network else undirected.
          bipartite       - Default False.
                            True for two-mode network else one-mode.
+         cache_dir       - Default None. If not None, directory
+                           for binary cache of the network (see
+                           load_network() in binaryNetwork.py) so
+                           that the text files are only parsed once
+                           for multiple (e.g. parallel) runs.
+         edge_weights    - Default False. If True, load edge weights
+                           (e.g. distances, for ContagionDist with
+                           EDGE_WEIGHTS) from the third column of the
+                           edge list. Only for undirected one-mode network.
+         seed            - Default None. Seed for the sampler random
+                           number generator, see run_ee().
 
 
 
@@ -120,19 +139,9 @@ def run_on_network_attr(edgelist_filename, param_func_list, labels,
     assert(len(param_func_list) == len(labels))
     basename = os.path.splitext(os.path.basename(edgelist_filename))[0]
 
-    if directed:
-        if bipartite:
-            raise Exception("directed bipartite network not suppored")
-        G = Digraph(edgelist_filename, binattr_filename, contattr_filename,
-                    catattr_filename, zone_filename)
-    else:
-        if bipartite:
-            G = BipartiteGraph(edgelist_filename, binattr_filename,
-                               contattr_filename, catattr_filename,
-                               zone_filename)
-        else:
-            G = Graph(edgelist_filename, binattr_filename,
-                      contattr_filename, catattr_filename, zone_filename)
+    G = load_network(edgelist_filename, binattr_filename, contattr_filename,
+                     catattr_filename, zone_filename, directed, bipartite,
+                     cache_dir, reorder, edge_weights)
 
     outcome_binvar = list(map(int_or_na, open(outcome_bin_filename).read().split()[1:]))
     assert(len(outcome_binvar) == G.numNodes())
@@ -143,7 +152,8 @@ def run_on_network_attr(edgelist_filename, param_func_list, labels,
            EEiterations    = EEiterations,
            run = run,
            learningRate = learningRate,
-           sampler_func = sampler_func)
+           sampler_func = sampler_func,
+           seed = seed)
 
     
 
@@ -167,7 +177,8 @@ def run_ee(G, outcome_vector, basename, param_func_list, labels,
            EEiterations    = 50000,
            run = None,
            learningRate = 0.01,
-           sampler_func = basicALAAMsampler):
+           sampler_func = basicALAAMsampler,
+           seed = None):
     """Run estimation using EE algorithm with supplied Graph (or Digraph
     or BipartiteGraph) object (which also contains (fixed) nodal
     attributes and snowball sampling zone information) and outcome
@@ -197,6 +208,17 @@ def run_ee(G, outcome_vector, basename, param_func_list, labels,
                                (G, A, changestats_func_list, theta, performMove,
                                 sampler_m); see basicALAAMsampler.py
                                default basicALAAMsampler
+                               The sampler is given the numpy random
+                               Generator for the run as its rng parameter.
+         seed             - seed (int) for the random number generator
+                            of the sampler, or None (the default) for a
+                            seed from the operating system. The stream
+                            for each run is spawned from
+                            numpy.random.SeedSequence(seed) as its child
+                            number run, so runs with the same seed
+                            (and different run numbers) are independent,
+                            and each can be reproduced from the seed
+                            recorded in the theta_values file header.
 
     Write output to theta_values_<basename>_<run>.txt and
                     dzA_values_<basename>_<run>.txt
@@ -221,15 +243,29 @@ def run_ee(G, outcome_vector, basename, param_func_list, labels,
     G.printSummary()
     
     assert(len(outcome_vector) == G.numNodes())
-    A = list(outcome_vector)
+    # outcome vector is in original node order, G may have reordered nodes
+    A = list(G.toInternalOrder(outcome_vector))
     print('positive outcome attribute = ', (float(A.count(1))/len(A))*100.0, '%')
     assert( all([x in [0,1,NA_VALUE] for x in A]) )
 
     if NA_VALUE in A:
         print('Warning: outcome variable has', A.count(NA_VALUE), 'NA values')
 
-    A = np.array(A) # convert list to numpy vector
-    
+    # convert list to numpy vector, which for undirected networks also
+    # maintains neighbour outcome counts for the change statistics
+    A = make_outcome_state(G, A)
+
+    # change statistics not depending on the outcome vector are
+    # computed once for each node here rather than in every iteration
+    sampler_func_list = precompute_static_changestats(G, param_func_list)
+
+    # independent random number stream for this run (child number run
+    # of the seed sequence, as would be made by SeedSequence.spawn())
+    seedseq = np.random.SeedSequence(seed, spawn_key = () if run is None
+                                     else (run,))
+    sampler_func = partial(sampler_func, rng = np.random.default_rng(seedseq))
+    print('seed = ', seedseq.entropy)
+
     # steps of Alg 1    
     M1 = 100
 
@@ -241,10 +277,11 @@ def run_ee(G, outcome_vector, basename, param_func_list, labels,
     print('learningRate = ', learningRate, end=' ')
     
     theta_outfile = open(THETA_OUTFILENAME, 'w',1) # 1 means line buffering
+    theta_outfile.write('# seed = ' + str(seedseq.entropy) + '\n')
     theta_outfile.write('t ' + ' '.join(labels) + ' ' + 'AcceptanceRate' + '\n')
     print('Running Algorithm S...', end=' ')
     start = time.time()
-    (theta, Dmean) = algorithm_S(G, A, param_func_list, M1, theta_outfile,
+    (theta, Dmean) = algorithm_S(G, A, sampler_func_list, M1, theta_outfile,
                                  sampler_func)
     print(time.time() - start, 's')
     print('after Algorithm S:')
@@ -256,7 +293,7 @@ def run_ee(G, outcome_vector, basename, param_func_list, labels,
     start = time.time()
     #OLD: theta = algorithm_EE(G, A, param_func_list, theta, Dmean,
     #OLD:                     Mouter, Msteps, theta_outfile, dzA_outfile)
-    theta = algorithm_EE(G, A, param_func_list, theta, 
+    theta = algorithm_EE(G, A, sampler_func_list, theta, 
                          EEiterations, theta_outfile, dzA_outfile, learningRate,
                          sampler_func)
 
@@ -271,5 +308,91 @@ def run_ee(G, outcome_vector, basename, param_func_list, labels,
         print('  Stivala, A. (2023). Overcoming near-degeneracy in the autologistic actor\n  attribute model. arXiv preprint arXiv:2309.07338.\n  https://arxiv.org/abs/2309.07338')
         print()
 
-    if isinstance(G, Graph):
-        print("twoPaths cache info: ", G.twoPaths.cache_info())
+
+def run_ee_shared(shared_network_descr, outcome_vector, basename,
+                  param_func_list, labels,
+                  EEiterations    = 50000,
+                  run = None,
+                  learningRate = 0.01,
+                  sampler_func = basicALAAMsampler,
+                  seed = None):
+    """Run estimation using EE algorithm, as for run_ee(), but on a network
+    in shared memory, created by share_network() (see sharedNetwork.py)
+    in another process. This is used by run_ee_parallel() in worker
+    processes. The parameters are the same as for run_ee() except
+    that instead of G:
+
+    Parameters:
+         shared_network_descr - description of network in shared memory
+                                from share_network()
+    """
+    (G, shms) = attach_network(shared_network_descr)
+    run_ee(G, outcome_vector, basename, param_func_list, labels,
+           EEiterations = EEiterations, run = run,
+           learningRate = learningRate, sampler_func = sampler_func,
+           seed = seed)
+    del G
+    release_network(shms)
+
+
+def run_ee_parallel(G, outcome_vector, basename, param_func_list, labels,
+                    runs,
+                    num_processes = None,
+                    EEiterations    = 50000,
+                    learningRate = 0.01,
+                    sampler_func = basicALAAMsampler,
+                    seed = None):
+    """Run multiple EE estimation runs in parallel in worker processes,
+    using a single copy of the network in shared memory. The network
+    adjacency and attribute arrays are put in shared memory with
+    share_network() (see sharedNetwork.py) and each worker attaches to
+    them read-only, so the total memory used is one copy of the network
+    plus the outcome vector (and other state) for each run.
+
+    Parameters:
+         G                 - Graph (or Digraph or BipartiteGraph) object
+                             containing network and node covariates and
+                             any snowball sampling zone information.
+         outcome_vector    - list of binary (0 or 1) outcome variables,
+                             corresponding to nodes in G
+         basename          - basename for theta and dzA output files
+                             theta_values_<basename>_<run>.txt and
+                             dzA_values_<basename>_<run>.txt
+         param_func_list   - list of change statistic functions corresponding
+                             to parameters to estimate
+         labels            - list of strings corresponding to param_func_list
+                             to label output (header line)
+         runs              - list of run numbers, one run for each, used as
+                             suffix on output filenames
+         num_processes     - number of worker processes. Default None
+                             in which case the number of CPUs is used.
+         EEiterations     - Number of iterations of the EE algorithm.
+                            Default 50000.
+         learningRate        - learning rate (step size multiplier, a)
+                               defult 0.01
+         sampler_func        - ALAAM sampler function with signature
+                               (G, A, changestats_func_list, theta, performMove,
+                                sampler_m); see basicALAAMsampler.py
+                               default basicALAAMsampler
+         seed             - seed (int) for the random number generators,
+                            or None (the default) for a seed from the
+                            operating system. Each run has the stream
+                            spawned from numpy.random.SeedSequence(seed)
+                            as its child number run (see run_ee()).
+
+    Write output to theta_values_<basename>_<run>.txt and
+                    dzA_values_<basename>_<run>.txt for each run
+    WARNING: these files are overwritten.
+    """
+    # same seed (entropy) for every run, they differ by run number
+    seed = np.random.SeedSequence(seed).entropy
+    (descr, shms) = share_network(G)
+    try:
+        # spawn so workers do not inherit a copy of the parent's memory
+        with multiprocessing.get_context('spawn').Pool(num_processes) as pool:
+            pool.starmap(run_ee_shared,
+                         [(descr, outcome_vector, basename, param_func_list,
+                           labels, EEiterations, run, learningRate,
+                           sampler_func, seed) for run in runs])
+    finally:
+        release_network(shms, unlink = True)
@@ -49,6 +49,7 @@ from changeStatisticsALAAMbipartite import *
 from changeStatisticsALAAMdirected import *
 from stochasticApproximation import stochasticApproximation
 from computeObservedStatistics import computeObservedStatistics
+from changeStatisticsALAAMvectorized import precompute_static_changestats
 from gofALAAM import gof
 from basicALAAMsampler import basicALAAMsampler
 from bipartiteALAAMsampler import bipartiteALAAMsampler
@@ -69,7 +70,10 @@ def run_on_network_attr(edgelist_filename, param_func_list, labels,
                         bipartiteGoFfixedMode = None,
                         add_gof_param_func_list = None,
                         outputGoFstatsFilename = None,
-                        outputObsStatsFilename = None
+                        outputObsStatsFilename = None,
+                        edge_weights = False,
+                        seed = None,
+                        numChains = 1
                         ):
     """Run estimation using stochastic approximation algorithm
     on specified network with binary and/or continuous and
@@ -127,6 +131,14 @@ def run_on_network_attr(edgelist_filename, param_func_list, labels,
                                  WARNING: file overwritten.
          outputObsStatsFilename- Filename to write observed statistics to or
                                  None. Default None. WARNING: file overwritten.
+         edge_weights    - Default False. If True, load edge weights
+                           (e.g. distances, for ContagionDist with
+                           EDGE_WEIGHTS) from the third column of the
+                           edge list. Only for undirected one-mode network.
+         seed            - Default None. Seed for the sampler random
+                           number generator, see run_sa().
+         numChains       - Default 1. Number of Markov chains for
+                           phase 3 and GoF, see run_sa().
 
     Writes output to stdout.
 
@@ -135,6 +147,7 @@ def run_on_network_attr(edgelist_filename, param_func_list, labels,
     assert bipartiteGoFfixedMode in [None, MODE_A, MODE_B]
     assert not (bipartiteGoFfixedMode is not None and not bipartite)
     assert not (zone_filename is not None and bipartite)
+    assert not (edge_weights and (directed or bipartite))
 
     if directed:
         if bipartite:
@@ -148,7 +161,8 @@ def run_on_network_attr(edgelist_filename, param_func_list, labels,
                                zone_filename)
         else:
             G = Graph(edgelist_filename, binattr_filename,
-                      contattr_filename, catattr_filename, zone_filename)
+                      contattr_filename, catattr_filename, zone_filename,
+                      edge_weights = edge_weights)
 
     outcome_binvar = list(map(int_or_na, open(outcome_bin_filename).read().split()[1:]))
 
@@ -161,7 +175,9 @@ def run_on_network_attr(edgelist_filename, param_func_list, labels,
            bipartiteGoFfixedMode = bipartiteGoFfixedMode,
            add_gof_param_func_list = add_gof_param_func_list,
            outputGoFstatsFilename = outputGoFstatsFilename,
-           outputObsStatsFilename = outputObsStatsFilename)
+           outputObsStatsFilename = outputObsStatsFilename,
+           seed = seed,
+           numChains = numChains)
 
 
 
@@ -212,7 +228,9 @@ def run_sa(G, outcome_vector, param_func_list, labels,
            bipartiteGoFfixedMode = None,
            add_gof_param_func_list = None,
            outputGoFstatsFilename = None,
-           outputObsStatsFilename = None
+           outputObsStatsFilename = None,
+           seed = None,
+           numChains = 1
            ):
     """Run estimation using stochastic approximation algorithm with
     supplied Graph (or Digraph or BipartiteGraph) object (which also
@@ -256,6 +274,16 @@ def run_sa(G, outcome_vector, param_func_list, labels,
                                  WARNING: file overwritten.
          outputObsStatsFilename- Filename to write observed statistics to or
                                  None. Default None. WARNING: file overwritten.
+         seed              - seed (int) for the numpy random Generator
+                             given to the sampler as its rng parameter,
+                             or None (the default) for a seed from the
+                             operating system. The seed used is printed
+                             so the run can be reproduced.
+         numChains         - number of Markov chains advanced in
+                             lockstep (see multiChainALAAMsampler.py)
+                             to sample the statistics in phase 3 of
+                             the stochastic approximation and in the
+                             goodness-of-fit test. Default 1.
 
     Writes output to stdout.
 
@@ -272,7 +300,8 @@ def run_sa(G, outcome_vector, param_func_list, labels,
     G.printSummary()
 
     assert(len(outcome_vector) == G.numNodes())
-    A = list(outcome_vector)
+    # outcome vector is in original node order, G may have reordered nodes
+    A = list(G.toInternalOrder(outcome_vector))
     assert( all([x in [0,1,NA_VALUE] for x in A]) )
     print('positive outcome attribute = ', (float(A.count(1))/len(A))*100.0, '%')
     if NA_VALUE in A:
@@ -284,6 +313,14 @@ def run_sa(G, outcome_vector, param_func_list, labels,
 
     theta = np.zeros(len(param_func_list))
 
+    # change statistics not depending on the outcome vector are
+    # computed once for each node here rather than in every iteration
+    sampler_func_list = precompute_static_changestats(G, param_func_list)
+
+    seedseq = np.random.SeedSequence(seed)
+    sampler_func = partial(sampler_func, rng = np.random.default_rng(seedseq))
+    print('seed = ', seedseq.entropy)
+
     estimation_start = time.time()
     max_runs = 20
     i = 0
@@ -293,9 +330,10 @@ def run_sa(G, outcome_vector, param_func_list, labels,
         print('Running stochastic approximation (run', i,' of at most',max_runs,')...')
         start = time.time()
         (theta, std_error, t_ratio) = stochasticApproximation(G, A,
-                                                              param_func_list,
+                                                              sampler_func_list,
                                                               theta, Zobs,
-                                                              sampler_func) 
+                                                              sampler_func,
+                                                              numChains)
 
         print('Stochastic approximation took',time.time() - start, 's')
         if theta is None:
@@ -392,14 +430,15 @@ def run_sa(G, outcome_vector, param_func_list, labels,
 
         print('Running goodness-of-fit test...')
         start = time.time()
-        gofresult = gof(G, A, gof_param_func_list, gof_theta,
+        gofresult = gof(G, outcome_vector, gof_param_func_list, gof_theta,
                         sampler_func = sampler_func,
                         iterationInStep = GoFiterationInStep,
                         burnIn = GoFburnIn,
                         bipartiteFixedMode = bipartiteGoFfixedMode,
                         outputStatsFilename = outputGoFstatsFilename,
                         outputObsStatsFilename = outputObsStatsFilename,
-                        labels = goflabels)
+                        labels = goflabels,
+                        numChains = numChains)
         print('GoF took',time.time() - start, 's')
         print('           ',goflabels)
         print('t_ratios = ',gofresult[0])
@@ -416,6 +455,4 @@ def run_sa(G, outcome_vector, param_func_list, labels,
                          ('Mahalanobis_distance', gofresult[1]))
         print()
 
-        if isinstance(G, Graph):
-            print("twoPaths cache info: ", G.twoPaths.cache_info())
     
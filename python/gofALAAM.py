@@ -34,7 +34,8 @@ def gof(G, Aobs, changestats_func_list, theta, numSamples = 1000,
         bipartiteFixedMode = None,
         outputStatsFilename = None,
         outputObsStatsFilename = None,
-        labels = None
+        labels = None,
+        numChains = 1
         ):
     """
     ALAAM goodness-of-fit by simulating from estimated parameters, and 
@@ -75,6 +76,10 @@ def gof(G, Aobs, changestats_func_list, theta, numSamples = 1000,
                                outputStatsFilename.. Default None.
                                Must be set if outputStatsFilename or
                                outputObsStatsFilename is not None.
+       numChains             - number of Markov chains to simulate in
+                               lockstep, see simulateALAAM() (including
+                               for the change statistics whose time is
+                               not shared by the chains). Default 1.
 
     Return value:
        tuple(tratios, mdist) where
@@ -90,7 +95,8 @@ def gof(G, Aobs, changestats_func_list, theta, numSamples = 1000,
     print('Gof numSamples =', numSamples, 'iterationInStep =', iterationInStep, 'burnIn = ', burnIn)
 
     # Calculate observed statistics by summing change stats for each 1 variable
-    Zobs = computeObservedStatistics(G, Aobs, changestats_func_list)
+    Zobs = computeObservedStatistics(G, G.toInternalOrder(Aobs),
+                                     changestats_func_list)
 
     # Write obseved statistics if output filename provided
     if outputObsStatsFilename is not None:
@@ -102,7 +108,7 @@ def gof(G, Aobs, changestats_func_list, theta, numSamples = 1000,
     sim_results = simulateALAAM(G, changestats_func_list,  theta,
                                 numSamples, iterationInStep, burnIn,
                                 sampler_func, Ainitial,
-                                bipartiteFixedMode, Aobs)
+                                bipartiteFixedMode, Aobs, numChains)
 
     # write simulated statistics if output filename provided
     if outputStatsFilename is not None:
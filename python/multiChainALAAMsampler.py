@@ -0,0 +1,782 @@
+#
+# File:    multiChainALAAMsampler.py
+# Author:  Alex Stivala
+# Created: October 2026
+#
+"""Multi-chain ALAAM MCMC sampler. K independent Markov chains, with
+   their outcome vectors stored as the rows of a K x N int8 numpy
+   array, are advanced in lockstep: at each step a node is chosen (as
+   in the basic sampler) for each chain, the change statistics for all
+   K proposals are computed together with numpy array operations, and
+   each move is accepted or rejected (independently for each chain).
+   The Python interpreter overhead of a step is therefore shared by
+   K proposals, so e.g. simulateALAAM() with numChains = K yields its
+   samples in roughly 1/K of the time of one chain.
+
+   The change statistics are computed for all chains at once for the
+   change statistics registered in MULTICHAIN_CHANGESTATS (including
+   the precomputed outcome independent statistics, see
+   precompute_static_changestats() in changeStatisticsALAAMvectorized.py),
+   see register_multichain_changestat(). Those needing the number of
+   neighbours with outcome 1 of the neighbours of the node (e.g.
+   GWContagion) look them up in counts for each chain kept up to date
+   as the outcomes change, as OutcomeState does for one outcome vector.
+   Others are computed by calling the change statistic function for
+   each chain, so any list of change statistic functions can be used,
+   but then the time taken is no longer shared by the chains.
+"""
+
+import functools
+import numpy as np         # used for matrix & vector data types and functions
+
+from utils import NA_VALUE,sampler_rng,SAMPLER_BLOCK_SIZE
+from Digraph import Digraph
+from BipartiteGraph import BipartiteGraph
+from OutcomeState import proposal_nodes
+from basicALAAMsampler import basicALAAMsampler
+from bipartiteALAAMsampler import bipartiteALAAMsampler
+from conditionalALAAMsampler import conditionalALAAMsampler
+from changeStatisticsALAAM import changeDensity,changeContagion,changePartnerAttributeActivity,changePartnerPartnerAttribute,changeTriangleT2,changeTriangleT3,changeoO_OsameContagion,changeGWContagion,changeLogContagion,changePowerContagion
+import changeStatisticsALAAMdirected
+from changeStatisticsALAAMvectorized import changeStaticTable,csr_graph,csr_digraph,csr_rows,category_codes
+
+# dict mapping change statistic function to function with the same
+# leading (functools.partial) parameters and the MultiChainChangeStats
+# object, returning function (A, nodes) computing the change statistic
+# for all chains, see register_multichain_changestat()
+MULTICHAIN_CHANGESTATS = dict()
+
+# dict mapping sampler function to the multiChainALAAMsampler()
+# keyword parameters giving the same proposal distribution (for
+# bipartiteALAAMsampler() the mode is also taken from its leading
+# functools.partial parameter), see multichain_sampler_args()
+MULTICHAIN_SAMPLERS = {basicALAAMsampler       : dict(),
+                       bipartiteALAAMsampler   : dict(),
+                       conditionalALAAMsampler : dict(inner = True)}
+
+# relation whose neighbours of i are the nodes which have i as a
+# neighbour in the relation (see neighbour_csr())
+REVERSE_RELATION = {'neighbours' : 'neighbours',
+                    'out'        : 'in',
+                    'in'         : 'out',
+                    'mutual'     : 'mutual'}
+
+
+def register_multichain_changestat(changestat_func, multichain_func):
+    """
+    Register the multi-chain form of a change statistic function
+
+    Parameters:
+       changestat_func - change statistic function with signature
+                         (G, A, i) or with leading parameters to be
+                         bound with functools.partial e.g.
+                         (attrname, G, A, i)
+       multichain_func - function with the same leading parameters
+                         and then the MultiChainChangeStats object
+                         (with the network G, its neighbour tables
+                         and neighbour outcome counts), returning
+                         function with signature (A, nodes) where A
+                         is the K x N array of outcome vectors and
+                         nodes the numpy vector of the node for each
+                         of the K chains, returning numpy vector of
+                         the change statistic for each chain; or
+                         returning None if it cannot be used for G
+                         (in which case the change statistic function
+                         is called for each chain)
+    """
+    MULTICHAIN_CHANGESTATS[changestat_func] = multichain_func
+
+
+def multichain_changestat(changestats, changestat_func):
+    """
+    Return function (A, nodes) computing the change statistic for the
+    node in nodes for each chain (row) of the outcome vectors A, using
+    the multi-chain form of the change statistic if it has one,
+    otherwise calling the change statistic function for each chain.
+
+    Parameters:
+       changestats     - MultiChainChangeStats object it is part of
+       changestat_func - change statistic function with signature
+                         (G, A, i), possibly made with functools.partial
+    """
+    G = changestats.G
+    func = None
+    if isinstance(changestat_func, functools.partial):
+        maker = MULTICHAIN_CHANGESTATS.get(changestat_func.func)
+        if maker is not None and not changestat_func.keywords:
+            func = maker(*changestat_func.args, changestats)
+    else:
+        maker = MULTICHAIN_CHANGESTATS.get(changestat_func)
+        if maker is not None:
+            func = maker(changestats)
+    if func is None:
+        func = lambda A, nodes: np.array([changestat_func(G, A[k], i) for
+                                          (k, i) in enumerate(nodes.tolist())],
+                                         dtype = np.float64)
+    return func
+
+
+def compile_multichain_changestats(G, changestats_func_list):
+    """
+    Return MultiChainChangeStats object computing the change
+    statistics for the list of change statistic functions for the
+    node proposed in each chain. This is done once for each
+    simulation, and the object passed to each call of
+    multiChainALAAMsampler(), as making it (e.g. the neighbour tables)
+    takes time proportional to the size of the network.
+
+    Parameters:
+       G                     - Graph, Digraph or BipartiteGraph object
+       changestats_func_list - list of change statistic functions
+    """
+    return MultiChainChangeStats(G, changestats_func_list)
+
+
+class MultiChainChangeStats:
+    """
+    Change statistics for a list of change statistic functions for the
+    node in nodes for each chain (row) of the K x N outcome vectors A,
+    called as changestats(A, nodes, out, removed) to set the K x n
+    numpy matrix out to them.
+
+    The multi-chain forms of the change statistics share the neighbour
+    tables of the network (see neighbourTable()) and the numbers of
+    neighbours with outcome 1 of each node in each chain (see
+    plusCount()), which are computed by initialize() and then kept up
+    to date by update() once the outcomes of a step are decided.
+    """
+
+    def __init__(self, G, changestats_func_list):
+        """
+        Parameters:
+           G                     - Graph, Digraph or BipartiteGraph object
+           changestats_func_list - list of change statistic functions
+        """
+        self.G = G
+        self.tables = {}     # dict relation -> NeighbourTable
+        self.plusCounts = {} # dict relation -> K x N neighbour outcome counts
+        self.neighbourPlusCache = {} # relation -> neighbourPlus() for this step
+        self.removed = None  # removed outcome of the node of each chain
+        self.funcs = [multichain_changestat(self, f)
+                      for f in changestats_func_list]
+
+    def __call__(self, A, nodes, out, removed = None):
+        """
+        Set the K x n numpy matrix out to the change statistics for
+        the node in nodes of each chain, whose outcome in A is 0.
+        removed is the numpy bool vector of whether the outcome of
+        the node was 1 before it was set to 0 in each chain, which
+        the neighbour outcome counts include until update() (None
+        if it was 0 in all chains).
+        """
+        self.neighbourPlusCache.clear()
+        self.removed = (np.zeros(len(nodes), dtype = np.int64) if removed is None
+                        else removed.astype(np.int64))
+        for (l, func) in enumerate(self.funcs):
+            out[:, l] = func(A, nodes)
+
+    def neighbourPlus(self, A, nodes, relation = 'neighbours'):
+        """
+        Return NeighbourTable.neighbourPlus(A, nodes) for the neighbours
+        in relation, computed only once for all the change statistics
+        of a step
+        """
+        result = self.neighbourPlusCache.get(relation)
+        if result is None:
+            result = self.neighbourTable(relation).neighbourPlus(A, nodes)
+            self.neighbourPlusCache[relation] = result
+        return result
+
+    def neighbourTable(self, relation = 'neighbours'):
+        """
+        Return the NeighbourTable of the neighbours in relation (see
+        neighbour_csr()) of each node, made only once
+        """
+        if relation not in self.tables:
+            self.tables[relation] = NeighbourTable(*neighbour_csr(self.G,
+                                                                  relation))
+        return self.tables[relation]
+
+    def countPlus(self, relation = 'neighbours'):
+        """
+        Keep the number of neighbours in relation with outcome 1 of
+        each node in each chain, see plusCount(). Called when making
+        the multi-chain change statistics that use them.
+        """
+        self.plusCounts.setdefault(relation, None)
+        self.neighbourTable(relation)
+        self.neighbourTable(REVERSE_RELATION[relation])
+
+    def plusCount(self, relation = 'neighbours'):
+        """
+        Return K x N numpy int64 array of the number of neighbours in
+        relation with outcome 1 of each node in each chain (if
+        countPlus(relation) was called)
+        """
+        return self.plusCounts[relation]
+
+    def neighbourPlusCount(self, chains, neighbours, relation = 'neighbours'):
+        """
+        Return plusCount(relation) for the neighbours of the proposed
+        node in each chain (as returned by neighbourPlus()), not
+        counting the outcome removed from the proposed node
+        """
+        return self.plusCounts[relation][chains, neighbours] - self.removed[chains]
+
+    def initialize(self, A):
+        """
+        Compute the neighbour outcome counts for the K x N outcome
+        vectors A. Must be called before computing change statistics
+        when A has been changed other than with update().
+        """
+        for relation in self.plusCounts:
+            self.plusCounts[relation] = self.neighbourTable(relation).plusCount(A)
+
+    def update(self, nodes, delta):
+        """
+        Update the neighbour outcome counts when the outcome of the
+        node in nodes of each chain has changed by delta (numpy int64
+        vector of -1, 0 or 1)
+        """
+        if len(self.plusCounts) == 0 or not delta.any():
+            return
+        for (relation, counts) in self.plusCounts.items():
+            self.neighbourTable(REVERSE_RELATION[relation]).addToNeighbours(
+                counts, nodes, delta)
+
+
+def neighbour_csr(G, relation):
+    """
+    Return tuple (indptr, indices) of CSR arrays of the neighbours in
+    relation of each node of G: 'neighbours' for an undirected one-mode
+    network, or 'out', 'in' or 'mutual' for a Digraph (the nodes with
+    an arc from, to, or both from and to, the node respectively)
+    """
+    if relation == 'neighbours':
+        g = csr_graph(G)
+        return (g.indptr, g.indices)
+    g = csr_digraph(G)
+    if relation == 'out':
+        return (g.indptr, g.indices)
+    elif relation == 'in':
+        return (g.in_indptr, g.in_indices)
+    assert relation == 'mutual'
+    n = g.numNodes()
+    indptr = np.zeros(n + 1, dtype = np.int64)
+    np.cumsum(np.bincount(csr_rows(g.indptr)[g.reciprocated], minlength = n),
+              out = indptr[1:])
+    return (indptr, np.asarray(g.indices)[g.reciprocated])
+
+
+# Neighbours are looked up in a table padded to the maximum degree
+# when it is at most this many times the size of the CSR arrays
+MAX_NEIGHBOUR_TABLE_RATIO = 4
+
+
+class NeighbourTable:
+    """
+    Neighbours of each node (in one relation, see neighbour_csr()),
+    for looking up the outcomes of the neighbours of the node proposed
+    in each chain.
+
+    If the maximum degree is not too much more than the mean degree,
+    the neighbours are in an N x maxdegree table, each row padded with
+    the node itself, whose outcome is always 0 when the change
+    statistics are computed (as the sampler sets it to 0 first, as for
+    the other samplers), so padding never counts as a neighbour with
+    outcome 1. Otherwise the neighbours are gathered from the CSR
+    arrays.
+    """
+
+    def __init__(self, indptr, indices):
+        """
+        Parameters:
+           indptr, indices - CSR arrays of the neighbours of each node
+        """
+        self.indptr = np.asarray(indptr, dtype = np.int64)
+        self.indices = np.asarray(indices, dtype = np.int64)
+        self.degrees = np.diff(self.indptr)
+        N = len(self.degrees)
+        dmax = int(np.max(self.degrees)) if N > 0 else 0
+        self.table = None
+        self.positions = None # CSR position of each table entry, see neighbourValues()
+        if N * dmax <= MAX_NEIGHBOUR_TABLE_RATIO * max(len(self.indices), N):
+            self.table = np.repeat(np.arange(N, dtype = np.int64)[:, None],
+                                   dmax, axis = 1)
+            self.table[self.tableEntries()] = self.indices
+
+    def tableEntries(self):
+        """
+        Return tuple (rows, cols) of the position in the table of each
+        entry of the CSR arrays
+        """
+        cols = np.arange(len(self.indices)) - np.repeat(self.indptr[:-1],
+                                                        self.degrees)
+        return (csr_rows(self.indptr), cols)
+
+    def flatNeighbours(self, nodes):
+        """
+        Return tuple (owners, positions) of numpy vectors with an
+        element for each neighbour of each node in nodes: the index
+        in nodes of the node, and the position of the neighbour in
+        the CSR arrays
+        """
+        starts = self.indptr[nodes]
+        degrees = self.degrees[nodes]
+        owners = np.repeat(np.arange(len(nodes)), degrees)
+        offsets = np.arange(len(owners)) - np.repeat(
+            np.cumsum(degrees) - degrees, degrees)
+        return (owners, np.repeat(starts, degrees) + offsets)
+
+    def neighbourPlus(self, A, nodes):
+        """
+        Return tuple (chains, neighbours, plus) of numpy vectors (or
+        K x maxdegree matrices) with an element for each neighbour u
+        of the node i = nodes[k] of each chain k: k, u, and True if u
+        has outcome 1 in chain k.
+
+        Parameters:
+           A     - K x N numpy array of outcome vectors
+           nodes - numpy vector of the node for each chain
+        """
+        if self.table is not None:
+            chains = np.arange(len(nodes))[:, None]
+            neighbours = self.table[nodes]
+        else:
+            (chains, positions) = self.flatNeighbours(nodes)
+            neighbours = self.indices[positions]
+        return (chains, neighbours, A[chains, neighbours] == 1)
+
+    def nodeValues(self, x, nodes, chains):
+        """
+        Return the values of the numpy vector x for the node of each
+        chain, for each of its neighbours as returned by neighbourPlus()
+        """
+        return x[nodes][:, None] if self.table is not None else x[nodes][chains]
+
+    def neighbourValues(self, x, nodes):
+        """
+        Return the values of the numpy vector x, aligned with the CSR
+        indices (e.g. edge weights), for the neighbours of the node of
+        each chain as returned by neighbourPlus() (0 for padding).
+        """
+        if self.table is None:
+            return x[self.flatNeighbours(nodes)[1]]
+        if self.positions is None:
+            # padding is the position one past the end of the entries
+            self.positions = np.full(self.table.shape, len(self.indices),
+                                     dtype = np.int64)
+            self.positions[self.tableEntries()] = np.arange(len(self.indices))
+        return np.append(x, 0)[self.positions[nodes]]
+
+    def neighbourSum(self, chains, weights, numChains):
+        """
+        Return numpy vector of the sums over the neighbours of the
+        proposed node in each chain of weights (as returned in plus by
+        neighbourPlus()).
+        """
+        if self.table is not None:
+            return np.sum(weights, axis = 1)
+        return np.bincount(chains, weights = weights, minlength = numChains)
+
+    def plusCount(self, A):
+        """
+        Return K x N numpy int64 array of the number of neighbours
+        with outcome 1 of each node in each chain (row) of A
+        """
+        cumulative = np.zeros((A.shape[0], len(self.indices) + 1),
+                              dtype = np.int64)
+        np.cumsum(A[:, self.indices] == 1, axis = 1, out = cumulative[:, 1:])
+        return cumulative[:, self.indptr[1:]] - cumulative[:, self.indptr[:-1]]
+
+    def addToNeighbours(self, counts, nodes, delta):
+        """
+        Add delta (numpy vector) to counts (K x N numpy array) for the
+        neighbours of the node in nodes of each chain
+        """
+        if self.table is not None:
+            # each padding entry (the node itself) adds 0 to its count
+            neighbours = self.table[nodes]
+            counts[np.arange(len(nodes))[:, None], neighbours] += (
+                delta[:, None] * (neighbours != nodes[:, None]))
+        else:
+            chains = np.flatnonzero(delta)
+            (owners, positions) = self.flatNeighbours(nodes[chains])
+            counts[chains[owners], self.indices[positions]] += delta[chains][owners]
+
+
+def is_one_mode_undirected(G):
+    """
+    Return True if G is an undirected one-mode network (Graph or CSRGraph)
+    """
+    return not isinstance(G, (Digraph, BipartiteGraph))
+
+
+def multichain_static_table(table, changestats):
+    """Multi-chain changeStaticTable"""
+    table = np.asarray(table, dtype = np.float64)
+    return lambda A, nodes: table[nodes]
+
+
+def multichain_density(changestats):
+    """Multi-chain changeDensity"""
+    return lambda A, nodes: 1
+
+
+def multichain_contagion(changestats):
+    """Multi-chain changeContagion (undirected one-mode networks only)"""
+    if not is_one_mode_undirected(changestats.G):
+        return None
+    g = changestats.neighbourTable()
+    def contagion(A, nodes):
+        (chains, neighbours, plus) = changestats.neighbourPlus(A, nodes)
+        return g.neighbourSum(chains, plus, len(nodes))
+    return contagion
+
+
+def multichain_partner_attribute_activity(changestats):
+    """Multi-chain changePartnerAttributeActivity (undirected one-mode only)"""
+    if not is_one_mode_undirected(changestats.G):
+        return None
+    g = changestats.neighbourTable()
+    def partner_attribute_activity(A, nodes):
+        (chains, neighbours, plus) = changestats.neighbourPlus(A, nodes)
+        d_i = g.nodeValues(g.degrees, nodes, chains)
+        return g.neighbourSum(chains, plus * (d_i + g.degrees[neighbours] - 2),
+                              len(nodes))
+    return partner_attribute_activity
+
+
+def multichain_partner_partner_attribute(changestats):
+    """Multi-chain changePartnerPartnerAttribute (undirected one-mode only)"""
+    if not is_one_mode_undirected(changestats.G):
+        return None
+    g = changestats.neighbourTable()
+    changestats.countPlus()
+    def partner_partner_attribute(A, nodes):
+        (chains, neighbours, plus) = changestats.neighbourPlus(A, nodes)
+        djplus = changestats.neighbourPlusCount(chains, neighbours)
+        diplus = g.neighbourSum(chains, plus, len(nodes))
+        return (2 * g.neighbourSum(chains, plus * djplus, len(nodes)) +
+                diplus * (diplus - 1))
+    return partner_partner_attribute
+
+
+def multichain_triangle_t2(changestats):
+    """Multi-chain changeTriangleT2 (undirected one-mode only)"""
+    if not is_one_mode_undirected(changestats.G):
+        return None
+    g = changestats.neighbourTable()
+    csrg = csr_graph(changestats.G)
+    if csrg.edgeTwoPaths is None:
+        csrg.computeEdgeTwoPaths()
+    twoPaths = np.asarray(csrg.edgeTwoPaths, dtype = np.float64)
+    def triangle_t2(A, nodes):
+        (chains, neighbours, plus) = changestats.neighbourPlus(A, nodes)
+        return g.neighbourSum(chains, plus * g.neighbourValues(twoPaths, nodes),
+                              len(nodes))
+    return triangle_t2
+
+
+def multichain_triangle_t3(changestats):
+    """
+    Multi-chain changeTriangleT3 (undirected one-mode only): the
+    neighbours with outcome 1 of the node of each chain are marked,
+    and the marked neighbours of each of them counted, which counts
+    each pair of adjacent neighbours with outcome 1 twice.
+    """
+    if not is_one_mode_undirected(changestats.G):
+        return None
+    g = changestats.neighbourTable()
+    marked = np.zeros((0, 0), dtype = bool)  # K x N, all False between calls
+    def triangle_t3(A, nodes):
+        nonlocal marked
+        if marked.shape != A.shape:
+            marked = np.zeros(A.shape, dtype = bool)
+        (chains, neighbours, plus) = changestats.neighbourPlus(A, nodes)
+        if g.table is not None:
+            # padding (the node itself) has outcome 0 so is not marked,
+            # but in the rows of the neighbours it is the neighbour itself
+            marked[chains, neighbours] = plus
+            second = g.table[neighbours]
+            common = (marked[chains[:, :, None], second] &
+                      (second != neighbours[:, :, None]) & plus[:, :, None])
+            delta = np.sum(common, axis = (1, 2))
+        else:
+            chains = chains[plus]
+            neighbours = neighbours[plus]
+            marked[chains, neighbours] = True
+            (owners, positions) = g.flatNeighbours(neighbours)
+            owners = chains[owners]
+            delta = np.bincount(owners, weights = marked[owners, g.indices[positions]],
+                                minlength = len(nodes))
+        marked[chains, neighbours] = False
+        return delta / 2
+    return triangle_t3
+
+
+def multichain_same_contagion(attrname, changestats):
+    """Multi-chain changeoO_OsameContagion (undirected one-mode only)"""
+    if not is_one_mode_undirected(changestats.G):
+        return None
+    g = changestats.neighbourTable()
+    (codes, valid) = category_codes(changestats.G, attrname)
+    codes = np.where(valid, codes, -1)  # -1 for NA matches nothing
+    def same_contagion(A, nodes):
+        (chains, neighbours, plus) = changestats.neighbourPlus(A, nodes)
+        c_i = g.nodeValues(codes, nodes, chains)
+        return g.neighbourSum(chains, plus & (c_i == codes[neighbours]) & (c_i >= 0),
+                              len(nodes))
+    return same_contagion
+
+
+def multichain_weighted_contagion(directed, changestats, term, total):
+    """
+    Return multi-chain function for the GW, Log and Power contagion
+    statistics: the sum of term(djplus) over the neighbours j with
+    outcome 1 of the node i, where djplus is the number of neighbours
+    of j with outcome 1, plus total(diplus), where diplus is the
+    number of neighbours of i with outcome 1. The term and total
+    functions (of numpy vectors) are computed once for all possible
+    counts and then looked up. For a Digraph (if
+    directed) this is the sum of the statistic for the out-neighbours
+    j (with djplus counting their in-neighbours) and for the
+    in-neighbours (with djplus counting their out-neighbours), as in
+    changeStatisticsALAAMdirected.py. Returns None if G is not an
+    undirected one-mode network (or not a Digraph if directed).
+    """
+    G = changestats.G
+    if directed != isinstance(G, Digraph) or isinstance(G, BipartiteGraph):
+        return None
+    relations = [('out', 'in'), ('in', 'out')] if directed else [('neighbours',)*2]
+    tables = []
+    for (relation, counted) in relations:
+        changestats.countPlus(counted)
+        g = changestats.neighbourTable(relation)
+        counts = np.arange(max(len(g.indices), 1) + 1, dtype = np.float64)
+        tables.append((g, relation, counted, term(counts), total(counts)))
+    def weighted_contagion(A, nodes):
+        delta = np.zeros(len(nodes))
+        for (g, relation, counted, termTable, totalTable) in tables:
+            (chains, neighbours, plus) = changestats.neighbourPlus(A, nodes,
+                                                                   relation)
+            djplus = changestats.neighbourPlusCount(chains, neighbours, counted)
+            diplus = g.neighbourSum(chains, plus, len(nodes)).astype(np.int64)
+            delta += (g.neighbourSum(chains, plus * termTable[djplus],
+                                     len(nodes)) + totalTable[diplus])
+        return delta
+    return weighted_contagion
+
+
+def multichain_gw_contagion(directed, alpha, changestats):
+    """Multi-chain changeGWContagion"""
+    return multichain_weighted_contagion(
+        directed, changestats,
+        lambda d: np.exp(-alpha * (d + 1)) - np.exp(-alpha * d),
+        lambda d: np.exp(-alpha * d))
+
+
+def multichain_log_contagion(directed, changestats):
+    """Multi-chain changeLogContagion"""
+    return multichain_weighted_contagion(
+        directed, changestats,
+        lambda d: np.log((d + 2) / (d + 1)),
+        lambda d: np.log(d + 1))
+
+
+def multichain_power_contagion(directed, beta, changestats):
+    """Multi-chain changePowerContagion"""
+    return multichain_weighted_contagion(
+        directed, changestats,
+        lambda d: np.power(d + 1, 1/beta) - np.power(d, 1/beta),
+        lambda d: np.power(d, 1/beta))
+
+
+def multichain_directed_contagion(relations, changestats):
+    """
+    Multi-chain directed changeContagion (relations 'out' and 'in')
+    and changeContagionReciprocity (relation 'mutual'), Digraph only
+    """
+    if not isinstance(changestats.G, Digraph):
+        return None
+    tables = [(changestats.neighbourTable(relation), relation)
+              for relation in relations]
+    def directed_contagion(A, nodes):
+        delta = np.zeros(len(nodes))
+        for (g, relation) in tables:
+            (chains, neighbours, plus) = changestats.neighbourPlus(A, nodes,
+                                                                   relation)
+            delta += g.neighbourSum(chains, plus, len(nodes))
+        return delta
+    return directed_contagion
+
+
+register_multichain_changestat(changeStaticTable, multichain_static_table)
+register_multichain_changestat(changeDensity, multichain_density)
+register_multichain_changestat(changeContagion, multichain_contagion)
+register_multichain_changestat(changePartnerAttributeActivity,
+                               multichain_partner_attribute_activity)
+register_multichain_changestat(changePartnerPartnerAttribute,
+                               multichain_partner_partner_attribute)
+register_multichain_changestat(changeTriangleT2, multichain_triangle_t2)
+register_multichain_changestat(changeTriangleT3, multichain_triangle_t3)
+register_multichain_changestat(changeoO_OsameContagion,
+                               multichain_same_contagion)
+register_multichain_changestat(changeGWContagion,
+                               functools.partial(multichain_gw_contagion, False))
+register_multichain_changestat(changeLogContagion,
+                               functools.partial(multichain_log_contagion, False))
+register_multichain_changestat(changePowerContagion,
+                               functools.partial(multichain_power_contagion, False))
+register_multichain_changestat(changeStatisticsALAAMdirected.changeContagion,
+                               functools.partial(multichain_directed_contagion,
+                                                 ('out', 'in')))
+register_multichain_changestat(changeStatisticsALAAMdirected.changeContagionReciprocity,
+                               functools.partial(multichain_directed_contagion,
+                                                 ('mutual',)))
+register_multichain_changestat(changeStatisticsALAAMdirected.changeGWContagion,
+                               functools.partial(multichain_gw_contagion, True))
+register_multichain_changestat(changeStatisticsALAAMdirected.changeLogContagion,
+                               functools.partial(multichain_log_contagion, True))
+register_multichain_changestat(changeStatisticsALAAMdirected.changePowerContagion,
+                               functools.partial(multichain_power_contagion, True))
+
+
+def multichain_sampler_args(sampler_func):
+    """
+    Return dict of the keyword parameters (mode, inner, rng) of
+    multiChainALAAMsampler() to sample with the same proposal
+    distribution as the sampler function, which may have leading
+    parameters (e.g. partial(bipartiteALAAMsampler, MODE_A)) and the
+    numpy random Generator (as done by run_ee() and run_sa()) bound
+    with functools.partial.
+
+    Raises ValueError if the sampler function has no multi-chain form
+    (e.g. zooALAAMsampler()).
+    """
+    func, args, keywords = sampler_func, (), {}
+    if isinstance(sampler_func, functools.partial):
+        func, args, keywords = (sampler_func.func, sampler_func.args,
+                                sampler_func.keywords)
+    if func not in MULTICHAIN_SAMPLERS:
+        raise ValueError("no multi-chain form of sampler function %s" %
+                         getattr(func, '__name__', func))
+    samplerArgs = dict(MULTICHAIN_SAMPLERS[func],
+                       rng = sampler_rng(keywords.get('rng')))
+    if func is bipartiteALAAMsampler:
+        samplerArgs['mode'] = args[0]
+    return samplerArgs
+
+
+def multiChainALAAMsampler(G, A, changestats_func_list, theta, performMove,
+                           sampler_m, rng = None, mode = None,
+                           inner = False, changestats_func = None):
+    """
+    multiChainALAAMsampler - sample from ALAAM distribution with the
+                             basic sampler, advancing K chains in lockstep
+
+    Each chain chooses a node uniformly at random from the nodes with
+    outcome not NA (and in the given mode of a bipartite network, if
+    mode is not None, and in the inner waves of a snowball sample, if
+    inner), and toggles its outcome, independently of the other chains.
+    All the chains must have the same nodes with outcome NA.
+
+    Parameters:
+       G                   - Graph object for network (fixed)
+       A                   - K x N numpy int8 array of 0/1 outcome
+                             variables, a row for each chain
+       changestats_func_list  - list of change statistics funcions
+       theta               - numpy vector of theta (parameter) values
+       performMove         - if True, actually do the MC move,
+                             updating the outcome vectors A
+                             (otherwise are not modified)
+       sampler_m           - number of proposals (iterations of sampler)
+                             for each chain
+       rng                 - numpy random Generator or None, see
+                             basicALAAMsampler()
+       mode                - for bipartite networks, only toggle
+                             outcomes of nodes in this mode (MODE_A or
+                             MODE_B, as bipartiteALAAMsampler()), or
+                             None (the default) for all nodes.
+       inner               - if True, only toggle outcomes of nodes in
+                             the inner waves of the snowball sample
+                             (as conditionalALAAMsampler()).
+                             Default False.
+       changestats_func    - MultiChainChangeStats object for G and
+                             changestats_func_list (see
+                             compile_multichain_changestats()), made
+                             once by the caller for all the calls of
+                             the sampler in a simulation, or None
+                             (the default) to make it for this call.
+
+    Returns:
+        acceptance_rate      - numpy vector of sampler acceptance rate
+                               for each chain
+        changeTo1ChangeStats - K x n numpy matrix of change stats for
+                               changeTo1 moves in each chain
+        changeTo0ChangeStats - K x n numpy matrix of change stats for
+                               changeTo0 moves in each chain
+
+    Note A is updated in place if performMove is True
+    otherwise unchanged
+    """
+    (K, N) = A.shape
+    assert A.flags['C_CONTIGUOUS']
+    assert np.all((A == NA_VALUE) == (A[0] == NA_VALUE)), "chains must have the same NA outcomes"
+    nodes = np.asarray(proposal_nodes(G, A[0], mode = mode, inner = inner), dtype = np.int64)
+    assert len(nodes) > 0, "no nodes with outcome not NA"
+    n = len(changestats_func_list)
+    theta = np.asarray(theta, dtype = np.float64).ravel()
+    rng = sampler_rng(rng)
+    if changestats_func is None:
+        changestats_func = compile_multichain_changestats(
+            G, changestats_func_list)
+    changestats_func.initialize(A)
+    Aflat = A.reshape(-1)  # view of A, indexed by k*N + i for chain k node i
+    rowStarts = np.arange(K, dtype = np.int64) * N
+    # steps in each block, so that a block is SAMPLER_BLOCK_SIZE proposals
+    blockSteps = max(1, SAMPLER_BLOCK_SIZE // K)
+
+    accepted = np.zeros(K, dtype = np.int64)
+    changeTo1ChangeStats = np.zeros((K, n))
+    changeTo0ChangeStats = np.zeros((K, n))
+    for start in range(0, sampler_m, blockSteps):
+        m = min(blockSteps, sampler_m - start)
+        # draw the random numbers for this block of steps: as for
+        # coreALAAMsampler(), accept if log(u) < theta * changestats
+        # for a change to 1 (-theta * changestats for a change to 0)
+        proposals = nodes[rng.integers(len(nodes), size = (m, K))]
+        with np.errstate(divide = 'ignore'):
+            thresholds = np.log(rng.random((m, K)))
+        # change statistics of each step, and accepted moves to 1 and to 0
+        changestats = np.empty((m, K, n))
+        acceptedTo1 = np.empty((m, K), dtype = bool)
+        acceptedTo0 = np.empty((m, K), dtype = bool)
+        for k in range(m):
+            # toggle outcome variable of the selected node in each chain
+            i = proposals[k]
+            f = rowStarts + i
+            isChangeToZero = Aflat[f] == 1
+            Aflat[f] = 0
+
+            changestats_func(A, i, changestats[k], isChangeToZero)
+            total = changestats[k] @ theta
+            np.negative(total, out = total, where = isChangeToZero)
+            accept = thresholds[k] < total
+            np.greater(accept, isChangeToZero, out = acceptedTo1[k])
+            np.logical_and(accept, isChangeToZero, out = acceptedTo0[k])
+
+            # outcome is 1 after an accepted change to 1 or a rejected
+            # change to 0 (or if not performing moves, if it was 1 before)
+            isOne = (accept != isChangeToZero) if performMove else isChangeToZero
+            Aflat[f] = isOne
+            if performMove:
+                changestats_func.update(i, isOne.view(np.int8) -
+                                        isChangeToZero.view(np.int8))
+        changeTo1ChangeStats += np.einsum('mkn,mk->kn', changestats, acceptedTo1)
+        changeTo0ChangeStats += np.einsum('mkn,mk->kn', changestats, acceptedTo0)
+        accepted += (np.count_nonzero(acceptedTo1, axis = 0) +
+                     np.count_nonzero(acceptedTo0, axis = 0))
+
+    acceptance_rate = accepted / sampler_m
+    return (acceptance_rate, changeTo1ChangeStats, changeTo0ChangeStats)
@@ -0,0 +1,114 @@
+#
+# File:    nodeOrdering.py
+# Author:  Alex Stivala
+# Created: October 2026
+#
+# Functions to compute orderings (relabellings) of the nodes of a
+# network in CSR format so that nodes which are neighbours tend to
+# have nearby node ids, for better memory locality (cache behaviour)
+# when iterating over neighbours and their attributes.
+#
+
+import numpy as np
+
+# node ordering methods supported by node_ordering()
+ORDERING_METHODS = ['rcm', 'degree', 'bfs']
+
+
+def bfs_ordering(indptr, indices, sort_by_degree = False):
+    """
+    Return the breadth-first search (BFS) ordering of the nodes of
+    the (undirected) graph, or the Cuthill-McKee ordering if
+    sort_by_degree is True.
+
+    Each connected component is searched in turn from an unvisited
+    node (the one with the lowest id, or for Cuthill-McKee the lowest
+    degree). In BFS ordering the unvisited neighbours of each node are
+    visited in node id order, and in Cuthill-McKee ordering in order
+    of increasing degree. Each level (frontier) of the search is
+    processed at once with numpy array operations, giving the same
+    order as the usual queue based search. Isolated nodes are put last.
+
+    Parameters:
+       indptr         - CSR offsets (n+1), see CSRGraph
+       indices        - CSR neighbour node ids (sorted for each node)
+       sort_by_degree - if True visit neighbours in order of increasing
+                        degree (Cuthill-McKee). Default False.
+
+    Return value:
+       numpy int64 array of the n node ids in the new order, i.e.
+       element k is the (original) id of the node which is node k
+       in the new ordering
+    """
+    n = len(indptr) - 1
+    degrees = np.diff(indptr)
+    indptr = np.asarray(indptr, dtype = np.int64)
+    visited = degrees == 0 # isolated nodes are appended at the end
+    order = np.empty(n, dtype = np.int64)
+    num_ordered = 0
+    # candidate starting nodes for each component, in order of preference
+    starts = (np.argsort(degrees, kind = 'stable') if sort_by_degree else
+              np.arange(n, dtype = np.int64))
+    next_start = 0
+    while True:
+        while next_start < n and visited[starts[next_start]]:
+            next_start += 1
+        if next_start == n:
+            break
+        frontier = starts[next_start:next_start+1]
+        visited[frontier] = True
+        while len(frontier) > 0:
+            order[num_ordered:num_ordered+len(frontier)] = frontier
+            num_ordered += len(frontier)
+            # all neighbours of the frontier nodes, grouped by frontier node
+            counts = degrees[frontier]
+            offsets = np.cumsum(counts) - counts
+            pos = (np.repeat(indptr[frontier] - offsets, counts) +
+                   np.arange(np.sum(counts), dtype = np.int64))
+            nbrs = indices[pos]
+            parent = np.repeat(np.arange(len(frontier)), counts)
+            unvisited = ~visited[nbrs]
+            (nbrs, parent) = (nbrs[unvisited], parent[unvisited])
+            if sort_by_degree:
+                perm = np.lexsort((nbrs, degrees[nbrs], parent))
+                nbrs = nbrs[perm]
+            # each node is visited from the first frontier node it is
+            # a neighbour of
+            (_, first) = np.unique(nbrs, return_index = True)
+            frontier = nbrs[np.sort(first)].astype(np.int64)
+            visited[frontier] = True
+    order[num_ordered:] = np.flatnonzero(degrees == 0)
+    return order
+
+
+def node_ordering(indptr, indices, method):
+    """
+    Return an ordering of the nodes of the (undirected) graph for
+    better memory locality.
+
+    Parameters:
+       indptr  - CSR offsets (n+1), see CSRGraph
+       indices - CSR neighbour node ids (sorted for each node)
+       method  - ordering method:
+                   'rcm'    - reverse Cuthill-McKee, which tends to
+                              minimize the bandwidth of the adjacency
+                              matrix
+                   'degree' - decreasing degree, so that the high degree
+                              nodes (which are used most often) are
+                              together
+                   'bfs'    - breadth-first search order
+
+    Return value:
+       numpy int64 array of the n node ids in the new order, i.e.
+       element k is the (original) id of the node which is node k
+       in the new ordering
+    """
+    if method == 'rcm':
+        return bfs_ordering(indptr, indices, sort_by_degree = True)[::-1].copy()
+    elif method == 'degree':
+        return np.argsort(-np.diff(indptr), kind = 'stable').astype(np.int64)
+    elif method == 'bfs':
+        return bfs_ordering(indptr, indices)
+    else:
+        raise ValueError("unknown node ordering method " + str(method) +
+                         " (must be one of " + ', '.join(ORDERING_METHODS) + ")")
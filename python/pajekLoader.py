@@ -0,0 +1,169 @@
+#
+# File:    pajekLoader.py
+# Author:  Alex Stivala
+# Created: October 2026
+#
+# Functions for fast bulk loading of Pajek format edge lists into
+# numpy arrays, and building compressed sparse row (CSR) adjacency
+# arrays from them.
+#
+
+import gzip
+import bz2
+import lzma
+import numpy as np
+
+# approximate number of bytes of edge list text parsed at a time
+CHUNK_BYTES = 64 * 1024 * 1024
+
+
+def open_datafile(filename):
+    """
+    Open a (text) data file for reading, transparently decompressing it
+    if the filename ends with .gz, .bz2 or .xz
+
+    Parameters:
+       filename - name of file to open
+
+    Return value:
+       file object open for reading in text mode
+    """
+    if filename.endswith('.gz'):
+        return gzip.open(filename, 'rt')
+    elif filename.endswith('.bz2'):
+        return bz2.open(filename, 'rt')
+    elif filename.endswith('.xz'):
+        return lzma.open(filename, 'rt')
+    else:
+        return open(filename)
+
+
+def read_pajek_edgelist(filename, directed = False, weights = False):
+    """
+    Read a Pajek format network edge list into numpy arrays.
+
+    The first line must be e.g. "*vertices 500" (or "*vertices 36 10"
+    for a two-mode network), followed by optional vertex lines, then
+    "*edges" (or "*arcs" for a directed network) followed by one edge
+    per line. Nodes must be numbered 1..N. Any third (weight) column
+    is ignored unless weights is True, in which case every edge must
+    have a weight (e.g. the distance between the two nodes). The file
+    may be compressed with gzip, bzip2 or xz (see open_datafile()).
+
+    The edge section is parsed in chunks directly into numpy arrays
+    and the node numbers validated in bulk. Self-loops and duplicate
+    edges (for an undirected network, the edge j -- i is a duplicate
+    of i -- j) are removed, and the number removed is reported (the
+    weight of the first occurrence of a duplicate edge is used).
+
+    Parameters:
+       filename - filename of Pajek format edge list
+       directed - True to read *arcs for directed network, else *edges.
+                  Default False.
+       weights  - True to read the edge weights in the third column.
+                  Default False.
+
+    Return value:
+       tuple (vertices, i, j) where vertices is the list of integers
+       on the *vertices line (number of nodes, then number of mode A
+       nodes for two-mode network), and i and j are numpy arrays of the
+       (0-based) endpoints of each edge (i -> j for directed), or
+       if weights is True, tuple (vertices, i, j, w) where w is the
+       numpy float64 array of the weight of each edge.
+    """
+    section = "*arcs" if directed else "*edges"
+    f = open_datafile(filename)
+    l = f.readline() # first line must be e.g. "*vertices 500"
+    vertices = [int(x) for x in l.split()[1:]]
+    n = vertices[0]
+    while l and l.rstrip().lower() != section:
+        l = f.readline()
+    if not l:
+        raise ValueError("no " + section + " in Pajek file " + filename)
+
+    chunks = []
+    text = f.read(CHUNK_BYTES)
+    while text:
+        text += f.readline() # complete the last line of the chunk
+        # edge list finishes at EOF or the start of another section
+        end = ('\n' + text).find('\n*')
+        if end >= 0:
+            text = text[:end]
+        if text.strip():
+            if weights:
+                chunks.append(np.loadtxt(text.splitlines(),
+                                         dtype = np.float64,
+                                         usecols = (0, 1, 2), ndmin = 2))
+            else:
+                # only use first two columns (i,j), ignore weight
+                chunks.append(np.loadtxt(text.splitlines(), dtype = np.int64,
+                                         usecols = (0, 1), ndmin = 2))
+        if end >= 0:
+            break
+        text = f.read(CHUNK_BYTES)
+    f.close()
+    edges = (np.concatenate(chunks) if len(chunks) > 0 else
+             np.zeros((0, 3 if weights else 2),
+                      dtype = np.float64 if weights else np.int64))
+    if weights:
+        w = edges[:, 2]
+        if np.any(edges[:, :2] != np.floor(edges[:, :2])):
+            raise ValueError("node number not an integer in Pajek file " +
+                             filename)
+        edges = edges[:, :2].astype(np.int64)
+
+    if np.any((edges < 1) | (edges > n)):
+        raise ValueError("node number not in range 1.." + str(n) +
+                         " in Pajek file " + filename)
+    edges -= 1  # input is 1-based but we are 0-based
+
+    num_input = len(edges)
+    loops = edges[:, 0] == edges[:, 1]
+    num_loops = np.count_nonzero(loops)
+    edges = edges[~loops]
+    if weights:
+        w = w[~loops]
+    if not directed:
+        edges = np.sort(edges, axis = 1) # i -- j same as j -- i
+    # remove duplicates, keeping the original order of first occurrences
+    (keys, first) = np.unique(edges[:, 0] * n + edges[:, 1],
+                              return_index = True)
+    edges = edges[np.sort(first)]
+    if weights:
+        w = w[np.sort(first)]
+    num_duplicates = num_input - num_loops - len(edges)
+    if num_loops > 0 or num_duplicates > 0:
+        print('Warning: removed', num_loops, 'self-loops and',
+              num_duplicates, 'duplicate', 'arcs' if directed else 'edges',
+              'from', filename)
+    if weights:
+        return (vertices, edges[:, 0], edges[:, 1], w)
+    return (vertices, edges[:, 0], edges[:, 1])
+
+
+def edges_to_csr(n, i, j, w = None):
+    """
+    Build compressed sparse row (CSR) adjacency arrays from arrays of
+    (0-based) arc endpoints i -> j, with the columns (neighbours) in
+    each row sorted in ascending order. Duplicate arcs must already
+    have been removed.
+
+    Parameters:
+       n - number of nodes (rows)
+       i - numpy array of source node of each arc
+       j - numpy array of target node of each arc
+       w - numpy array of weight of each arc, or None. Default None.
+
+    Return value:
+       tuple (indptr, indices) where the neighbours of node v are
+       indices[indptr[v]:indptr[v+1]], or if w is not None, tuple
+       (indptr, indices, weights) where weights is the numpy float64
+       array of arc weights aligned with indices
+    """
+    order = np.lexsort((j, i))
+    indptr = np.zeros(n + 1, dtype = np.int64)
+    np.cumsum(np.bincount(i, minlength = n), out = indptr[1:])
+    indices = j[order].astype(np.int32 if n < 2**31 else np.int64)
+    if w is not None:
+        return (indptr, indices, np.asarray(w, dtype = np.float64)[order])
+    return (indptr, indices)
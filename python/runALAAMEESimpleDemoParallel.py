@@ -10,11 +10,18 @@
  parallel runs can be run with GNU parallel. 
  Usage:
      runALAAMEESimpleDemoParallel.py runNumber
+     runALAAMEESimpleDemoParallel.py -n numRuns
 
   E.g. for 16 parallel runs:
 
   seq 0 15 |  parallel -j 16 --progress --joblog parallel.log runALAAMEESimpleDemoParallel.py
 
+  or with -n, runs 0 to numRuns-1 are run in worker processes of this
+  process (one for each CPU), sharing a single copy of the network in
+  shared memory (see run_ee_parallel() in estimateALAAMEE.py):
+
+  runALAAMEESimpleDemoParallel.py -n 16
+
 
  Citation for GNU parallel:
 
@@ -23,9 +30,12 @@
 
 """
 import getopt
+import os
 import sys
 from functools import partial
 import  estimateALAAMEE
+from binaryNetwork import load_network
+from utils import int_or_na
 from changeStatisticsALAAM import *
 
 
@@ -33,7 +43,7 @@ def usage(progname):
     """
     print usage msg and exit
     """
-    sys.stderr.write("usage: " + progname + " runNumber\n")
+    sys.stderr.write("usage: " + progname + " runNumber | -n numRuns\n")
     sys.exit(1)
 
 
@@ -42,28 +52,41 @@ def main():
     See usage message in module header block
     """
     directed = False
+    numRuns = None
     try:
-        opts,args = getopt.getopt(sys.argv[1:], "")
+        opts,args = getopt.getopt(sys.argv[1:], "n:")
     except:
         usage(sys.argv[0])
     for opt,arg in opts:
-        usage(sys.argv[0])
+        if opt == "-n":
+            numRuns = int(arg)
+        else:
+            usage(sys.argv[0])
 
-    if len(args) != 1:
+    if len(args) != (0 if numRuns is not None else 1):
         usage(sys.argv[0])
 
-    runNumber = int(args[0])
-
-
-    estimateALAAMEE.run_on_network_attr(
-        '../data/simulated_n500_bin_cont2/n500_kstar_simulate12750000.txt',
-        [changeDensity, changeActivity, changeContagion, partial(changeoOb,"binaryAttribute"), partial(changeoOc, "continuousAttribute")],
-        ["Density", "Activity", "Contagion", "Binary", "Continuous"],
-        '../data/simulated_n500_bin_cont2/sample-n500_bin_cont6700000.txt',
-        '../data/simulated_n500_bin_cont2/binaryAttribute_50_50_n500.txt',
-        '../data/simulated_n500_bin_cont2/continuousAttributes_n500.txt',
-        run = runNumber
-    )
+    edgelist_filename = '../data/simulated_n500_bin_cont2/n500_kstar_simulate12750000.txt'
+    param_func_list = [changeDensity, changeActivity, changeContagion, partial(changeoOb,"binaryAttribute"), partial(changeoOc, "continuousAttribute")]
+    labels = ["Density", "Activity", "Contagion", "Binary", "Continuous"]
+    outcome_bin_filename = '../data/simulated_n500_bin_cont2/sample-n500_bin_cont6700000.txt'
+    binattr_filename = '../data/simulated_n500_bin_cont2/binaryAttribute_50_50_n500.txt'
+    contattr_filename = '../data/simulated_n500_bin_cont2/continuousAttributes_n500.txt'
+
+    if numRuns is not None:
+        G = load_network(edgelist_filename, binattr_filename, contattr_filename)
+        outcome_binvar = list(map(int_or_na, open(outcome_bin_filename).read().split()[1:]))
+        estimateALAAMEE.run_ee_parallel(
+            G, outcome_binvar,
+            os.path.splitext(os.path.basename(edgelist_filename))[0],
+            param_func_list, labels, runs = range(numRuns))
+    else:
+        runNumber = int(args[0])
+        estimateALAAMEE.run_on_network_attr(
+            edgelist_filename, param_func_list, labels,
+            outcome_bin_filename, binattr_filename, contattr_filename,
+            run = runNumber
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,213 @@
+#
+# File:    sharedNetwork.py
+# Author:  Alex Stivala
+# Created: October 2026
+#
+# Functions to put the arrays of a network (adjacency, node attributes,
+# snowball sampling zones) in shared memory (multiprocessing.shared_memory)
+# so that multiple processes, e.g. parallel EE estimation runs, can use
+# a single copy of the network.
+#
+
+import sys
+import multiprocessing
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+
+from CSRGraph import CSRGraph
+from Digraph import Digraph
+from CSRDigraph import CSRDigraph
+from BipartiteGraph import BipartiteGraph
+from binaryNetwork import adjacency_arrays,in_adjacency_arrays,edge_weight_array
+from AttributeStore import AttributeStore
+
+# names of shared memory blocks created by this process
+_created_names = set()
+
+
+def share_array(a):
+    """
+    Copy a numpy array into a new shared memory block
+
+    Parameters:
+       a - numpy array
+
+    Return value:
+       tuple (shm, descr) where shm is the SharedMemory object and
+       descr is the (picklable and JSON serializable) description
+       (name, shape, dtype) used by attach_array() to attach to it
+    """
+    a = np.ascontiguousarray(a)
+    shm = shared_memory.SharedMemory(create = True, size = max(a.nbytes, 1))
+    b = np.ndarray(a.shape, dtype = a.dtype, buffer = shm.buf)
+    b[...] = a
+    _created_names.add(shm.name)
+    return (shm, (shm.name, list(a.shape), a.dtype.str))
+
+
+def attach_array(descr):
+    """
+    Attach to a numpy array in shared memory created by share_array()
+
+    Parameters:
+       descr - description (name, shape, dtype) from share_array()
+
+    Return value:
+       tuple (shm, a) where shm is the SharedMemory object (which must be
+       kept referenced while a is in use) and a is the (read-only)
+       numpy array in the shared memory block
+    """
+    (name, shape, dtype) = descr
+    if sys.version_info >= (3, 13):
+        shm = shared_memory.SharedMemory(name = name, track = False)
+    else:
+        shm = shared_memory.SharedMemory(name = name)
+        # Only the creating process should unlink the shared memory, not
+        # the resource tracker when this process exits. But the creating
+        # process, and processes started by multiprocessing, which share
+        # its resource tracker, must leave the registration alone.
+        if (name not in _created_names and
+            multiprocessing.parent_process() is None):
+            resource_tracker.unregister(shm._name, 'shared_memory')
+    a = np.ndarray(shape, dtype = np.dtype(dtype), buffer = shm.buf)
+    a.flags.writeable = False
+    return (shm, a)
+
+
+def share_network(G):
+    """
+    Put the arrays of a network in shared memory.
+
+    The adjacency (in CSR format, see CSRGraph) and edge weights, binary, continuous
+    and categorical node attributes, snowball sampling zones, node
+    reordering permutation and bipartite mode split are copied into
+    shared memory blocks. The returned description can be passed (it is picklable and JSON
+    serializable) to other processes which then use attach_network()
+    to get a network object using the shared memory. The caller must
+    keep the returned SharedMemory objects until the other processes
+    have finished, and then call release_network(shms, unlink = True).
+
+    Parameters:
+       G - Graph, Digraph or BipartiteGraph object
+
+    Return value:
+       tuple (descr, shms) where descr is the description of the shared
+       network for attach_network() and shms the list of SharedMemory
+       objects
+    """
+    shms = []
+    def share(a):
+        (shm, descr) = share_array(a)
+        shms.append(shm)
+        return descr
+    try:
+        descr = share_arrays(G, share)
+    except BaseException:
+        # free the blocks already created, no other process has them
+        release_network(shms, unlink = True)
+        raise
+    return (descr, shms)
+
+
+def share_arrays(G, share):
+    """
+    Return the description of the shared network for share_network(),
+    with share(a) called to put each array a in shared memory and get
+    its description.
+    """
+    directed = isinstance(G, Digraph)
+    bipartite = isinstance(G, BipartiteGraph)
+    (indptr, indices) = adjacency_arrays(G)
+    weights = edge_weight_array(G)
+    descr = {'type': ('Digraph' if directed else
+                      'BipartiteGraph' if bipartite else 'Graph'),
+             'num_nodes': G.numNodes(),
+             'num_A_nodes': G.num_A_nodes if bipartite else None,
+             'indptr': share(indptr),
+             'indices': share(indices),
+             'weights': (share(weights) if weights is not None else None),
+             'zone': share(G.zone) if G.zone is not None else None,
+             'permutation': (share(G.permutation) if G.permutation is not None
+                             else None)}
+    if directed:
+        (in_indptr, in_indices) = in_adjacency_arrays(G)
+        descr['in_indptr'] = share(in_indptr)
+        descr['in_indices'] = share(in_indices)
+    for attrtype in ['binattr', 'contattr', 'catattr']:
+        attrs = getattr(G, attrtype)
+        descr[attrtype] = (None if attrs is None else
+                           [(name, share(values)) for (name, values) in
+                            AttributeStore(attrtype, arrays = attrs).items()])
+    return descr
+
+
+def attach_network(descr):
+    """
+    Get network object using network arrays in shared memory
+    created by share_network() in another process.
+
+    An undirected one-mode network is a CSRGraph, and a directed
+    network a CSRDigraph, directly using the shared memory arrays, so
+    it takes little extra memory. BipartiteGraph objects are built
+    from the shared arrays. Node
+    attributes are the (read-only) numpy arrays in shared memory (in
+    the dict keyed by attribute name as usual).
+
+    Parameters:
+       descr - description of shared network from share_network()
+
+    Return value:
+       tuple (G, shms) where G is the CSRGraph, CSRDigraph or BipartiteGraph
+       object and shms is the list of SharedMemory objects which must
+       be kept referenced while G is in use (and released with
+       release_network() when no longer needed)
+    """
+    shms = []
+    def attach(d):
+        (shm, a) = attach_array(d)
+        shms.append(shm)
+        return a
+    n = descr['num_nodes']
+    (indptr, indices) = (attach(descr['indptr']), attach(descr['indices']))
+    if descr['type'] == 'Graph':
+        G = CSRGraph(csr = (indptr, indices) + (
+            (attach(descr['weights']),) if descr.get('weights') else ()))
+    elif descr['type'] == 'Digraph':
+        G = CSRDigraph(csr = (indptr, indices, attach(descr['in_indptr']),
+                              attach(descr['in_indices'])))
+    else:
+        i = np.repeat(np.arange(n), np.diff(indptr))
+        j = np.asarray(indices, dtype = np.int64)
+        num_A = descr['num_A_nodes']
+        G = BipartiteGraph(num_nodes = (num_A, n - num_A))
+        G.insertEdges(i[i < j], j[i < j])
+    for attrtype in ['binattr', 'contattr', 'catattr']:
+        if descr[attrtype] is not None:
+            setattr(G, attrtype, AttributeStore(attrtype, arrays = dict(
+                [(name, attach(d)) for (name, d) in descr[attrtype]])))
+    if descr['zone'] is not None:
+        G.zone = attach(descr['zone'])
+        G.max_zone = int(np.max(G.zone))
+        G.inner_nodes = np.flatnonzero(G.zone < G.max_zone).tolist()
+    if descr['permutation'] is not None:
+        G.permutation = attach(descr['permutation'])
+    return (G, shms)
+
+
+def release_network(shms, unlink = False):
+    """
+    Close (and optionally unlink i.e. free) the shared memory blocks
+    of a shared network.
+
+    Parameters:
+       shms   - list of SharedMemory objects from share_network()
+                or attach_network()
+       unlink - if True also free the shared memory. Only the process
+                that called share_network() should do this, after
+                all other processes are finished with it. Default False.
+    """
+    for shm in shms:
+        shm.close()
+        if unlink:
+            shm.unlink()
+            _created_names.discard(shm.name)
@@ -33,6 +33,9 @@ from BipartiteGraph import BipartiteGraph,MODE_A,MODE_B
 from changeStatisticsALAAM import *
 from basicALAAMsampler import basicALAAMsampler
 from computeObservedStatistics import computeObservedStatistics
+from OutcomeState import make_outcome_state
+from changeStatisticsALAAMvectorized import precompute_static_changestats
+from multiChainALAAMsampler import multiChainALAAMsampler,multichain_sampler_args,compile_multichain_changestats
 
 
 
@@ -56,10 +59,62 @@ def rand_bin_array(K, N):
 
 
 
+def initial_outcome_vector(G, bipartiteFixedMode = None, Aobs = None):
+    """
+    Return random initial outcome vector (in internal node order) for
+    simulation, see simulateALAAM().
+
+    Parameters:
+       G                  - Graph, Digraph or BipartiteGraph object
+       bipartiteFixedMode - for bipartite networks only, the mode
+                            fixed to NA in simulation, or None
+       Aobs               - vector of 0/1 observed outcome variables for
+                            snowball conditional estimation only, or None
+
+    Return value:
+       numpy vector of 0/1 (or NA) outcome variables
+    """
+    START_FROM_ZERO = False 
+    if START_FROM_ZERO: # start from zero vector
+        A = np.zeros(G.numNodes())  # initialize outcmoe vector to zero
+    else:   # do not use all zero,to avoid special case of proposal probability
+        if G.zone is not None: # snowball conditional estimation
+            # For snowball conditional estimation, we must not start with
+            # random initial outcome vector, but rather make sure the
+            # nodes in the outermost zone have the same outcome attributes
+            # as the obseved vector
+            A= np.copy(G.toInternalOrder(Aobs)) # copy of observed vector
+            # make vector of 50% ones, size of number of inner nodes
+            Arandom_inner = rand_bin_array(int(0.5*len(G.inner_nodes)), len(G.inner_nodes))
+            # set the outcome for inner nodes to random values, leaving
+            # value of outermost nodes at the original observed values
+            A[G.inner_nodes] = Arandom_inner
+        elif isinstance(G, BipartiteGraph):
+            # initialize outcome vector to all NA for one mode and
+            # 50% zero for other mode, depending which mode we want fixed
+            # to all NA values.
+            if bipartiteFixedMode == MODE_B:
+                A = np.concatenate(
+                    (rand_bin_array(int(0.5*G.num_A_nodes), G.num_A_nodes),
+                      np.ones(G.num_B_nodes)*NA_VALUE) )
+            elif bipartiteFixedMode == MODE_A:
+                A = np.concatenate(
+                    (np.ones(G.num_A_nodes)*NA_VALUE,
+                   rand_bin_array(int(0.5*G.num_B_nodes), G.num_B_nodes)) )
+            else:
+                # initialize outcome vector to 50% ones
+                A = rand_bin_array(int(0.5*G.numNodes()), G.numNodes())
+        else:
+            # initialize outcome vector to 50% ones
+            A = rand_bin_array(int(0.5*G.numNodes()), G.numNodes())
+    return A
+
+
+
 def simulateALAAM(G, changestats_func_list, theta, numSamples,
                   iterationInStep = None, burnIn = None,
                   sampler_func = basicALAAMsampler, Ainitial = None,
-                  bipartiteFixedMode = None, Aobs = None):
+                  bipartiteFixedMode = None, Aobs = None, numChains = 1):
     """
     Simulate ALAAM (generate binary outcome vector) given model parameters
     and network (including node attributes).
@@ -92,6 +147,20 @@ def simulateALAAM(G, changestats_func_list, theta, numSamples,
       Aobs                 - vector of 0/1 observed outcome variables for ALAAM
                              for use with snowball conditional estimation only,
                              or None (default None).
+      numChains            - number of Markov chains to advance in lockstep
+                             with multiChainALAAMsampler(), each
+                             yielding a sample every iterationInStep
+                             iterations, with the same proposals as
+                             sampler_func (see multichain_sampler_args();
+                             raises ValueError if it has no multi-chain
+                             form). Default 1 (sampler_func on a single
+                             chain). The chains share the time taken
+                             only for the change statistics with a
+                             multi-chain form in multiChainALAAMsampler.py;
+                             others are computed for each chain in
+                             turn, so the numSamples samples take
+                             less than 1/numChains of the time only
+                             with few (or cheap) such statistics.
 
      Returns:
        This is a generator function that yields tuple
@@ -115,42 +184,29 @@ def simulateALAAM(G, changestats_func_list, theta, numSamples,
     if burnIn is None:
         burnIn = 10*iterationInStep
 
+    # change statistics not depending on the outcome vector are
+    # computed once for each node here rather than in every iteration
+    changestats_func_list = precompute_static_changestats(
+        G, changestats_func_list)
+
+    if numChains > 1:
+        yield from simulateALAAMmultiChain(G, changestats_func_list, theta,
+                                           numSamples, iterationInStep,
+                                           burnIn, sampler_func, Ainitial,
+                                           bipartiteFixedMode, Aobs,
+                                           numChains)
+        return
+
+    # Ainitial and Aobs are in original node order, and simulated
+    # outcome vectors are returned in original node order, but G may
+    # have reordered nodes (see CSRGraph)
     if Ainitial is not None:
-        A = np.copy(Ainitial)
+        A = np.copy(G.toInternalOrder(Ainitial))
     else:
-        START_FROM_ZERO = False 
-        if START_FROM_ZERO: # start from zero vector
-            A = np.zeros(G.numNodes())  # initialize outcmoe vector to zero
-        else:   # do not use all zero,to avoid special case of proposal probability
-            if G.zone is not None: # snowball conditional estimation
-                # For snowball conditional estimation, we must not start with
-                # random initial outcome vector, but rather make sure the
-                # nodes in the outermost zone have the same outcome attributes
-                # as the obseved vector
-                A= np.copy(Aobs) # copy of observed vector
-                # make vector of 50% ones, size of number of inner nodes
-                Arandom_inner = rand_bin_array(int(0.5*len(G.inner_nodes)), len(G.inner_nodes))
-                # set the outcome for inner nodes to random values, leaving
-                # value of outermost nodes at the original observed values
-                A[G.inner_nodes] = Arandom_inner
-            elif bipartite:
-                # initialize outcome vector to all NA for one mode and
-                # 50% zero for other mode, depending which mode we want fixed
-                # to all NA values.
-                if bipartiteFixedMode == MODE_B:
-                    A = np.concatenate(
-                        (rand_bin_array(int(0.5*G.num_A_nodes), G.num_A_nodes),
-                          np.ones(G.num_B_nodes)*NA_VALUE) )
-                elif bipartiteFixedMode == MODE_A:
-                    A = np.concatenate(
-                        (np.ones(G.num_A_nodes)*NA_VALUE,
-                       rand_bin_array(int(0.5*G.num_B_nodes), G.num_B_nodes)) )
-                else:
-                    # initialize outcome vector to 50% ones
-                    A = rand_bin_array(int(0.5*G.numNodes()), G.numNodes())
-            else:
-                # initialize outcome vector to 50% ones
-                A = rand_bin_array(int(0.5*G.numNodes()), G.numNodes())
+        A = initial_outcome_vector(G, bipartiteFixedMode, Aobs)
+
+    # maintain neighbour outcome counts for the change statistics
+    A = make_outcome_state(G, A)
 
     # And compute observed statistics by summing change stats for each
     # 1 variable (note if instead starting at all zero A vector don't
@@ -176,7 +232,60 @@ def simulateALAAM(G, changestats_func_list, theta, numSamples,
                                               performMove = True,
                                               sampler_m = iterationInStep)
         Z += changeTo1ChangeStats - changeTo0ChangeStats
-        yield (np.array(A), np.array(Z), acceptance_rate, (i+1)*iterationInStep+burnIn)
+        yield (np.array(G.toOriginalOrder(A)), np.array(Z), acceptance_rate,
+               (i+1)*iterationInStep+burnIn)
+
+
+
+def simulateALAAMmultiChain(G, changestats_func_list, theta, numSamples,
+                            iterationInStep, burnIn, sampler_func,
+                            Ainitial, bipartiteFixedMode, Aobs, numChains):
+    """
+    Simulate ALAAM with numChains Markov chains advanced in lockstep by
+    multiChainALAAMsampler(), yielding a sample from each chain every
+    iterationInStep iterations. Parameters and yielded tuples as for
+    simulateALAAM() (which calls this when numChains > 1), except
+    that the change statistics have already been precomputed.
+    """
+    # outcome vectors of the chains as the rows of a matrix
+    if Ainitial is not None:
+        A = np.array([G.toInternalOrder(Ainitial)] * numChains,
+                     dtype = np.int8)
+    else:
+        A = np.array([initial_outcome_vector(G, bipartiteFixedMode, Aobs)
+                      for k in range(numChains)], dtype = np.int8)
+    Z = np.array([computeObservedStatistics(G, a, changestats_func_list)
+                  for a in A])
+    samplerArgs = multichain_sampler_args(sampler_func)
+    changestats_func = compile_multichain_changestats(G, changestats_func_list)
+
+    (acceptance_rate,
+     changeTo1ChangeStats,
+     changeTo0ChangeStats) = multiChainALAAMsampler(G, A,
+                                                    changestats_func_list,
+                                                    theta,
+                                                    performMove = True,
+                                                    sampler_m = burnIn,
+                                                    changestats_func = changestats_func,
+                                                    **samplerArgs)
+    Z += changeTo1ChangeStats - changeTo0ChangeStats
+
+    numSteps = (numSamples + numChains - 1) // numChains
+    for i in range(numSteps):
+        (acceptance_rate,
+         changeTo1ChangeStats,
+         changeTo0ChangeStats) = multiChainALAAMsampler(G, A,
+                                                        changestats_func_list,
+                                                        theta,
+                                                        performMove = True,
+                                                        sampler_m = iterationInStep,
+                                                        changestats_func = changestats_func,
+                                                        **samplerArgs)
+        Z += changeTo1ChangeStats - changeTo0ChangeStats
+        for k in range(min(numChains, numSamples - i * numChains)):
+            yield (np.array(G.toOriginalOrder(A[k]), dtype = np.float64),
+                   np.array(Z[k]), acceptance_rate[k],
+                   (i+1)*iterationInStep+burnIn)
 
 
 
@@ -358,7 +467,7 @@ def do_simulate(G, param_func_list, labels,
 
     if degreestats:
         ##TODO directed and bipartite degrees
-        degseq = np.array([G.degree(v) for v in G.nodeIterator()])
+        degseq = G.toOriginalOrder(np.array([G.degree(v) for v in G.nodeIterator()]))
         labels += ['meanDegree1', 'varDegree1', 'meanDegree0', 'varDegree0']
 
     sys.stdout.write(' '.join(['t'] + labels + ['acceptance_rate']) + '\n')
@@ -30,10 +30,13 @@ import numpy as np         # used for matrix & vector data types and functions
 from Graph import Graph,NA_VALUE
 from changeStatisticsALAAM import *
 from basicALAAMsampler import basicALAAMsampler
+from OutcomeState import make_outcome_state
+from multiChainALAAMsampler import multiChainALAAMsampler,multichain_sampler_args,compile_multichain_changestats
 
 
 def stochasticApproximation(G, Aobs, changestats_func_list, theta0,
-                            Zobs, sampler_func=basicALAAMsampler):
+                            Zobs, sampler_func=basicALAAMsampler,
+                            numChains = 1):
     """
     Robbins-Monro stochastic approximation to estimate ALAAM parameers.
 
@@ -54,6 +57,17 @@ def stochasticApproximation(G, Aobs, changestats_func_list, theta0,
                              (G, A, changestats_func_list, theta, performMove,
                               sampler_m); see basicALAAMsampler.py
                              default basicALAAMsampler
+       numChains           - number of Markov chains advanced in lockstep
+                             by multiChainALAAMsampler() to sample the
+                             statistics in phase 3 (each starting from
+                             the state at the end of phase 2), or 1
+                             (the default) for sampler_func. Raises
+                             ValueError if sampler_func has no
+                             multi-chain form, see
+                             multichain_sampler_args(). As for
+                             simulateALAAM(), change statistics without
+                             a multi-chain form are computed for each
+                             chain in turn.
 
 
      Returns:
@@ -65,9 +79,11 @@ def stochasticApproximation(G, Aobs, changestats_func_list, theta0,
     epsilon = np.finfo(float).eps
     
     n = len(changestats_func_list)
+    if numChains > 1:
+        samplerArgs = multichain_sampler_args(sampler_func)
 
     # copy input parameter vectors so input vectors not modified
-    A     = np.copy(Aobs)
+    A     = make_outcome_state(G, Aobs) # copy, see OutcomeState
     theta = np.copy(theta0)
     
     # constants used in multiple phases
@@ -177,6 +193,12 @@ def stochasticApproximation(G, Aobs, changestats_func_list, theta0,
     start = time.time()
     Zmatrix = np.empty((phase3steps, n)) # rows statistics Z vectors, 1 per step
 
+    if numChains > 1:
+        phase3multiChain(G, A, changestats_func_list, theta, Z, Zmatrix,
+                         burnin, iterationInStep, numChains,
+                         samplerArgs)
+        return phase3covariance(Zmatrix, Zobs, theta, start)
+
     # burn-in iterations
     (acceptance_rate,
      changeTo1ChangeStats,
@@ -199,6 +221,78 @@ def stochasticApproximation(G, Aobs, changestats_func_list, theta0,
         Z += changeTo1ChangeStats - changeTo0ChangeStats
         Zmatrix[i, ] = Z
 
+    return phase3covariance(Zmatrix, Zobs, theta, start)
+
+
+def phase3multiChain(G, A, changestats_func_list, theta, Z, Zmatrix,
+                     burnin, iterationInStep, numChains, samplerArgs):
+    """
+    Fill the rows of Zmatrix with the statistics sampled in phase 3 of
+    the stochastic approximation, with numChains Markov chains
+    advanced in lockstep by multiChainALAAMsampler(), each starting
+    from the outcome vector A with statistics Z, so each step gives
+    numChains rows.
+
+    Parameters:
+       G                   - Graph object
+       A                   - vector of 0/1 outcome variables at end of phase 2
+       changestats_func_list-list of change statistics funcions
+       theta               - vector of theta values
+       Z                   - vector of statistics of A
+       Zmatrix             - matrix with a row for each phase 3 step, filled in
+       burnin              - number of burn-in iterations for each chain
+       iterationInStep     - number of iterations in each step
+       numChains           - number of Markov chains
+       samplerArgs         - dict of keyword parameters of
+                             multiChainALAAMsampler(), see
+                             multichain_sampler_args()
+    """
+    phase3steps = Zmatrix.shape[0]
+    Achains = np.array([A] * numChains, dtype = np.int8)
+    Zchains = np.array([Z] * numChains)
+    changestats_func = compile_multichain_changestats(G, changestats_func_list)
+    (acceptance_rate,
+     changeTo1ChangeStats,
+     changeTo0ChangeStats) = multiChainALAAMsampler(G, Achains,
+                                                    changestats_func_list,
+                                                    theta,
+                                                    performMove = True,
+                                                    sampler_m = burnin,
+                                                    changestats_func = changestats_func,
+                                                    **samplerArgs)
+    Zchains += changeTo1ChangeStats - changeTo0ChangeStats
+
+    for i in range(0, phase3steps, numChains):
+        (acceptance_rate,
+         changeTo1ChangeStats,
+         changeTo0ChangeStats) = multiChainALAAMsampler(G, Achains,
+                                                        changestats_func_list,
+                                                        theta,
+                                                        performMove = True,
+                                                        sampler_m = iterationInStep,
+                                                        changestats_func = changestats_func,
+                                                        **samplerArgs)
+        Zchains += changeTo1ChangeStats - changeTo0ChangeStats
+        m = min(numChains, phase3steps - i)
+        Zmatrix[i:i+m, ] = Zchains[:m]
+
+
+def phase3covariance(Zmatrix, Zobs, theta, start):
+    """
+    Return tuple (theta, std_error, t_ratio) from the statistics
+    sampled in phase 3 of the stochastic approximation (as returned by
+    stochasticApproximation()), or (None, None, None) if the
+    covariance matrix is singular.
+
+    Parameters:
+       Zmatrix             - matrix of statistics, a row for each phase 3 step
+       Zobs                - vector of observed statistics
+       theta               - vector of theta values
+       start               - time.time() at start of phase 3
+    """
+    (phase3steps, n) = Zmatrix.shape
+    epsilon = np.finfo(float).eps
+
     print('XXX Zmatrix = ')
     print(Zmatrix) #XXX
 
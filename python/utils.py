@@ -6,10 +6,16 @@
 # Utility functions
 #
 
+import random
+import numpy as np
 
 # NA values for categorical and binary attributes (continuous uses float("nan"))
 NA_VALUE = -1
 
+# maximum number of proposals the samplers draw random numbers for at once
+SAMPLER_BLOCK_SIZE = 2**16
+
+
 def int_or_na(s):
     """
     Convert string to integer or NA value for "NA" for missing data
@@ -35,3 +41,19 @@ def float_or_na(s):
     """
     return float("NaN") if s == "NA" else float(s)
 
+
+def sampler_rng(rng = None):
+    """
+    Return the numpy random number Generator for a sampler to draw its
+    random numbers from: rng itself, or if it is None, a new Generator
+    seeded from the Python random module (so that without a Generator,
+    random.seed() still makes the sampler reproducible).
+
+    Parameters:
+       rng - numpy.random.Generator or None
+
+    Return value:
+      numpy.random.Generator
+    """
+    return rng if rng is not None else np.random.default_rng(random.getrandbits(64))
+
@@ -20,19 +20,169 @@
       of exponential-family random graph models: terms and computational
       aspects. Journal of Statistical Software, 24(4), 1548.
 
+   The nodes with 0 and with 1 outcome are kept in index arrays
+   (ZeroOneNodeSets) updated as moves are accepted, so choosing a node
+   and computing the proposal ratio does not require scanning the
+   outcome vector on each proposal. If the outcome vector is an
+   OutcomeState, they are kept with it (and updated as it changes)
+   between calls of the sampler, so they are not made again (in O(N)
+   time) for each call, see zero_one_node_sets().
 """
 
-import random
 import math
 import numpy as np         # used for matrix & vector data types and functions
 
-from Graph import Graph,NA_VALUE
 from changeStatisticsALAAM import *
+from coreALAAMsampler import coreALAAMsampler
+
+
+class ZeroOneNodeSets:
+    """
+    The sets of nodes with outcome 0 and with outcome 1 (NA nodes are
+    in neither), each stored as a list of node ids, with the
+    position of each node in its array, so that a random node with a
+    given outcome can be chosen, and a node moved from one set to the
+    other (by swapping it with the last node in its set), in O(1) time.
+    """
+
+    def __init__(self, A):
+        """
+        Construct the sets of 0 and 1 outcome nodes from the outcome
+        vector.
+
+        Parameters:
+           A - vector of 0/1/NA_VALUE outcome variables
+        """
+        A = np.asarray(A)
+        self.nodes = [np.flatnonzero(A == 0), np.flatnonzero(A == 1)]
+        self.count = [len(self.nodes[0]), len(self.nodes[1])]
+        self.pos = np.full(len(A), -1, dtype = np.int64)
+        for outcome in [0, 1]:
+            self.pos[self.nodes[outcome]] = np.arange(self.count[outcome])
+            self.nodes[outcome] = self.nodes[outcome].tolist()
+
+
+    def numNodes(self, outcome):
+        """
+        Return the number of nodes with outcome (0 or 1)
+        """
+        return self.count[outcome]
+
+
+    def randomNode(self, outcome, u):
+        """
+        Return a node with outcome (0 or 1) chosen uniformly at random,
+        given u drawn uniformly from [0, 1)
+        """
+        return self.nodes[outcome][min(int(u * self.count[outcome]),
+                                       self.count[outcome] - 1)]
+
+
+    def randomMoveType(self, u):
+        """
+        Return True for a one-to-zero move or False for a zero-to-one
+        move, each with probability 1/2 given u drawn uniformly from
+        [0, 1), unless all nodes (not NA) have outcome 1 (so must
+        change to 0) or none do (so must change to 1).
+        """
+        if self.count[0] == 0:
+            return True
+        elif self.count[1] == 0:
+            return False
+        return u < 0.5
+
+
+    def logProposalRatio(self, isChangeToZero):
+        """
+        Return the log of the ZOO sampler proposal ratio for toggling
+        a node with 1 outcome (if isChangeToZero) or 0 outcome
+        (otherwise), see zoo_log_proposal_ratio()
+        """
+        return zoo_log_proposal_ratio(self.count[1],
+                                      self.count[0] + self.count[1],
+                                      isChangeToZero)
+
+
+    def move(self, i, outcome):
+        """
+        Move node i from the set of the other outcome to the set of
+        nodes with outcome (0 or 1)
+        """
+        other = 1 - outcome
+        nodes = self.nodes[other]
+        k = self.pos[i]
+        last = nodes[self.count[other] - 1]
+        nodes[k] = last
+        self.pos[last] = k
+        nodes.pop()
+        self.count[other] -= 1
+        self.pos[i] = self.count[outcome]
+        self.nodes[outcome].append(i)
+        self.count[outcome] += 1
+
+
+
+def zero_one_node_sets(A):
+    """
+    Return the ZeroOneNodeSets for the outcome vector A.
+
+    If A is an OutcomeState the sets are made once and kept in
+    A.zeroOneNodeSets, where they are updated when an element of A is
+    set (until an outcome is changed to or from NA, or A is set with
+    a slice or index array, when they are made again on next use), as
+    proposal_nodes() keeps the proposal nodes. So the samplers, called
+    many times with the same outcome vector, do not make them every time.
+
+    Parameters:
+       A - vector of 0/1/NA_VALUE outcome variables
+
+    Return value:
+       ZeroOneNodeSets object
+    """
+    nodesets = getattr(A, 'zeroOneNodeSets', None)
+    if nodesets is None:
+        nodesets = ZeroOneNodeSets(A)
+        if getattr(A, 'G', None) is not None:
+            A.zeroOneNodeSets = nodesets
+    return nodesets
+
+
+def zoo_move_probability(numOnes, Dmax, isChangeToZero):
+    """
+    Return the probability that the ZOO sampler chooses a one-to-zero
+    move (if isChangeToZero) or zero-to-one move (otherwise) when there
+    are numOnes outcome=1 nodes out of Dmax non-NA nodes: 1/2, unless
+    all are 1 (so must change to 0) or none are (so must change to 1).
+    """
+    if numOnes == Dmax or numOnes == 0:
+        return 1.0 if isChangeToZero == (numOnes > 0) else 0.0
+    return 0.5
+
+
+def zoo_log_proposal_ratio(numOnes, Dmax, isChangeToZero):
+    """
+    Return the log of the ZOO sampler proposal ratio
+    q(y' -> y) / q(y -> y') for the move from y with numOnes outcome=1
+    nodes (out of Dmax non-NA nodes) to y' toggling a node with 1
+    outcome (if isChangeToZero) or 0 outcome (otherwise). Including the
+    special cases where y or y' is all zero or all one, where the move
+    type is not chosen with probability 1/2.
+    """
+    numZeros = Dmax - numOnes
+    if isChangeToZero:
+        forward = zoo_move_probability(numOnes, Dmax, True) / numOnes
+        reverse = (zoo_move_probability(numOnes - 1, Dmax, False) /
+                   (numZeros + 1))
+    else:
+        forward = zoo_move_probability(numOnes, Dmax, False) / numZeros
+        reverse = (zoo_move_probability(numOnes + 1, Dmax, True) /
+                   (numOnes + 1))
+    return math.log(reverse / forward)
 
 
 
 def zooALAAMsampler(G, A, changestats_func_list, theta, performMove,
-                      sampler_m):
+                      sampler_m, rng = None):
     """
     zooALAAMsampler - sample from ALAAM distribution with Zero-Or-One (ZOO)
                       sampler, returning estimate of E(Delta_z(x_obs))
@@ -56,6 +206,12 @@ def zooALAAMsampler(G, A, changestats_func_list, theta, performMove,
                              updating the outcome vector A
                              (otherwise are not modified)
        sampler_m           - number of proposals (iterations of sampler)
+       rng                 - numpy random Generator (e.g. a per-run stream,
+                             see run_ee() in estimateALAAMEE.py) to draw
+                             the random numbers from, in blocks (of
+                             up to SAMPLER_BLOCK_SIZE proposals).
+                             Default None, for a Generator seeded from
+                             the random module.
 
     Returns:
         acceptance_rate      - sampler acceptance rate
@@ -65,79 +221,14 @@ def zooALAAMsampler(G, A, changestats_func_list, theta, performMove,
     Note A is updated in place if performMove is True
     otherwise unchanged
     """
-    n = len(changestats_func_list)
-
-    # number of elements of A that are not NA (so 0 or 1)
-    numNodes = len(A)
-    num_not_na = len(A) - len(np.where(A == NA_VALUE)[0])
-
-    accepted = 0
-    changeTo1ChangeStats = np.zeros(n)
-    changeTo0ChangeStats = np.zeros(n)
-    for k in range(sampler_m):
-        # ZOO sampler: first choose a zero-to-one or one-to-zero move
-        # with equal probability (1/2) by choosing a node with 0
-        # outcome or 1 outcome with equal probability, and then toggle
-        # outcome variable for it.
-
-        # if all non-NA elements are 1 then must do 1 to 0 move
-        # of if all non-NA elements are 0 must do 0 to 1 move
-        if len(np.where(A == 1)[0]) == num_not_na:
-            isChangeToZero = True
-        elif len(np.where(A == 0)[0]) == num_not_na:
-            isChangeToZero = False
-        else:
-            isChangeToZero = (random.uniform(0, 1) < 0.5)
-
-        i = np.random.choice(np.where(A == (1 if isChangeToZero else 0))[0])
-        while A[i] == NA_VALUE:  # keep going until we get one that is not NA
-            i = np.random.choice(np.where(A == (1 if isChangeToZero else 0))[0])
-        
-        if isChangeToZero:
-            assert(A[i] == 1)
-            A[i] = 0
-
-        assert(A[i] == 0)
-
-        # compute change statistics for each of the n statistics using the
-        # list of change statistic functions
-        changestats = np.zeros(n)
-        for l in range(n):
-            changestats[l] = changestats_func_list[l](G, A, i)
-        changeSignMul = -1 if isChangeToZero else +1
-        total = np.sum(theta * changeSignMul * changestats)
-
-        Dmax = float(num_not_na)                # max possible outcome=1 nodes
-        Dy   = float(len(np.where(A == 1)[0]))  # number of outcome=1 nodes now
-        # TODO should handle special cases for all zero and all one
-        if isChangeToZero:
-            log_proposal_ratio = np.log(Dy / (Dmax - Dy))
-        else:
-            log_proposal_ratio = np.log((Dmax - Dy) / Dy)
-        
-
-        alpha = np.exp(log_proposal_ratio + total)#np.exp gives inf not overflow
-
-        if random.uniform(0, 1) < alpha:
-            accepted += 1
-            if performMove:
-                # actually accept the move.
-                # if changing to 0, we have already done it.
-                # For changeTo1 move, set outcome to 1 now
-                if not isChangeToZero:
-                    A[i] = 1
-            else:
-                # if we are not to actually perform the moves, then reverse
-                # changes for changeTo0 move made so A same as before
-                if isChangeToZero:
-                    A[i] = 1
-            if isChangeToZero:
-                changeTo0ChangeStats += changestats
-            else:
-                changeTo1ChangeStats += changestats
-        elif isChangeToZero: # move not accepted, so reverse change 
-            A[i] = 1
-
-    acceptance_rate = float(accepted) / sampler_m
-    return (acceptance_rate, changeTo1ChangeStats, changeTo0ChangeStats)
+    # ZOO sampler: first choose a zero-to-one or one-to-zero move
+    # with equal probability (1/2) by choosing a node with 0
+    # outcome or 1 outcome with equal probability, and then toggle
+    # outcome variable for it. The nodes with 0 and with 1 outcome (not
+    # NA) are kept up to date as moves are performed.
+    nodesets = zero_one_node_sets(A)
+    Dmax = nodesets.numNodes(0) + nodesets.numNodes(1)
+    assert Dmax > 0, "ZOO sampler requires some outcome not NA"
+    return coreALAAMsampler(G, A, changestats_func_list, theta, performMove,
+                            sampler_m, rng, nodesets = nodesets)
 
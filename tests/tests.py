@@ -7,8 +7,13 @@
 """Unit and regression tests for ALAAMEE, particularly change statistics
    computations.
 """
+import sys
 import time
+import os
+import shutil
 import random
+import tempfile
+import gzip,bz2,lzma
 from functools import partial
 from math import log,exp,isclose
 import math
@@ -16,13 +21,32 @@ from collections import Counter
 import numpy
 
 from Graph import Graph,int_or_na
+from AttributeStore import AttributeStore
+from CSRGraph import CSRGraph
+from CSRDigraph import CSRDigraph
+from binaryNetwork import save_binary,load_binary,load_network
+from sharedNetwork import share_network,attach_network,release_network
+import sharedNetwork
 from Digraph import Digraph
 from BipartiteGraph import BipartiteGraph,MODE_A,MODE_B
-from computeObservedStatistics import computeObservedStatistics
+from SparseMatrix import SparseMatrix,adjacency_two_paths,csr_sparse_matrix
+from computeObservedStatistics import computeObservedStatistics,computeObservedStatisticsSum
+from GeographicDistance import GeographicDistance
+from OutcomeState import OutcomeState,DirectedOutcomeState,BipartiteOutcomeState,make_outcome_state,proposal_nodes
+from changeStatisticsALAAMfused import compile_changestats,compile_changestats_source,fused_source,fused_code
+from changeStatisticsALAAMvectorized import csr_graph,vectorized_changestat,change_statistic_vector,change_statistics_matrix,precompute_static_changestats
 from changeStatisticsALAAM import *
 import changeStatisticsALAAMdirected
 from changeStatisticsALAAMbipartite import *
-from gofALAAM import mahalanobis
+from gofALAAM import gof,mahalanobis
+from basicALAAMsampler import basicALAAMsampler
+from bipartiteALAAMsampler import bipartiteALAAMsampler
+from zooALAAMsampler import zooALAAMsampler,ZeroOneNodeSets,zero_one_node_sets
+from conditionalALAAMsampler import conditionalALAAMsampler
+import estimateALAAMEE
+from stochasticApproximation import stochasticApproximation
+from multiChainALAAMsampler import multiChainALAAMsampler,compile_multichain_changestats
+from simulateALAAM import simulateALAAM
 
 DEFAULT_NUM_TESTS = 10000 # number of random node samples
 
@@ -135,8 +159,8 @@ def compare_statistic_sum_changestatistic(g, outcome_binvar, stat_func,
                              default None
     """
     start = time.time()
-    change_stat_sum = computeObservedStatistics(g, outcome_binvar,
-                                                [changestats_func])[0]
+    change_stat_sum = computeObservedStatisticsSum(g, outcome_binvar,
+                                                   [changestats_func])[0]
     #print("sum changestats time:  ", time.time() - start, "s")
     start = time.time()
     stat_value =  stat_func(g, outcome_binvar)
@@ -415,6 +439,1137 @@ def test_undirected_graph():
     print()
 
 
+def test_pajek_loader():
+    """
+    test bulk Pajek edge list loader with compressed files,
+    self-loops and duplicate edges
+    """
+    print("testing Pajek edge list loader...")
+    start = time.time()
+    netfilename = "../examples/data/karate_club/karate.net"
+    g = Graph(netfilename)
+    text = open(netfilename).read()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for (suffix, openfunc) in [('.gz', gzip.open), ('.bz2', bz2.open),
+                                   ('.xz', lzma.open)]:
+            filename = os.path.join(tmpdir, 'karate.net' + suffix)
+            with openfunc(filename, 'wt') as f:
+                f.write(text)
+            gz = Graph(filename)
+            assert gz.numEdges() == g.numEdges()
+            assert all([gz.isEdge(i, j) for (i, j) in g.edgeIterator()])
+        # add self-loops, duplicate and reversed duplicate edges
+        filename = os.path.join(tmpdir, 'karate_dups.net')
+        with open(filename, 'w') as f:
+            f.write(text.rstrip() + '\n1 1\n2 1\n1 2\n34 34\n')
+        gd = Graph(filename)
+        assert gd.numEdges() == g.numEdges()
+        assert all([gd.isEdge(i, j) for (i, j) in g.edgeIterator()])
+        with open(filename, 'w') as f:
+            f.write(text.rstrip().replace('*Edges', '*Arcs') +
+                    '\n1 1\n2 1\n1 2\n34 34\n')
+        dd = Digraph(filename)
+        assert dd.numArcs() == g.numEdges() + 1 # 2 -> 1 is a new arc
+        filename = os.path.join(tmpdir, 'karate_bad.net')
+        with open(filename, 'w') as f:
+            f.write(text.rstrip() + '\n1 35\n')
+        try:
+            Graph(filename)
+            assert False
+        except ValueError:
+            pass
+    print("OK,", time.time() - start, "s")
+    print()
+
+
+def test_csr_graph():
+    """
+    test CSRGraph object against Graph object
+    """
+    print("testing CSRGraph object...")
+    start = time.time()
+    netfilename = "../examples/data/simulated_n1000_bin_cont/n1000_kstar_simulate12750000.txt"
+    binattrfilename = "../examples/data/simulated_n1000_bin_cont/binaryAttribute_50_50_n1000.txt"
+    contattrfilename = "../examples/data/simulated_n1000_bin_cont/continuousAttributes_n1000.txt"
+    g = Graph(netfilename, binattrfilename, contattrfilename)
+    for csrg in [CSRGraph(netfilename, binattrfilename, contattrfilename),
+                 CSRGraph(graph = g)]:
+        assert csrg.numNodes() == g.numNodes()
+        assert csrg.numEdges() == g.numEdges()
+        assert csrg.density() == g.density()
+        csrg.printSummary()
+        assert list(csrg.nodeIterator()) == list(g.nodeIterator())
+        assert all([csrg.degree(i) == g.degree(i) for i in g.nodeIterator()])
+        assert all([sorted(g.neighbourIterator(i)) == list(csrg.neighbourIterator(i)) for i in g.nodeIterator()])
+        assert all([sorted(g.neighbourList(i)) == csrg.neighbourList(i) for i in g.nodeIterator()])
+        assert sorted(g.edgeIterator()) == list(csrg.edgeIterator())
+        assert all([csrg.isEdge(i, j) for i in g.nodeIterator() for j in g.neighbourIterator(i)])
+        assert all([csrg.isEdge(i, j) == g.isEdge(i, j) for i in random.sample(range(g.numNodes()), 100) for j in g.nodeIterator()])
+        assert all([csrg.twoPaths(i, j) == g.twoPaths(i, j) for i in random.sample(range(g.numNodes()), 100) for j in g.nodeIterator()])
+        assert all([numpy.array_equal(csrg.binattr[a], g.binattr[a]) for a in g.binattr.keys()])
+        assert all([numpy.array_equal(csrg.contattr[a], g.contattr[a]) for a in g.contattr.keys()])
+
+    g = Graph("../examples/data/karate_club/karate.net",
+              "../examples/data/karate_club/karate_binattr.txt",
+              "../examples/data/karate_club/karate_contattr.txt",
+              "../examples/data/karate_club/karate_catattr.txt")
+    csrg = CSRGraph("../examples/data/karate_club/karate.net",
+                    "../examples/data/karate_club/karate_binattr.txt",
+                    "../examples/data/karate_club/karate_contattr.txt",
+                    "../examples/data/karate_club/karate_catattr.txt")
+    outcome_binvar = list(map(int_or_na, open("../examples/data/karate_club/karate_outcome.txt").read().split()[1:]))
+    statfuncs = [changeDensity, changeActivity, changeTwoStar, changeThreeStar, changeContagion, changeTriangleT1, changeTriangleT2, changeTriangleT3, changeIndirectPartnerAttribute, changePartnerAttributeActivity, changePartnerPartnerAttribute, changePartnerActivityTwoPath, partial(changeoOb, "senior"), partial(changeo_Ob, "senior"), partial(changeoOc, "age"), partial(changeo_Oc, "age"), partial(changeoO_Osame, "gender")]
+    assert numpy.all(computeObservedStatistics(csrg, outcome_binvar, statfuncs) == computeObservedStatistics(g, outcome_binvar, statfuncs))
+    print("OK,", time.time() - start, "s")
+    print()
+
+
+def test_csr_digraph():
+    """
+    test CSRDigraph object against Digraph object
+    """
+    print("testing CSRDigraph object...")
+    start = time.time()
+    netfilename = "../examples/data/directed/HighSchoolFriendship/highschool_friendship_arclist.net"
+    binattrfilename = "../examples/data/directed/HighSchoolFriendship/highschool_friendship_binattr.txt"
+    catattrfilename = "../examples/data/directed/HighSchoolFriendship/highschool_friendship_catattr.txt"
+    g = Digraph(netfilename, binattrfilename, None, catattrfilename)
+    for csrg in [CSRDigraph(netfilename, binattrfilename, None, catattrfilename),
+                 CSRDigraph(digraph = g),
+                 CSRDigraph(csr = (CSRDigraph(digraph = g).indptr, CSRDigraph(digraph = g).indices))]:
+        assert csrg.numNodes() == g.numNodes()
+        assert csrg.numArcs() == g.numArcs()
+        assert csrg.density() == g.density()
+        assert list(csrg.nodeIterator()) == list(g.nodeIterator())
+        assert sorted(g.edgeIterator()) == list(csrg.edgeIterator())
+        for i in g.nodeIterator():
+            assert csrg.outdegree(i) == g.outdegree(i)
+            assert csrg.indegree(i) == g.indegree(i)
+            assert sorted(g.outIterator(i)) == list(csrg.outIterator(i))
+            assert sorted(g.inIterator(i)) == list(csrg.inIterator(i))
+            assert csrg.mutualdegree(i) == g.mutualdegree(i) == len([j for j in g.outIterator(i) if g.isArc(j, i)])
+            assert sorted(g.mutualIterator(i)) == list(csrg.mutualIterator(i))
+            assert all([csrg.isArc(i, j) == g.isArc(i, j) for j in g.nodeIterator()])
+    csrg = CSRDigraph(netfilename, binattrfilename, None, catattrfilename)
+    outcome_binvar = [random.randint(0, 1) for i in g.nodeIterator()]
+    statfuncs = [changeDensity, changeStatisticsALAAMdirected.changeSender, changeStatisticsALAAMdirected.changeReceiver, changeStatisticsALAAMdirected.changeReciprocity, changeStatisticsALAAMdirected.changeContagion, changeStatisticsALAAMdirected.changeContagionReciprocity, changeStatisticsALAAMdirected.changeTransitiveTriangleT1, changeStatisticsALAAMdirected.changeTransitiveTriangleT3, changeStatisticsALAAMdirected.changeCyclicTriangleC1, partial(changeStatisticsALAAMdirected.changeReciprocityMatch, "class"), partial(changeStatisticsALAAMdirected.changeReciprocityMismatch, "class")]
+    assert numpy.all(computeObservedStatistics(csrg, outcome_binvar, statfuncs) == computeObservedStatistics(g, outcome_binvar, statfuncs))
+    # triangle census, also in very small chunks to test processing in chunks
+    csrg.computeTriangleCensus()
+    for (t, f) in [('T1', changeStatisticsALAAMdirected.changeTransitiveTriangleT1), ('D1', changeStatisticsALAAMdirected.changeTransitiveTriangleD1), ('U1', changeStatisticsALAAMdirected.changeTransitiveTriangleU1), ('C1', changeStatisticsALAAMdirected.changeCyclicTriangleC1)]:
+        assert list(csrg.triangleCensus[t]) == [f(g, outcome_binvar, i) for i in g.nodeIterator()]
+    csrdigraph_module = sys.modules[CSRDigraph.__module__]
+    max_twopaths_chunk = csrdigraph_module.MAX_TWOPATHS_CHUNK
+    csrdigraph_module.MAX_TWOPATHS_CHUNK = 7
+    csrg2 = CSRDigraph(digraph = g)
+    csrg2.computeTriangleCensus()
+    csrdigraph_module.MAX_TWOPATHS_CHUNK = max_twopaths_chunk
+    assert all(numpy.array_equal(csrg.triangleCensus[t], csrg2.triangleCensus[t]) for t in csrg.triangleCensus)
+    print("OK,", time.time() - start, "s")
+    print()
+
+
+def test_node_reordering():
+    """
+    test reordering the nodes of CSRGraph, and converting outcome
+    vectors between original and internal node order
+    """
+    print("testing node reordering...")
+    start = time.time()
+    netfilename = "../examples/data/karate_club/karate.net"
+    binattrfilename = "../examples/data/karate_club/karate_binattr.txt"
+    contattrfilename = "../examples/data/karate_club/karate_contattr.txt"
+    catattrfilename = "../examples/data/karate_club/karate_catattr.txt"
+    g = CSRGraph(netfilename, binattrfilename, contattrfilename, catattrfilename)
+    outcome_binvar = list(map(int_or_na, open("../examples/data/karate_club/karate_outcome.txt").read().split()[1:]))
+    statfuncs = [changeDensity, changeActivity, changeTwoStar, changeContagion, changeTriangleT1, changeTriangleT2, changeTriangleT3, changePartnerActivityTwoPath, partial(changeoOb, "senior"), partial(changeoOc, "age"), partial(changeoO_Osame, "gender")]
+    Zobs = computeObservedStatistics(g, outcome_binvar, statfuncs)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        zonefilename = os.path.join(tmpdir, 'zone.txt')
+        zone = [random.randint(0, 2) for i in g.nodeIterator()]
+        zone[:3] = [0, 1, 2]
+        with open(zonefilename, 'w') as f:
+            f.write('zone\n' + '\n'.join([str(z) for z in zone]) + '\n')
+        for method in ['rcm', 'degree', 'bfs']:
+            rg = CSRGraph(netfilename, binattrfilename, contattrfilename,
+                          catattrfilename, zonefilename, reorder = method)
+            perm = rg.permutation
+            assert sorted(perm) == list(g.nodeIterator())
+            assert rg.numEdges() == g.numEdges()
+            assert all([g.isEdge(perm[i], perm[j]) for (i, j) in rg.edgeIterator()])
+            assert all([rg.degree(i) == g.degree(perm[i]) for i in rg.nodeIterator()])
+            for attrtype in ['binattr', 'contattr', 'catattr']:
+                for name in getattr(g, attrtype).keys():
+                    assert numpy.array_equal(getattr(rg, attrtype)[name],
+                                             getattr(g, attrtype)[name][perm],
+                                             equal_nan = True)
+            assert rg.zone == [zone[v] for v in perm]
+            assert sorted(perm[i] for i in rg.inner_nodes) == [i for (i, z) in enumerate(zone) if z < 2]
+            A = rg.toInternalOrder(outcome_binvar)
+            assert list(rg.toOriginalOrder(A)) == outcome_binvar
+            assert numpy.all(computeObservedStatistics(rg, A, statfuncs) == Zobs)
+        # reordering an already reordered graph keeps original node ids
+        rg2 = CSRGraph(csr = (rg.indptr, rg.indices))
+        rg2.permutation = rg.permutation
+        rg2.reorderNodes('rcm')
+        assert all([g.isEdge(rg2.permutation[i], rg2.permutation[j]) for (i, j) in rg2.edgeIterator()])
+        # node permutation saved in binary network format
+        save_binary(rg, os.path.join(tmpdir, 'rg'))
+        rg3 = load_binary(os.path.join(tmpdir, 'rg'))
+        compare_networks(rg, rg3)
+        assert numpy.array_equal(rg3.permutation, rg.permutation)
+        rg4 = load_network(netfilename, binattrfilename, contattrfilename,
+                           catattrfilename, zonefilename, reorder = 'rcm')
+        compare_networks(CSRGraph(netfilename, binattrfilename, contattrfilename,
+                                  catattrfilename, zonefilename, reorder = 'rcm'),
+                         rg4)
+    print("OK,", time.time() - start, "s")
+    print()
+
+
+def test_edge_twopaths():
+    """
+    test the two-paths (triangle) counts for each edge
+    """
+    print("testing edge two-paths counts...")
+    start = time.time()
+    g = Graph("../examples/data/simulated_n1000_bin_cont/n1000_kstar_simulate12750000.txt")
+    csrg = CSRGraph(graph = g)
+    for i in g.nodeIterator():
+        expected = [sum([g.isEdge(u, v) for u in g.neighbourIterator(i)]) for v in g.neighbourIterator(i)]
+        assert g.neighbourTwoPathsList(i) == expected
+        assert g.neighbourTwoPathsList(i) == [g.twoPaths(i, v) for v in g.neighbourIterator(i)]
+        assert csrg.neighbourTwoPathsList(i) == [csrg.twoPaths(i, v) for v in csrg.neighbourIterator(i)]
+    # very small chunks to test processing in chunks
+    csrgraph_module = sys.modules[CSRGraph.__module__]
+    max_wedges_chunk = csrgraph_module.MAX_WEDGES_CHUNK
+    csrgraph_module.MAX_WEDGES_CHUNK = 7
+    csrg2 = CSRGraph(graph = g)
+    csrg2.computeEdgeTwoPaths()
+    csrgraph_module.MAX_WEDGES_CHUNK = max_wedges_chunk
+    assert numpy.array_equal(csrg.edgeTwoPaths, csrg2.edgeTwoPaths)
+    # counts are updated when graph is modified
+    (i, v) = next(g.edgeIterator())
+    twopaths = g.neighbourTwoPathsList(i)[g.neighbourList(i).index(v)]
+    u = next(u for u in g.nodeIterator() if u not in (i, v) and not g.isEdge(u, i) and not g.isEdge(u, v))
+    g.insertEdge(u, i)
+    g.insertEdge(u, v)
+    assert g.neighbourTwoPathsList(i)[g.neighbourList(i).index(v)] == twopaths + 1
+    g.removeEdge(u, v)
+    assert g.neighbourTwoPathsList(i)[g.neighbourList(i).index(v)] == twopaths
+    print("OK,", time.time() - start, "s")
+    print()
+
+
+def compare_networks(g1, g2):
+    """
+    Verify that two Graph, Digraph or BipartiteGraph objects (of possibly
+    different implementation classes) are the same network with the
+    same node attributes and snowball sampling zones
+
+    Parameters:
+       g1, g2 - network objects to compare
+    """
+    assert g1.numNodes() == g2.numNodes()
+    assert sorted(g1.edgeIterator()) == sorted(g2.edgeIterator())
+    for attrtype in ['binattr', 'contattr', 'catattr']:
+        attrs1 = getattr(g1, attrtype)
+        attrs2 = getattr(g2, attrtype)
+        assert (attrs1 is None) == (attrs2 is None)
+        if attrs1 is not None:
+            assert list(attrs1.keys()) == list(attrs2.keys())
+            for name in attrs1.keys():
+                assert numpy.array_equal(numpy.asarray(attrs1[name]),
+                                         numpy.asarray(attrs2[name]),
+                                         equal_nan = True)
+    assert (g1.zone is None) == (g2.zone is None)
+    if g1.zone is not None:
+        assert numpy.array_equal(g1.zone, g2.zone)
+        assert list(g1.inner_nodes) == list(g2.inner_nodes)
+
+
+def test_attribute_store():
+    """
+    test typed lazily loaded node attribute storage
+    """
+    print("testing attribute store...")
+    start = time.time()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = os.path.join(tmpdir, 'attr.txt')
+        with open(filename, 'w') as f:
+            f.write("a b c\n1 0.5 3\nNA NA 1\n0 2 NA\n")
+        binattr = AttributeStore('binattr', filename, 3)
+        contattr = AttributeStore('contattr', filename, 3)
+        catattr = AttributeStore('catattr', filename, 3)
+        assert list(binattr.keys()) == ['a', 'b', 'c']
+        assert not binattr.isLoaded('a')
+        assert binattr['a'].dtype == numpy.int8
+        assert binattr.isLoaded('a') and not binattr.isLoaded('b')
+        assert list(binattr['a']) == [1, NA_VALUE, 0]
+        assert list(binattr.naMask('a')) == [False, True, False]
+        assert contattr['b'].dtype == numpy.float64
+        assert contattr['b'][0] == 0.5 and math.isnan(contattr['b'][1])
+        assert contattr.numNA('b') == 1
+        assert catattr['c'].dtype == numpy.int32
+        assert list(catattr['c']) == [3, 1, NA_VALUE]
+        assert list(catattr.naMask('c')) == [False, False, True]
+        try:
+            binattr['b'] # not binary
+            assert False
+        except ValueError:
+            pass
+        try:
+            AttributeStore('catattr', filename, 4)['c']
+            assert False
+        except ValueError:
+            pass
+    g = Graph("../examples/data/karate_club/karate.net",
+              "../examples/data/karate_club/karate_binattr.txt",
+              "../examples/data/karate_club/karate_contattr.txt",
+              "../examples/data/karate_club/karate_catattr.txt")
+    for (attrtype, conv) in [('binattr', int_or_na), ('contattr', float),
+                             ('catattr', int_or_na)]:
+        cols = list(zip(*[row.split() for row in open("../examples/data/karate_club/karate_" + attrtype + ".txt").readlines()]))
+        attrs = getattr(g, attrtype)
+        assert list(attrs.keys()) == [col[0] for col in cols]
+        for col in cols:
+            assert list(attrs[col[0]]) == list(map(conv, col[1:]))
+    print("OK,", time.time() - start, "s")
+    print()
+
+
+def test_binary_network():
+    """
+    test saving and loading networks in binary format and the
+    binary network cache
+    """
+    print("testing binary network format...")
+    start = time.time()
+    graphs = [Graph("../examples/data/karate_club/karate.net",
+                    "../examples/data/karate_club/karate_binattr.txt",
+                    "../examples/data/karate_club/karate_contattr.txt",
+                    "../examples/data/karate_club/karate_catattr.txt"),
+              Digraph("../examples/data/directed/HighSchoolFriendship/highschool_friendship_arclist.net",
+                      "../examples/data/directed/HighSchoolFriendship/highschool_friendship_binattr.txt",
+                      None,
+                      "../examples/data/directed/HighSchoolFriendship/highschool_friendship_catattr.txt"),
+              BipartiteGraph("../examples/data/bipartite/Inouye_Pyke_pollinator_web/inouye_bipartite.net")]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for (k, g) in enumerate(graphs):
+            dirname = os.path.join(tmpdir, str(k))
+            save_binary(g, dirname)
+            for mmap in [True, False]:
+                g2 = load_binary(dirname, mmap)
+                compare_networks(g, g2)
+                assert isinstance(g2, BipartiteGraph) == isinstance(g, BipartiteGraph)
+                assert isinstance(g2, Digraph) == isinstance(g, Digraph)
+        g2 = load_binary(os.path.join(tmpdir, '2'))
+        assert g2.num_A_nodes == graphs[2].num_A_nodes
+        assert all([graphs[2].twoPathsMatrix.getValue(i, j) == g2.twoPathsMatrix.getValue(i, j) for i in graphs[2].nodeIterator() for j in graphs[2].nodeIterator()])
+
+        # cache of files parsed on first use, and reused unless source changed
+        netfilename = os.path.join(tmpdir, 'n500.net')
+        shutil.copyfile("../examples/data/simulated_n500_bin_cont2/n500_kstar_simulate12750000.txt", netfilename)
+        binattrfilename = "../examples/data/simulated_n500_bin_cont2/binaryAttribute_50_50_n500.txt"
+        cachedir = os.path.join(tmpdir, 'cache')
+        g = Graph(netfilename, binattrfilename)
+        g1 = load_network(netfilename, binattrfilename, cache_dir = cachedir)
+        assert isinstance(g1, CSRGraph)
+        compare_networks(g, g1)
+        # a version directory and the file naming it
+        assert len(os.listdir(cachedir)) == 2
+        cachefile = [os.path.join(cachedir, f) for f in os.listdir(cachedir)
+                     if os.path.isfile(os.path.join(cachedir, f))][0]
+        with open(cachefile) as f:
+            cachename = os.path.join(cachedir, f.read())
+        assert os.path.isdir(cachename)
+        mtime = os.stat(os.path.join(cachename, 'indices.npy')).st_mtime_ns
+        g2 = load_network(netfilename, binattrfilename, cache_dir = cachedir)
+        compare_networks(g, g2)
+        assert os.stat(os.path.join(cachename, 'indices.npy')).st_mtime_ns == mtime
+        os.utime(netfilename) # same contents so cache still used
+        g2 = load_network(netfilename, binattrfilename, cache_dir = cachedir)
+        compare_networks(g, g2)
+        assert os.stat(os.path.join(cachename, 'indices.npy')).st_mtime_ns == mtime
+        with open(netfilename, 'a') as f:
+            f.write("1 2\n")
+        assert not g.isEdge(0, 1)
+        g2 = load_network(netfilename, binattrfilename, cache_dir = cachedir)
+        assert g2.isEdge(0, 1) and g2.numEdges() == g.numEdges() + 1
+        # new version named, old version left for processes using it
+        assert len(os.listdir(cachedir)) == 3
+        with open(cachefile) as f:
+            assert os.path.join(cachedir, f.read()) != cachename
+        compare_networks(g, load_binary(cachename))
+        compare_networks(g, g1)
+        g3 = load_network(netfilename, binattrfilename, cache_dir = cachedir)
+        assert g3.numEdges() == g2.numEdges()
+        assert len(os.listdir(cachedir)) == 3
+        # a cache directory in place of the file naming the version
+        # (as written before versions) is left, and not used
+        othercache = os.path.join(tmpdir, 'othercache')
+        g1 = load_network(netfilename, binattrfilename, cache_dir = othercache)
+        othername = os.path.join(othercache, os.path.basename(cachefile))
+        os.remove(othername)
+        os.mkdir(othername)
+        g3 = load_network(netfilename, binattrfilename, cache_dir = othercache)
+        assert g3.numEdges() == g2.numEdges() and os.path.isdir(othername)
+    print("OK,", time.time() - start, "s")
+    print()
+
+
+def test_shared_network():
+    """
+    test putting networks in shared memory and attaching to them
+    """
+    print("testing shared memory network...")
+    start = time.time()
+    graphs = [Graph("../examples/data/karate_club/karate.net",
+                    "../examples/data/karate_club/karate_binattr.txt",
+                    "../examples/data/karate_club/karate_contattr.txt",
+                    "../examples/data/karate_club/karate_catattr.txt"),
+              Digraph("../examples/data/directed/HighSchoolFriendship/highschool_friendship_arclist.net",
+                      "../examples/data/directed/HighSchoolFriendship/highschool_friendship_binattr.txt",
+                      None,
+                      "../examples/data/directed/HighSchoolFriendship/highschool_friendship_catattr.txt"),
+              BipartiteGraph("../examples/data/bipartite/Inouye_Pyke_pollinator_web/inouye_bipartite.net")]
+    for g in graphs:
+        (descr, shms) = share_network(g)
+        (g2, shms2) = attach_network(descr)
+        compare_networks(g, g2)
+        assert isinstance(g2, BipartiteGraph) == isinstance(g, BipartiteGraph)
+        assert isinstance(g2, Digraph) == isinstance(g, Digraph)
+        del g2
+        release_network(shms2)
+        release_network(shms, unlink = True)
+        assert not any(shm.name in sharedNetwork._created_names for shm in shms)
+    # blocks already shared are freed if an attribute cannot be shared
+    g = Graph("../examples/data/karate_club/karate.net")
+    g.binattr = {'senior': ['x'] * g.numNodes()}
+    created = set(sharedNetwork._created_names)
+    try:
+        share_network(g)
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+    assert sharedNetwork._created_names == created
+    print("OK,", time.time() - start, "s")
+    print()
+
+
+def test_ee_parallel():
+    """
+    test EE runs in parallel worker processes on a network in shared
+    memory, each giving the same results as the run alone
+    """
+    print("testing parallel EE runs...")
+    start = time.time()
+    g = Graph("../examples/data/karate_club/karate.net", "../examples/data/karate_club/karate_binattr.txt")
+    A = list(map(int_or_na, open("../examples/data/karate_club/karate_outcome.txt").read().split()[1:]))
+    statfuncs = [changeDensity, changeActivity, changeContagion, partial(changeoOb, "senior")]
+    labels = ["Density", "Activity", "Contagion", "senior"]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cwd = os.getcwd()
+        os.chdir(tmpdir)
+        try:
+            estimateALAAMEE.run_ee_parallel(g, A, 'karate', statfuncs, labels,
+                                            runs = [0, 1], num_processes = 2,
+                                            EEiterations = 100, seed = 42)
+            for run in [0, 1]:
+                for prefix in ['theta_values_', 'dzA_values_']:
+                    assert os.path.exists(prefix + 'karate_' + str(run) + '.txt')
+            lines = [open('theta_values_karate_' + str(run) + '.txt').readlines()
+                     for run in [0, 1]]
+            estimateALAAMEE.run_ee(g, A, 'serial', statfuncs, labels,
+                                   EEiterations = 100, run = 1, seed = 42)
+            serial_lines = open('theta_values_serial_1.txt').readlines()
+        finally:
+            os.chdir(cwd)
+    for run in [0, 1]:
+        assert lines[run][0] == '# seed = 42\n'
+        assert lines[run][1] == 't ' + ' '.join(labels) + ' AcceptanceRate\n'
+        assert len(lines[run]) > 100  # Algorithm S and EE iterations
+    assert lines[0] != lines[1]
+    assert lines[1] == serial_lines
+    print("OK,", time.time() - start, "s")
+    print()
+
+
+def count_csr_conversions(func, *args):
+    """
+    Return tuple (result, count) of func(*args) and the number of
+    CSRGraph and CSRDigraph objects constructed by it
+    """
+    inits = (CSRGraph.__init__, CSRDigraph.__init__)
+    count = [0]
+    def counted(init):
+        def counted_init(self, *a, **kw):
+            count[0] += 1
+            init(self, *a, **kw)
+        return counted_init
+    (CSRGraph.__init__, CSRDigraph.__init__) = [counted(f) for f in inits]
+    try:
+        result = func(*args)
+    finally:
+        (CSRGraph.__init__, CSRDigraph.__init__) = inits
+    return (result, count[0])
+
+
+def test_vectorized_change_stats():
+    """
+    test vectorized change statistics for all nodes against the
+    change statistic functions for each node, and observed statistics
+    (computed with vectorized and closed form statistics) against
+    the sum of the change statistics
+    """
+    print("testing vectorized change statistics...")
+    start = time.time()
+    def check(g, statfuncs):
+        A = numpy.array([random.choice([0, 1, 1, NA_VALUE]) for i in g.nodeIterator()])
+        for f in statfuncs:
+            assert vectorized_changestat(f) is not None
+            assert numpy.allclose(change_statistic_vector(g, A, f),
+                                  [f(g, A, i) for i in g.nodeIterator()])
+        (Zobs, conversions) = count_csr_conversions(computeObservedStatistics,
+                                                    g, A, statfuncs)
+        assert numpy.allclose(Zobs, computeObservedStatisticsSum(g, A, statfuncs))
+        # network converted to CSR form (at most) once for all the
+        # statistics, and kept for the next time
+        assert conversions <= (0 if isinstance(g, (CSRGraph, CSRDigraph)) else 1)
+        assert count_csr_conversions(computeObservedStatistics,
+                                     g, A, statfuncs)[1] == 0
+
+    g = Graph("../examples/data/karate_club/karate.net",
+              "../examples/data/karate_club/karate_binattr.txt",
+              "../examples/data/karate_club/karate_contattr.txt",
+              "../examples/data/karate_club/karate_catattr.txt")
+    distmatrix = numpy.random.rand(g.numNodes(), g.numNodes())
+    statfuncs = [changeDensity, changeActivity, changeTwoStar, changeThreeStar, changePartnerActivityTwoPath, changeTriangleT1, changeContagion, changeIndirectPartnerAttribute, changePartnerAttributeActivity, changePartnerPartnerAttribute, changeTriangleT2, changeTriangleT3, partial(changeoOb, "senior"), partial(changeo_Ob, "senior"), partial(changeoOc, "age"), partial(changeo_Oc, "age"), partial(changeoO_Osame, "gender"), partial(changeoO_OsameContagion, "class"), partial(changeoO_Odiff, "class"), partial(changeSettingHomophily, CSRGraph(graph = g)), partial(changeGWActivity, math.log(2)), partial(changeGeographicHomophily, distmatrix), partial(changeContagionDist, distmatrix), partial(changeSamePartnerActivityTwoPath, "class"), partial(changeDiffPartnerActivityTwoPath, "class"), partial(changeSameIndirectPartnerAttribute, "class"), partial(changeDiffIndirectPartnerAttribute, "class"), partial(changeAlterBinaryTwoStar1, "senior"), partial(changeAlterBinaryTwoStar2, "senior"), partial(changeGWContagion, math.log(2)), changeLogContagion, partial(changePowerContagion, 2)]
+    check(g, statfuncs)
+    check(CSRGraph(graph = g), statfuncs)
+    # CSRGraph kept for g is made again when g is modified
+    assert csr_graph(g) is csr_graph(g)
+    (i, j) = next((i, j) for i in g.nodeIterator() for j in g.nodeIterator()
+                  if i < j and not g.isEdge(i, j))
+    g.insertEdge(i, j)
+    assert csr_graph(g).isEdge(i, j)
+    g.removeEdge(i, j)
+    assert not csr_graph(g).isEdge(i, j)
+
+    g = Digraph("../examples/data/directed/HighSchoolFriendship/highschool_friendship_arclist.net",
+                "../examples/data/directed/HighSchoolFriendship/highschool_friendship_binattr.txt",
+                None,
+                "../examples/data/directed/HighSchoolFriendship/highschool_friendship_catattr.txt")
+    statfuncs = [changeStatisticsALAAMdirected.changeSender, changeStatisticsALAAMdirected.changeReceiver, changeStatisticsALAAMdirected.changeReciprocity, changeStatisticsALAAMdirected.changeEgoInTwoStar, changeStatisticsALAAMdirected.changeEgoInThreeStar, changeStatisticsALAAMdirected.changeEgoOutTwoStar, changeStatisticsALAAMdirected.changeEgoOutThreeStar, changeStatisticsALAAMdirected.changeMixedTwoStar, changeStatisticsALAAMdirected.changeMixedTwoStarSource, changeStatisticsALAAMdirected.changeMixedTwoStarSink, changeStatisticsALAAMdirected.changeContagion, changeStatisticsALAAMdirected.changeContagionReciprocity, changeStatisticsALAAMdirected.changeTransitiveTriangleT1, changeStatisticsALAAMdirected.changeTransitiveTriangleD1, changeStatisticsALAAMdirected.changeTransitiveTriangleU1, changeStatisticsALAAMdirected.changeCyclicTriangleC1, changeStatisticsALAAMdirected.changeAlterInTwoStar2, changeStatisticsALAAMdirected.changeAlterOutTwoStar2, partial(changeStatisticsALAAMdirected.changeSenderMatch, "class"), partial(changeStatisticsALAAMdirected.changeReceiverMatch, "class"), partial(changeStatisticsALAAMdirected.changeReciprocityMatch, "class"), partial(changeStatisticsALAAMdirected.changeSenderMismatch, "sex"), partial(changeStatisticsALAAMdirected.changeReceiverMismatch, "sex"), partial(changeStatisticsALAAMdirected.changeReciprocityMismatch, "sex"), partial(changeStatisticsALAAMdirected.changeGWSender, math.log(2)), partial(changeStatisticsALAAMdirected.changeGWReceiver, math.log(2)), partial(changeStatisticsALAAMdirected.changeGWContagion, math.log(2)), changeStatisticsALAAMdirected.changeLogContagion, partial(changeStatisticsALAAMdirected.changePowerContagion, 2)]
+    check(g, statfuncs)
+    check(CSRDigraph(digraph = g), statfuncs)
+
+    g = BipartiteGraph("../examples/data/bipartite/Inouye_Pyke_pollinator_web/inouye_bipartite.net")
+    check(g, [partial(f, mode) for mode in [MODE_A, MODE_B] for f in [changeBipartiteDensity, changeBipartiteActivity, changeBipartiteEgoTwoStar, changeBipartiteEgoThreeStar, changeBipartiteAlterTwoStar1, changeBipartiteAlterTwoStar2, changeBipartiteFourCycle1, changeBipartiteFourCycle2]] + [partial(changeBipartiteGWActivity, mode, math.log(2)) for mode in [MODE_A, MODE_B]])
+
+    g = BipartiteGraph("../examples/data/bipartite/tiny/tiny_bipartite.net",
+                       binattr_filename = "../examples/data/bipartite/tiny/tiny_binattr.txt",
+                       catattr_filename = "../examples/data/bipartite/tiny/tiny_catattr.txt")
+    check(g, [partial(f, mode, attrname) for mode in [MODE_A, MODE_B] for (f, attrname) in [(changeBpAlterSameTwoStar1, 'catattr'), (changeBpAlterDiffTwoStar1, 'catattr'), (changeBpAlterSameTwoStar2, 'catattr'), (changeBpAlterDiffTwoStar2, 'catattr'), (changeBpAlterBinaryTwoStar1, 'binattr'), (changeBpAlterBinaryTwoStar2, 'binattr')]])
+
+    # change statistics with no vectorized form are computed for each node
+    A = [0] * g.numNodes()
+    assert vectorized_changestat(changeTriangleT3_OLD) is None
+    assert numpy.all(change_statistics_matrix(g, A, [changeDensity, partial(changeBipartiteFourCycle1_OLD, MODE_A)], [0, 3]) == [[1, changeBipartiteFourCycle1_OLD(MODE_A, g, A, 0)], [1, changeBipartiteFourCycle1_OLD(MODE_A, g, A, 3)]])
+    print("OK,", time.time() - start, "s")
+    print()
+
+
+def test_outcome_state():
+    """
+    test change statistics computed with the neighbour outcome counts
+    of OutcomeState against those computed for plain outcome vector,
+    as the outcome vector changes
+    """
+    print("testing outcome state...")
+    start = time.time()
+    g = Graph("../examples/data/karate_club/karate.net",
+              "../examples/data/karate_club/karate_binattr.txt",
+              "../examples/data/karate_club/karate_contattr.txt",
+              "../examples/data/karate_club/karate_catattr.txt")
+    statfuncs = [changeContagion, changePartnerAttributeActivity, changePartnerPartnerAttribute, partial(changeoO_OsameContagion, "class"), partial(changeGWContagion, math.log(2)), changeLogContagion, partial(changePowerContagion, 2)]
+    A = numpy.array([random.choice([0, 1, 1, NA_VALUE]) for i in g.nodeIterator()])
+    for G in [g, CSRGraph(graph = g)]:
+        state = make_outcome_state(G, A)
+        assert isinstance(state, OutcomeState)
+        for k in range(200):
+            i = random.randrange(G.numNodes())
+            state[i] = random.choice([0, 1, NA_VALUE])
+            if k % 50 == 0:
+                state[[0, 1]] = [1, 0]  # recomputes counts
+            Aplain = numpy.array(state)
+            assert not isinstance(Aplain, OutcomeState)
+            for f in statfuncs:
+                for j in random.sample(range(G.numNodes()), 5):
+                    assert isclose(f(G, state, j), f(G, Aplain, j))
+    # views do not maintain (or use) the counts
+    assert state[:5].plusCount is None
+    assert not isinstance(state == 1, OutcomeState)
+
+    g = Digraph("../examples/data/directed/HighSchoolFriendship/highschool_friendship_arclist.net")
+    statfuncs = [changeStatisticsALAAMdirected.changeContagion, changeStatisticsALAAMdirected.changeContagionReciprocity, partial(changeStatisticsALAAMdirected.changeGWContagion, math.log(2)), changeStatisticsALAAMdirected.changeLogContagion, partial(changeStatisticsALAAMdirected.changePowerContagion, 2)]
+    A = numpy.array([random.choice([0, 1, 1, NA_VALUE]) for i in g.nodeIterator()])
+    for G in [g, CSRDigraph(digraph = g)]:
+        state = make_outcome_state(G, A)
+        assert isinstance(state, DirectedOutcomeState)
+        for k in range(200):
+            i = random.randrange(G.numNodes())
+            state[i] = random.choice([0, 1, NA_VALUE])
+            if k % 50 == 0:
+                state[[0, 1]] = [1, 0]  # recomputes counts
+            Aplain = numpy.array(state)
+            for f in statfuncs:
+                for j in random.sample(range(G.numNodes()), 5):
+                    assert isclose(f(G, state, j), f(G, Aplain, j), abs_tol = 1e-9)
+    assert state[:5].outPlusCount is None
+
+    inouye = "../examples/data/bipartite/Inouye_Pyke_pollinator_web/inouye_bipartite.net"
+    tiny = "../examples/data/bipartite/tiny/tiny_bipartite.net"
+    for g in [BipartiteGraph(inouye), BipartiteGraph(inouye, twopaths_max_bytes = 0), BipartiteGraph(tiny, catattr_filename = "../examples/data/bipartite/tiny/tiny_catattr.txt")]:
+        statfuncs = [partial(f, mode) for mode in [MODE_A, MODE_B] for f in [changeBipartiteAlterTwoStar2, changeBipartiteFourCycle2]]
+        if g.catattr is not None:
+            statfuncs += [partial(f, mode, 'catattr') for mode in [MODE_A, MODE_B] for f in [changeBpAlterSameTwoStar2, changeBpAlterDiffTwoStar2]]
+        A = numpy.array([random.choice([0, 1, 1, NA_VALUE]) for i in g.nodeIterator()])
+        state = make_outcome_state(g, A)
+        assert isinstance(state, BipartiteOutcomeState)
+        for k in range(200):
+            i = random.randrange(g.numNodes())
+            state[i] = random.choice([0, 1, NA_VALUE])
+            if k % 50 == 0:
+                state[[0, 1]] = [1, 0]  # recomputes counts
+            Aplain = numpy.array(state)
+            for f in statfuncs:
+                for j in random.sample(range(g.numNodes()), 5):
+                    assert f(g, state, j) == f(g, Aplain, j)
+    print("OK,", time.time() - start, "s")
+    print()
+
+
+def test_fused_change_stats():
+    """
+    test fused change statistics function compiled from list of change
+    statistic functions against the change statistic functions
+    """
+    print("testing fused change statistics...")
+    start = time.time()
+    g = Graph("../examples/data/karate_club/karate.net",
+              "../examples/data/karate_club/karate_binattr.txt",
+              "../examples/data/karate_club/karate_contattr.txt",
+              "../examples/data/karate_club/karate_catattr.txt")
+    distmatrix = numpy.random.rand(g.numNodes(), g.numNodes())
+    statfuncs = [changeDensity, changeActivity, changeTwoStar, changeThreeStar, changePartnerActivityTwoPath, changeTriangleT1, changeContagion, changeIndirectPartnerAttribute, changePartnerAttributeActivity, changePartnerPartnerAttribute, changeTriangleT2, changeTriangleT3, partial(changeoOb, "senior"), partial(changeo_Ob, "senior"), partial(changeoOc, "age"), partial(changeo_Oc, "age"), partial(changeoO_Osame, "gender"), partial(changeoO_OsameContagion, "class"), partial(changeoO_Odiff, "class"), partial(changeGWActivity, math.log(2)), partial(changeContagionDist, distmatrix), partial(changeAlterBinaryTwoStar1, "senior"), partial(changeAlterBinaryTwoStar2, "senior"), partial(changeGWContagion, math.log(2))]
+    fused = compile_changestats(statfuncs)
+    assert compile_changestats_source(list(statfuncs))[0] is compile_changestats_source(statfuncs)[0]
+    # only the statistics not registered are computed by calling the function
+    (source, namespace) = compile_changestats_source(statfuncs)
+    # one loop in each version of the body (with and without counts)
+    assert source.count("G.neighbourIterator(i)") == 2
+    assert sorted(k for k in namespace if k.startswith('f')) == ['f11', 'f22', 'f23', 'f7', 'f9']
+    for G in [g, CSRGraph(graph = g)]:
+        A = numpy.array([random.choice([0, 1, 1, NA_VALUE]) for i in G.nodeIterator()])
+        fused_tuple = compile_changestats(statfuncs, as_tuple = True)
+        for i in G.nodeIterator():
+            assert numpy.all(fused(G, A, i) == [f(G, A, i) for f in statfuncs])
+            assert fused_tuple(G, A, i) == tuple(fused(G, A, i))
+        # with neighbour outcome counts (those change statistic
+        # functions do not iterate over the neighbours)
+        A = make_outcome_state(G, A)
+        assert A.plusCount is not None
+        for i in G.nodeIterator():
+            assert numpy.all(fused(G, A, i) == [f(G, A, i) for f in statfuncs])
+    # statistics kept in the counts are read from them, not computed in a loop
+    countfuncs = [changeDensity, changeContagion, changePartnerAttributeActivity,
+                  partial(changeoO_OsameContagion, "class")]
+    (source, namespace) = compile_changestats_source(countfuncs)
+    assert source.count("G.neighbourIterator(i)") == 1
+    assert "A.plusCount[i]" in source and "A.plusDegreeSum[i]" in source
+    counted = compile_changestats(countfuncs, as_tuple = True)
+    A = make_outcome_state(g, [random.choice([0, 1]) for i in g.nodeIterator()])
+    for i in g.nodeIterator():
+        values = counted(g, A, i)
+        assert values == tuple(f(g, A, i) for f in countfuncs)
+        A.plusCount[i] += 1000
+        A.plusDegreeSum[i] += 1000
+        assert counted(g, A, i)[1:3] == (values[1] + 1000,
+                                         values[2] + 1000 * (g.degree(i) - 2) + 1000)
+        A.plusCount[i] -= 1000
+        A.plusDegreeSum[i] -= 1000
+    assert len(compile_changestats([])(g, A, 0)) == 0
+    assert compile_changestats([], as_tuple = True)(g, A, 0) == ()
+    # compiling again with new precomputed tables (as each run of a
+    # model does) reuses the cached code, and nothing but the compiled
+    # function keeps the tables alive
+    compile_changestats(precompute_static_changestats(g, countfuncs + [changeActivity]))
+    (source_info, code_info) = (fused_source.cache_info(), fused_code.cache_info())
+    for k in range(5):
+        funcs = precompute_static_changestats(g, countfuncs + [changeActivity])
+        table = funcs[-1].args[0]
+        refcount = sys.getrefcount(table)
+        compiled = compile_changestats(funcs)
+        assert sys.getrefcount(table) == refcount + 1
+        del compiled
+        assert sys.getrefcount(table) == refcount
+    assert fused_source.cache_info().currsize == source_info.currsize
+    assert fused_code.cache_info().currsize == code_info.currsize
+    assert fused_code.cache_info().hits == code_info.hits + 5
+    # directed statistics are not fused, and Digraph has no degree()
+    g = Digraph("../examples/data/directed/HighSchoolFriendship/highschool_friendship_arclist.net")
+    A = numpy.array([random.choice([0, 1, 1, NA_VALUE]) for i in g.nodeIterator()])
+    statfuncs = [changeDensity, changeStatisticsALAAMdirected.changeContagion]
+    assert all(numpy.all(compile_changestats(statfuncs)(g, A, i) == [f(g, A, i) for f in statfuncs]) for i in g.nodeIterator())
+    print("OK,", time.time() - start, "s")
+    print()
+
+
+def test_static_change_stats():
+    """
+    test change statistics not depending on the outcome vector
+    precomputed for each node
+    """
+    print("testing precomputed static change statistics...")
+    start = time.time()
+    g = Graph("../examples/data/karate_club/karate.net",
+              "../examples/data/karate_club/karate_binattr.txt",
+              "../examples/data/karate_club/karate_contattr.txt",
+              "../examples/data/karate_club/karate_catattr.txt")
+    statfuncs = [changeDensity, changeActivity, changeContagion, changeTriangleT1, changeTriangleT2, partial(changeo_Ob, "senior"), partial(changeo_Oc, "age"), partial(changeoO_Osame, "class"), partial(changeGWActivity, math.log(2)), partial(changeGWContagion, math.log(2))]
+    static = [True, True, False, True, False, True, True, True, True, False]
+    precomputed = precompute_static_changestats(g, statfuncs)
+    assert len(precomputed) == len(statfuncs)
+    A = numpy.array([random.choice([0, 1, 1, NA_VALUE]) for i in g.nodeIterator()])
+    for (f, pf, s) in zip(statfuncs, precomputed, static):
+        assert (pf is not f) == s
+        assert all(isclose(pf(g, A, i), f(g, A, i)) for i in g.nodeIterator())
+    assert numpy.allclose(computeObservedStatistics(g, A, precomputed),
+                          computeObservedStatistics(g, A, statfuncs))
+    theta = numpy.array([-1.0, 0.1, 0.2, 0.1, -0.1, 0.1, 0.1, 0.1, 0.2, 0.1])
+    results = []
+    for funcs in [statfuncs, precomputed]:
+        random.seed(123)
+        results.append(basicALAAMsampler(g, numpy.copy(A), funcs, theta,
+                                         True, 1000))
+    assert results[0][0] == results[1][0]
+    assert numpy.allclose(results[0][1], results[1][1])
+    assert numpy.allclose(results[0][2], results[1][2])
+    # directed: digraph converted once for all the triangle statistics
+    g = Digraph("../examples/data/directed/HighSchoolFriendship/highschool_friendship_arclist.net")
+    statfuncs = [changeDensity, changeStatisticsALAAMdirected.changeContagion, changeStatisticsALAAMdirected.changeTransitiveTriangleT1, changeStatisticsALAAMdirected.changeTransitiveTriangleD1, changeStatisticsALAAMdirected.changeTransitiveTriangleU1, changeStatisticsALAAMdirected.changeCyclicTriangleC1]
+    precomputed = precompute_static_changestats(g, statfuncs)
+    A = numpy.array([random.choice([0, 1, 1, NA_VALUE]) for i in g.nodeIterator()])
+    for (f, pf) in zip(statfuncs, precomputed):
+        assert (pf is not f) == (f != changeStatisticsALAAMdirected.changeContagion)
+        assert all(pf(g, A, i) == f(g, A, i) for i in g.nodeIterator())
+    print("OK,", time.time() - start, "s")
+    print()
+
+
+def test_geographic_distance():
+    """
+    test GeographicHomophily and ContagionDist change statistics with
+    GeographicDistance object (and distance sums maintained in
+    OutcomeState) against those with distance matrix
+    """
+    print("testing geographic distance...")
+    start = time.time()
+    g = Graph("../examples/data/karate_club/karate.net")
+    n = g.numNodes()
+    coords = numpy.random.rand(n, 2)
+    distmatrix = numpy.sqrt(numpy.sum((coords[:, numpy.newaxis, :] -
+                                       coords[numpy.newaxis, :, :])**2, axis = 2))
+    cutoff = 0.3
+    cutmatrix = numpy.where(distmatrix <= cutoff, distmatrix, 0)
+    euclidean = lambda i, nodes: numpy.sqrt(numpy.sum((coords[nodes] - coords[i])**2, axis = 1))
+    for (dist, matrix) in [(GeographicDistance(coords), distmatrix),
+                           (GeographicDistance(coords, cutoff = cutoff), cutmatrix),
+                           (GeographicDistance(distance_func = euclidean, num_nodes = n), distmatrix),
+                           (GeographicDistance(distance_func = euclidean, num_nodes = n, cutoff = cutoff), cutmatrix)]:
+        x = numpy.random.rand(n)
+        assert numpy.allclose(dist.sumDistances(x), matrix @ x)
+        assert isclose(dist[3, 7], matrix[3, 7]) and dist[5, 5] == 0
+        statfuncs = [partial(changeGeographicHomophily, dist), partial(changeContagionDist, dist)]
+        matrixfuncs = [partial(changeGeographicHomophily, matrix), partial(changeContagionDist, matrix)]
+        A = numpy.array([random.choice([0, 1, 1, NA_VALUE]) for i in g.nodeIterator()])
+        state = make_outcome_state(g, A)
+        for k in range(100):
+            i = random.randrange(n)
+            old = state[i]
+            state[i] = random.choice([0, 1, NA_VALUE])
+            if k % 3 == 0:
+                state[i] = old  # as for move not accepted
+            for (f, mf) in zip(statfuncs, matrixfuncs):
+                for j in random.sample(range(n), 3):
+                    assert isclose(f(g, state, j), mf(g, state, j), abs_tol = 1e-9)
+                    assert isclose(f(g, numpy.array(state), j), mf(g, state, j))
+        A = numpy.array(state)
+        assert numpy.allclose(change_statistics_matrix(g, A, statfuncs),
+                              change_statistics_matrix(g, A, matrixfuncs))
+        assert numpy.allclose(computeObservedStatistics(g, A, statfuncs),
+                              computeObservedStatisticsSum(g, A, matrixfuncs))
+    print("OK,", time.time() - start, "s")
+    print()
+
+
+def test_proposal_nodes():
+    """
+    test the lists of nodes the samplers propose toggling (not NA,
+    in inner snowball sampling waves or of the bipartite mode), and
+    that they are kept in OutcomeState until an outcome changes to or
+    from NA
+    """
+    print("testing proposal nodes...")
+    start = time.time()
+    g = Graph("../examples/data/karate_club/karate.net")
+    g.inner_nodes = list(range(0, g.numNodes(), 3))  # as if snowball sample
+    A = numpy.array([random.choice([0, 1, 1, NA_VALUE]) for i in g.nodeIterator()])
+    state = make_outcome_state(g, A)
+    for a in [A, state]:
+        assert proposal_nodes(g, a) == [i for i in g.nodeIterator() if A[i] != NA_VALUE]
+        assert proposal_nodes(g, a, inner = True) == [i for i in g.inner_nodes if A[i] != NA_VALUE]
+    nodes = proposal_nodes(g, state)
+    assert proposal_nodes(g, state) is nodes
+    i = nodes[0]
+    state[i] = 1 - state[i]
+    assert proposal_nodes(g, state) is nodes
+    state[i] = NA_VALUE
+    assert proposal_nodes(g, state) == nodes[1:]
+    state[i] = 0
+    assert proposal_nodes(g, state) == nodes
+    g = BipartiteGraph("../examples/data/bipartite/Inouye_Pyke_pollinator_web/inouye_bipartite.net")
+    A = numpy.array([random.choice([0, 1, 1, NA_VALUE]) for i in g.nodeIterator()])
+    state = make_outcome_state(g, A)
+    for mode in [MODE_A, MODE_B]:
+        assert proposal_nodes(g, state, mode = mode) == [i for i in g.nodeModeIterator(mode) if A[i] != NA_VALUE]
+    (acceptance_rate, _, _) = bipartiteALAAMsampler(MODE_A, g, state, [partial(changeBipartiteDensity, MODE_A)], numpy.array([-0.5]), True, 100)
+    assert acceptance_rate > 0
+    assert numpy.all(state[g.num_A_nodes:] == A[g.num_A_nodes:])
+    assert numpy.all((state == NA_VALUE) == (A == NA_VALUE))
+    print("OK,", time.time() - start, "s")
+    print()
+
+
+def test_sampler_rng():
+    """
+    test that the samplers are reproducible with a numpy random
+    Generator (or the random module seed), and that EE runs with the
+    same seed and run number give the same results and record the seed
+    """
+    print("testing sampler random number generator...")
+    start = time.time()
+    g = Graph("../examples/data/karate_club/karate.net", "../examples/data/karate_club/karate_binattr.txt")
+    g.inner_nodes = list(range(0, g.numNodes(), 2))  # as if snowball sample
+    A = numpy.array([random.choice([0, 1, 1, NA_VALUE]) for i in g.nodeIterator()])
+    statfuncs = [changeDensity, changeActivity, changeContagion, partial(changeoOb, "senior")]
+    theta = numpy.array([-0.5, 0.1, 0.2, 0.3])
+    for sampler in [basicALAAMsampler, conditionalALAAMsampler, zooALAAMsampler]:
+        results = []
+        for rng in [numpy.random.default_rng(11), numpy.random.default_rng(11), None, None]:
+            if rng is None:
+                random.seed(12)
+            Acopy = numpy.copy(A)
+            results.append(sampler(g, Acopy, statfuncs, theta, True, 500, rng = rng) + (Acopy,))
+        for (r1, r2) in [(results[0], results[1]), (results[2], results[3])]:
+            assert r1[0] == r2[0] and all(numpy.array_equal(x, y) for (x, y) in zip(r1[1:], r2[1:]))
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cwd = os.getcwd()
+        os.chdir(tmpdir)
+        try:
+            for basename in ['a', 'b']:
+                estimateALAAMEE.run_ee(g, list(A), basename, statfuncs,
+                                       ["Density", "Activity", "Contagion", "senior"],
+                                       EEiterations = 100, run = 3, seed = 42)
+            lines = [open('theta_values_' + basename + '_3.txt').readlines()
+                     for basename in ['a', 'b']]
+        finally:
+            os.chdir(cwd)
+    assert lines[0][0] == '# seed = 42\n' and lines[0][1].startswith('t Density')
+    assert lines[0] == lines[1]
+    # stream for run 3 is the same as child 3 spawned from the seed
+    child = numpy.random.SeedSequence(42).spawn(4)[3]
+    assert numpy.array_equal(numpy.random.default_rng(child).random(5),
+                             numpy.random.default_rng(numpy.random.SeedSequence(42, spawn_key = (3,))).random(5))
+    print("OK,", time.time() - start, "s")
+    print()
+
+
+def test_stochastic_approximation():
+    """
+    test that the sampler gives the same results with theta as a 1 x n
+    row vector (as in the stochastic approximation) as with a vector,
+    and that the stochastic approximation and goodness-of-fit (with
+    one and several chains) run through the samplers on the karate
+    club example
+    """
+    print("testing stochastic approximation and goodness-of-fit...")
+    start = time.time()
+    g = Graph("../examples/data/karate_club/karate.net")
+    outcome_binvar = list(map(int_or_na, open("../examples/data/karate_club/karate_outcome.txt").read().split()[1:]))
+    statfuncs = [changeDensity, changeActivity, changeContagion]
+    theta = numpy.array([-1.0, 0.1, 0.3])
+    results = []
+    for thetavec in [theta, numpy.reshape(theta, (1, len(theta)))]:
+        A = make_outcome_state(g, outcome_binvar)
+        results.append(basicALAAMsampler(g, A, statfuncs, thetavec, True, 1000,
+                                         rng = numpy.random.default_rng(7)) + (A,))
+    assert results[0][0] == results[1][0]
+    assert all(numpy.array_equal(x, y) for (x, y) in zip(results[0][1:], results[1][1:]))
+    Zobs = computeObservedStatistics(g, outcome_binvar, statfuncs)
+    sampler_func = partial(basicALAAMsampler, rng = numpy.random.default_rng(1))
+    result = stochasticApproximation(g, outcome_binvar, statfuncs,
+                                     numpy.zeros(len(statfuncs)), Zobs,
+                                     sampler_func)
+    assert result is not None
+    (theta, std_error, t_ratio) = result
+    for x in result:
+        assert x.shape == (len(statfuncs),) and numpy.all(numpy.isfinite(x))
+    for numChains in [1, 4]:
+        (tratio, mdist) = gof(g, outcome_binvar, statfuncs, theta,
+                              numSamples = 100, sampler_func = sampler_func,
+                              iterationInStep = 100, burnIn = 1000,
+                              numChains = numChains)
+        assert len(tratio) == len(statfuncs) and numpy.all(numpy.isfinite(tratio))
+        assert math.isfinite(mdist)
+    print("OK,", time.time() - start, "s")
+    print()
+
+
+def test_zoo_sampler():
+    """
+    test ZOO sampler index sets, and that with only the Density
+    statistic it samples from the stationary distribution in which
+    each node not NA has outcome 1 independently with probability
+    exp(theta)/(1+exp(theta)), including when there are only two nodes
+    not NA so the all zero and all one special cases are common
+    """
+    print("testing ZOO sampler...")
+    start = time.time()
+    g = Graph("../examples/data/karate_club/karate.net")
+    A = numpy.array([random.choice([0, 1, 1, NA_VALUE]) for i in g.nodeIterator()])
+    nodesets = ZeroOneNodeSets(A)
+    for k in range(200):
+        i = nodesets.randomNode(random.choice([outcome for outcome in [0, 1]
+                                               if nodesets.numNodes(outcome) > 0]),
+                                random.random())
+        A[i] = 1 - A[i]
+        nodesets.move(i, A[i])
+    for outcome in [0, 1]:
+        assert nodesets.numNodes(outcome) == numpy.count_nonzero(A == outcome)
+        assert sorted(nodesets.nodes[outcome]) == list(numpy.flatnonzero(A == outcome))
+        assert all(nodesets.nodes[outcome][nodesets.pos[i]] == i
+                   for i in nodesets.nodes[outcome])
+    # also with node sets kept with an OutcomeState between calls
+    for (num_not_na, theta, outcome_state) in [(2, 0.0, False), (20, -1.0, False),
+                                               (2, 0.0, True), (20, -1.0, True)]:
+        A = numpy.full(g.numNodes(), NA_VALUE)
+        A[:num_not_na] = 0
+        if outcome_state:
+            A = make_outcome_state(g, A)
+        random.seed(42)
+        counts = Counter()
+        for k in range(20000):
+            zooALAAMsampler(g, A, [changeDensity], numpy.array([theta]), True, 5)
+            counts[numpy.count_nonzero(A == 1)] += 1
+        assert numpy.all(A[num_not_na:] == NA_VALUE)
+        p = exp(theta) / (1 + exp(theta))
+        mean = sum(d * c for (d, c) in counts.items()) / 20000
+        assert abs(mean - num_not_na * p) < 0.1 * num_not_na * p
+        if num_not_na == 2:
+            assert all(abs(counts[d] / 20000 - q) < 0.02
+                       for (d, q) in [(0, 0.25), (1, 0.5), (2, 0.25)])
+    # node sets kept with an OutcomeState, and updated as it changes
+    def check_nodesets(A, nodesets):
+        for outcome in [0, 1]:
+            assert sorted(nodesets.nodes[outcome]) == list(numpy.flatnonzero(A == outcome))
+            assert all(nodesets.pos[i] == k for (k, i) in enumerate(nodesets.nodes[outcome]))
+    A = make_outcome_state(g, [random.choice([0, 1, 1, NA_VALUE]) for i in g.nodeIterator()])
+    nodesets = zero_one_node_sets(A)
+    assert A.zeroOneNodeSets is nodesets
+    theta = numpy.array([-0.5, 0.2])
+    for performMove in [True, False]:
+        zooALAAMsampler(g, A, [changeDensity, changeContagion], theta, performMove, 500)
+        assert zero_one_node_sets(A) is nodesets
+        check_nodesets(A, nodesets)
+    A[int(numpy.flatnonzero(A == 1)[0])] = NA_VALUE
+    assert A.zeroOneNodeSets is None
+    check_nodesets(A, zero_one_node_sets(A))
+    A[:] = 0
+    assert A.zeroOneNodeSets is None
+    assert zero_one_node_sets(A).numNodes(0) == g.numNodes()
+    assert zero_one_node_sets(numpy.copy(A)) is not zero_one_node_sets(numpy.copy(A))
+    print("OK,", time.time() - start, "s")
+    print()
+
+
+def test_edge_weights():
+    """
+    test ContagionDist change statistic with EDGE_WEIGHTS (edge weights
+    loaded from the Pajek edge list) against that with distance matrix
+    """
+    print("testing edge weights...")
+    start = time.time()
+    g = Graph("../examples/data/karate_club/karate.net")
+    n = g.numNodes()
+    distmatrix = numpy.zeros((n, n))
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = os.path.join(tmpdir, 'karate_weighted.net')
+        with open(filename, 'w') as f:
+            f.write('*vertices ' + str(n) + '\n*edges\n')
+            for (i, j) in g.edgeIterator():
+                w = random.choice([0.5, 1, 2.25, 7])
+                distmatrix[i, j] = distmatrix[j, i] = w
+                f.write(str(i+1) + ' ' + str(j+1) + ' ' + str(w) + '\n')
+        wg = Graph(filename, edge_weights = True)
+        assert wg.numEdges() == g.numEdges()
+        assert all(wg.edgeWeight(i, j) == distmatrix[i, j] for (i, j) in g.edgeIterator())
+        rg = CSRGraph(filename, edge_weights = True, reorder = 'rcm')
+        perm = rg.permutation
+        save_binary(rg, os.path.join(tmpdir, 'rg'))
+        lg = load_binary(os.path.join(tmpdir, 'rg'))
+        for G in [wg, CSRGraph(graph = wg), rg, lg]:
+            if G.permutation is not None:
+                matrix = distmatrix[numpy.ix_(perm, perm)]
+            else:
+                matrix = distmatrix
+            A = numpy.array([random.choice([0, 1, 1, NA_VALUE]) for i in G.nodeIterator()])
+            statfuncs = [changeDensity, partial(changeContagionDist, EDGE_WEIGHTS)]
+            matrixfuncs = [changeDensity, partial(changeContagionDist, matrix)]
+            fused = compile_changestats(statfuncs)
+            for i in G.nodeIterator():
+                assert isclose(statfuncs[1](G, A, i), matrixfuncs[1](G, A, i))
+                assert numpy.allclose(fused(G, A, i), [1, matrixfuncs[1](G, A, i)])
+            assert numpy.allclose(change_statistics_matrix(G, A, statfuncs),
+                                  change_statistics_matrix(G, A, matrixfuncs))
+            assert numpy.allclose(computeObservedStatistics(G, A, statfuncs),
+                                  computeObservedStatisticsSum(G, A, matrixfuncs))
+        del lg
+    print("OK,", time.time() - start, "s")
+    print()
+
+
+def test_multichain_sampler():
+    """
+    test multi-chain sampler change statistics against those of each
+    chain computed separately (for undirected and directed networks,
+    with neighbours in tables and in CSR arrays), that the statistics
+    and neighbour outcome counts of the chains are kept correct, and
+    that simulateALAAM() with several chains yields samples from the
+    stationary distribution with only Density
+    """
+    print("testing multi-chain sampler...")
+    start = time.time()
+    g = Graph("../examples/data/karate_club/karate.net",
+              "../examples/data/karate_club/karate_binattr.txt",
+              catattr_filename = "../examples/data/karate_club/karate_catattr.txt")
+    funcs = precompute_static_changestats(
+        g, [changeDensity, changeActivity, changeContagion,
+            changePartnerAttributeActivity, partial(changeo_Ob, "senior"),
+            changeTriangleT1, changeTriangleT2, changeTriangleT3,
+            changePartnerPartnerAttribute, partial(changeoO_OsameContagion, "class"),
+            partial(changeGWContagion, log(2)), changeLogContagion,
+            partial(changePowerContagion, 2), changeIndirectPartnerAttribute])
+    theta = numpy.array([-1.0, 0.1, 0.3, 0.05, 0.2, -0.1, 0.2, 0.1, -0.02,
+                         0.1, 0.2, 0.1, 0.1, 0.01])
+    dg = Digraph("../examples/data/directed/HighSchoolFriendship/highschool_friendship_arclist.net")
+    dfuncs = [changeDensity, changeStatisticsALAAMdirected.changeContagion,
+              changeStatisticsALAAMdirected.changeContagionReciprocity,
+              partial(changeStatisticsALAAMdirected.changeGWContagion, log(2)),
+              changeStatisticsALAAMdirected.changeLogContagion,
+              partial(changeStatisticsALAAMdirected.changePowerContagion, 2),
+              changeStatisticsALAAMdirected.changeSender]
+    dtheta = numpy.array([-1.0, 0.2, 0.1, 0.2, 0.1, 0.1, 0.05])
+    K = 5
+    for (G, statfuncs, thetavec) in [(g, funcs, theta), (dg, dfuncs, dtheta)]:
+        A = numpy.array([[random.choice([0, 1]) for i in G.nodeIterator()]
+                         for k in range(K)], dtype = numpy.int8)
+        changestats = compile_multichain_changestats(G, statfuncs)
+        # lambdas: static tables, Density, and IndirectPartnerAttribute
+        # and Sender (which have no multi-chain form) called for each chain
+        assert sum(func.__name__ == '<lambda>' for func in changestats.funcs) == (5 if G is g else 2)
+        assert len(changestats.plusCounts) == (1 if G is g else 2)
+        assert all(t.table is not None for t in changestats.tables.values())
+        for use_table in [True, False]:
+            if not use_table:
+                for t in changestats.tables.values():
+                    t.table = None
+            nodes = numpy.array([random.randrange(G.numNodes()) for k in range(K)])
+            # counts still include the outcomes removed from the nodes
+            changestats.initialize(A)
+            removed = A[numpy.arange(K), nodes] == 1
+            A[numpy.arange(K), nodes] = 0
+            Z = numpy.empty((K, len(statfuncs)))
+            changestats(A, nodes, Z, removed)
+            for k in range(K):
+                assert numpy.allclose(Z[k], [f(G, A[k], nodes[k]) for f in statfuncs])
+            if G is g:
+                table = changestats.neighbourTable()
+                (chains, neighbours, plus) = table.neighbourPlus(A, nodes)
+                assert numpy.array_equal(table.neighbourSum(chains, plus, K),
+                                         [changeContagion(g, A[k], nodes[k])
+                                          for k in range(K)])
+        Z = numpy.array([computeObservedStatistics(G, a, statfuncs) for a in A])
+        Acopy = numpy.copy(A)
+        multiChainALAAMsampler(G, A, statfuncs, thetavec, False, 500)
+        assert numpy.array_equal(A, Acopy)
+        rng = numpy.random.default_rng(42)
+        # neighbours in CSR arrays, then in tables
+        for compiled in [changestats, changestats,
+                         compile_multichain_changestats(G, statfuncs)]:
+            (acceptance_rate,
+             changeTo1ChangeStats,
+             changeTo0ChangeStats) = multiChainALAAMsampler(G, A, statfuncs,
+                                                            thetavec, True, 1000,
+                                                            rng = rng,
+                                                            changestats_func = compiled)
+            assert acceptance_rate.shape == (K,)
+            Z += changeTo1ChangeStats - changeTo0ChangeStats
+            for k in range(K):
+                assert numpy.allclose(Z[k], computeObservedStatistics(G, A[k], statfuncs))
+                # neighbour outcome counts kept as for an OutcomeState
+                state = make_outcome_state(G, A[k])
+                if G is g:
+                    assert numpy.array_equal(compiled.plusCount()[k], state.plusCount)
+                else:
+                    assert numpy.array_equal(compiled.plusCount('in')[k], state.inPlusCount)
+                    assert numpy.array_equal(compiled.plusCount('out')[k], state.outPlusCount)
+        assert not numpy.array_equal(A, Acopy)
+    samples = list(simulateALAAM(g, funcs, theta, 10, 100, 1000, numChains = 4))
+    assert len(samples) == 10
+    for (simvec, stats, acceptance_rate, t) in samples:
+        assert numpy.allclose(stats, computeObservedStatistics(g, simvec, funcs))
+    theta = -1.0
+    samples = list(simulateALAAM(g, [changeDensity], numpy.array([theta]),
+                                 2000, 10, 1000, numChains = 8))
+    p = exp(theta) / (1 + exp(theta))
+    mean = numpy.mean([stats[0] for (simvec, stats, acceptance_rate, t) in samples])
+    assert abs(mean - g.numNodes() * p) < 0.05 * g.numNodes() * p
+    try:
+        next(simulateALAAM(g, [changeDensity], numpy.array([theta]), 1,
+                           numChains = 2, sampler_func = zooALAAMsampler))
+        assert False, "expected ValueError: ZOO sampler has no multi-chain form"
+    except ValueError:
+        pass
+    # bipartite sampler: only outcomes of nodes in its mode are toggled
+    g = BipartiteGraph("../examples/data/bipartite/Inouye_Pyke_pollinator_web/inouye_bipartite.net")
+    modeB = list(g.nodeModeIterator(MODE_B))
+    Ainitial = numpy.array([random.choice([0, 1]) for i in g.nodeIterator()])
+    sampler_func = partial(bipartiteALAAMsampler, MODE_A,
+                           rng = numpy.random.default_rng(42))
+    samples = list(simulateALAAM(g, [partial(changeBipartiteDensity, MODE_A)],
+                                 numpy.array([-0.5]), 8, 100, 100,
+                                 sampler_func = sampler_func,
+                                 Ainitial = Ainitial, numChains = 4))
+    for (simvec, stats, acceptance_rate, t) in samples:
+        assert numpy.array_equal(simvec[modeB], Ainitial[modeB])
+    assert any(not numpy.array_equal(simvec, Ainitial)
+               for (simvec, stats, acceptance_rate, t) in samples)
+    print("OK,", time.time() - start, "s")
+    print()
+
+
 def test_undirected_change_stats_karate():
     """
     test Graph object and undirected ALAAM change stats on karate club example
@@ -487,8 +1642,8 @@ def test_directed_change_stats_highschool():
     # > incident(g, V(g)[29], 'all')
     # + 8/668 edges from b2f5311 (vertex names):
     # [1] 34 ->151 151->34  34 ->277 277->34  34 ->502 34 ->866 866->34  201->34
-    assert g.catattr['sex'].count(NA_VALUE) == 1
-    sex_na_node = g.catattr['sex'].index(NA_VALUE) # node with NA for sex
+    assert numpy.count_nonzero(g.catattr['sex'] == NA_VALUE) == 1
+    sex_na_node = int(numpy.flatnonzero(g.catattr['sex'] == NA_VALUE)[0]) # node with NA for sex
     assert g.outdegree(sex_na_node) == 4
     assert g.indegree(sex_na_node) == 4
     assert len(set(g.outIterator(sex_na_node)).union(set(g.inIterator(sex_na_node)))) == 5
@@ -714,7 +1869,7 @@ def test_regression_twopaths(netfilename):
     """
     test that nonzero two-paths values in two-paths sparse matrix
     built at network construction are same as those computed by the
-    twoPaths function.
+    Graph twoPaths function (BipartiteGraph.twoPaths uses the matrix).
     For bipartite only, since only build matrix for bipartite
 
     Parameters:
@@ -726,7 +1881,7 @@ def test_regression_twopaths(netfilename):
     g.printSummary()
     for i in g.nodeModeIterator(MODE_A):
         for j in g.nodeModeIterator(MODE_B):
-            assert g.twoPathsMatrix.getValue(i, j) == g.twoPaths(i, j)
+            assert g.twoPathsMatrix.getValue(i, j) == Graph.twoPaths(g, i, j)
 
     print("OK,", time.time() - start, "s")
     print()
@@ -746,12 +1901,69 @@ def test_regression_twopaths_iterators(netfilename):
     for i in range(g.numNodes()):
         for j in g.twoPathsMatrix.rowNonZeroColumnsIterator(i):
             assert g.twoPathsMatrix.getValue(i, j) > 0
-            assert g.twoPathsMatrix.getValue(i, j) == g.twoPaths(i, j)
+            assert g.twoPathsMatrix.getValue(i, j) == Graph.twoPaths(g, i, j)
     for i in range(g.numNodes()):
         for (j, p) in zip(g.twoPathsMatrix.rowNonZeroColumnsIterator(i),
                           g.twoPathsMatrix.rowNonZeroValuesIterator(i)):
             assert p > 0
-            assert p == g.twoPaths(i, j)
+            assert p == Graph.twoPaths(g, i, j)
+    print("OK,", time.time() - start, "s")
+    print()
+
+
+def test_bipartite_twopaths_matrix(netfilename, outcomefilename):
+    """
+    test bulk construction of the two-paths matrix for bipartite
+    network, and four-cycle change statistics without it
+
+    Parameters:
+           netfilename     - filename bipartite network in Pajek format
+           outcomefilename - filename of binary outcome file
+    """
+    print("testing bulk two-paths matrix for ", netfilename)
+    start = time.time()
+    g = BipartiteGraph(netfilename)
+    assert all([g.twoPathsMatrix.getValue(i, j) == Graph.twoPaths(g, i, j) for i in g.nodeIterator() for j in g.nodeIterator()])
+    # very small chunks to test processing in chunks
+    sparsematrix_module = sys.modules[adjacency_two_paths.__module__]
+    max_pairs_chunk = sparsematrix_module.MAX_PAIRS_CHUNK
+    sparsematrix_module.MAX_PAIRS_CHUNK = 5
+    g2 = BipartiteGraph(netfilename)
+    m2 = g2.twoPathsMatrix
+    sparsematrix_module.MAX_PAIRS_CHUNK = max_pairs_chunk
+    assert numpy.array_equal(g.twoPathsMatrix.indptr, m2.indptr)
+    assert numpy.array_equal(g.twoPathsMatrix.indices, m2.indices)
+    assert numpy.array_equal(g.twoPathsMatrix.values, m2.values)
+
+    # same as converting dict of dicts SparseMatrix built incrementally
+    m3 = SparseMatrix(g.numNodes())
+    for (u, v) in g.edgeIterator():
+        for (x, y) in [(u, v), (v, u)]:
+            for w in g.neighbourIterator(x):
+                if w != y:
+                    m3.incrementValue(w, y)
+    m3 = csr_sparse_matrix(m3)
+    assert m3.numNonZero() == g.twoPathsMatrix.numNonZero()
+    for i in g.nodeIterator():
+        assert numpy.array_equal(m3.rowNonZeroColumns(i), g.twoPathsMatrix.rowNonZeroColumns(i))
+        assert numpy.array_equal(m3.rowNonZeroValues(i), g.twoPathsMatrix.rowNonZeroValues(i))
+        assert list(g.twoPathsMatrix.rowNonZeroColumnsIterator(i)) == g.twoPathsMatrix.rowNonZeroColumns(i).tolist()
+
+    # matrix is rebuilt when graph is modified
+    (i, j) = next((i, j) for i in g.nodeModeIterator(MODE_A) for j in g.nodeModeIterator(MODE_B) if not g.isEdge(i, j))
+    g.insertEdge(i, j)
+    assert all([g.twoPathsMatrix.getValue(i, k) == Graph.twoPaths(g, i, k) for k in g.nodeIterator()])
+    g.removeEdge(i, j)
+    assert numpy.array_equal(g.twoPathsMatrix.values, m2.values)
+
+    # with memory limit too small for matrix, two-paths counted on the fly
+    g3 = BipartiteGraph(netfilename, twopaths_max_bytes = 1000)
+    assert g3.twoPathsMatrix is None
+    assert all([g3.twoPaths(i, j) == g.twoPaths(i, j) for i in g.nodeIterator() for j in g.nodeIterator()])
+    assert all([sorted(g3.twoPathsIterator(i)) == sorted(g.twoPathsIterator(i)) for i in g.nodeIterator()])
+    outcome_binvar = list(map(int_or_na, open(outcomefilename).read().split()[1:]))
+    statfuncs = [partial(changeBipartiteFourCycle1, MODE_A), partial(changeBipartiteFourCycle1, MODE_B), partial(changeBipartiteFourCycle2, MODE_A), partial(changeBipartiteFourCycle2, MODE_B)]
+    assert numpy.all(computeObservedStatistics(g3, outcome_binvar, statfuncs) == computeObservedStatistics(g, outcome_binvar, statfuncs))
     print("OK,", time.time() - start, "s")
     print()
 
@@ -923,6 +2135,26 @@ def main():
     """main: run all tests
     """
     test_undirected_graph()
+    test_pajek_loader()
+    test_csr_graph()
+    test_node_reordering()
+    test_edge_twopaths()
+    test_csr_digraph()
+    test_attribute_store()
+    test_binary_network()
+    test_shared_network()
+    test_ee_parallel()
+    test_vectorized_change_stats()
+    test_outcome_state()
+    test_fused_change_stats()
+    test_static_change_stats()
+    test_geographic_distance()
+    test_edge_weights()
+    test_proposal_nodes()
+    test_zoo_sampler()
+    test_sampler_rng()
+    test_stochastic_approximation()
+    test_multichain_sampler()
     test_undirected_change_stats_karate()
     test_directed_change_stats_highschool()
     test_gwcontagion()
@@ -933,6 +2165,7 @@ def main():
     test_bipartite_change_stats_inouye()
     test_regression_twopaths("../examples/data/bipartite/Inouye_Pyke_pollinator_web/inouye_bipartite.net")
     test_regression_twopaths_iterators("../examples/data/bipartite/Inouye_Pyke_pollinator_web/inouye_bipartite.net")
+    test_bipartite_twopaths_matrix("../examples/data/bipartite/Inouye_Pyke_pollinator_web/inouye_bipartite.net", "../examples/data/bipartite/Inouye_Pyke_pollinator_web/inouye_outcome.txt")
     test_regression_bipartite_change_stats("../examples/data/bipartite/Inouye_Pyke_pollinator_web/inouye_bipartite.net", "../examples/data/bipartite/Inouye_Pyke_pollinator_web/inouye_outcome.txt")
     #too slow (and data large for GitHub): test_regression_bipartite_change_stats("../examples/data/bipartite/Evtusehnko_Gastner_directors/evtushenko_directors_bipartite.net", "../examples/data/bipartite/Evtusehnko_Gastner_directors/evtushenko_directors_outcome.txt", 10)
     test_regression_directed_change_stats("../examples/data/directed/HighSchoolFriendship/highschool_friendship_arclist.net", '../examples/data/directed/HighSchoolFriendship/highschool_friendship_binattr.txt', None, None, '../examples/data/directed/HighSchoolFriendship/highschool_friendship_catattr.txt')